@@ -28,3 +28,15 @@ print("error from canonical =", mycc.e_corr - -0.3170511898840137)
 
 # use delta-MP2 as correction
 print("error from canonical =", mycc.e_corr+mycc.delta_emp2 - -0.3170511898840137)
+
+# FNO-CCSD(T) with frozen core.  delta-MP2 is added to e_corr_fno and e_tot_fno
+mycc = cc.FNOCCSD(mf, thresh=1e-5, frozen=1)
+mycc.with_t = True
+mycc.run()
+print("E(FNO-CCSD(T)+delta-MP2) =", mycc.e_tot_fno)
+
+# density fitting for MP2, CCSD and (T)
+mycc = cc.FNOCCSD(mf, thresh=1e-5, frozen=1, density_fit=True)
+mycc.with_t = True
+mycc.run()
+print("E(DF-FNO-CCSD(T)+delta-MP2) =", mycc.e_tot_fno)
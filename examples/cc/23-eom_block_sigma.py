@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+'''
+Many IP/EA-EOM-CCSD roots with block sigma and shared intermediates.
+
+With block_sigma (default), the EOM Hamiltonian is applied to all trial
+vectors of a Davidson iteration at once.  With share_imds, the integrals and
+the intermediates are cached on the CCSD object, so that the IP, EA and EE
+calculations of the same CCSD amplitudes do not rebuild them.
+'''
+
+import time
+from pyscf import gto, scf, cc
+from pyscf.cc import eom_rccsd
+
+mol = gto.M(
+    atom = 'O 0 0 0; H 0 -.757 .587; H 0 .757 .587',
+    basis = 'aug-ccpvdz')
+mf = scf.RHF(mol).run()
+mycc = cc.RCCSD(mf).run()
+
+for block_sigma in (False, True):
+    t0 = time.time()
+    myeom = eom_rccsd.EOMEA(mycc)
+    myeom.block_sigma = block_sigma
+    eea = myeom.kernel(nroots=20)[0]
+    print('EA-EOM-CCSD 20 roots, block_sigma = %s, wall time %.2f s'
+          % (block_sigma, time.time() - t0))
+
+#
+# IP and EA share the intermediates Loo, Lvv, Fov, Wovov, Wovvo.  The EE
+# calculation reuses the integrals of the cache.
+#
+ip = eom_rccsd.EOMIP(mycc)
+ip.share_imds = True
+eip = ip.kernel(nroots=20)[0]
+
+ea = eom_rccsd.EOMEA(mycc)
+ea.share_imds = True
+eea = ea.kernel(nroots=20)[0]
+
+ee = eom_rccsd.EOMEESinglet(mycc)
+ee.share_imds = True
+eee = ee.kernel(nroots=5)[0]
+
+# Release the cache
+mycc._eom_imds = None
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+'''
+Epstein-Nesbet PT2 correction for the heat-bath selected CI wavefunction.
+
+The deterministic PT2 includes all contributions |H_ai c_i| > pt2_cutoff.
+When pt2_nsamples is set, the semistochastic algorithm is used: contributions
+above pt2_det_cutoff are computed exactly and the rest are sampled.
+'''
+
+from pyscf import gto, scf, mcscf, hci
+
+mol = gto.M(atom='N 0 0 0; N 0 0 1.2', basis='ccpvdz')
+myhf = scf.RHF(mol).run()
+
+ncas = 16
+mc = mcscf.CASCI(myhf, ncas, 10)
+h1, ecore = mc.get_h1eff()
+h2 = mc.get_h2eff()
+
+cisolver = hci.SCI(mol)
+cisolver.select_cutoff = 1e-3
+cisolver.ci_coeff_cutoff = 1e-3
+e, civec = cisolver.kernel(h1, h2, ncas, (5,5), ecore=ecore, verbose=4)
+
+e_pt2, err = cisolver.pt2(civec[0], h1, h2, ncas, (5,5), pt2_cutoff=1e-6)
+print('E(SCI+PT2) = %.12f' % (e[0] + e_pt2))
+
+cisolver.pt2_nsamples = 200
+cisolver.pt2_nbatches = 20
+e_pt2, err = cisolver.pt2(civec[0], h1, h2, ncas, (5,5), pt2_cutoff=1e-7,
+                          pt2_det_cutoff=1e-5)
+print('E(SCI+PT2) = %.12f +/- %.2g' % (e[0] + e_pt2, err))
@@ -48,9 +48,6 @@ def UADC(mf, frozen=None, mo_coeff=None, mo_occ=None):
     if isinstance(mf, newton_ah._CIAH_SOSCF) or not isinstance(mf, scf.uhf.UHF):
         mf = scf.addons.convert_to_uhf(mf)
 
-    if getattr(mf, 'with_df', None):
-        raise NotImplementedError('DF-UADC')
-    else:
-        return uadc.UADC(mf, frozen, mo_coeff, mo_occ)
+    return uadc.UADC(mf, frozen, mo_coeff, mo_occ)
 
 UADC.__doc__ = uadc.UADC.__doc__
@@ -56,6 +56,23 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(p[1], 0.8844048539643351, 6)
         self.assertAlmostEqual(p[2], 0.9096460559671828, 6)
 
+    def test_ip_adc2_cvs(self):
+
+        myadc1 = adc.ADC(mf)
+        myadc1.kernel()
+        myadc1.ncvs = 2
+        e,v,p = myadc1.ip_adc(nroots=3)
+
+        self.assertAlmostEqual(e[0], 15.12281032, 6)
+        self.assertAlmostEqual(e[1], 15.12281032, 6)
+        self.assertAlmostEqual(e[2], 15.12611218, 6)
+
+        self.assertAlmostEqual(p[0], 0.77131404, 6)
+        self.assertAlmostEqual(p[1], 0.77131404, 6)
+        self.assertAlmostEqual(p[2], 0.77076384, 6)
+
+        self.assertRaises(NotImplementedError, myadc1.ea_adc, nroots=1)
+
     def test_ip_adc2_oneroot(self):
   
         e, t_amp1, t_amp2 = myadc.kernel()
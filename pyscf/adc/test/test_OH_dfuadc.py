@@ -0,0 +1,111 @@
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+import numpy
+from pyscf import gto
+from pyscf import scf
+from pyscf import adc
+from pyscf.adc import uadc_ao2mo
+
+r = 0.969286393
+mol = gto.Mole()
+mol.atom = [
+    ['O', ( 0., 0.    , -r/2   )],
+    ['H', ( 0., 0.    ,  r/2)],]
+mol.basis = 'cc-pvdz'
+mol.verbose = 0
+mol.symmetry = False
+mol.spin  = 1
+mol.build()
+mf = scf.UHF(mol).density_fit(auxbasis='cc-pvdz-ri')
+mf.conv_tol = 1e-12
+mf.kernel()
+
+# Conventional ADC with the DF approximated integrals as the reference
+mf_ref = scf.UHF(mol)
+mf_ref._eri = mf.with_df.get_ao_eri()
+mf_ref.conv_tol = 1e-12
+mf_ref.kernel(mf.make_rdm1())
+
+def tearDownModule():
+    global mol, mf, mf_ref
+    del mol, mf, mf_ref
+
+class KnownValues(unittest.TestCase):
+
+    def test_df_eris(self):
+        myadc = adc.ADC(mf)
+        self.assertTrue(myadc.with_df is mf.with_df)
+        eris = myadc.transform_integrals()
+        self.assertTrue(isinstance(eris, uadc_ao2mo._DFERIs))
+        self.assertFalse(hasattr(eris, 'vvvv'))
+
+        ref = adc.ADC(mf_ref)
+        ref.mo_coeff = myadc.mo_coeff
+        eris_ref = ref.transform_integrals()
+        for key in ('ovov', 'OVvo', 'ooVV', 'ovvv', 'OVvv'):
+            self.assertAlmostEqual(abs(getattr(eris, key) -
+                                       getattr(eris_ref, key)).max(), 0, 9)
+
+    def _check(self, method):
+        myadc = adc.ADC(mf)
+        myadc.method = method
+        ref = adc.ADC(mf_ref)
+        ref.method = method
+        e = myadc.kernel()[0]
+        self.assertAlmostEqual(e, ref.kernel()[0], 8)
+
+        e, v, p = myadc.ip_adc(nroots=3)
+        e_ref, v_ref, p_ref = ref.ip_adc(nroots=3)
+        self.assertAlmostEqual(abs(e - e_ref).max(), 0, 7)
+        self.assertAlmostEqual(abs(p - p_ref).max(), 0, 6)
+
+        e, v, p = myadc.ea_adc(nroots=3)
+        e_ref, v_ref, p_ref = ref.ea_adc(nroots=3)
+        self.assertAlmostEqual(abs(e - e_ref).max(), 0, 7)
+        self.assertAlmostEqual(abs(p - p_ref).max(), 0, 6)
+
+    def test_df_adc2(self):
+        self._check('adc(2)')
+
+    def test_df_adc2x(self):
+        self._check('adc(2)-x')
+
+    def test_df_adc3(self):
+        self._check('adc(3)')
+
+    def test_df_rhf(self):
+        mol1 = gto.M(atom='N 0 0 0; N 0 0 1.098', basis='cc-pvdz', verbose=0)
+        mf1 = scf.RHF(mol1).density_fit(auxbasis='cc-pvdz-ri').run(conv_tol=1e-12)
+        myadc = adc.ADC(mf1)
+        myadc.method = 'adc(3)'
+        self.assertTrue(myadc.with_df is not None)
+        e = myadc.kernel()[0]
+
+        mf_ref1 = scf.UHF(mol1)
+        mf_ref1._eri = mf1.with_df.get_ao_eri()
+        mf_ref1.conv_tol = 1e-12
+        dm = mf1.make_rdm1() * .5
+        mf_ref1.kernel((dm, dm))
+        ref = adc.ADC(mf_ref1)
+        ref.method = 'adc(3)'
+        self.assertAlmostEqual(e, ref.kernel()[0], 8)
+        self.assertAlmostEqual(abs(myadc.ip_adc(nroots=2)[0] -
+                                   ref.ip_adc(nroots=2)[0]).max(), 0, 7)
+
+if __name__ == "__main__":
+    print("DF-ADC calculations for open-shell molecule")
+    unittest.main()
@@ -39,7 +39,7 @@ def kernel(adc, nroots=1, guess=None, eris=None, verbose=None):
     adc.dump_flags()
 
     if eris is None:
-        eris = uadc_ao2mo.transform_integrals_incore(adc)
+        eris = adc.transform_integrals()
 
     imds = adc.get_imds(eris)
     matvec, diag = adc.gen_matvec(imds, eris)
@@ -49,6 +49,8 @@ def kernel(adc, nroots=1, guess=None, eris=None, verbose=None):
     E, U = lib.linalg_helper.davidson(matvec, guess, diag, nroots=nroots, verbose=log, max_cycle=adc.max_cycle, max_space=adc.max_space)
 
     U = np.array(U)
+    if getattr(adc, 'ncvs', None):
+        U = _cvs_unpack(U, adc.cvs_mask())
 
     T = adc.get_trans_moments()
 
@@ -178,16 +180,20 @@ def compute_amplitudes(myadc, eris):
         eris_OVvo = eris.OVvo
         eris_ovVO = eris.ovVO
 
-        temp = t2_1_a.reshape(nocc_a*nocc_a,nvir_a*nvir_a)
-        eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
-        eris_vvvv = eris_vvvv.transpose(0,2,1,3)
-        eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
-        t2_2_a = 0.5*np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
-        eris_vvvv = eris_vvvv[:].reshape(nvir_a,nvir_a,nvir_a,nvir_a)
-        eris_vvvv = eris_vvvv.transpose(0,1,3,2)
-        eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
-        t2_2_a -= 0.5*np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
-        del eris_vvvv
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            temp = t2_1_a - t2_1_a.transpose(0,1,3,2)
+            t2_2_a = 0.5*uadc_ao2mo.contract_ladder_df(myadc, temp, eris.Lvv, eris.Lvv)
+        else:
+            temp = t2_1_a.reshape(nocc_a*nocc_a,nvir_a*nvir_a)
+            eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
+            eris_vvvv = eris_vvvv.transpose(0,2,1,3)
+            eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
+            t2_2_a = 0.5*np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
+            eris_vvvv = eris_vvvv[:].reshape(nvir_a,nvir_a,nvir_a,nvir_a)
+            eris_vvvv = eris_vvvv.transpose(0,1,3,2)
+            eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
+            t2_2_a -= 0.5*np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
+            del eris_vvvv
         t2_2_a += 0.5*np.einsum('kilj,klab->ijab', eris_oooo, t2_1_a,optimize=True)
         t2_2_a -= 0.5*np.einsum('kjli,klab->ijab', eris_oooo, t2_1_a,optimize=True)
 
@@ -198,16 +204,20 @@ def compute_amplitudes(myadc, eris):
         t2_2_a += temp - temp.transpose(1,0,2,3) - temp.transpose(0,1,3,2) + temp.transpose(1,0,3,2)
         t2_2_a += temp_1 - temp_1.transpose(1,0,2,3) - temp_1.transpose(0,1,3,2) + temp_1.transpose(1,0,3,2)
 
-        temp = t2_1_b.reshape(nocc_b*nocc_b,nvir_b*nvir_b)
-        eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
-        eris_VVVV = eris_VVVV.transpose(0,2,1,3)
-        eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
-        t2_2_b = 0.5*np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
-        eris_VVVV = eris_VVVV[:].reshape(nvir_b,nvir_b,nvir_b,nvir_b)
-        eris_VVVV = eris_VVVV.transpose(0,1,3,2)
-        eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
-        t2_2_b -= 0.5*np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
-        del eris_VVVV
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            temp = t2_1_b - t2_1_b.transpose(0,1,3,2)
+            t2_2_b = 0.5*uadc_ao2mo.contract_ladder_df(myadc, temp, eris.LVV, eris.LVV)
+        else:
+            temp = t2_1_b.reshape(nocc_b*nocc_b,nvir_b*nvir_b)
+            eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
+            eris_VVVV = eris_VVVV.transpose(0,2,1,3)
+            eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
+            t2_2_b = 0.5*np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
+            eris_VVVV = eris_VVVV[:].reshape(nvir_b,nvir_b,nvir_b,nvir_b)
+            eris_VVVV = eris_VVVV.transpose(0,1,3,2)
+            eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
+            t2_2_b -= 0.5*np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
+            del eris_VVVV
         t2_2_b += 0.5*np.einsum('kilj,klab->ijab', eris_OOOO, t2_1_b,optimize=True)
         t2_2_b -= 0.5*np.einsum('kjli,klab->ijab', eris_OOOO, t2_1_b,optimize=True)
 
@@ -218,12 +228,15 @@ def compute_amplitudes(myadc, eris):
         t2_2_b += temp - temp.transpose(1,0,2,3) - temp.transpose(0,1,3,2) + temp.transpose(1,0,3,2)
         t2_2_b += temp_1 - temp_1.transpose(1,0,2,3) - temp_1.transpose(0,1,3,2) + temp_1.transpose(1,0,3,2)
 
-        temp = t2_1_ab.reshape(nocc_a*nocc_b,nvir_a*nvir_b)
-        eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
-        eris_vvVV = eris_vvVV.transpose(0,2,1,3)
-        eris_vvVV = eris_vvVV.copy()[:].reshape(nvir_a*nvir_b,nvir_a*nvir_b)
-        t2_2_ab = np.dot(temp,eris_vvVV.T).reshape(nocc_a,nocc_b,nvir_a,nvir_b)
-        del eris_vvVV
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            t2_2_ab = uadc_ao2mo.contract_ladder_df(myadc, t2_1_ab, eris.Lvv, eris.LVV)
+        else:
+            temp = t2_1_ab.reshape(nocc_a*nocc_b,nvir_a*nvir_b)
+            eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
+            eris_vvVV = eris_vvVV.transpose(0,2,1,3)
+            eris_vvVV = eris_vvVV.copy()[:].reshape(nvir_a*nvir_b,nvir_a*nvir_b)
+            t2_2_ab = np.dot(temp,eris_vvVV.T).reshape(nocc_a,nocc_b,nvir_a,nvir_b)
+            del eris_vvVV
 
         t2_2_ab += np.einsum('kilj,klab->ijab',eris_ooOO,t2_1_ab,optimize=True)
         t2_2_ab += np.einsum('kcbj,kica->ijab',eris_ovVO,t2_1_a,optimize=True)
@@ -481,16 +494,20 @@ def compute_energy(myadc, t1, t2, eris):
         #e_mp3 = 0.125 * np.einsum('ijcd,ijcd',temp_1_a, t2_1_a)
         #del temp_1_a
 
-        temp = t2_1_a.reshape(nocc_a*nocc_a,nvir_a*nvir_a)
-        eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
-        eris_vvvv = eris_vvvv.transpose(0,2,1,3)
-        eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
-        temp_1_a = np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
-        eris_vvvv = eris_vvvv[:].reshape(nvir_a,nvir_a,nvir_a,nvir_a)
-        eris_vvvv = eris_vvvv.transpose(0,1,3,2)
-        eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
-        temp_1_a -= np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
-        del eris_vvvv
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            temp = t2_1_a - t2_1_a.transpose(0,1,3,2)
+            temp_1_a = uadc_ao2mo.contract_ladder_df(myadc, temp, eris.Lvv, eris.Lvv)
+        else:
+            temp = t2_1_a.reshape(nocc_a*nocc_a,nvir_a*nvir_a)
+            eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
+            eris_vvvv = eris_vvvv.transpose(0,2,1,3)
+            eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
+            temp_1_a = np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
+            eris_vvvv = eris_vvvv[:].reshape(nvir_a,nvir_a,nvir_a,nvir_a)
+            eris_vvvv = eris_vvvv.transpose(0,1,3,2)
+            eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
+            temp_1_a -= np.dot(temp,eris_vvvv.T).reshape(nocc_a,nocc_a,nvir_a,nvir_a)
+            del eris_vvvv
         e_mp3 = 0.125 * np.einsum('ijcd,ijcd',temp_1_a, t2_1_a)
         del temp_1_a
 
@@ -501,16 +518,20 @@ def compute_energy(myadc, t1, t2, eris):
         #e_mp3 += 0.125 * np.einsum('ijcd,ijcd',temp_1_b, t2_1_b)
         #del temp_1_b
 
-        temp = t2_1_b.reshape(nocc_b*nocc_b,nvir_b*nvir_b)
-        eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
-        eris_VVVV = eris_VVVV.transpose(0,2,1,3)
-        eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
-        temp_1_b = np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
-        eris_VVVV = eris_VVVV[:].reshape(nvir_b,nvir_b,nvir_b,nvir_b)
-        eris_VVVV = eris_VVVV.transpose(0,1,3,2)
-        eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
-        temp_1_b -= np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
-        del eris_VVVV
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            temp = t2_1_b - t2_1_b.transpose(0,1,3,2)
+            temp_1_b = uadc_ao2mo.contract_ladder_df(myadc, temp, eris.LVV, eris.LVV)
+        else:
+            temp = t2_1_b.reshape(nocc_b*nocc_b,nvir_b*nvir_b)
+            eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
+            eris_VVVV = eris_VVVV.transpose(0,2,1,3)
+            eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
+            temp_1_b = np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
+            eris_VVVV = eris_VVVV[:].reshape(nvir_b,nvir_b,nvir_b,nvir_b)
+            eris_VVVV = eris_VVVV.transpose(0,1,3,2)
+            eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
+            temp_1_b -= np.dot(temp,eris_VVVV.T).reshape(nocc_b,nocc_b,nvir_b,nvir_b)
+            del eris_VVVV
         e_mp3 += 0.125 * np.einsum('ijcd,ijcd',temp_1_b, t2_1_b)
         del temp_1_b
 
@@ -520,12 +541,15 @@ def compute_energy(myadc, t1, t2, eris):
         #e_mp3 +=  np.einsum('ijcd,ijcd',temp_1_ab_1, t2_1_ab)
         #del temp_1_ab_1
 
-        temp = t2_1_ab.reshape(nocc_a*nocc_b,nvir_a*nvir_b)
-        eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
-        eris_vvVV = eris_vvVV.transpose(0,2,1,3)
-        eris_vvVV = eris_vvVV.copy()[:].reshape(nvir_a*nvir_b,nvir_a*nvir_b)
-        temp_1_ab = np.dot(temp,eris_vvVV.T).reshape(nocc_a,nocc_b,nvir_a,nvir_b)
-        del eris_vvVV
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            temp_1_ab = uadc_ao2mo.contract_ladder_df(myadc, t2_1_ab, eris.Lvv, eris.LVV)
+        else:
+            temp = t2_1_ab.reshape(nocc_a*nocc_b,nvir_a*nvir_b)
+            eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
+            eris_vvVV = eris_vvVV.transpose(0,2,1,3)
+            eris_vvVV = eris_vvVV.copy()[:].reshape(nvir_a*nvir_b,nvir_a*nvir_b)
+            temp_1_ab = np.dot(temp,eris_vvVV.T).reshape(nocc_a,nocc_b,nvir_a,nvir_b)
+            del eris_vvVV
         e_mp3 +=  np.einsum('ijcd,ijcd',temp_1_ab, t2_1_ab)
         del temp_1_ab
 
@@ -590,6 +614,15 @@ class UADC(lib.StreamObject):
             Avoid all I/O. Default is False.
         method : string
             nth-order ADC method. Options are : ADC(2), ADC(2)-X, ADC(3). Default is ADC(2).
+        ncvs : int
+            Number of core orbitals for core-valence separated (CVS) IP-ADC.
+            If set, only the ionizations from these orbitals are computed.
+            Default is None.
+        with_df : DF object
+            If given, the DF-ADC integrals are used.  Only the 3-index
+            tensors (L|oo), (L|ov) and (L|vv) and the 4-index blocks with at
+            most two virtual indices are stored.  The default is the DF
+            object of the mean-field object if it has one, otherwise None.
 
             >>> mol = gto.M(atom = 'H 0 0 0; F 0 0 1.1', basis = 'ccpvdz')
             >>> mf = scf.RHF(mol).run()
@@ -640,8 +673,10 @@ class UADC(lib.StreamObject):
         self.mo_energy_b = mf.mo_energy[1]
         self.chkfile = mf.chkfile
         self.method = "adc(2)"
+        self.ncvs = getattr(__config__, 'adc_uadc_UADC_ncvs', None)
+        self.with_df = getattr(mf, 'with_df', None)
 
-        keys = set(('e_corr', 'method', 'mo_coeff', 'mol', 'mo_energy_b', 'max_memory', 'scf_energy', 'e_tot', 't1', 'frozen', 'mo_energy_a', 'chkfile', 'max_space', 't2', 'mo_occ', 'max_cycle'))
+        keys = set(('e_corr', 'method', 'mo_coeff', 'mol', 'mo_energy_b', 'max_memory', 'scf_energy', 'e_tot', 't1', 'frozen', 'mo_energy_a', 'chkfile', 'max_space', 't2', 'mo_occ', 'max_cycle', 'ncvs', 'with_df'))
 
         self._keys = set(self.__dict__.keys()).union(keys)
 
@@ -654,6 +689,10 @@ class UADC(lib.StreamObject):
         logger.info(self, 'max_space = %d', self.max_space)
         logger.info(self, 'max_cycle = %d', self.max_cycle)
         logger.info(self, 'conv_tol = %s', self.conv_tol)
+        if getattr(self, 'ncvs', None):
+            logger.info(self, 'ncvs = %d', self.ncvs)
+        if getattr(self, 'with_df', None):
+            logger.info(self, 'DF-ADC with auxbasis %s', self.with_df.auxbasis)
         logger.info(self, 'max_memory %d MB (current use %d MB)',
                     self.max_memory, lib.current_memory()[0])
         return self
@@ -661,10 +700,18 @@ class UADC(lib.StreamObject):
     def dump_flags_gs(self, verbose=None):
         logger.info(self, '')
         logger.info(self, '******** %s ********', self.__class__)
+        if getattr(self, 'with_df', None):
+            logger.info(self, 'DF-ADC with auxbasis %s', self.with_df.auxbasis)
         logger.info(self, 'max_memory %d MB (current use %d MB)',
                     self.max_memory, lib.current_memory()[0])
         return self
 
+    def transform_integrals(self):
+        if getattr(self, 'with_df', None):
+            return uadc_ao2mo.transform_integrals_df(self)
+        else:
+            return uadc_ao2mo.transform_integrals_incore(self)
+
     def kernel(self):
         assert(self.mo_coeff is not None)
         assert(self.mo_occ is not None)
@@ -677,7 +724,7 @@ class UADC(lib.StreamObject):
             self.check_sanity()
         self.dump_flags_gs()
 
-        eris = uadc_ao2mo.transform_integrals_incore(self)
+        eris = self.transform_integrals()
         self.e_corr, self.t1, self.t2 = compute_amplitudes_energy(self, eris, verbose=self.verbose)
         self.e_tot = self.scf_energy + self.e_corr
 
@@ -727,7 +774,7 @@ def get_imds_ea(adc, eris=None):
     idn_vir_b = np.identity(nvir_b)
 
     if eris is None:
-        eris = uadc_ao2mo.transform_integrals_incore(adc)
+        eris = adc.transform_integrals()
 
     eris_ovov = eris.ovov
     eris_OVOV = eris.OVOV
@@ -982,39 +1029,72 @@ def get_imds_ea(adc, eris=None):
         M_ab_b += 0.25*np.einsum('mlbd,noad,nlom->ab',t2_1_b, t2_1_b, eris_OOOO, optimize=True)
         M_ab_b -= np.einsum('lmdb,onda,olnm->ab',t2_1_ab, t2_1_ab, eris_ooOO, optimize=True)
 
-        eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
-        M_ab_a -= 0.25*np.einsum('mlef,mlbd,aedf->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
-        M_ab_a += 0.25*np.einsum('mlef,mlbd,afde->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
-        M_ab_a -= 0.25*np.einsum('mled,mlaf,ebdf->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
-        M_ab_a += 0.25*np.einsum('mled,mlaf,efdb->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
-        M_ab_a -= 0.5*np.einsum('mldf,mled,abef->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
-        M_ab_a += 0.5*np.einsum('mldf,mled,afeb->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
-        M_ab_a += np.einsum('mlfd,mled,abef->ab',t2_1_ab, t2_1_ab, eris_vvvv, optimize=True)
-        M_ab_a -= np.einsum('mlfd,mled,afeb->ab',t2_1_ab, t2_1_ab, eris_vvvv, optimize=True)
-        del eris_vvvv
-
-        eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
-        M_ab_b -= 0.25*np.einsum('mlef,mlbd,aedf->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
-        M_ab_b += 0.25*np.einsum('mlef,mlbd,afde->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
-        M_ab_b -= 0.25*np.einsum('mled,mlaf,ebdf->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
-        M_ab_b += 0.25*np.einsum('mled,mlaf,efdb->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
-        M_ab_b -= 0.5*np.einsum('mldf,mled,abef->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
-        M_ab_b += 0.5*np.einsum('mldf,mled,afeb->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
-        M_ab_b += np.einsum('mldf,mlde,abef->ab',t2_1_ab, t2_1_ab, eris_VVVV, optimize=True)
-        M_ab_b -= np.einsum('mldf,mlde,afeb->ab',t2_1_ab, t2_1_ab, eris_VVVV, optimize=True)
-        del eris_VVVV
-
-        eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
-        M_ab_a -= np.einsum('mlef,mlbd,aedf->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
-        M_ab_a -= np.einsum('mled,mlaf,ebdf->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
-        M_ab_a -= 0.5*np.einsum('mldf,mled,abef->ab',t2_1_b, t2_1_b, eris_vvVV, optimize=True)
-        M_ab_a += np.einsum('mldf,mlde,abef->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
-
-        M_ab_b -= np.einsum('mlef,mldb,deaf->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
-        M_ab_b -= np.einsum('mled,mlfa,efdb->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
-        M_ab_b -= 0.5*np.einsum('mldf,mled,efab->ab',t2_1_a, t2_1_a, eris_vvVV, optimize=True)
-        M_ab_b += np.einsum('mlfd,mled,efab->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
-        del eris_vvVV
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            Lvv, LVV = eris.Lvv, eris.LVV
+
+            temp = t2_1_a - t2_1_a.transpose(0,1,3,2)
+            temp = uadc_ao2mo.contract_ladder_df(adc, temp, Lvv, Lvv)
+            M_ab_a -= 0.25*np.einsum('mlbd,mlad->ab',t2_1_a, temp, optimize=True)
+            M_ab_a -= 0.25*np.einsum('mlaf,mlbf->ab',t2_1_a, temp, optimize=True)
+
+            temp = uadc_ao2mo.contract_ladder_df(adc, t2_1_b - t2_1_b.transpose(0,1,3,2), LVV, LVV)
+            M_ab_b -= 0.25*np.einsum('mlbd,mlad->ab',t2_1_b, temp, optimize=True)
+            M_ab_b -= 0.25*np.einsum('mlaf,mlbf->ab',t2_1_b, temp, optimize=True)
+
+            temp = uadc_ao2mo.contract_ladder_df(adc, t2_1_ab, Lvv, LVV)
+            M_ab_a -= np.einsum('mlbd,mlad->ab',t2_1_ab, temp, optimize=True)
+            M_ab_a -= np.einsum('mlaf,mlbf->ab',t2_1_ab, temp, optimize=True)
+            M_ab_b -= np.einsum('mldb,mlda->ab',t2_1_ab, temp, optimize=True)
+            M_ab_b -= np.einsum('mlfa,mlfb->ab',t2_1_ab, temp, optimize=True)
+            del temp
+
+            dm_a  = -0.5*np.einsum('mldf,mled->ef',t2_1_a, t2_1_a, optimize=True)
+            dm_a += np.einsum('mlfd,mled->ef',t2_1_ab, t2_1_ab, optimize=True)
+            dm_b  = -0.5*np.einsum('mldf,mled->ef',t2_1_b, t2_1_b, optimize=True)
+            dm_b += np.einsum('mldf,mlde->ef',t2_1_ab, t2_1_ab, optimize=True)
+            vL  = np.einsum('Pef,ef->P', Lvv, dm_a)
+            vL += np.einsum('Pef,ef->P', LVV, dm_b)
+            M_ab_a += np.einsum('Pab,P->ab', Lvv, vL)
+            M_ab_b += np.einsum('Pab,P->ab', LVV, vL)
+            temp = np.einsum('Paf,ef->Pae', Lvv, dm_a, optimize=True)
+            M_ab_a -= np.einsum('Pae,Peb->ab', temp, Lvv, optimize=True)
+            temp = np.einsum('Paf,ef->Pae', LVV, dm_b, optimize=True)
+            M_ab_b -= np.einsum('Pae,Peb->ab', temp, LVV, optimize=True)
+            del temp
+        else:
+            eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
+            M_ab_a -= 0.25*np.einsum('mlef,mlbd,aedf->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
+            M_ab_a += 0.25*np.einsum('mlef,mlbd,afde->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
+            M_ab_a -= 0.25*np.einsum('mled,mlaf,ebdf->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
+            M_ab_a += 0.25*np.einsum('mled,mlaf,efdb->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
+            M_ab_a -= 0.5*np.einsum('mldf,mled,abef->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
+            M_ab_a += 0.5*np.einsum('mldf,mled,afeb->ab',t2_1_a, t2_1_a, eris_vvvv, optimize=True)
+            M_ab_a += np.einsum('mlfd,mled,abef->ab',t2_1_ab, t2_1_ab, eris_vvvv, optimize=True)
+            M_ab_a -= np.einsum('mlfd,mled,afeb->ab',t2_1_ab, t2_1_ab, eris_vvvv, optimize=True)
+            del eris_vvvv
+
+            eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
+            M_ab_b -= 0.25*np.einsum('mlef,mlbd,aedf->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
+            M_ab_b += 0.25*np.einsum('mlef,mlbd,afde->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
+            M_ab_b -= 0.25*np.einsum('mled,mlaf,ebdf->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
+            M_ab_b += 0.25*np.einsum('mled,mlaf,efdb->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
+            M_ab_b -= 0.5*np.einsum('mldf,mled,abef->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
+            M_ab_b += 0.5*np.einsum('mldf,mled,afeb->ab',t2_1_b, t2_1_b, eris_VVVV, optimize=True)
+            M_ab_b += np.einsum('mldf,mlde,abef->ab',t2_1_ab, t2_1_ab, eris_VVVV, optimize=True)
+            M_ab_b -= np.einsum('mldf,mlde,afeb->ab',t2_1_ab, t2_1_ab, eris_VVVV, optimize=True)
+            del eris_VVVV
+
+            eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
+            M_ab_a -= np.einsum('mlef,mlbd,aedf->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
+            M_ab_a -= np.einsum('mled,mlaf,ebdf->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
+            M_ab_a -= 0.5*np.einsum('mldf,mled,abef->ab',t2_1_b, t2_1_b, eris_vvVV, optimize=True)
+            M_ab_a += np.einsum('mldf,mlde,abef->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
+
+            M_ab_b -= np.einsum('mlef,mldb,deaf->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
+            M_ab_b -= np.einsum('mled,mlfa,efdb->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
+            M_ab_b -= 0.5*np.einsum('mldf,mled,efab->ab',t2_1_a, t2_1_a, eris_vvVV, optimize=True)
+            M_ab_b += np.einsum('mlfd,mled,efab->ab',t2_1_ab, t2_1_ab,   eris_vvVV, optimize=True)
+            del eris_vvVV
 
     M_ab = (M_ab_a, M_ab_b)
 
@@ -1050,7 +1130,7 @@ def get_imds_ip(adc, eris=None):
     idn_vir_b = np.identity(nvir_b)
 
     if eris is None:
-        eris = uadc_ao2mo.transform_integrals_incore(adc)
+        eris = adc.transform_integrals()
 
     eris_ovov = eris.ovov
     eris_OVOV = eris.OVOV
@@ -1270,20 +1350,34 @@ def get_imds_ip(adc, eris=None):
         M_ij_b -= 0.25*np.einsum('lmde,jnde,lnmi->ij',t2_1_b, t2_1_b,eris_OOOO, optimize = True)
         M_ij_b += np.einsum('mled,njed,mnli->ij',t2_1_ab ,t2_1_ab,eris_ooOO, optimize = True)
 
-        eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
-        M_ij_a += 0.25*np.einsum('ilde,jlgf,gdfe->ij',t2_1_a, t2_1_a, eris_vvvv, optimize = True)
-        M_ij_a -= 0.25*np.einsum('ilde,jlgf,gefd->ij',t2_1_a, t2_1_a, eris_vvvv, optimize = True)
-        del eris_vvvv
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            temp = uadc_ao2mo.contract_ladder_df(adc, t2_1_a, eris.Lvv, eris.Lvv)
+            temp -= temp.transpose(0,1,3,2)
+            M_ij_a += 0.25*np.einsum('ilde,jlde->ij',t2_1_a, temp, optimize = True)
+
+            temp = uadc_ao2mo.contract_ladder_df(adc, t2_1_b, eris.LVV, eris.LVV)
+            temp -= temp.transpose(0,1,3,2)
+            M_ij_b += 0.25*np.einsum('ilde,jlde->ij',t2_1_b, temp, optimize = True)
 
-        eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
-        M_ij_b += 0.25*np.einsum('ilde,jlgf,gdfe->ij',t2_1_b, t2_1_b, eris_VVVV, optimize = True)
-        M_ij_b -= 0.25*np.einsum('ilde,jlgf,gefd->ij',t2_1_b, t2_1_b, eris_VVVV, optimize = True)
-        del eris_VVVV
+            temp = uadc_ao2mo.contract_ladder_df(adc, t2_1_ab, eris.Lvv, eris.LVV)
+            M_ij_a += np.einsum('ilde,jlde->ij',t2_1_ab, temp, optimize = True)
+            M_ij_b += np.einsum('lied,ljed->ij',t2_1_ab, temp, optimize = True)
+            del temp
+        else:
+            eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
+            M_ij_a += 0.25*np.einsum('ilde,jlgf,gdfe->ij',t2_1_a, t2_1_a, eris_vvvv, optimize = True)
+            M_ij_a -= 0.25*np.einsum('ilde,jlgf,gefd->ij',t2_1_a, t2_1_a, eris_vvvv, optimize = True)
+            del eris_vvvv
+
+            eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
+            M_ij_b += 0.25*np.einsum('ilde,jlgf,gdfe->ij',t2_1_b, t2_1_b, eris_VVVV, optimize = True)
+            M_ij_b -= 0.25*np.einsum('ilde,jlgf,gefd->ij',t2_1_b, t2_1_b, eris_VVVV, optimize = True)
+            del eris_VVVV
 
-        eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
-        M_ij_a +=np.einsum('ilde,jlgf,gdfe->ij',t2_1_ab, t2_1_ab,eris_vvVV, optimize = True)
-        M_ij_b +=np.einsum('lied,ljfg,fegd->ij',t2_1_ab, t2_1_ab,eris_vvVV, optimize = True)
-        del eris_vvVV
+            eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
+            M_ij_a +=np.einsum('ilde,jlgf,gdfe->ij',t2_1_ab, t2_1_ab,eris_vvVV, optimize = True)
+            M_ij_b +=np.einsum('lied,ljfg,fegd->ij',t2_1_ab, t2_1_ab,eris_vvVV, optimize = True)
+            del eris_vvVV
 
         M_ij_a += 0.25*np.einsum('inde,lmde,jlnm->ij',t2_1_a, t2_1_a,eris_oooo, optimize = True)
         M_ij_a -= 0.25*np.einsum('inde,lmde,jmnl->ij',t2_1_a, t2_1_a,eris_oooo, optimize = True)
@@ -1558,7 +1652,7 @@ def ea_adc_matvec(adc, M_ab=None, eris=None):
     idn_vir_b = np.identity(nvir_b)
 
     if eris is None:
-        eris = uadc_ao2mo.transform_integrals_incore(adc)
+        eris = adc.transform_integrals()
 
     eris_ovov = eris.ovov
     eris_OVOV = eris.OVOV
@@ -1635,31 +1729,56 @@ def ea_adc_matvec(adc, M_ab=None, eris=None):
 
 ############# ADC(2) a - ibc and ibc - a coupling blocks #########################
 
-        eris_ovvv = uadc_ao2mo.unpack_eri_1(eris.ovvv, nvir_a)
-        s[s_a:f_a] += 0.5*np.einsum('icab,ibc->a',eris_ovvv, r_aaa_, optimize = True)
-        s[s_a:f_a] -= 0.5*np.einsum('ibac,ibc->a',eris_ovvv, r_aaa_, optimize = True)
-        temp = np.einsum('icab,a->ibc', eris_ovvv, r_a, optimize = True)
-        temp -= np.einsum('ibac,a->ibc', eris_ovvv, r_a, optimize = True)
-        s[s_aaa:f_aaa] += temp[:,ab_ind_a[0],ab_ind_a[1]].reshape(-1)
-        del eris_ovvv
-
-        eris_OVvv = uadc_ao2mo.unpack_eri_1(eris.OVvv, nvir_a)
-        s[s_a:f_a] += np.einsum('icab,ibc->a', eris_OVvv, r_bab, optimize = True)
-        s[s_bab:f_bab] += np.einsum('icab,a->ibc', eris_OVvv, r_a, optimize = True).reshape(-1)
-        del eris_OVvv
-
-        eris_OVVV = uadc_ao2mo.unpack_eri_1(eris.OVVV, nvir_b)
-        s[s_b:f_b] += 0.5*np.einsum('icab,ibc->a',eris_OVVV, r_bbb_, optimize = True)
-        s[s_b:f_b] -= 0.5*np.einsum('ibac,ibc->a',eris_OVVV, r_bbb_, optimize = True)
-        temp = np.einsum('icab,a->ibc', eris_OVVV, r_b, optimize = True)
-        temp -= np.einsum('ibac,a->ibc', eris_OVVV, r_b, optimize = True)
-        s[s_bbb:f_bbb] += temp[:,ab_ind_b[0],ab_ind_b[1]].reshape(-1)
-        del eris_OVVV
-
-        eris_ovVV = uadc_ao2mo.unpack_eri_1(eris.ovVV, nvir_b)
-        s[s_b:f_b] += np.einsum('icab,ibc->a', eris_ovVV, r_aba, optimize = True)
-        s[s_aba:f_aba] += np.einsum('icab,a->ibc', eris_ovVV, r_b, optimize = True).reshape(-1)
-        del eris_ovVV
+        if isinstance(eris, uadc_ao2mo._DFERIs):
+            Lov, LOV, Lvv, LVV = eris.Lov, eris.LOV, eris.Lvv, eris.LVV
+
+            temp = np.einsum('Pic,ibc->Pb', Lov, r_aaa_, optimize = True)
+            temp -= np.einsum('Pib,ibc->Pc', Lov, r_aaa_, optimize = True)
+            temp += 2*np.einsum('Pic,ibc->Pb', LOV, r_bab, optimize = True)
+            s[s_a:f_a] += 0.5*np.einsum('Pab,Pb->a', Lvv, temp, optimize = True)
+            temp = np.einsum('Pic,ibc->Pb', LOV, r_bbb_, optimize = True)
+            temp -= np.einsum('Pib,ibc->Pc', LOV, r_bbb_, optimize = True)
+            temp += 2*np.einsum('Pic,ibc->Pb', Lov, r_aba, optimize = True)
+            s[s_b:f_b] += 0.5*np.einsum('Pab,Pb->a', LVV, temp, optimize = True)
+
+            vL_a = np.einsum('Pab,a->Pb', Lvv, r_a, optimize = True)
+            temp = np.einsum('Pic,Pb->ibc', Lov, vL_a, optimize = True)
+            temp -= temp.transpose(0,2,1)
+            s[s_aaa:f_aaa] += temp[:,ab_ind_a[0],ab_ind_a[1]].reshape(-1)
+            s[s_bab:f_bab] += np.einsum('Pic,Pb->ibc', LOV, vL_a, optimize = True).reshape(-1)
+
+            vL_b = np.einsum('Pab,a->Pb', LVV, r_b, optimize = True)
+            temp = np.einsum('Pic,Pb->ibc', LOV, vL_b, optimize = True)
+            temp -= temp.transpose(0,2,1)
+            s[s_bbb:f_bbb] += temp[:,ab_ind_b[0],ab_ind_b[1]].reshape(-1)
+            s[s_aba:f_aba] += np.einsum('Pic,Pb->ibc', Lov, vL_b, optimize = True).reshape(-1)
+            del temp, vL_a, vL_b
+        else:
+            eris_ovvv = uadc_ao2mo.unpack_eri_1(eris.ovvv, nvir_a)
+            s[s_a:f_a] += 0.5*np.einsum('icab,ibc->a',eris_ovvv, r_aaa_, optimize = True)
+            s[s_a:f_a] -= 0.5*np.einsum('ibac,ibc->a',eris_ovvv, r_aaa_, optimize = True)
+            temp = np.einsum('icab,a->ibc', eris_ovvv, r_a, optimize = True)
+            temp -= np.einsum('ibac,a->ibc', eris_ovvv, r_a, optimize = True)
+            s[s_aaa:f_aaa] += temp[:,ab_ind_a[0],ab_ind_a[1]].reshape(-1)
+            del eris_ovvv
+
+            eris_OVvv = uadc_ao2mo.unpack_eri_1(eris.OVvv, nvir_a)
+            s[s_a:f_a] += np.einsum('icab,ibc->a', eris_OVvv, r_bab, optimize = True)
+            s[s_bab:f_bab] += np.einsum('icab,a->ibc', eris_OVvv, r_a, optimize = True).reshape(-1)
+            del eris_OVvv
+
+            eris_OVVV = uadc_ao2mo.unpack_eri_1(eris.OVVV, nvir_b)
+            s[s_b:f_b] += 0.5*np.einsum('icab,ibc->a',eris_OVVV, r_bbb_, optimize = True)
+            s[s_b:f_b] -= 0.5*np.einsum('ibac,ibc->a',eris_OVVV, r_bbb_, optimize = True)
+            temp = np.einsum('icab,a->ibc', eris_OVVV, r_b, optimize = True)
+            temp -= np.einsum('ibac,a->ibc', eris_OVVV, r_b, optimize = True)
+            s[s_bbb:f_bbb] += temp[:,ab_ind_b[0],ab_ind_b[1]].reshape(-1)
+            del eris_OVVV
+
+            eris_ovVV = uadc_ao2mo.unpack_eri_1(eris.ovVV, nvir_b)
+            s[s_b:f_b] += np.einsum('icab,ibc->a', eris_ovVV, r_aba, optimize = True)
+            s[s_aba:f_aba] += np.einsum('icab,a->ibc', eris_ovVV, r_b, optimize = True).reshape(-1)
+            del eris_ovVV
 
 ################ ADC(2) iab - jcd block ############################
 
@@ -1695,41 +1814,55 @@ def ea_adc_matvec(adc, M_ab=None, eris=None):
                r_bbb_u[:,ab_ind_b[0],ab_ind_b[1]]= r_bbb.copy()
                r_bbb_u[:,ab_ind_b[1],ab_ind_b[0]]= -r_bbb.copy()
 
-               eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
-               eris_vvvv = eris_vvvv.transpose(0,2,1,3)
-               eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
-               r_aaa_t = r_aaa_u.reshape(nocc_a,-1)
-               temp_1 = np.dot(r_aaa_t,eris_vvvv.T).reshape(nocc_a,nvir_a,nvir_a)
-               eris_vvvv = eris_vvvv[:].reshape(nvir_a,nvir_a,nvir_a,nvir_a)
-               eris_vvvv = eris_vvvv.transpose(0,1,3,2)
-               eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
-               temp_1 -= np.dot(r_aaa_t,eris_vvvv.T).reshape(nocc_a,nvir_a,nvir_a)
-               del eris_vvvv
-               temp_1 = temp_1[:,ab_ind_a[0],ab_ind_a[1]]
-               s[s_aaa:f_aaa] += 0.5*temp_1.reshape(-1)
-
-               eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
-               eris_VVVV = eris_VVVV.transpose(0,2,1,3)
-               eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
-               r_bbb_t = r_bbb_u.reshape(nocc_b,-1)
-               temp_1 = np.dot(r_bbb_t,eris_VVVV.T).reshape(nocc_b,nvir_b,nvir_b)
-               eris_VVVV = eris_VVVV[:].reshape(nvir_b,nvir_b,nvir_b,nvir_b)
-               eris_VVVV = eris_VVVV.transpose(0,1,3,2)
-               eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
-               temp_1 -= np.dot(r_bbb_t,eris_VVVV.T).reshape(nocc_b,nvir_b,nvir_b)
-               del eris_VVVV
-               temp_1 = temp_1[:,ab_ind_b[0],ab_ind_b[1]]
-               s[s_bbb:f_bbb] += 0.5*temp_1.reshape(-1)
-
-               r_bab_t = r_bab.reshape(nocc_b,-1)
-               r_aba_t = r_aba.transpose(0,2,1).reshape(nocc_a,-1)
-               eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
-               eris_vvVV = eris_vvVV.transpose(0,2,1,3)
-               eris_vvVV = eris_vvVV.copy()[:].reshape(nvir_a*nvir_b,nvir_a*nvir_b)
-               s[s_bab:f_bab] += np.dot(r_bab_t,eris_vvVV.T).reshape(-1)
-               temp_1 = np.dot(r_aba_t,eris_vvVV.T).reshape(nocc_a, nvir_a,nvir_b)
-               del eris_vvVV
-               s[s_aba:f_aba] += temp_1.transpose(0,2,1).copy().reshape(-1)
+               if isinstance(eris, uadc_ao2mo._DFERIs):
+                   temp_1 = r_aaa_u - r_aaa_u.transpose(0,2,1)
+                   temp_1 = uadc_ao2mo.contract_ladder_df(adc, temp_1, eris.Lvv, eris.Lvv)
+                   s[s_aaa:f_aaa] += 0.5*temp_1[:,ab_ind_a[0],ab_ind_a[1]].reshape(-1)
+
+                   temp_1 = r_bbb_u - r_bbb_u.transpose(0,2,1)
+                   temp_1 = uadc_ao2mo.contract_ladder_df(adc, temp_1, eris.LVV, eris.LVV)
+                   s[s_bbb:f_bbb] += 0.5*temp_1[:,ab_ind_b[0],ab_ind_b[1]].reshape(-1)
+
+                   temp_1 = uadc_ao2mo.contract_ladder_df(adc, r_bab, eris.Lvv, eris.LVV)
+                   s[s_bab:f_bab] += temp_1.reshape(-1)
+                   temp_1 = uadc_ao2mo.contract_ladder_df(adc, r_aba.transpose(0,2,1), eris.Lvv, eris.LVV)
+                   s[s_aba:f_aba] += temp_1.transpose(0,2,1).copy().reshape(-1)
+               else:
+                   eris_vvvv = uadc_ao2mo.unpack_eri_2s(eris.vvvv, nvir_a)
+                   eris_vvvv = eris_vvvv.transpose(0,2,1,3)
+                   eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
+                   r_aaa_t = r_aaa_u.reshape(nocc_a,-1)
+                   temp_1 = np.dot(r_aaa_t,eris_vvvv.T).reshape(nocc_a,nvir_a,nvir_a)
+                   eris_vvvv = eris_vvvv[:].reshape(nvir_a,nvir_a,nvir_a,nvir_a)
+                   eris_vvvv = eris_vvvv.transpose(0,1,3,2)
+                   eris_vvvv = eris_vvvv.copy()[:].reshape(nvir_a*nvir_a,nvir_a*nvir_a)
+                   temp_1 -= np.dot(r_aaa_t,eris_vvvv.T).reshape(nocc_a,nvir_a,nvir_a)
+                   del eris_vvvv
+                   temp_1 = temp_1[:,ab_ind_a[0],ab_ind_a[1]]
+                   s[s_aaa:f_aaa] += 0.5*temp_1.reshape(-1)
+
+                   eris_VVVV = uadc_ao2mo.unpack_eri_2s(eris.VVVV, nvir_b)
+                   eris_VVVV = eris_VVVV.transpose(0,2,1,3)
+                   eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
+                   r_bbb_t = r_bbb_u.reshape(nocc_b,-1)
+                   temp_1 = np.dot(r_bbb_t,eris_VVVV.T).reshape(nocc_b,nvir_b,nvir_b)
+                   eris_VVVV = eris_VVVV[:].reshape(nvir_b,nvir_b,nvir_b,nvir_b)
+                   eris_VVVV = eris_VVVV.transpose(0,1,3,2)
+                   eris_VVVV = eris_VVVV.copy()[:].reshape(nvir_b*nvir_b,nvir_b*nvir_b)
+                   temp_1 -= np.dot(r_bbb_t,eris_VVVV.T).reshape(nocc_b,nvir_b,nvir_b)
+                   del eris_VVVV
+                   temp_1 = temp_1[:,ab_ind_b[0],ab_ind_b[1]]
+                   s[s_bbb:f_bbb] += 0.5*temp_1.reshape(-1)
+
+                   r_bab_t = r_bab.reshape(nocc_b,-1)
+                   r_aba_t = r_aba.transpose(0,2,1).reshape(nocc_a,-1)
+                   eris_vvVV = uadc_ao2mo.unpack_eri_2(eris.vvVV, nvir_a, nvir_b)
+                   eris_vvVV = eris_vvVV.transpose(0,2,1,3)
+                   eris_vvVV = eris_vvVV.copy()[:].reshape(nvir_a*nvir_b,nvir_a*nvir_b)
+                   s[s_bab:f_bab] += np.dot(r_bab_t,eris_vvVV.T).reshape(-1)
+                   temp_1 = np.dot(r_aba_t,eris_vvVV.T).reshape(nocc_a, nvir_a,nvir_b)
+                   del eris_vvVV
+                   s[s_aba:f_aba] += temp_1.transpose(0,2,1).copy().reshape(-1)
 
                temp = 0.5*np.einsum('jiyz,jzx->ixy',eris_oovv,r_aaa_u,optimize = True)
                temp -= 0.5*np.einsum('jzyi,jzx->ixy',eris_ovvo,r_aaa_u,optimize = True)
@@ -2034,7 +2167,7 @@ def ip_adc_matvec(adc, M_ij=None, eris=None):
     idn_vir_b = np.identity(nvir_b)
 
     if eris is None:
-        eris = uadc_ao2mo.transform_integrals_incore(adc)
+        eris = adc.transform_integrals()
 
     d_ij_a = e_occ_a[:,None] + e_occ_a
     d_a_a = e_vir_a[:,None]
@@ -2484,6 +2617,44 @@ def ip_adc_matvec(adc, M_ij=None, eris=None):
     return sigma_
 
 
+def ip_cvs_mask(adc, ncvs=None):
+    '''Mask of the vector elements in the core-valence separated (CVS) space.
+    The CVS space includes the 1h and 2h1p configurations in which at least
+    one hole is in the ncvs lowest occupied orbitals (of both spins).
+    '''
+    if ncvs is None: ncvs = adc.ncvs
+
+    nocc_a = adc.nocc_a
+    nocc_b = adc.nocc_b
+    nvir_a = adc.nvir_a
+    nvir_b = adc.nvir_b
+
+    core_a = np.arange(nocc_a) < ncvs
+    core_b = np.arange(nocc_b) < ncvs
+
+    ij_ind_a = np.tril_indices(nocc_a, k=-1)
+    ij_ind_b = np.tril_indices(nocc_b, k=-1)
+
+    mask_aaa = core_a[ij_ind_a[0]] | core_a[ij_ind_a[1]]
+    mask_bab = core_b[:,None] | core_a
+    mask_aba = core_a[:,None] | core_b
+    mask_bbb = core_b[ij_ind_b[0]] | core_b[ij_ind_b[1]]
+
+    mask = (core_a, core_b,
+            np.repeat(mask_aaa[None], nvir_a, axis=0).ravel(),
+            np.repeat(mask_bab[None], nvir_b, axis=0).ravel(),
+            np.repeat(mask_aba[None], nvir_a, axis=0).ravel(),
+            np.repeat(mask_bbb[None], nvir_b, axis=0).ravel())
+    return np.hstack(mask)
+
+
+def _cvs_unpack(U, mask):
+    '''Embed the CVS vector(s) U in the full space'''
+    U_full = np.zeros(U.shape[:-1] + (mask.size,), dtype=U.dtype)
+    U_full[...,mask] = U
+    return U_full
+
+
 def ea_compute_trans_moments(adc, orb, spin="alpha"):
 
     if adc.method not in ("adc(2)", "adc(2)-x", "adc(3)"):
@@ -2897,6 +3068,7 @@ class UADCEA(UADC):
         self.t2 = adc.t2
         self.e_corr = adc.e_corr
         self.method = adc.method
+        self.with_df = adc.with_df
         self._scf = adc._scf
         self._nocc = adc._nocc
         self._nvir = adc._nvir
@@ -2909,8 +3081,10 @@ class UADCEA(UADC):
         self.mo_energy_b = adc.mo_energy_b
         self.nmo_a = adc._nmo[0]
         self.nmo_b = adc._nmo[1]
+        if getattr(adc, 'ncvs', None):
+            raise NotImplementedError('CVS for EA-ADC.  ncvs is supported by IP-ADC only')
 
-        keys = set(('e_corr', 'method', 'mo_coeff', 'mo_energy_b', 'max_memory', 't1', 'mo_energy_a', 'max_space', 't2', 'max_cycle'))
+        keys = set(('e_corr', 'method', 'mo_coeff', 'mo_energy_b', 'max_memory', 't1', 'mo_energy_a', 'max_space', 't2', 'max_cycle', 'with_df'))
 
         self._keys = set(self.__dict__.keys()).union(keys)
 
@@ -2960,6 +3134,10 @@ class UADCIP(UADC):
             Avoid all I/O. Default is False.
         method : string
             nth-order ADC method. Options are : ADC(2), ADC(2)-X, ADC(3). Default is ADC(2).
+        ncvs : int
+            Number of core orbitals.  If set, the core-valence separated
+            (CVS) IP-ADC is solved for the ionizations from the ncvs lowest
+            occupied orbitals.  Default is None.
         conv_tol : float
             Convergence threshold for Davidson iterations.  Default is 1e-12.
         max_cycle : int
@@ -2994,6 +3172,8 @@ class UADCIP(UADC):
         self.t2 = adc.t2
         self.e_corr = adc.e_corr
         self.method = adc.method
+        self.ncvs = adc.ncvs
+        self.with_df = adc.with_df
         self._scf = adc._scf
         self._nocc = adc._nocc
         self._nvir = adc._nvir
@@ -3007,12 +3187,13 @@ class UADCIP(UADC):
         self.nmo_a = adc._nmo[0]
         self.nmo_b = adc._nmo[1]
 
-        keys = set(('e_corr', 'method', 'mo_coeff', 'mo_energy_b', 'max_memory', 't1', 'mo_energy_a', 'max_space', 't2', 'max_cycle'))
+        keys = set(('e_corr', 'method', 'mo_coeff', 'mo_energy_b', 'max_memory', 't1', 'mo_energy_a', 'max_space', 't2', 'max_cycle', 'ncvs', 'with_df'))
 
         self._keys = set(self.__dict__.keys()).union(keys)
 
     kernel = kernel
     get_imds = get_imds_ip
+    cvs_mask = ip_cvs_mask
     get_diag = ip_adc_diag
     matvec = ip_adc_matvec
     compute_trans_moments = ip_compute_trans_moments
@@ -3042,6 +3223,16 @@ class UADCIP(UADC):
         diag = self.get_diag(imds)
         matvec = self.matvec(imds, eris)
         #matvec = lambda x: self.matvec()
+        if self.ncvs:
+            # CVS: the eigenvalue problem is solved in the space of the
+            # configurations with core holes
+            mask = self.cvs_mask()
+            logger.info(self, 'CVS space of %d core orbitals, dimension %d.  '
+                        'Sigma is evaluated in the full space and projected',
+                        self.ncvs, np.count_nonzero(mask))
+            full_matvec = matvec
+            matvec = lambda x: full_matvec(_cvs_unpack(x, mask))[mask]
+            diag = diag[mask]
         return matvec, diag
 
 if __name__ == '__main__':
@@ -16,8 +16,12 @@
 #         Alexander Sokolov <alexander.y.sokolov@gmail.com>
 #
 
+import time
 import numpy as np
 import pyscf.ao2mo as ao2mo
+from pyscf.ao2mo import _ao2mo
+from pyscf import lib
+from pyscf.lib import logger
 
 ### Integral transformation for integrals in Chemists' notation###
 def transform_integrals_incore(myadc):
@@ -77,6 +81,119 @@ def transform_integrals_incore(myadc):
 
     return eris
 
+class _DFERIs:
+    '''Integrals of DF-ADC.  The 3-index tensors (L|oo), (L|ov) and (L|vv)
+    of both spins are kept in core.  The 4-index blocks with at most two
+    virtual indices are built from them.  The ovvv-type blocks are assembled
+    from the 3-index tensors each time they are accessed.  The vvvv-type
+    blocks are not available.  The terms with (vv|vv) are contracted through
+    the 3-index tensors (see :func:`contract_ladder_df`).
+    '''
+    @property
+    def ovvv(self):
+        return _make_ovvv(self.Lov, self.Lvv)
+    @property
+    def OVVV(self):
+        return _make_ovvv(self.LOV, self.LVV)
+    @property
+    def ovVV(self):
+        return _make_ovvv(self.Lov, self.LVV)
+    @property
+    def OVvv(self):
+        return _make_ovvv(self.LOV, self.Lvv)
+
+def _make_ovvv(Lov, Lvv):
+    '''(ov|vv) with the vv pair in the lower triangular form'''
+    naux, nocc, nvir = Lov.shape
+    vvL = lib.pack_tril(Lvv)
+    ovvv = lib.ddot(Lov.reshape(naux,-1).T, vvL)
+    return ovvv.reshape(nocc, nvir, -1)
+
+def _make_df_vectors(with_df, mo, nocc):
+    nmo = mo.shape[1]
+    naux = with_df.get_naoaux()
+    Loo = np.empty((naux,nocc,nocc))
+    Lov = np.empty((naux,nocc,nmo-nocc))
+    Lvv = np.empty((naux,nmo-nocc,nmo-nocc))
+    mo = np.asarray(mo, order='F')
+    ijslice = (0, nmo, 0, nmo)
+    p1 = 0
+    Lpq = None
+    for eri1 in with_df.loop():
+        Lpq = _ao2mo.nr_e2(eri1, mo, ijslice, aosym='s2', mosym='s1', out=Lpq)
+        p0, p1 = p1, p1 + Lpq.shape[0]
+        Lpq = Lpq.reshape(p1-p0,nmo,nmo)
+        Loo[p0:p1] = Lpq[:,:nocc,:nocc]
+        Lov[p0:p1] = Lpq[:,:nocc,nocc:]
+        Lvv[p0:p1] = Lpq[:,nocc:,nocc:]
+    return Loo, Lov, Lvv
+
+def transform_integrals_df(myadc):
+    '''Integrals of DF-ADC.  The ovvv- and vvvv-type blocks are not stored
+    (see :class:`_DFERIs`).'''
+    cput0 = (time.clock(), time.time())
+    log = logger.Logger(myadc.stdout, myadc.verbose)
+
+    nocc_a, nocc_b = myadc._nocc
+    nvir_a, nvir_b = myadc._nvir
+    with_df = myadc.with_df
+    naux = with_df.get_naoaux()
+
+    eris = _DFERIs()
+    eris.Loo, eris.Lov, eris.Lvv = _make_df_vectors(with_df, myadc.mo_coeff[0], nocc_a)
+    eris.LOO, eris.LOV, eris.LVV = _make_df_vectors(with_df, myadc.mo_coeff[1], nocc_b)
+
+    def make_eri(L1, L2):
+        shape = L1.shape[1:] + L2.shape[1:]
+        return lib.ddot(L1.reshape(naux,-1).T, L2.reshape(naux,-1)).reshape(shape)
+
+    eris.oooo = make_eri(eris.Loo, eris.Loo)
+    eris.ovoo = make_eri(eris.Lov, eris.Loo)
+    eris.ovov = make_eri(eris.Lov, eris.Lov)
+    eris.ovvo = eris.ovov.transpose(0,1,3,2).copy()
+    eris.oovv = make_eri(eris.Loo, eris.Lvv)
+
+    eris.OOOO = make_eri(eris.LOO, eris.LOO)
+    eris.OVOO = make_eri(eris.LOV, eris.LOO)
+    eris.OVOV = make_eri(eris.LOV, eris.LOV)
+    eris.OVVO = eris.OVOV.transpose(0,1,3,2).copy()
+    eris.OOVV = make_eri(eris.LOO, eris.LVV)
+
+    eris.ooOO = make_eri(eris.Loo, eris.LOO)
+    eris.ovOO = make_eri(eris.Lov, eris.LOO)
+    eris.ovOV = make_eri(eris.Lov, eris.LOV)
+    eris.ooVV = make_eri(eris.Loo, eris.LVV)
+    eris.ovVO = eris.ovOV.transpose(0,1,3,2).copy()
+
+    eris.OVoo = make_eri(eris.LOV, eris.Loo)
+    eris.OOvv = make_eri(eris.LOO, eris.Lvv)
+    eris.OVov = eris.ovOV.transpose(2,3,0,1).copy()
+    eris.OVvo = eris.ovOV.transpose(2,3,1,0).copy()
+
+    log.timer('DF-ADC integral transformation', *cput0)
+    return eris
+
+def contract_ladder_df(myadc, t_amp, Lvv1, Lvv2):
+    r'''out[...,a,c] = \sum_{bd} t_amp[...,b,d] (ab|cd), with (ab|cd) computed
+    from the 3-index tensors Lvv1 (L|ab) and Lvv2 (L|cd) for blocks of a.'''
+    naux, nvir1 = Lvv1.shape[:2]
+    nvir2 = Lvv2.shape[1]
+    shape = t_amp.shape
+    t_amp = t_amp.reshape(-1, nvir1*nvir2)
+    out = np.empty((t_amp.shape[0], nvir1, nvir2))
+    Lvv2 = Lvv2.reshape(naux, -1)
+
+    max_memory = max(0, myadc.max_memory - lib.current_memory()[0])
+    blksize = int(max_memory*.4e6/8/(nvir1*nvir2**2*2 + t_amp.shape[0]*nvir2))
+    blksize = min(nvir1, max(1, blksize))
+    for p0, p1 in lib.prange(0, nvir1, blksize):
+        vvvv = lib.ddot(Lvv1[:,p0:p1].reshape(naux,-1).T, Lvv2)
+        vvvv = vvvv.reshape(p1-p0,nvir1,nvir2,nvir2).transpose(0,2,1,3)
+        vvvv = vvvv.reshape((p1-p0)*nvir2,-1)
+        out[:,p0:p1] = lib.ddot(t_amp, vvvv.T).reshape(-1,p1-p0,nvir2)
+        vvvv = None
+    return out.reshape(shape[:-2] + (nvir1, nvir2))
+
 def unpack_eri_1(eri, norb):
 
     n_oo = norb * (norb + 1) // 2
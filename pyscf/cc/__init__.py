@@ -123,7 +123,8 @@ def UCCSD(mf, frozen=None, mo_coeff=None, mo_occ=None):
         mf = scf.addons.convert_to_uhf(mf)
 
     if getattr(mf, 'with_df', None):
-        raise NotImplementedError('DF-UCCSD')
+        from pyscf.cc import dfuccsd
+        return dfuccsd.UCCSD(mf, frozen, mo_coeff, mo_occ)
     else:
         return uccsd.UCCSD(mf, frozen, mo_coeff, mo_occ)
 UCCSD.__doc__ = uccsd.UCCSD.__doc__
@@ -142,7 +143,8 @@ def GCCSD(mf, frozen=None, mo_coeff=None, mo_occ=None):
 GCCSD.__doc__ = gccsd.GCCSD.__doc__
 
 
-def FNOCCSD(mf, thresh=1e-6, pct_occ=None, nvir_act=None):
+def FNOCCSD(mf, thresh=1e-6, pct_occ=None, nvir_act=None, frozen=None,
+            density_fit=False):
     """Frozen natural orbital CCSD
 
     Attributes:
@@ -150,28 +152,26 @@ def FNOCCSD(mf, thresh=1e-6, pct_occ=None, nvir_act=None):
             Threshold on NO occupation numbers.  Default is 1e-6.
         pct_occ : float
             Percentage of total occupation number.  Default is None.  If present, overrides `thresh`.
+        nvir_act : int
+            Number of active virtual NOs.  If present, overrides `thresh` and `pct_occ`.
+        frozen : int
+            Number of frozen core orbitals.
+        density_fit : bool
+            Whether to use DF-MP2 and DF-CCSD.  DF is always used if the SCF
+            object has density fitting.
+
+    See also :class:`pyscf.cc.fnoccsd.FNOCCSD`
     """
-    #from pyscf import mp
-    #pt = mp.MP2(mf).set(verbose=0).run()
-    from pyscf.mp.mp2 import MP2
-    pt = MP2(mf).set(verbose=0).run()
-    frozen, no_coeff = pt.make_fno(thresh=thresh, pct_occ=pct_occ, nvir_act=nvir_act)
-    #pt_no = mp.MP2(mf, frozen=frozen, mo_coeff=no_coeff).set(verbose=0).run() #avoid DF
-    pt_no = MP2(mf, frozen=frozen, mo_coeff=no_coeff).set(verbose=0).run()
-    mycc = ccsd.CCSD(mf, frozen=frozen, mo_coeff=no_coeff) #avoid DF
-    mycc.delta_emp2 = pt.e_corr - pt_no.e_corr
-    from pyscf.lib import logger
-    def _finalize(self):
-        '''Hook for dumping results and clearing up the object.'''
-        if self.converged:
-            logger.info(self, 'FNO-%s converged', self.__class__.__name__)
-        else:
-            logger.note(self, 'FNO-%s not converged', self.__class__.__name__)
-        logger.note(self, 'E(FNO-%s) = %.16g  E_corr = %.16g',
-                    self.__class__.__name__, self.e_tot, self.e_corr)
-        logger.note(self, 'E(FNO-%s+delta-MP2) = %.16g  E_corr = %.16g',
-                    self.__class__.__name__, self.e_tot+self.delta_emp2,
-                    self.e_corr+self.delta_emp2)
-        return self
-    mycc._finalize = _finalize.__get__(mycc, mycc.__class__)
-    return mycc
+    from pyscf.cc import fnoccsd
+    if density_fit or getattr(mf, 'with_df', None):
+        return fnoccsd.DFFNOCCSD(mf, frozen, thresh, pct_occ, nvir_act)
+    else:
+        return fnoccsd.FNOCCSD(mf, frozen, thresh, pct_occ, nvir_act)
+
+
+def PNOCCSD(mf, frozen=None):
+    '''Local CCSD in the pair natural orbital (PNO) domains of the localized
+    occupied orbitals.  See :class:`pyscf.cc.pnoccsd.PNOCCSD`.
+    '''
+    from pyscf.cc import pnoccsd
+    return pnoccsd.PNOCCSD(mf, frozen)
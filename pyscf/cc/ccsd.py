@@ -59,8 +59,7 @@ def kernel(mycc, eris=None, t1=None, t2=None, max_cycle=50, tol=1e-8,
     if isinstance(mycc.diis, lib.diis.DIIS):
         adiis = mycc.diis
     elif mycc.diis:
-        adiis = lib.diis.DIIS(mycc, mycc.diis_file, incore=mycc.incore_complete)
-        adiis.space = mycc.diis_space
+        adiis = _make_diis(mycc)
     else:
         adiis = None
 
@@ -704,6 +703,19 @@ def energy(mycc, t1=None, t2=None, eris=None):
         logger.warn(mycc, 'Non-zero imaginary part found in CCSD energy %s', e)
     return e.real
 
+def _make_diis(mycc):
+    '''DIIS object for the amplitudes.  With diis_dtype or diis_compression,
+    the DIIS history is kept on disk in the reduced storage.'''
+    diis_dtype = getattr(mycc, 'diis_dtype', None)
+    diis_compression = getattr(mycc, 'diis_compression', None)
+    if diis_dtype is not None or diis_compression:
+        adiis = lib.diis.OutcoreDIIS(mycc, mycc.diis_file, diis_dtype,
+                                     diis_compression)
+    else:
+        adiis = lib.diis.DIIS(mycc, mycc.diis_file, incore=mycc.incore_complete)
+    adiis.space = mycc.diis_space
+    return adiis
+
 def restore_from_diis_(mycc, diis_file, inplace=True):
     '''Reuse an existed DIIS object in the CCSD calculation.
 
@@ -824,6 +836,13 @@ class CCSD(lib.StreamObject):
             DIIS space size.  Default is 6.
         diis_start_cycle : int
             The step to start DIIS.  Default is 0.
+        diis_dtype : numpy dtype
+            If given (e.g. numpy.float32), the DIIS history is stored on disk
+            in this precision.  Default is None (DIIS vectors are stored in
+            the precision of the amplitudes, in memory for small systems).
+        diis_compression : str
+            HDF5 compression filter ('lzf' or 'gzip') for the DIIS history on
+            disk.  Default is None.
         iterative_damping : float
             The self consistent damping parameter.
         direct : bool
@@ -871,6 +890,8 @@ class CCSD(lib.StreamObject):
     diis_start_cycle = getattr(__config__, 'cc_ccsd_CCSD_diis_start_cycle', 0)
     # FIXME: Should we avoid DIIS starting early?
     diis_start_energy_diff = getattr(__config__, 'cc_ccsd_CCSD_diis_start_energy_diff', 1e9)
+    diis_dtype = getattr(__config__, 'cc_ccsd_CCSD_diis_dtype', None)
+    diis_compression = getattr(__config__, 'cc_ccsd_CCSD_diis_compression', None)
 
     direct = getattr(__config__, 'cc_ccsd_CCSD_direct', False)
     async_io = getattr(__config__, 'cc_ccsd_CCSD_async_io', True)
@@ -925,7 +946,8 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         keys = set(('max_cycle', 'conv_tol', 'iterative_damping',
                     'conv_tol_normt', 'diis', 'diis_space', 'diis_file',
                     'diis_start_cycle', 'diis_start_energy_diff', 'direct',
-                    'async_io', 'incore_complete', 'cc2'))
+                    'async_io', 'incore_complete', 'cc2', 'diis_dtype',
+                    'diis_compression'))
         self._keys = set(self.__dict__.keys()).union(keys)
 
     @property
@@ -976,6 +998,9 @@ http://sunqm.net/pyscf/code-rule.html#api-rules for the details of API conventio
         #log.info('diis_file = %s', self.diis_file)
         log.info('diis_start_cycle = %d', self.diis_start_cycle)
         log.info('diis_start_energy_diff = %g', self.diis_start_energy_diff)
+        if self.diis_dtype is not None or self.diis_compression:
+            log.info('diis_dtype = %s  diis_compression = %s',
+                     self.diis_dtype, self.diis_compression)
         log.info('max_memory %d MB (current use %d MB)',
                  self.max_memory, lib.current_memory()[0])
         if (log.verbose >= logger.DEBUG1 and
@@ -27,6 +27,7 @@ from pyscf import lib
 from pyscf import symm
 from pyscf.lib import logger
 from pyscf.cc import _ccsd
+from pyscf.ao2mo import _ao2mo
 
 # t3 as ijkabc
 
@@ -41,14 +42,34 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
     nmo = nocc + nvir
 
     dtype = numpy.result_type(t1, t2, eris.ovoo.dtype)
-    if mycc.incore_complete:
+    df_triples = (getattr(mycc, 'with_df', None) is not None and
+                  dtype == numpy.double)
+    if df_triples:
+        # The 3-index tensor (L|vp) is held in memory.  At least half of the
+        # available memory is left for the vvop blocks.
+        naux = mycc.with_df.get_naoaux()
+        mem_df = nvir*nmo*naux * 8/1e6
+        mem_avail = mycc.max_memory - lib.current_memory()[0]
+        if mem_df > mem_avail * .5:
+            log.info('DF-(T) 3-index tensors (%d MB) do not fit in max_memory '
+                     '(%d MB available).  vvop is sorted on disk', mem_df, mem_avail)
+            df_triples = False
+    if df_triples:
+        # DF-(T): vvop blocks are generated from the 3-index tensors on the fly
         ftmp = None
-        eris_vvop = numpy.zeros((nvir,nvir,nocc,nmo), dtype)
+        orbsym = _get_orbsym(mycc, eris, nmo)
+        load_vvop = _make_df_vvop_loader(mycc, eris, orbsym, log)
     else:
-        ftmp = lib.H5TmpFile()
-        eris_vvop = ftmp.create_dataset('vvop', (nvir,nvir,nocc,nmo), dtype)
+        if mycc.incore_complete:
+            ftmp = None
+            eris_vvop = numpy.zeros((nvir,nvir,nocc,nmo), dtype)
+        else:
+            ftmp = lib.H5TmpFile()
+            eris_vvop = ftmp.create_dataset('vvop', (nvir,nvir,nocc,nmo), dtype)
 
-    orbsym = _sort_eri(mycc, eris, nocc, nvir, eris_vvop, log)
+        orbsym = _sort_eri(mycc, eris, nocc, nvir, eris_vvop, log)
+        def load_vvop(a0, a1, b0, b1):
+            return numpy.asarray(eris_vvop[a0:a1,b0:b1], order='C')
 
     mo_energy, t1T, t2T, vooo, fvo, restore_t2_inplace = \
             _sort_t2_vooo_(mycc, orbsym, t1, t2, eris)
@@ -95,29 +116,32 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
         cpu2[:] = log.timer_debug1('contract %d:%d,%d:%d'%(a0,a1,b0,b1), *cpu2)
 
     # The rest 20% memory for cache b
+    # The 3-index tensors of DF-(T) are included in mem_now
     mem_now = lib.current_memory()[0]
     max_memory = max(0, mycc.max_memory - mem_now)
     bufsize = (max_memory*.5e6/8-nocc**3*3*lib.num_threads())/(nocc*nmo)  #*.5 for async_io
     bufsize *= .5  #*.5 upper triangular part is loaded
     bufsize *= .8  #*.8 for [a0:a1]/[b0:b1] partition
+    if df_triples:
+        bufsize *= .5  #*.5 for the intermediates of DF vvop blocks
     bufsize = max(8, bufsize)
     log.debug('max_memory %d MB (%d MB in use)', max_memory, mem_now)
     with lib.call_in_background(contract, sync=not mycc.async_io) as async_contract:
         for a0, a1 in reversed(list(lib.prange_tril(0, nvir, bufsize))):
-            cache_row_a = numpy.asarray(eris_vvop[a0:a1,:a1], order='C')
+            cache_row_a = load_vvop(a0, a1, 0, a1)
             if a0 == 0:
                 cache_col_a = cache_row_a
             else:
-                cache_col_a = numpy.asarray(eris_vvop[:a0,a0:a1], order='C')
+                cache_col_a = load_vvop(0, a0, a0, a1)
             async_contract(a0, a1, a0, a1, (cache_row_a,cache_col_a,
                                             cache_row_a,cache_col_a))
 
             for b0, b1 in lib.prange_tril(0, a0, bufsize/8):
-                cache_row_b = numpy.asarray(eris_vvop[b0:b1,:b1], order='C')
+                cache_row_b = load_vvop(b0, b1, 0, b1)
                 if b0 == 0:
                     cache_col_b = cache_row_b
                 else:
-                    cache_col_b = numpy.asarray(eris_vvop[:b0,b0:b1], order='C')
+                    cache_col_b = load_vvop(0, b0, b0, b1)
                 async_contract(a0, a1, b0, b1, (cache_row_a,cache_col_a,
                                                 cache_row_b,cache_col_b))
 
@@ -131,17 +155,20 @@ def kernel(mycc, eris, t1=None, t2=None, verbose=logger.NOTE):
     log.note('CCSD(T) correction = %.15g', et)
     return et
 
-def _sort_eri(mycc, eris, nocc, nvir, vvop, log):
-    cpu1 = (time.clock(), time.time())
+def _get_orbsym(mycc, eris, nmo):
     mol = mycc.mol
-    nmo = nocc + nvir
-
     if mol.symmetry:
         orbsym = symm.addons.label_orb_symm(mol, mol.irrep_id, mol.symm_orb,
                                             eris.mo_coeff, check=False)
         orbsym = numpy.asarray(orbsym, dtype=numpy.int32) % 10
     else:
         orbsym = numpy.zeros(nmo, dtype=numpy.int32)
+    return orbsym
+
+def _sort_eri(mycc, eris, nocc, nvir, vvop, log):
+    cpu1 = (time.clock(), time.time())
+    nmo = nocc + nvir
+    orbsym = _get_orbsym(mycc, eris, nmo)
 
     o_sorted = _irrep_argsort(orbsym[:nocc])
     v_sorted = _irrep_argsort(orbsym[nocc:])
@@ -172,6 +199,43 @@ def _sort_eri(mycc, eris, nocc, nvir, vvop, log):
 
     return orbsym
 
+def _make_df_vvop_loader(mycc, eris, orbsym, log):
+    '''DF-(T).  Returns a function to generate the blocks of
+    vvop[a,b,i,p] = (ia|pb) from the 3-index tensor (L|vp) of
+    mycc.with_df.  The orbitals are sorted by irreps as in _sort_eri.
+    '''
+    cpu1 = (time.clock(), time.time())
+    nocc = eris.nocc
+    mo_coeff = numpy.asarray(eris.mo_coeff)
+    nmo = mo_coeff.shape[1]
+    nvir = nmo - nocc
+    o_sorted = _irrep_argsort(orbsym[:nocc])
+    v_sorted = _irrep_argsort(orbsym[nocc:])
+    mo = numpy.asarray(numpy.hstack((mo_coeff[:,:nocc][:,o_sorted],
+                                     mo_coeff[:,nocc:][:,v_sorted])), order='F')
+
+    with_df = mycc.with_df
+    naux = with_df.get_naoaux()
+    Lvp = numpy.empty((nvir,nmo,naux))
+    ijslice = (0, nmo, nocc, nmo)
+    p1 = 0
+    Lpv = None
+    for eri1 in with_df.loop():
+        Lpv = _ao2mo.nr_e2(eri1, mo, ijslice, aosym='s2', mosym='s1', out=Lpv)
+        p0, p1 = p1, p1 + Lpv.shape[0]
+        Lpv = Lpv.reshape(p1-p0,nmo,nvir)
+        Lvp[:,:,p0:p1] = Lpv.transpose(2,1,0)
+    Lpv = None
+    log.timer_debug1('DF-(T) 3-index tensors', *cpu1)
+
+    def load_vvop(a0, a1, b0, b1):
+        #: vvop[a,b,i,p] = einsum('aiL,bpL->abip', Lvp[a0:a1,:nocc], Lvp[b0:b1])
+        Lvo = numpy.asarray(Lvp[a0:a1,:nocc], order='C').reshape(-1,naux)
+        vvop = lib.ddot(Lvo, Lvp[b0:b1].reshape(-1,naux).T)
+        vvop = vvop.reshape(a1-a0,nocc,b1-b0,nmo).transpose(0,2,1,3)
+        return numpy.asarray(vvop, order='C')
+    return load_vvop
+
 def _sort_t2_vooo_(mycc, orbsym, t1, t2, eris):
     assert(t2.flags.c_contiguous)
     vooo = numpy.asarray(eris.ovoo).transpose(1,0,3,2).conj().copy()
@@ -16,6 +16,7 @@
 import time
 import ctypes
 import numpy
+import scipy.linalg
 from pyscf import lib
 from pyscf.lib import logger
 from pyscf.ao2mo import _ao2mo
@@ -27,6 +28,24 @@ from pyscf import __config__
 MEMORYMIN = getattr(__config__, 'cc_ccsd_memorymin', 2000)
 
 class RCCSD(ccsd.CCSD):
+    '''DF-CCSD
+
+    Attributes:
+        factorize_vvvv : bool
+            Whether to contract the particle-particle ladder term with the DF
+            vectors of the vv pairs directly.  The cost is
+            O(nocc^2 nvir^3 naux) and the (vv|vv) integrals are never built.
+            Default is False.
+        vvvv_rank_tol : float
+            The DF vectors of the vv pairs are compressed for the factorized
+            ladder.  The components of the (vv|vv) matrix with eigenvalues
+            smaller than vvvv_rank_tol are dropped.  It bounds the 2-norm of
+            the error in (vv|vv).  Default is 1e-10.
+    '''
+
+    factorize_vvvv = getattr(__config__, 'cc_dfccsd_RCCSD_factorize_vvvv', False)
+    vvvv_rank_tol = getattr(__config__, 'cc_dfccsd_RCCSD_vvvv_rank_tol', 1e-10)
+
     def __init__(self, mf, frozen=None, mo_coeff=None, mo_occ=None):
         ccsd.CCSD.__init__(self, mf, frozen, mo_coeff, mo_occ)
         if getattr(mf, 'with_df', None):
@@ -114,9 +133,106 @@ def _contract_vvvv_t2(mycc, mol, vvL, t2, out=None, verbose=None):
     return Ht2.reshape(t2.shape)
 
 
+def _compress_vvL(mycc, vvLs, tol, verbose=None):
+    '''Rotate the DF vectors of vv pairs to the eigenvectors of the metric
+    M[P,Q] = sum_{ac} L[P,a,c] L[Q,a,c] and drop the vectors of which the
+    eigenvalues are smaller than tol.  The dropped part of (vv|vv) is bounded
+    by tol in 2-norm.
+
+    Args:
+        vvLs : a list of DF vectors (in HDF5 or in memory) of the shape
+            (nvir*(nvir+1)/2, naux).  When multiple DF tensors are given (e.g.
+            alpha and beta vv pairs), they are rotated with the same
+            transformation so that the mixed integrals (vv|VV) are factorized
+            with the same auxiliary vectors.
+
+    Returns:
+        A list of the compressed DF vectors of the shape
+        (nvir*(nvir+1)/2, nrank) in memory.
+    '''
+    log = logger.new_logger(mycc, verbose)
+    naux = vvLs[0].shape[1]
+    max_memory = max(MEMORYMIN, mycc.max_memory - lib.current_memory()[0])
+    blksize = max(ccsd.BLKMIN, int(max_memory*.3e6/8/naux))
+
+    metric = numpy.zeros((naux,naux))
+    for vvL in vvLs:
+        nvir_pair = vvL.shape[0]
+        nvir = int(numpy.sqrt(nvir_pair*2))
+        # Off-diagonal pairs (a>c) are counted twice in sum_{ac}
+        weights = numpy.full(nvir_pair, 2.)
+        weights[numpy.arange(nvir)*(numpy.arange(nvir)+3)//2] = 1
+        for p0, p1 in lib.prange(0, nvir_pair, blksize):
+            vvL1 = _cp(vvL[p0:p1])
+            metric += lib.ddot(vvL1.T, vvL1 * weights[p0:p1,None])
+            vvL1 = None
+
+    e, u = scipy.linalg.eigh(metric)
+    mask = e > tol
+    u = u[:,mask]
+    log.debug('vvvv DF vectors compressed from %d to %d (tol = %g)',
+              naux, u.shape[1], tol)
+
+    vvXs = []
+    for vvL in vvLs:
+        nvir_pair = vvL.shape[0]
+        vvX = numpy.empty((nvir_pair,u.shape[1]))
+        for p0, p1 in lib.prange(0, nvir_pair, blksize):
+            lib.ddot(_cp(vvL[p0:p1]), u, c=vvX[p0:p1])
+        vvXs.append(vvX)
+    return vvXs
+
+def _contract_vvvv_t2_factorized(mycc, vvX, VVX, t2, out=None, verbose=None):
+    '''Ht2 = numpy.einsum('ijcd,acbd->ijab', t2, vvVV) with the factorized
+    integrals vvVV[a,c,b,d] = sum_P vvX[ac,P] VVX[bd,P]
+
+    vvX and VVX are the DF vectors of the bra and ket vv pairs, stored in
+    lower triangular (packed) form.  The cost is O(nocc^2 nvir^3 naux).
+    '''
+    time0 = time.clock(), time.time()
+    log = logger.new_logger(mycc, verbose)
+
+    nvira, nvirb = t2.shape[-2:]
+    x2 = t2.reshape(-1,nvira,nvirb)
+    nocc2 = x2.shape[0]
+    nrank = vvX.shape[1]
+    Ht2 = numpy.ndarray(x2.shape, buffer=out)
+    if nocc2 == 0 or nrank == 0:
+        Ht2[:] = 0
+        return Ht2.reshape(t2.shape)
+
+    max_memory = max(MEMORYMIN, mycc.max_memory - lib.current_memory()[0])
+    unit = nocc2*nvira*nvirb*2 + nvira**2 + nvirb**2
+    blksize = int(min(nrank, max(1, max_memory*.8e6/8/unit)))
+    log.debug1('factorized vvvv ladder: nrank = %d  blksize = %d', nrank, blksize)
+
+    # Ht2 is accumulated in the order [a,i,j,b]
+    Ht2T = numpy.zeros((nvira,nocc2*nvirb))
+    for p0, p1 in lib.prange(0, nrank, blksize):
+        nP = p1 - p0
+        La = lib.unpack_tril(_cp(vvX[:,p0:p1].T))
+        Lb = lib.unpack_tril(_cp(VVX[:,p0:p1].T))
+        #: tmp[x,c,P,b] = einsum('xcd,Pbd->xcPb', x2, Lb)
+        tmp = lib.ddot(x2.reshape(-1,nvirb),
+                       Lb.transpose(2,0,1).reshape(nvirb,nP*nvirb))
+        tmp = tmp.reshape(nocc2,nvira,nP,nvirb).transpose(2,1,0,3)
+        tmp = numpy.asarray(tmp, order='C').reshape(nP*nvira,nocc2*nvirb)
+        #: Ht2T[a,x,b] += einsum('Pac,Pcxb->axb', La, tmp)
+        La = La.transpose(1,0,2).reshape(nvira,nP*nvira)
+        lib.ddot(La, tmp, 1, Ht2T, 1)
+        La = Lb = tmp = None
+        time0 = log.timer_debug1('vvvv [%d:%d]'%(p0,p1), *time0)
+
+    Ht2[:] = Ht2T.reshape(nvira,nocc2,nvirb).transpose(1,0,2)
+    return Ht2.reshape(t2.shape)
+
+
 class _ChemistsERIs(ccsd._ChemistsERIs):
     def _contract_vvvv_t2(self, mycc, t2, direct=False, out=None, verbose=None):
         assert(not direct)
+        if getattr(self, 'vvX', None) is not None:
+            return _contract_vvvv_t2_factorized(mycc, self.vvX, self.vvX, t2,
+                                                out, verbose)
         return _contract_vvvv_t2(mycc, self.mol, self.vvL, t2, out, verbose)
 
 def _make_df_eris(cc, mo_coeff=None):
@@ -184,6 +300,9 @@ def _make_df_eris(cc, mo_coeff=None):
             tmpLov = _cp(Lov[:,:,p0:p1]).reshape(naux,-1)
             eris.ovvv[:,p0:p1,q0:q1] = lib.ddot(tmpLov.T, vvL.T).reshape(nocc,p1-p0,q1-q0)
         vvL = None
+
+    if cc.factorize_vvvv:
+        eris.vvX = _compress_vvL(cc, [eris.vvL], cc.vvvv_rank_tol)[0]
     return eris
 
 def _cp(a):
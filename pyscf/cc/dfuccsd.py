@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+DF-UCCSD
+
+The particle-particle ladder term is contracted with the (compressed) DF
+vectors of the vv pairs.  The (vv|vv) integrals are never built.
+'''
+
+import time
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf.ao2mo import _ao2mo
+from pyscf import df
+from pyscf.cc import uccsd
+from pyscf.cc import dfccsd
+from pyscf import __config__
+
+
+class UCCSD(uccsd.UCCSD):
+    '''DF-UCCSD
+
+    Attributes:
+        vvvv_rank_tol : float
+            The DF vectors of the vv pairs are compressed for the ladder term.
+            The components of the (vv|vv) matrix with eigenvalues smaller
+            than vvvv_rank_tol are dropped.  Default is 1e-10.
+    '''
+
+    vvvv_rank_tol = getattr(__config__, 'cc_dfuccsd_UCCSD_vvvv_rank_tol', 1e-10)
+
+    def __init__(self, mf, frozen=None, mo_coeff=None, mo_occ=None):
+        uccsd.UCCSD.__init__(self, mf, frozen, mo_coeff, mo_occ)
+        if getattr(mf, 'with_df', None):
+            self.with_df = mf.with_df
+        else:
+            self.with_df = df.DF(mf.mol)
+            self.with_df.auxbasis = df.make_auxbasis(mf.mol, mp2fit=True)
+        self._keys.update(['with_df'])
+
+    def reset(self, mol=None):
+        self.with_df.reset(mol)
+        return uccsd.UCCSD.reset(self, mol)
+
+    def ao2mo(self, mo_coeff=None):
+        return _make_df_eris(self, mo_coeff)
+
+    def _add_vvvv(self, t1, t2, eris, out=None, with_ovvv=False, t2sym=None):
+        assert(not self.direct)
+        return uccsd.UCCSD._add_vvvv(self, t1, t2, eris, out, with_ovvv, t2sym)
+
+
+class _ChemistsERIs(uccsd._ChemistsERIs):
+    def _contract_vvvv_t2(self, mycc, t2, direct=False, out=None, verbose=None):
+        assert(not direct)
+        return dfccsd._contract_vvvv_t2_factorized(mycc, self.vvX, self.vvX,
+                                                   t2, out, verbose)
+
+    def _contract_VVVV_t2(self, mycc, t2, direct=False, out=None, verbose=None):
+        assert(not direct)
+        return dfccsd._contract_vvvv_t2_factorized(mycc, self.VVX, self.VVX,
+                                                   t2, out, verbose)
+
+    def _contract_vvVV_t2(self, mycc, t2, direct=False, out=None, verbose=None):
+        assert(not direct)
+        return dfccsd._contract_vvvv_t2_factorized(mycc, self.vvX, self.VVX,
+                                                   t2, out, verbose)
+
+def _make_df_eris(mycc, mo_coeff=None):
+    eris = _ChemistsERIs()
+    eris._common_init_(mycc, mo_coeff)
+    log = logger.new_logger(mycc)
+    cput0 = (time.clock(), time.time())
+
+    moa, mob = eris.mo_coeff
+    nocca, noccb = eris.nocc
+    nmoa = moa.shape[1]
+    nmob = mob.shape[1]
+    nvira = nmoa - nocca
+    nvirb = nmob - noccb
+    with_df = mycc.with_df
+    naux = eris.naux = with_df.get_naoaux()
+
+    Loo, Lov, vvL = _make_df_vectors(with_df, moa, nocca, naux)
+    LOO, LOV, VVL = _make_df_vectors(with_df, mob, noccb, naux)
+    Loo = Loo.reshape(naux,nocca**2)
+    LOO = LOO.reshape(naux,noccb**2)
+    Lov = Lov.reshape(naux,nocca*nvira)
+    LOV = LOV.reshape(naux,noccb*nvirb)
+
+    eris.feri = feri = lib.H5TmpFile()
+    feri['oooo'] = lib.ddot(Loo.T, Loo).reshape(nocca,nocca,nocca,nocca)
+    feri['OOOO'] = lib.ddot(LOO.T, LOO).reshape(noccb,noccb,noccb,noccb)
+    feri['ooOO'] = lib.ddot(Loo.T, LOO).reshape(nocca,nocca,noccb,noccb)
+    feri['ovoo'] = lib.ddot(Lov.T, Loo).reshape(nocca,nvira,nocca,nocca)
+    feri['OVOO'] = lib.ddot(LOV.T, LOO).reshape(noccb,nvirb,noccb,noccb)
+    feri['ovOO'] = lib.ddot(Lov.T, LOO).reshape(nocca,nvira,noccb,noccb)
+    feri['OVoo'] = lib.ddot(LOV.T, Loo).reshape(noccb,nvirb,nocca,nocca)
+
+    ovov = lib.ddot(Lov.T, Lov).reshape(nocca,nvira,nocca,nvira)
+    feri['ovov'] = ovov
+    feri['ovvo'] = ovov.transpose(0,1,3,2)
+    ovov = lib.ddot(LOV.T, LOV).reshape(noccb,nvirb,noccb,nvirb)
+    feri['OVOV'] = ovov
+    feri['OVVO'] = ovov.transpose(0,1,3,2)
+    ovov = lib.ddot(Lov.T, LOV).reshape(nocca,nvira,noccb,nvirb)
+    feri['ovOV'] = ovov
+    feri['ovVO'] = ovov.transpose(0,1,3,2)
+    feri['OVvo'] = ovov.transpose(2,3,1,0)
+    ovov = None
+
+    def oovv(Loo, vvL, nocc1, nvir2):
+        oovv = lib.ddot(Loo.T, vvL.T)
+        return lib.unpack_tril(oovv).reshape(nocc1,nocc1,nvir2,nvir2)
+    feri['oovv'] = oovv(Loo, vvL, nocca, nvira)
+    feri['OOVV'] = oovv(LOO, VVL, noccb, nvirb)
+    feri['ooVV'] = oovv(Loo, VVL, nocca, nvirb)
+    feri['OOvv'] = oovv(LOO, vvL, noccb, nvira)
+
+    mem_now = lib.current_memory()[0]
+    max_memory = max(0, mycc.max_memory - mem_now)
+    def ovvv(key, Lov, vvL, nocc1, nvir1):
+        nvir_pair = vvL.shape[0]
+        Lov = Lov.reshape(naux,nocc1,nvir1)
+        ds = feri.create_dataset(key, (nocc1,nvir1,nvir_pair), 'f8')
+        blksize = max(1, int(min(nocc1, max_memory*.3e6/8/(nvir1*(nvir_pair+naux)))))
+        for p0, p1 in lib.prange(0, nocc1, blksize):
+            tmpLov = dfccsd._cp(Lov[:,p0:p1]).reshape(naux,-1)
+            ds[p0:p1] = lib.ddot(tmpLov.T, vvL.T).reshape(p1-p0,nvir1,nvir_pair)
+    ovvv('ovvv', Lov, vvL, nocca, nvira)
+    ovvv('OVVV', LOV, VVL, noccb, nvirb)
+    ovvv('ovVV', Lov, VVL, nocca, nvira)
+    ovvv('OVvv', LOV, vvL, noccb, nvirb)
+
+    for key in feri:
+        setattr(eris, key, feri[key])
+
+    eris.vvX, eris.VVX = dfccsd._compress_vvL(mycc, [vvL, VVL],
+                                              mycc.vvvv_rank_tol)
+    log.timer('DF-UCCSD integral transformation', *cput0)
+    return eris
+
+def _make_df_vectors(with_df, mo, nocc, naux):
+    '''DF vectors (L|oo), (L|ov) and the lower triangular part of (vv|L)'''
+    nmo = mo.shape[1]
+    nvir = nmo - nocc
+    Loo = numpy.empty((naux,nocc,nocc))
+    Lov = numpy.empty((naux,nocc,nvir))
+    vvL = numpy.empty((nvir*(nvir+1)//2,naux))
+    mo = numpy.asarray(mo, order='F')
+    ijslice = (0, nmo, 0, nmo)
+    p1 = 0
+    Lpq = None
+    for eri1 in with_df.loop():
+        Lpq = _ao2mo.nr_e2(eri1, mo, ijslice, aosym='s2', mosym='s1', out=Lpq)
+        p0, p1 = p1, p1 + Lpq.shape[0]
+        Lpq = Lpq.reshape(p1-p0,nmo,nmo)
+        Loo[p0:p1] = Lpq[:,:nocc,:nocc]
+        Lov[p0:p1] = Lpq[:,:nocc,nocc:]
+        vvL[:,p0:p1] = lib.pack_tril(Lpq[:,nocc:,nocc:]).T
+    return Loo, Lov, vvL
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+
+    mol = gto.Mole()
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -0.757 , 0.587)],
+        [1 , (0. , 0.757  , 0.587)]]
+    mol.basis = 'cc-pvdz'
+    mol.spin = 2
+    mol.build()
+    mf = scf.UHF(mol).density_fit('weigend').run()
+    mycc = UCCSD(mf).run()
+    print(mycc.e_corr)
@@ -43,11 +43,36 @@ def kernel(eom, nroots=1, koopmans=False, guess=None, left=False,
     matvec, diag = eom.gen_matvec(imds, left=left, **kwargs)
 
     size = eom.vector_size()
+    if getattr(eom, 'ncvs', None):
+        # Core-valence separation.  The eigenvalue problem is solved in the
+        # space of the excitations which involve the core orbitals.
+        cvs_mask = eom.cvs_mask()
+        log.info('CVS space of %d core orbitals, dimension %d',
+                 eom.ncvs, np.count_nonzero(cvs_mask))
+        if (not left and isinstance(eom, EOMIP) and
+            _block_sigma_enabled(eom, ipccsd_matvec)):
+            full_diag = diag
+            matvec = lambda xs: eom.matvec_cvs(xs, imds, full_diag)
+            diag = diag[cvs_mask]
+        else:
+            log.info('CVS sigma is evaluated in the full space and projected')
+            matvec, diag = _cvs_matvec(matvec, diag, cvs_mask)
+        size = diag.size
+    else:
+        cvs_mask = None
+
     nroots = min(nroots, size)
     if guess is not None:
         user_guess = True
+        if cvs_mask is not None:
+            guess = [g[cvs_mask] if g.size == cvs_mask.size else g
+                     for g in guess]
         for g in guess:
             assert g.size == size
+    elif cvs_mask is not None:
+        user_guess = False
+        guess = _cvs_init_guess(eom, nroots, koopmans, diag, cvs_mask)
+        nroots = len(guess)
     else:
         user_guess = False
         guess = eom.get_init_guess(nroots, koopmans, diag)
@@ -78,6 +103,9 @@ def kernel(eom, nroots=1, koopmans=False, guess=None, left=False,
                            tol=eom.conv_tol, max_cycle=eom.max_cycle,
                            max_space=eom.max_space, nroots=nroots, verbose=log)
 
+    if cvs_mask is not None:
+        vs = [_cvs_unpack(v, cvs_mask) for v in vs]
+
     if eom.verbose >= logger.INFO:
         for n, en, vn, convn in zip(range(nroots), es, vs, conv):
             r1, r2 = eom.vector_to_amplitudes(vn)
@@ -95,6 +123,59 @@ def kernel(eom, nroots=1, koopmans=False, guess=None, left=False,
         return conv, es.real, vs
 
 
+def cvs_mask(eom, ncvs=None):
+    '''Mask of the vector elements in the core-valence separated (CVS) space.
+    The CVS space includes the excitations (ionizations) in which at least one
+    hole is in the ncvs lowest occupied orbitals.
+    '''
+    if ncvs is None: ncvs = eom.ncvs
+    r1, r2 = eom.vector_to_amplitudes(np.zeros(eom.vector_size()))
+    if not (isinstance(r1, np.ndarray) and isinstance(r2, np.ndarray)):
+        raise NotImplementedError('CVS for %s' % eom.__class__)
+    core = np.arange(eom.nocc) < ncvs
+    r1 = np.zeros(r1.shape)
+    r2 = np.zeros(r2.shape)
+    r1[core] = 1
+    r2[core] = 1
+    r2[:,core] = 1
+    return eom.amplitudes_to_vector(r1, r2) != 0
+
+def _cvs_matvec(matvec, diag, mask):
+    '''Restrict matvec and diag to the CVS space'''
+    def cvs_matvec(xs):
+        xs = [_cvs_unpack(x, mask) for x in xs]
+        return [hx[mask] for hx in matvec(xs)]
+    return cvs_matvec, diag[mask]
+
+def _cvs_unpack(x, mask):
+    x_full = np.zeros(mask.size, dtype=x.dtype)
+    x_full[mask] = x
+    return x_full
+
+def _cvs_init_guess(eom, nroots, koopmans, diag, mask):
+    '''Unit vectors of the lowest diagonal elements in the CVS space.  With
+    koopmans, only the 1h (1h1p) elements are considered.'''
+    if koopmans:
+        r1 = eom.vector_to_amplitudes(np.zeros(mask.size))[0]
+        n1 = np.count_nonzero(mask[:r1.size])
+        idx = diag[:n1].argsort()[:nroots]
+    else:
+        idx = diag.argsort()[:nroots]
+    guess = []
+    for i in idx:
+        g = np.zeros(diag.size, diag.dtype)
+        g[i] = 1.0
+        guess.append(g)
+    return guess
+
+def _block_sigma_enabled(eom, matvec):
+    '''Whether the block sigma can be used.  It is disabled for the
+    subclasses which redefine the matvec method.'''
+    cls_matvec = getattr(eom.__class__, 'matvec', None)
+    cls_matvec = getattr(cls_matvec, '__func__', cls_matvec)
+    return getattr(eom, 'block_sigma', False) and cls_matvec is matvec
+
+
 class EOM(lib.StreamObject):
     def __init__(self, cc):
         self.mol = cc.mol
@@ -107,6 +188,16 @@ class EOM(lib.StreamObject):
         self.max_cycle = getattr(__config__, 'eom_rccsd_EOM_max_cycle', cc.max_cycle)
         self.conv_tol = getattr(__config__, 'eom_rccsd_EOM_conv_tol', cc.conv_tol)
         self.partition = getattr(__config__, 'eom_rccsd_EOM_partition', None)
+        # Apply the EOM Hamiltonian to all trial vectors of a Davidson
+        # iteration at once
+        self.block_sigma = getattr(__config__, 'eom_rccsd_EOM_block_sigma', True)
+        # Cache the intermediates on the CCSD object.  They are reused by other
+        # EOM objects which have the same CCSD amplitudes.
+        self.share_imds = getattr(__config__, 'eom_rccsd_EOM_share_imds', False)
+        # Core-valence separation.  If ncvs is set, only the states which have
+        # a hole in the ncvs lowest occupied orbitals are solved (for X-ray
+        # spectra).  It is supported by IP and EE-singlet.
+        self.ncvs = getattr(__config__, 'eom_rccsd_EOM_ncvs', None)
 
 ##################################################
 # don't modify the following attributes, they are not input options
@@ -123,6 +214,10 @@ class EOM(lib.StreamObject):
         logger.info(self, 'max_cycle = %d', self.max_cycle)
         logger.info(self, 'conv_tol = %s', self.conv_tol)
         logger.info(self, 'partition = %s', self.partition)
+        logger.info(self, 'block_sigma = %s', self.block_sigma)
+        logger.info(self, 'share_imds = %s', self.share_imds)
+        if self.ncvs:
+            logger.info(self, 'ncvs = %d', self.ncvs)
         #logger.info(self, 'nocc = %d', self.nocc)
         #logger.info(self, 'nmo = %d', self.nmo)
         logger.info(self, 'max_memory %d MB (current use %d MB)',
@@ -133,6 +228,34 @@ class EOM(lib.StreamObject):
         self._cc.reset(mol)
         return self
 
+    def cvs_mask(self, ncvs=None):
+        raise NotImplementedError('CVS for %s' % self.__class__)
+
+    def _new_imds(self, eris=None, key='ipea'):
+        '''An _IMDS object for the amplitudes of the CCSD object.  If
+        share_imds is set, the integrals and the intermediates are cached on
+        the CCSD object and reused by the EOM objects which have the same
+        amplitudes (and the same eris, if given).  IP and EA share one set of
+        intermediates (key 'ipea').  EE intermediates are held separately (key
+        'ee').  Set cc._eom_imds = None to release the cache.
+        '''
+        cc = self._cc
+        if not getattr(self, 'share_imds', False):
+            return _IMDS(cc, eris=eris)
+
+        cache = getattr(cc, '_eom_imds', None)
+        if (cache is None or cache['t1'] is not cc.t1 or
+            cache['t2'] is not cc.t2 or
+            (eris is not None and cache['eris'] is not eris)):
+            if eris is None:
+                eris = cc.ao2mo()
+            cache = cc._eom_imds = {'t1': cc.t1, 't2': cc.t2, 'eris': eris}
+        if key in cache:
+            logger.debug(self, 'Reuse the cached EOM-CCSD intermediates (%s)', key)
+        else:
+            cache[key] = _IMDS(cc, eris=cache['eris'])
+        return cache[key]
+
 
 def _sort_left_right_eigensystem(eom, right_converged, right_evals, right_evecs,
                                  left_converged, left_evals, left_evecs, tol=1e-6):
@@ -318,6 +441,154 @@ def ipccsd_matvec(eom, vector, imds=None, diag=None):
     vector = amplitudes_to_vector_ip(Hr1, Hr2)
     return vector
 
+def ipccsd_matvec_block(eom, vectors, imds=None, diag=None):
+    '''Apply the IP-EOM-CCSD Hamiltonian to a block of vectors.  It gives
+    the same results as calling :func:`ipccsd_matvec` for each vector.  The
+    vectors are stacked so that each term is evaluated with one GEMM for all
+    vectors.
+
+    Returns:
+        An ndarray of shape (nvec, vector_size).
+    '''
+    if imds is None: imds = eom.make_imds()
+    nocc = eom.nocc
+    nmo = eom.nmo
+    nvir = nmo - nocc
+    vectors = np.asarray(vectors)
+    nvec, size = vectors.shape
+    dtype = np.result_type(vectors, imds.Wovoo)
+    Hvec = np.empty((nvec,size), dtype=dtype)
+
+    Wooov = 2*imds.Wooov - imds.Wooov.transpose(1,0,2,3)
+    if eom.partition == 'mp':
+        fock = imds.eris.fock
+        foo = fock[:nocc,:nocc]
+        fvv = fock[nocc:,nocc:]
+    elif eom.partition == 'full':
+        diag_matrix2 = vector_to_amplitudes_ip(diag, nmo, nocc)[1]
+    else:
+        Wovvo = 2*imds.Wovvo - imds.Wovov.transpose(0,1,3,2)
+        Woovv = 2*imds.Woovv - imds.Woovv.transpose(1,0,2,3)
+
+    mem_now = lib.current_memory()[0]
+    max_memory = max(0, eom.max_memory - mem_now)
+    blksize = min(nvec, max(1, int(max_memory*1e6/16/(size*4))))
+    for p0, p1 in lib.prange(0, nvec, blksize):
+        r1 = vectors[p0:p1,:nocc]
+        r2 = vectors[p0:p1,nocc:].reshape(p1-p0,nocc,nocc,nvir)
+
+        Hr1 = -lib.einsum('ki,nk->ni', imds.Loo, r1)
+        Hr1 += 2*lib.einsum('ld,nild->ni', imds.Fov, r2)
+        Hr1 -= lib.einsum('kd,nkid->ni', imds.Fov, r2)
+        Hr1 -= lib.einsum('klid,nkld->ni', Wooov, r2)
+
+        Hr2 = -lib.einsum('kbij,nk->nijb', imds.Wovoo, r1)
+        if eom.partition == 'mp':
+            Hr2 += lib.einsum('bd,nijd->nijb', fvv, r2)
+            Hr2 -= lib.einsum('ki,nkjb->nijb', foo, r2)
+            Hr2 -= lib.einsum('lj,nilb->nijb', foo, r2)
+        elif eom.partition == 'full':
+            Hr2 += diag_matrix2 * r2
+        else:
+            Hr2 += lib.einsum('bd,nijd->nijb', imds.Lvv, r2)
+            Hr2 -= lib.einsum('ki,nkjb->nijb', imds.Loo, r2)
+            Hr2 -= lib.einsum('lj,nilb->nijb', imds.Loo, r2)
+            Hr2 += lib.einsum('klij,nklb->nijb', imds.Woooo, r2)
+            Hr2 += lib.einsum('lbdj,nild->nijb', Wovvo, r2)
+            Hr2 -= lib.einsum('kbdj,nkid->nijb', imds.Wovvo, r2)
+            Hr2 -= lib.einsum('kbid,nkjd->nijb', imds.Wovov, r2)
+            tmp = lib.einsum('lkdc,nkld->nc', Woovv, r2)
+            Hr2 -= lib.einsum('nc,ijcb->nijb', tmp, imds.t2)
+
+        Hvec[p0:p1,:nocc] = Hr1
+        Hvec[p0:p1,nocc:] = Hr2.reshape(p1-p0,-1)
+    return Hvec
+
+def ipccsd_matvec_cvs(eom, vectors, imds=None, diag=None, ncvs=None):
+    '''Block sigma of IP-EOM-CCSD in the core-valence separated (CVS) space.
+    vectors are the CVS components (the elements of :func:`cvs_mask`) of the
+    trial vectors.  Only the elements with a hole in the ncvs core orbitals,
+    Hr1[c], Hr2[c,j,b] and Hr2[v,c,b] (c for core, v for valence orbitals),
+    are evaluated.
+
+    Returns:
+        An ndarray of shape (nvec, CVS space size).
+    '''
+    if imds is None: imds = eom.make_imds()
+    if ncvs is None: ncvs = eom.ncvs
+    nocc = eom.nocc
+    nmo = eom.nmo
+    nvir = nmo - nocc
+    mask = eom.cvs_mask(ncvs)
+    vectors = np.asarray(vectors)
+    nvec = len(vectors)
+    c = slice(0, ncvs)
+    v = slice(ncvs, nocc)
+    dtype = np.result_type(vectors, imds.Wovoo)
+    Hvec = np.empty((nvec,vectors.shape[1]), dtype=dtype)
+
+    Wooov = 2*imds.Wooov - imds.Wooov.transpose(1,0,2,3)
+    if eom.partition == 'mp':
+        fock = imds.eris.fock
+        foo = fock[:nocc,:nocc]
+        fvv = fock[nocc:,nocc:]
+    elif eom.partition == 'full':
+        diag_matrix2 = vector_to_amplitudes_ip(diag, nmo, nocc)[1]
+    else:
+        foo = imds.Loo
+        fvv = imds.Lvv
+        Wovvo = 2*imds.Wovvo - imds.Wovov.transpose(0,1,3,2)
+        Woovv = 2*imds.Woovv - imds.Woovv.transpose(1,0,2,3)
+
+    size = mask.size
+    mem_now = lib.current_memory()[0]
+    max_memory = max(0, eom.max_memory - mem_now)
+    blksize = min(nvec, max(1, int(max_memory*1e6/16/(size*4))))
+    for p0, p1 in lib.prange(0, nvec, blksize):
+        x = np.zeros((p1-p0,size), dtype=vectors.dtype)
+        x[:,mask] = vectors[p0:p1]
+        r1 = x[:,:ncvs]
+        r2 = x[:,nocc:].reshape(p1-p0,nocc,nocc,nvir)
+        x = None
+
+        Hr1 = -lib.einsum('ki,nk->ni', imds.Loo[c,c], r1)
+        Hr1 += 2*lib.einsum('ld,nild->ni', imds.Fov, r2[:,c])
+        Hr1 -= lib.einsum('kd,nkid->ni', imds.Fov, r2[:,:,c])
+        Hr1 -= lib.einsum('klid,nkld->ni', Wooov[:,:,c], r2)
+
+        Hr2c = -lib.einsum('kbij,nk->nijb', imds.Wovoo[c,:,c], r1)
+        Hr2v = -lib.einsum('kbij,nk->nijb', imds.Wovoo[c,:,v,c], r1)
+        if eom.partition == 'full':
+            Hr2c += diag_matrix2[c] * r2[:,c]
+            Hr2v += diag_matrix2[v,c] * r2[:,v,c]
+        else:
+            Hr2c += lib.einsum('bd,nijd->nijb', fvv, r2[:,c])
+            Hr2v += lib.einsum('bd,nijd->nijb', fvv, r2[:,v,c])
+            Hr2c -= lib.einsum('ki,nkjb->nijb', foo[:,c], r2)
+            Hr2v -= lib.einsum('ki,nkjb->nijb', foo[:,v], r2[:,:,c])
+            Hr2c -= lib.einsum('lj,nilb->nijb', foo, r2[:,c])
+            Hr2v -= lib.einsum('lj,nilb->nijb', foo[:,c], r2[:,v])
+        if eom.partition is None:
+            Hr2c += lib.einsum('klij,nklb->nijb', imds.Woooo[:,:,c], r2)
+            Hr2v += lib.einsum('klij,nklb->nijb', imds.Woooo[:,:,v,c], r2)
+            Hr2c += lib.einsum('lbdj,nild->nijb', Wovvo, r2[:,c])
+            Hr2v += lib.einsum('lbdj,nild->nijb', Wovvo[:,:,:,c], r2[:,v])
+            Hr2c -= lib.einsum('kbdj,nkid->nijb', imds.Wovvo, r2[:,:,c])
+            Hr2v -= lib.einsum('kbdj,nkid->nijb', imds.Wovvo[:,:,:,c], r2[:,:,v])
+            Hr2c -= lib.einsum('kbid,nkjd->nijb', imds.Wovov[:,:,c], r2)
+            Hr2v -= lib.einsum('kbid,nkjd->nijb', imds.Wovov[:,:,v], r2[:,:,c])
+            tmp = lib.einsum('lkdc,nkld->nc', Woovv, r2)
+            Hr2c -= lib.einsum('nc,ijcb->nijb', tmp, imds.t2[c])
+            Hr2v -= lib.einsum('nc,ijcb->nijb', tmp, imds.t2[v,c])
+
+        Hr = np.zeros((p1-p0,size), dtype=dtype)
+        Hr[:,:ncvs] = Hr1
+        Hr2 = Hr[:,nocc:].reshape(p1-p0,nocc,nocc,nvir)
+        Hr2[:,c] = Hr2c
+        Hr2[:,v,c] = Hr2v
+        Hvec[p0:p1] = Hr[:,mask]
+    return Hvec
+
 def lipccsd_matvec(eom, vector, imds=None, diag=None):
     '''For left eigenvector'''
     # Note this is not the same left EA equations used by Nooijen and Bartlett.
@@ -540,6 +811,9 @@ class EOMIP(EOM):
     ipccsd_star = ipccsd_star
 
     matvec = ipccsd_matvec
+    matvec_block = ipccsd_matvec_block
+    matvec_cvs = ipccsd_matvec_cvs
+    cvs_mask = cvs_mask
     l_matvec = lipccsd_matvec
     get_diag = ipccsd_diag
     ccsd_star_contract = ipccsd_star_contract
@@ -552,6 +826,8 @@ class EOMIP(EOM):
         diag = self.get_diag(imds)
         if left:
             matvec = lambda xs: [self.l_matvec(x, imds, diag) for x in xs]
+        elif _block_sigma_enabled(self, ipccsd_matvec):
+            matvec = lambda xs: self.matvec_block(xs, imds, diag)
         else:
             matvec = lambda xs: [self.matvec(x, imds, diag) for x in xs]
         return matvec, diag
@@ -570,7 +846,7 @@ class EOMIP(EOM):
         return nocc + nocc*nocc*nvir
 
     def make_imds(self, eris=None):
-        imds = _IMDS(self._cc, eris=eris)
+        imds = self._new_imds(eris)
         imds.make_ip(self.partition)
         return imds
 
@@ -664,6 +940,74 @@ def eaccsd_matvec(eom, vector, imds=None, diag=None):
     vector = amplitudes_to_vector_ea(Hr1,Hr2)
     return vector
 
+def eaccsd_matvec_block(eom, vectors, imds=None, diag=None):
+    '''Apply the EA-EOM-CCSD Hamiltonian to a block of vectors.  It gives
+    the same results as calling :func:`eaccsd_matvec` for each vector.  The
+    vectors are stacked so that each term is evaluated with one GEMM for all
+    vectors, and Wvvvv is read once for all vectors.
+
+    Returns:
+        An ndarray of shape (nvec, vector_size).
+    '''
+    if imds is None: imds = eom.make_imds()
+    nocc = eom.nocc
+    nmo = eom.nmo
+    nvir = nmo - nocc
+    vectors = np.asarray(vectors)
+    nvec, size = vectors.shape
+    dtype = np.result_type(vectors, imds.Wvvvo)
+    Hvec = np.empty((nvec,size), dtype=dtype)
+
+    Wvovv = 2*imds.Wvovv - imds.Wvovv.transpose(0,1,3,2)
+    if eom.partition == 'mp':
+        fock = imds.eris.fock
+        foo = fock[:nocc,:nocc]
+        fvv = fock[nocc:,nocc:]
+    elif eom.partition == 'full':
+        diag_matrix2 = vector_to_amplitudes_ea(diag, nmo, nocc)[1]
+    else:
+        Wovvo = 2*imds.Wovvo - imds.Wovov.transpose(0,1,3,2)
+        Woovv = 2*imds.Woovv - imds.Woovv.transpose(0,1,3,2)
+
+    mem_now = lib.current_memory()[0]
+    max_memory = max(0, eom.max_memory - mem_now)
+    blksize = min(nvec, max(1, int(max_memory*.5e6/16/(size*4))))
+    for p0, p1 in lib.prange(0, nvec, blksize):
+        r1 = vectors[p0:p1,:nvir]
+        r2 = vectors[p0:p1,nvir:].reshape(p1-p0,nocc,nvir,nvir)
+
+        Hr1 = lib.einsum('ac,nc->na', imds.Lvv, r1)
+        Hr1 += 2*lib.einsum('ld,nlad->na', imds.Fov, r2)
+        Hr1 -= lib.einsum('ld,nlda->na', imds.Fov, r2)
+        Hr1 += lib.einsum('alcd,nlcd->na', Wvovv, r2)
+
+        Hr2 = lib.einsum('abcj,nc->njab', imds.Wvvvo, r1)
+        if eom.partition == 'mp':
+            Hr2 += lib.einsum('ac,njcb->njab', fvv, r2)
+            Hr2 += lib.einsum('bd,njad->njab', fvv, r2)
+            Hr2 -= lib.einsum('lj,nlab->njab', foo, r2)
+        elif eom.partition == 'full':
+            Hr2 += diag_matrix2 * r2
+        else:
+            Hr2 += lib.einsum('ac,njcb->njab', imds.Lvv, r2)
+            Hr2 += lib.einsum('bd,njad->njab', imds.Lvv, r2)
+            Hr2 -= lib.einsum('lj,nlab->njab', imds.Loo, r2)
+            Hr2 += lib.einsum('lbdj,nlad->njab', Wovvo, r2)
+            Hr2 -= lib.einsum('lajc,nlcb->njab', imds.Wovov, r2)
+            Hr2 -= lib.einsum('lbcj,nlca->njab', imds.Wovvo, r2)
+            r2vv = r2.reshape(-1,nvir**2)
+            vblk = max(1, int(max_memory*.5e6/16/(nvir**3+r2vv.shape[0]*nvir)))
+            for a0, a1 in lib.prange(0, nvir, vblk):
+                Wvvvv = np.asarray(imds.Wvvvv[a0:a1]).reshape(-1,nvir**2)
+                tmp = lib.dot(r2vv, Wvvvv.T).reshape(p1-p0,nocc,a1-a0,nvir)
+                Hr2[:,:,a0:a1] += tmp
+            tmp = lib.einsum('klcd,nlcd->nk', Woovv, r2)
+            Hr2 -= lib.einsum('nk,kjab->njab', tmp, imds.t2)
+
+        Hvec[p0:p1,:nvir] = Hr1
+        Hvec[p0:p1,nvir:] = Hr2.reshape(p1-p0,-1)
+    return Hvec
+
 def leaccsd_matvec(eom, vector, imds=None, diag=None):
     # Note this is not the same left EA equations used by Nooijen and Bartlett.
     # Small changes were made so that the same type L2 basis was used for both the
@@ -901,6 +1245,7 @@ class EOMEA(EOM):
     eaccsd_star = eaccsd_star
 
     matvec = eaccsd_matvec
+    matvec_block = eaccsd_matvec_block
     l_matvec = leaccsd_matvec
     get_diag = eaccsd_diag
     ccsd_star_contract = eaccsd_star_contract
@@ -913,6 +1258,8 @@ class EOMEA(EOM):
         diag = self.get_diag(imds)
         if left:
             matvec = lambda xs: [self.l_matvec(x, imds, diag) for x in xs]
+        elif _block_sigma_enabled(self, eaccsd_matvec):
+            matvec = lambda xs: self.matvec_block(xs, imds, diag)
         else:
             matvec = lambda xs: [self.matvec(x, imds, diag) for x in xs]
         return matvec, diag
@@ -931,7 +1278,7 @@ class EOMEA(EOM):
         return nvir + nocc*nvir*nvir
 
     def make_imds(self, eris=None):
-        imds = _IMDS(self._cc, eris=eris)
+        imds = self._new_imds(eris)
         imds.make_ea(self.partition)
         return imds
 
@@ -965,6 +1312,9 @@ def eeccsd(eom, nroots=1, koopmans=False, guess=None, eris=None, imds=None):
         guess : list of ndarray
             List of guess vectors to use for targeting via overlap.
     '''
+    if getattr(eom, 'ncvs', None):
+        raise NotImplementedError('CVS for the spin-adapted EOM-EE.  '
+                                  'Use EOMEESinglet for the CVS excitations')
     if eris is None: eris = eom._cc.ao2mo()
     if imds is None: imds = eom.make_imds(eris)
 
@@ -1639,7 +1989,7 @@ class EOMEE(EOM):
         return nocc*nvir + nocc*nocc*nvir*nvir
 
     def make_imds(self, eris=None):
-        imds = _IMDS(self._cc, eris=eris)
+        imds = self._new_imds(eris, 'ee')
         imds.make_ee()
         return imds
 
@@ -1652,6 +2002,7 @@ class EOMEESinglet(EOMEE):
     kernel = eomee_ccsd_singlet
     eomee_ccsd_singlet = eomee_ccsd_singlet
     matvec = eeccsd_matvec_singlet
+    cvs_mask = cvs_mask
 
     def gen_matvec(self, imds=None, diag=None, **kwargs):
         if imds is None: imds = self.make_imds()
@@ -1747,7 +2098,16 @@ class _IMDS:
         if eris is None:
             eris = cc.ao2mo()
         self.eris = eris
+        self._made_shared_1e = False
         self._made_shared_2e = False
+        self.made_ee_imds = False
+
+    def _reset(self):
+        '''Drop the IP/EA intermediates so that they are regenerated'''
+        self._made_shared_1e = False
+        self._made_shared_2e = False
+        for key in ('Woooo', 'Wooov', 'Wovoo', 'Wvovv', 'Wvvvv', 'Wvvvo'):
+            self.__dict__.pop(key, None)
 
     def _make_shared_1e(self):
         cput0 = (time.clock(), time.time())
@@ -1757,6 +2117,7 @@ class _IMDS:
         self.Lvv = imd.Lvv(t1, t2, eris)
         self.Fov = imd.cc_Fov(t1, t2, eris)
 
+        self._made_shared_1e = True
         logger.timer_debug1(self, 'EOM-CCSD shared one-electron '
                             'intermediates', *cput0)
         return self
@@ -1776,7 +2137,10 @@ class _IMDS:
         return self
 
     def make_ip(self, ip_partition=None):
-        self._make_shared_1e()
+        '''IP intermediates.  The intermediates which already exist are not
+        regenerated.'''
+        if not self._made_shared_1e:
+            self._make_shared_1e()
         if not self._made_shared_2e and ip_partition != 'mp':
             self._make_shared_2e()
 
@@ -1786,10 +2150,11 @@ class _IMDS:
         t1, t2, eris = self.t1, self.t2, self.eris
 
         # 0 or 1 virtuals
-        if ip_partition != 'mp':
+        if ip_partition != 'mp' and getattr(self, 'Woooo', None) is None:
             self.Woooo = imd.Woooo(t1, t2, eris)
-        self.Wooov = imd.Wooov(t1, t2, eris)
-        self.Wovoo = imd.Wovoo(t1, t2, eris)
+        if getattr(self, 'Wovoo', None) is None:
+            self.Wooov = imd.Wooov(t1, t2, eris)
+            self.Wovoo = imd.Wovoo(t1, t2, eris)
         log.timer_debug1('EOM-CCSD IP intermediates', *cput0)
         return self
 
@@ -1803,7 +2168,7 @@ class _IMDS:
         self.t1 = pt1
         self.t2 = pt2
 
-        self._made_shared_2e = False  # Force update
+        self._reset()  # Force update
         self.make_ip()  # Make after t1/t2 updated
         self.Wovoo = self.Wovoo + Wovoo
 
@@ -1812,7 +2177,10 @@ class _IMDS:
 
 
     def make_ea(self, ea_partition=None):
-        self._make_shared_1e()
+        '''EA intermediates.  The intermediates which already exist are not
+        regenerated.'''
+        if not self._made_shared_1e:
+            self._make_shared_1e()
         if not self._made_shared_2e and ea_partition != 'mp':
             self._make_shared_2e()
 
@@ -1822,12 +2190,15 @@ class _IMDS:
         t1, t2, eris = self.t1, self.t2, self.eris
 
         # 3 or 4 virtuals
-        self.Wvovv = imd.Wvovv(t1, t2, eris)
-        if ea_partition == 'mp':
-            self.Wvvvo = imd.Wvvvo(t1, t2, eris)
-        else:
+        if getattr(self, 'Wvovv', None) is None:
+            self.Wvovv = imd.Wvovv(t1, t2, eris)
+        if ea_partition != 'mp' and getattr(self, 'Wvvvv', None) is None:
             self.Wvvvv = imd.Wvvvv(t1, t2, eris)
-            self.Wvvvo = imd.Wvvvo(t1, t2, eris, self.Wvvvv)
+        if getattr(self, 'Wvvvo', None) is None:
+            if ea_partition == 'mp':
+                self.Wvvvo = imd.Wvvvo(t1, t2, eris)
+            else:
+                self.Wvvvo = imd.Wvvvo(t1, t2, eris, self.Wvvvv)
         log.timer_debug1('EOM-CCSD EA intermediates', *cput0)
         return self
 
@@ -1841,7 +2212,7 @@ class _IMDS:
         self.t1 = pt1
         self.t2 = pt2
 
-        self._made_shared_2e = False  # Force update
+        self._reset()  # Force update
         self.make_ea()  # Make after t1/t2 updated
         self.Wvvvo = self.Wvvvo + Wvvvo
 
@@ -1850,6 +2221,8 @@ class _IMDS:
 
 
     def make_ee(self):
+        if self.made_ee_imds:
+            return self
         cput0 = (time.clock(), time.time())
         log = logger.Logger(self.stdout, self.verbose)
 
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Frozen natural orbital (FNO) CCSD and CCSD(T)
+
+The virtual space is truncated to the natural orbitals of the MP2 density
+whose occupation numbers are above a threshold.  CCSD (and (T)) are solved in
+the truncated space.  The truncation error is corrected with the difference
+between the MP2 energies of the full and the truncated spaces (delta-MP2).
+
+With density fitting, the MP2 energies and the virtual density matrix are
+computed from the in-core 3-index integrals, and DF-CCSD and DF-(T) are used
+in the truncated space.
+
+Ref: Taube, Bartlett, J. Chem. Phys. 128, 164101 (2008)
+'''
+
+import time
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf.cc import ccsd
+from pyscf.cc import dfccsd
+from pyscf.mp import mp2
+from pyscf.mp import dfmp2
+from pyscf import __config__
+
+THRESH = getattr(__config__, 'cc_fnoccsd_thresh', 1e-6)
+
+
+def make_fno(pt, thresh=THRESH, pct_occ=None, nvir_act=None, verbose=None):
+    '''Frozen natural orbitals of the MP2 object pt.  Unlike
+    :func:`mp2.make_fno`, pt.frozen can be set to freeze core orbitals, and
+    the full MP2 amplitudes are not stored.
+
+    Kwargs:
+        thresh : float
+            Virtual NOs with occupation numbers larger than thresh are kept.
+        pct_occ : float
+            If given, the virtual NOs which make up pct_occ of the total
+            virtual occupation are kept.  It overrides thresh.
+        nvir_act : int
+            If given, the number of virtual NOs to keep.  It overrides thresh
+            and pct_occ.
+
+    Returns:
+        e_mp2 : float
+            MP2 correlation energy of the full space
+        frozen : list
+            Indices of the frozen orbitals in no_coeff
+        no_coeff : ndarray
+            Occupied MOs followed by the semicanonical active virtual NOs and
+            the frozen virtual NOs.
+    '''
+    log = logger.new_logger(pt, verbose)
+    cput0 = (time.clock(), time.time())
+    mf = pt._scf
+    mo_coeff = pt.mo_coeff
+    mo_energy = mf.mo_energy
+    nocc = numpy.count_nonzero(pt.mo_occ > 0)
+    nmo = mo_coeff.shape[1]
+    ncore = nocc - pt.nocc
+    if pt.nmo != nmo - ncore:
+        raise NotImplementedError('FNO with frozen virtual orbitals')
+
+    e_mp2, dvv = _vir_dm1(pt)
+    n, v = numpy.linalg.eigh(dvv)
+    idx = numpy.argsort(n)[::-1]
+    n, v = n[idx], v[:,idx]
+
+    if nvir_act is None:
+        if pct_occ is None:
+            nvir_act = numpy.count_nonzero(n > thresh)
+        else:
+            nvir_act = numpy.count_nonzero(numpy.cumsum(n/n.sum()) < pct_occ)
+    log.info('FNO: %d active virtual orbitals out of %d', nvir_act, n.size)
+    log.debug('Virtual NO occupations %s', n)
+
+    fvv = numpy.dot(v[:,:nvir_act].T * mo_energy[nocc:], v[:,:nvir_act])
+    v_canon = numpy.linalg.eigh(fvv)[1]
+    no_coeff = numpy.hstack((mo_coeff[:,:nocc],
+                             numpy.dot(mo_coeff[:,nocc:],
+                                       numpy.dot(v[:,:nvir_act], v_canon)),
+                             numpy.dot(mo_coeff[:,nocc:], v[:,nvir_act:])))
+    frozen = list(range(ncore)) + list(range(nocc+nvir_act, nmo))
+    if not frozen:
+        frozen = None
+    log.timer('FNO', *cput0)
+    return e_mp2, frozen, no_coeff
+
+def _vir_dm1(pt):
+    '''MP2 correlation energy and the virtual block of the MP2 density
+    matrix.  The amplitudes are generated on the fly for each occupied
+    orbital.'''
+    nocc = pt.nocc
+    nvir = pt.nmo - nocc
+    if isinstance(pt, dfmp2.DFMP2):
+        eris = pt.ao2mo()
+        mo_energy = eris.mo_energy
+        eia = mo_energy[:nocc,None] - mo_energy[None,nocc:]
+        naux = pt.with_df.get_naoaux()
+        Lov = numpy.empty((naux, nocc*nvir))
+        p1 = 0
+        for qov in pt.loop_ao2mo(eris.mo_coeff, nocc):
+            p0, p1 = p1, p1 + qov.shape[0]
+            Lov[p0:p1] = qov
+
+        emp2 = 0
+        dvv = numpy.zeros((nvir,nvir))
+        for i in range(nocc):
+            gi = lib.ddot(Lov[:,i*nvir:(i+1)*nvir].T, Lov)
+            gi = gi.reshape(nvir,nocc,nvir).transpose(1,0,2)
+            t2i = gi/lib.direct_sum('jb+a->jba', eia, eia[i])
+            emp2 += numpy.einsum('jab,jab', t2i, gi) * 2
+            emp2 -= numpy.einsum('jab,jba', t2i, gi)
+            dvv += numpy.einsum('jca,jcb->ba', t2i, t2i) * 2
+            dvv -= numpy.einsum('jca,jbc->ba', t2i, t2i)
+    else:
+        eris = pt.ao2mo()
+        emp2 = pt.kernel(eris=eris, with_t2=False)[0]
+        dvv = mp2._gamma1_intermediates(pt, None, eris)[1]
+    return emp2, dvv
+
+
+class FNOCCSD(ccsd.CCSD):
+    '''CCSD in the frozen natural orbital space
+
+    Attributes:
+        thresh : float
+            Threshold on the virtual NO occupation numbers.  Default is 1e-6.
+        pct_occ : float
+            Percentage of the total virtual occupation to keep.  If given, it
+            overrides thresh.
+        nvir_act : int
+            Number of active virtual NOs.  If given, it overrides thresh and
+            pct_occ.
+        frozen_core : int or list
+            Orbitals frozen in MP2 and CCSD (the frozen argument).  The
+            frozen attribute is overwritten by the frozen core and the frozen
+            virtual NOs when the FNOs are built.
+        with_t : bool
+            Whether to compute the (T) correction in the kernel.  Default is
+            False.
+
+    The FNOs and delta_emp2 are built in the kernel, and rebuilt when
+    thresh, pct_occ, nvir_act or frozen_core are changed.
+
+    Saved results
+
+        delta_emp2 : float
+            MP2 correlation energy of the full space minus that of the FNO
+            space.
+        e_t : float
+            (T) correction in the FNO space.  It is 0 until the (T)
+            correction is computed.
+        e_corr_fno : float
+            e_corr + delta_emp2 + e_t
+        e_tot_fno : float
+            HF energy + e_corr_fno
+
+    Examples:
+
+    >>> mf = scf.RHF(mol).run()
+    >>> mycc = cc.fnoccsd.FNOCCSD(mf, frozen=1, thresh=1e-5)
+    >>> mycc.with_t = True
+    >>> mycc.run()
+    >>> print(mycc.e_tot_fno)
+    '''
+
+    with_t = getattr(__config__, 'cc_fnoccsd_FNOCCSD_with_t', False)
+
+    def __init__(self, mf, frozen=None, thresh=THRESH, pct_occ=None,
+                 nvir_act=None):
+        super(FNOCCSD, self).__init__(mf, frozen)
+        self.thresh = thresh
+        self.pct_occ = pct_occ
+        self.nvir_act = nvir_act
+        # Orbitals frozen in MP2 and CCSD.  self.frozen and self.mo_coeff are
+        # overwritten by build_fno
+        self.frozen_core = frozen
+
+        self.e_mp2_full = None
+        self.delta_emp2 = None
+        self.e_t = 0
+        self._fno_args = None
+        self._keys.update(['thresh', 'pct_occ', 'nvir_act', 'with_t',
+                           'frozen_core', 'e_mp2_full', 'delta_emp2', 'e_t'])
+
+    def _make_mp2(self, mf, frozen=None, mo_coeff=None):
+        pt = mp2.MP2(mf, frozen, mo_coeff)
+        pt.verbose = 0
+        return pt
+
+    def build_fno(self):
+        '''Truncate the virtual space and compute the delta-MP2 correction.
+        Called by ccsd() when the truncation parameters change.'''
+        mf = self._scf
+        pt = self._make_mp2(mf, self.frozen_core)
+        if getattr(self, 'with_df', None):
+            pt.with_df = self.with_df
+        e_mp2, frozen_no, no_coeff = make_fno(pt, self.thresh, self.pct_occ,
+                                              self.nvir_act, self.verbose)
+        pt_no = self._make_mp2(mf, frozen_no, no_coeff)
+        if getattr(self, 'with_df', None):
+            pt_no.with_df = self.with_df
+        e_mp2_no = pt_no.kernel(with_t2=False)[0]
+
+        self.frozen = frozen_no
+        self.mo_coeff = no_coeff
+        self.e_mp2_full = e_mp2
+        self.delta_emp2 = e_mp2 - e_mp2_no
+        self._fno_args = self._get_fno_args()
+        return self
+
+    def _get_fno_args(self):
+        return (self.thresh, self.pct_occ, self.nvir_act, self.frozen_core)
+
+    @property
+    def e_corr_fno(self):
+        return self.e_corr + self.delta_emp2 + self.e_t
+
+    @property
+    def e_tot_fno(self):
+        return (self.e_hf or self._scf.e_tot) + self.e_corr_fno
+
+    def dump_flags(self, verbose=None):
+        ccsd.CCSD.dump_flags(self, verbose)
+        log = logger.new_logger(self, verbose)
+        log.info('FNO thresh = %g  pct_occ = %s  nvir_act = %s',
+                 self.thresh, self.pct_occ, self.nvir_act)
+        if self.delta_emp2 is not None:
+            log.info('delta-MP2 = %.15g', self.delta_emp2)
+        return self
+
+    def ccsd(self, t1=None, t2=None, eris=None):
+        if self._fno_args != self._get_fno_args():
+            if eris is not None:
+                raise RuntimeError('eris were generated before the FNOs were built')
+            self.build_fno()
+        self.e_t = 0
+        if self.with_t and eris is None:
+            eris = self.ao2mo(self.mo_coeff)
+        ccsd.CCSD.ccsd(self, t1, t2, eris)
+        if self.with_t:
+            self.ccsd_t(eris=eris)
+        return self.e_corr, self.t1, self.t2
+
+    def ccsd_t(self, t1=None, t2=None, eris=None):
+        self.e_t = ccsd.CCSD.ccsd_t(self, t1, t2, eris)
+        logger.note(self, 'E(FNO-CCSD(T)+delta-MP2) = %.16g  E_corr = %.16g',
+                    self.e_tot_fno, self.e_corr_fno)
+        return self.e_t
+
+    def _finalize(self):
+        ccsd.CCSD._finalize(self)
+        logger.note(self, 'E(FNO-CCSD+delta-MP2) = %.16g  E_corr = %.16g',
+                    self.e_tot+self.delta_emp2,
+                    self.e_corr+self.delta_emp2)
+        return self
+
+
+class DFFNOCCSD(FNOCCSD, dfccsd.RCCSD):
+    '''FNO-CCSD with density fitting.  The DF object of the SCF is used if
+    available.  Otherwise the 3-index integrals are generated with the
+    MP2-fitting auxiliary basis.'''
+    def _make_mp2(self, mf, frozen=None, mo_coeff=None):
+        pt = dfmp2.DFMP2(mf, frozen, mo_coeff)
+        pt.verbose = 0
+        return pt
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+
+    mol = gto.Mole()
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -0.757 , 0.587)],
+        [1 , (0. , 0.757  , 0.587)]]
+    mol.basis = 'cc-pvtz'
+    mol.build()
+    mf = scf.RHF(mol).run()
+    mycc = FNOCCSD(mf, frozen=1, thresh=1e-4)
+    mycc.with_t = True
+    mycc.run()
+    print(mycc.e_tot_fno)
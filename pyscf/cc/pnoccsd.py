@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+r'''
+Local CCSD with pair natural orbitals (PNO)
+
+The active occupied orbitals are localized (Boys or Pipek-Mezey).  For each
+pair of localized orbitals (LMOs) IJ, the semicanonical MP2 amplitudes
+
+    T_{IJ}^{ab} = (Ia|Jb) / (F_II + F_JJ - e_a - e_b)
+
+give the pair energy and the pair density.  The pairs with small MP2 pair
+energy are screened.  The natural orbitals of the pair densities (PNOs) are
+truncated by the occupation number.
+
+The correlation energy is partitioned over the LMOs.  For LMO I, CCSD is
+solved in the domain made of the LMOs J of the strong pairs IJ and the union
+of the PNOs of these pairs.  The energy of the domain is evaluated with the
+occupied index of the amplitudes projected on LMO I.  The errors of the
+pair screening and the PNO truncation are corrected at the MP2 level
+
+    E_corr = E_MP2 + \sum_I (E_I^{CCSD} - E_I^{MP2})
+
+where E_I^{MP2} is the MP2 energy of domain I with the same projection.  The
+canonical CCSD energy is recovered when both thresholds are 0.
+
+Ref: Riplinger, Neese, JCP 138, 034106 (2013); Rolik, Kallay, JCP 135, 104111
+(2011)
+'''
+
+import time
+from functools import reduce
+import numpy
+import scipy.linalg
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf import ao2mo
+from pyscf.ao2mo import _ao2mo
+from pyscf import lo
+from pyscf.cc import ccsd
+from pyscf import __config__
+
+LO_METHOD = getattr(__config__, 'cc_pnoccsd_PNOCCSD_lo_method', 'boys')
+PAIR_THRESH = getattr(__config__, 'cc_pnoccsd_PNOCCSD_pair_thresh', 1e-5)
+PNO_THRESH = getattr(__config__, 'cc_pnoccsd_PNOCCSD_pno_thresh', 1e-7)
+
+
+def kernel(mypno, lmo=None, verbose=None):
+    '''Local PNO-CCSD correlation energy
+
+    Kwargs:
+        lmo : ndarray
+            Localized active occupied orbitals.  If not given, they are
+            generated by :meth:`localize`.
+
+    Returns:
+        e_corr, e_frag (the contribution of each LMO)
+    '''
+    log = logger.new_logger(mypno, verbose)
+    cput0 = cput1 = (time.clock(), time.time())
+    mf = mypno._scf
+    mo_coeff = mf.mo_coeff
+    mo_energy = mf.mo_energy
+    nocc = numpy.count_nonzero(mf.mo_occ > 0)
+    ncore = mypno.ncore
+    orbv = mo_coeff[:,nocc:]
+
+    if lmo is None:
+        lmo = mypno.localize()
+    nlmo = lmo.shape[1]
+    fock = mf.get_fock()
+    foo = reduce(numpy.dot, (lmo.T, fock, lmo))
+    cput1 = log.timer('localization', *cput1)
+
+    mypno.e_mp2 = mypno._canonical_mp2()
+    cput1 = log.timer('canonical MP2', *cput1)
+
+    get_ovov = _make_ovov_loader(mypno, lmo, orbv)
+    ev = mo_energy[nocc:]
+    evv = ev[:,None] + ev
+    e_pair = numpy.zeros((nlmo,nlmo))
+    domains = []
+    for i in range(nlmo):
+        ovov = get_ovov(i)
+        pnos = []
+        occ_dom = []
+        for j in range(nlmo):
+            kij = ovov[:,j]
+            tij = kij / (foo[i,i] + foo[j,j] - evv)
+            e_pair[i,j] = numpy.einsum('ab,ab', tij, kij*2-kij.T)
+            if i != j and abs(e_pair[i,j]) < mypno.pair_thresh:
+                continue
+            occ_dom.append(j)
+            dm = _pair_density(tij, i == j)
+            w, v = scipy.linalg.eigh(dm)
+            pnos.append(v[:,abs(w) > mypno.pno_thresh])
+        domains.append((occ_dom, _union_space(numpy.hstack(pnos))))
+    log.info('Semicanonical MP2 pair energy %.15g', e_pair.sum())
+    cput1 = log.timer('PNO construction', *cput1)
+
+    e_frag = numpy.zeros(nlmo)
+    mypno.converged = True
+    mypno.domain_size = numpy.zeros((nlmo,2), dtype=int)
+    s = mf.get_ovlp()
+    fvv = numpy.diag(ev)
+    for i, (occ_dom, vir_dom) in enumerate(domains):
+        nocc_dom = len(occ_dom)
+        nvir_dom = vir_dom.shape[1]
+        e_weak = e_pair[i].sum() - e_pair[i,occ_dom].sum()
+        log.debug('LMO %d  domain nocc = %d  nvir = %d  weak pairs E = %.6g',
+                  i, nocc_dom, nvir_dom, e_weak)
+        mypno.domain_size[i] = (nocc_dom, nvir_dom)
+
+        # Semicanonical orbitals of the domain
+        c_occ = lmo[:,occ_dom]
+        w, u = scipy.linalg.eigh(reduce(numpy.dot, (c_occ.T, fock, c_occ)))
+        c_occ = numpy.dot(c_occ, u)
+        w, u = scipy.linalg.eigh(reduce(numpy.dot, (vir_dom.T, fvv, vir_dom)))
+        c_vir = numpy.dot(orbv, numpy.dot(vir_dom, u))
+        c_vir_frz = numpy.dot(orbv, scipy.linalg.null_space(vir_dom.T))
+        frz_occ = numpy.setdiff1d(numpy.arange(nlmo), occ_dom)
+        c_occ_frz = numpy.hstack((mo_coeff[:,:ncore], lmo[:,frz_occ]))
+        nfrz = c_occ_frz.shape[1]
+        mo = numpy.hstack((c_occ_frz, c_occ, c_vir, c_vir_frz))
+        frozen = list(range(nfrz)) + list(range(nocc+nvir_dom, mo.shape[1]))
+
+        mycc = mypno._make_domain_ccsd(mo, frozen or None)
+        eris = mycc.ao2mo()
+        t2mp = mycc.init_amps(eris)[2]
+        mycc.kernel(eris=eris)
+        mypno.converged &= mycc.converged
+
+        # Coefficients of LMO i in the domain occupied orbitals
+        ui = reduce(numpy.dot, (c_occ.T, s, lmo[:,i]))
+        e_cc = _project_energy(ui, mycc.t1, mycc.t2, eris)
+        e_mp = _project_energy(ui, None, t2mp, eris)
+        e_frag[i] = e_cc - e_mp
+        log.info('LMO %d  E(CCSD) = %.15g  E(MP2) = %.15g  domain (%d, %d)',
+                 i, e_cc, e_mp, nocc_dom, nvir_dom)
+        cput1 = log.timer('domain CCSD %d' % i, *cput1)
+
+    e_corr = mypno.e_mp2 + e_frag.sum()
+    log.timer('PNO-CCSD', *cput0)
+    return e_corr, e_frag
+
+def _pair_density(tij, diagonal):
+    '''Pair density (T~^+ T + T~ T^+) / (1 + delta_ij) of the amplitudes of
+    pair ij in the virtual space'''
+    tt = tij * 2 - tij.T
+    dm = numpy.dot(tt.T, tij) + numpy.dot(tt, tij.T)
+    if diagonal:
+        dm *= .5
+    return dm
+
+def _union_space(vecs, tol=1e-7):
+    '''Orthonormal basis of the space spanned by vecs'''
+    if vecs.shape[1] == 0:
+        return vecs
+    u, s = scipy.linalg.svd(vecs, full_matrices=False)[:2]
+    return u[:,s > tol]
+
+def _project_energy(ui, t1, t2, eris):
+    '''CCSD energy with the first occupied index of tau projected on the
+    vector ui'''
+    nocc = t2.shape[0]
+    tau = numpy.einsum('i,ijab->jab', ui, t2)
+    if t1 is not None:
+        tau += numpy.einsum('a,jb->jab', numpy.dot(ui, t1), t1)
+    ovvo = numpy.asarray(eris.ovvo)
+    w = numpy.einsum('i,iabj->jab', ui, ovvo) * 2
+    w -= numpy.einsum('i,jabi->jab', ui, ovvo)
+    e = numpy.einsum('jab,jab', tau, w)
+    if t1 is not None:
+        e += numpy.dot(ui, numpy.einsum('ia,ia->i', eris.fock[:nocc,nocc:], t1)) * 2
+    return e
+
+def _make_ovov_loader(mypno, lmo, orbv):
+    '''A function which returns the (Ia|Jb) integrals of LMO I, in the shape
+    (nvir, nlmo, nvir)'''
+    mf = mypno._scf
+    nlmo = lmo.shape[1]
+    nvir = orbv.shape[1]
+    if getattr(mf, 'with_df', None):
+        with_df = mf.with_df
+        naux = with_df.get_naoaux()
+        mo = numpy.asarray(numpy.hstack((lmo, orbv)), order='F')
+        ijslice = (0, nlmo, nlmo, nlmo+nvir)
+        Lov = numpy.empty((naux,nlmo,nvir))
+        p1 = 0
+        for eri1 in with_df.loop():
+            Lpq = _ao2mo.nr_e2(eri1, mo, ijslice, aosym='s2', mosym='s1')
+            p0, p1 = p1, p1 + Lpq.shape[0]
+            Lov[p0:p1] = Lpq.reshape(p1-p0,nlmo,nvir)
+        Lov = Lov.reshape(naux,nlmo*nvir)
+        def get_ovov(i):
+            return lib.ddot(Lov.reshape(naux,nlmo,nvir)[:,i].T,
+                            Lov).reshape(nvir,nlmo,nvir)
+    else:
+        if mf._eri is not None:
+            eri = mf._eri
+        else:
+            eri = mf.mol
+        ovov = ao2mo.general(eri, (lmo,orbv,lmo,orbv), compact=False)
+        ovov = ovov.reshape(nlmo,nvir,nlmo,nvir)
+        def get_ovov(i):
+            return ovov[i]
+    return get_ovov
+
+
+class PNOCCSD(lib.StreamObject):
+    '''Local CCSD in the pair natural orbital domains of localized orbitals
+
+    Attributes:
+        frozen : int
+            Number of frozen core orbitals.  Default is 0.
+        lo_method : str
+            Localization method for the occupied orbitals, 'boys' or 'pipek'.
+            Default is 'boys'.
+        pair_thresh : float
+            LMO pairs with absolute semicanonical MP2 pair energy below
+            pair_thresh are excluded from the CCSD domains.  Default is 1e-5.
+        pno_thresh : float
+            PNOs with occupation numbers below pno_thresh are dropped.
+            Default is 1e-7.
+        conv_tol : float
+            conv_tol of the CCSD of each domain.  Default is 1e-7.
+
+    Saved results
+
+        e_corr : float
+            PNO-CCSD correlation energy, including the MP2 correction of
+            the truncated space.
+        e_mp2 : float
+            Canonical MP2 correlation energy
+        e_frag : ndarray
+            Contribution of each LMO to (e_corr - e_mp2)
+        converged : bool
+            Whether the CCSD of all domains converged.
+        domain_size : ndarray, shape (nlmo,2)
+            Number of occupied and virtual orbitals of the domain of each LMO
+
+    Examples:
+
+    >>> mf = scf.RHF(mol).run()
+    >>> mycc = cc.pnoccsd.PNOCCSD(mf, frozen=1).run()
+    >>> print(mycc.e_tot)
+    '''
+
+    lo_method = LO_METHOD
+    pair_thresh = PAIR_THRESH
+    pno_thresh = PNO_THRESH
+    conv_tol = getattr(__config__, 'cc_pnoccsd_PNOCCSD_conv_tol', 1e-7)
+
+    def __init__(self, mf, frozen=None):
+        self.mol = mf.mol
+        self._scf = mf
+        self.verbose = self.mol.verbose
+        self.stdout = self.mol.stdout
+        self.max_memory = mf.max_memory
+        self.frozen = frozen
+
+##################################################
+# don't modify the following attributes, they are not input options
+        self.lmo = None
+        self.e_corr = None
+        self.e_mp2 = None
+        self.e_frag = None
+        self.domain_size = None
+        self.converged = False
+        keys = set(('lo_method', 'pair_thresh', 'pno_thresh', 'conv_tol'))
+        self._keys = set(self.__dict__.keys()).union(keys)
+
+    @property
+    def ncore(self):
+        if self.frozen is None:
+            return 0
+        elif isinstance(self.frozen, (int, numpy.integer)):
+            return self.frozen
+        else:
+            raise NotImplementedError('PNOCCSD frozen must be an integer')
+
+    @property
+    def e_tot(self):
+        return self._scf.e_tot + self.e_corr
+
+    def dump_flags(self, verbose=None):
+        log = logger.new_logger(self, verbose)
+        log.info('')
+        log.info('******** %s ********', self.__class__)
+        log.info('frozen core = %d', self.ncore)
+        log.info('lo_method = %s', self.lo_method)
+        log.info('pair_thresh = %g', self.pair_thresh)
+        log.info('pno_thresh = %g', self.pno_thresh)
+        log.info('conv_tol = %g', self.conv_tol)
+        return self
+
+    def localize(self, mo_coeff=None):
+        '''Localized active occupied orbitals'''
+        mf = self._scf
+        if mo_coeff is None:
+            nocc = numpy.count_nonzero(mf.mo_occ > 0)
+            mo_coeff = mf.mo_coeff[:,self.ncore:nocc]
+        method = self.lo_method.lower()
+        if method in ('boys', 'fb'):
+            loc = lo.Boys(self.mol, mo_coeff)
+        elif method in ('pipek', 'pm'):
+            loc = lo.PM(self.mol, mo_coeff)
+        else:
+            raise KeyError('Unknown localization method %s' % self.lo_method)
+        loc.verbose = self.verbose - 1
+        loc.stdout = self.stdout
+        return loc.kernel()
+
+    def _canonical_mp2(self):
+        from pyscf import mp
+        pt = mp.MP2(self._scf, frozen=self.frozen or None)
+        pt.verbose = self.verbose - 1
+        pt.stdout = self.stdout
+        return pt.kernel(with_t2=False)[0]
+
+    def _make_domain_ccsd(self, mo_coeff, frozen):
+        mf = self._scf
+        mo_occ = numpy.zeros(mo_coeff.shape[1])
+        mo_occ[:numpy.count_nonzero(mf.mo_occ > 0)] = 2
+        if getattr(mf, 'with_df', None):
+            from pyscf.cc import dfccsd
+            mycc = dfccsd.RCCSD(mf, frozen, mo_coeff, mo_occ)
+            # The domains have few occupied orbitals.  The ladder term is
+            # cheaper with the compressed DF vectors.
+            mycc.factorize_vvvv = True
+        else:
+            mycc = ccsd.CCSD(mf, frozen, mo_coeff, mo_occ)
+        mycc.verbose = self.verbose - 2
+        mycc.stdout = self.stdout
+        mycc.conv_tol = self.conv_tol
+        mycc.max_memory = self.max_memory
+        return mycc
+
+    def kernel(self, lmo=None):
+        if self.verbose >= logger.WARN:
+            self.check_sanity()
+        self.dump_flags()
+        if lmo is None:
+            lmo = self.lmo
+        if lmo is None:
+            lmo = self.lmo = self.localize()
+        self.e_corr, self.e_frag = kernel(self, lmo, verbose=self.verbose)
+        self._finalize()
+        return self.e_corr
+
+    def _finalize(self):
+        if not self.converged:
+            logger.note(self, 'PNO-CCSD not converged')
+        logger.note(self, 'E(PNO-CCSD) = %.16g  E_corr = %.16g',
+                    self.e_tot, self.e_corr)
+        return self
+
+
+if __name__ == '__main__':
+    from pyscf import gto
+    from pyscf import scf
+
+    mol = gto.Mole()
+    mol.atom = '''
+    C   0.000   0.000   0.000
+    C   0.000   0.000   1.540
+    H   1.019   0.000  -0.385
+    H  -0.510   0.882  -0.385
+    H  -0.510  -0.882  -0.385
+    H  -1.019   0.000   1.925
+    H   0.510  -0.882   1.925
+    H   0.510   0.882   1.925'''
+    mol.basis = 'cc-pvdz'
+    mol.build()
+    mf = scf.RHF(mol).run()
+    mycc = PNOCCSD(mf, frozen=2).run()
+    print(mycc.e_corr)
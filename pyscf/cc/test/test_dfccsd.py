@@ -85,6 +85,42 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(lib.finger(numpy.array(eris.ovvv)), 59.418747028576142, 12)
         self.assertAlmostEqual(lib.finger(numpy.array(eris.vvvv)), 43.562457227975969, 12)
 
+    def test_factorize_vvvv(self):
+        numpy.random.seed(2)
+        t2 = numpy.random.random((no,no,nv,nv)) - .5
+        ref = eris1._contract_vvvv_t2(mycc1, t2)
+        mycc1.factorize_vvvv = True
+        try:
+            eris = mycc1.ao2mo()
+        finally:
+            mycc1.factorize_vvvv = False
+        self.assertAlmostEqual(abs(eris._contract_vvvv_t2(mycc1, t2) - ref).max(), 0, 9)
+
+        mycc2 = dfccsd.RCCSD(mf).set(factorize_vvvv=True, conv_tol=1e-10)
+        self.assertAlmostEqual(mycc2.kernel()[0], cc1.e_corr, 8)
+        mycc2.vvvv_rank_tol = 1e-3
+        eris = mycc2.ao2mo()
+        self.assertTrue(eris.vvX.shape[1] < eris.naux)
+        self.assertAlmostEqual(mycc2.kernel(eris=eris)[0], cc1.e_corr, 5)
+
+
+    def test_df_ccsd_t(self):
+        from pyscf.cc import ccsd_t
+        eris = cc1.ao2mo()
+        e_t = ccsd_t.kernel(cc1, eris)
+        self.assertAlmostEqual(e_t, -0.000994360147793466, 9)
+        mycc2 = cc.ccsd.CCSD(mf)
+        mycc2.t1, mycc2.t2 = cc1.t1, cc1.t2
+        mycc2.max_memory = cc1.max_memory = 1
+        try:
+            self.assertAlmostEqual(ccsd_t.kernel(mycc2, eris), e_t, 12)
+            # The DF 3-index tensors do not fit in max_memory.  vvop on disk
+            self.assertAlmostEqual(ccsd_t.kernel(cc1, eris), e_t, 12)
+            # Small vvop blocks generated from the DF 3-index tensors
+            cc1.max_memory = lib.current_memory()[0] + 1
+            self.assertAlmostEqual(ccsd_t.kernel(cc1, eris), e_t, 12)
+        finally:
+            cc1.max_memory = mol.max_memory
 
     def test_df_ipccsd(self):
         e,v = mycc.ipccsd(nroots=1)
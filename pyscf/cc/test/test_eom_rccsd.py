@@ -334,6 +334,117 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(lib.finger(vec1), -17030.363405297598, 9)
         self.assertAlmostEqual(lib.finger(diag), 4688.9122122011922, 9)
 
+    def test_ip_matvec_block(self):
+        numpy.random.seed(1)
+        myeom = eom_rccsd.EOMIP(mycc1)
+        vecs = numpy.random.random((4,myeom.vector_size())) - .9
+        for partition in (None, 'mp', 'full'):
+            myeom.partition = partition
+            imds = myeom.make_imds(eris1)
+            diag = myeom.get_diag(imds)
+            ref = [myeom.matvec(v, imds, diag) for v in vecs]
+            vec1 = myeom.matvec_block(vecs, imds, diag)
+            self.assertAlmostEqual(abs(vec1 - numpy.array(ref)).max(), 0, 9)
+
+        myeom = eom_rccsd.EOMIP(mycci)
+        imds = myeom.make_imds(erisi)
+        vecs = vecs + numpy.random.random(vecs.shape) * .2j
+        ref = [myeom.matvec(v, imds) for v in vecs]
+        vec1 = myeom.matvec_block(vecs, imds)
+        self.assertAlmostEqual(abs(vec1 - numpy.array(ref)).max(), 0, 9)
+
+    def test_ea_matvec_block(self):
+        numpy.random.seed(1)
+        myeom = eom_rccsd.EOMEA(mycc1)
+        vecs = numpy.random.random((4,myeom.vector_size())) - .9
+        for partition in (None, 'mp', 'full'):
+            myeom.partition = partition
+            imds = myeom.make_imds(eris1)
+            diag = myeom.get_diag(imds)
+            ref = [myeom.matvec(v, imds, diag) for v in vecs]
+            vec1 = myeom.matvec_block(vecs, imds, diag)
+            self.assertAlmostEqual(abs(vec1 - numpy.array(ref)).max(), 0, 8)
+
+        myeom = eom_rccsd.EOMEA(mycci)
+        imds = myeom.make_imds(erisi)
+        vecs = vecs + numpy.random.random(vecs.shape) * .2j
+        ref = [myeom.matvec(v, imds) for v in vecs]
+        vec1 = myeom.matvec_block(vecs, imds)
+        self.assertAlmostEqual(abs(vec1 - numpy.array(ref)).max(), 0, 8)
+
+    def test_share_imds(self):
+        mycc2 = copy.copy(mycc)
+        mycc2._eom_imds = None
+        eip_ref = mycc.ipccsd(nroots=3)[0]
+        eea_ref = mycc.eaccsd(nroots=3)[0]
+        eee_ref = mycc.eeccsd(nroots=3)[0]
+
+        eom_ip = eom_rccsd.EOMIP(mycc2)
+        eom_ip.share_imds = True
+        eom_ea = eom_rccsd.EOMEA(mycc2)
+        eom_ea.share_imds = True
+        eom_ea.block_sigma = False
+        eom_ee = eom_rccsd.EOMEESinglet(mycc2)
+        eom_ee.share_imds = True
+        imds = eom_ip.make_imds()
+        self.assertTrue(eom_ea.make_imds() is imds)
+        self.assertTrue(eom_ee.make_imds().eris is imds.eris)
+
+        self.assertAlmostEqual(abs(eom_ip.kernel(nroots=3)[0] - eip_ref).max(), 0, 8)
+        self.assertAlmostEqual(abs(eom_ea.kernel(nroots=3)[0] - eea_ref).max(), 0, 8)
+        eom_ee = eom_rccsd.EOMEE(mycc2)
+        eom_ee.share_imds = True
+        self.assertAlmostEqual(abs(eom_ee.kernel(nroots=3)[0] - eee_ref).max(), 0, 8)
+
+        # New amplitudes invalidate the cache
+        mycc2.t1 = mycc2.t1.copy()
+        self.assertTrue(eom_ip.make_imds() is not imds)
+
+    def test_cvs(self):
+        mol1 = gto.M(atom=mol.atom, basis='631g', verbose=0)
+        mf1 = scf.RHF(mol1).run()
+        mycc2 = rccsd.RCCSD(mf1).run()
+        for cls in (eom_rccsd.EOMIP, eom_rccsd.EOMEESinglet):
+            myeom = cls(mycc2)
+            myeom.ncvs = 1
+            imds = myeom.make_imds()
+            mask = myeom.cvs_mask()
+            self.assertEqual(mask.size, myeom.vector_size())
+            idx = numpy.where(mask)[0]
+            h = []
+            for i in idx:
+                x = numpy.zeros(mask.size)
+                x[i] = 1
+                h.append(myeom.matvec(x, imds)[mask])
+            eref = numpy.sort(numpy.linalg.eigvals(numpy.array(h)).real)
+            e, v = myeom.kernel(nroots=2, imds=imds)
+            self.assertAlmostEqual(e[0], eref[0], 6)
+            self.assertAlmostEqual(abs(e[1] - eref).min(), 0, 6)
+            self.assertEqual(v[0].size, mask.size)
+            self.assertAlmostEqual(abs(v[0][~mask]).max(), 0, 12)
+
+            e, v = myeom.kernel(nroots=1, koopmans=True, imds=imds)
+            self.assertAlmostEqual(e, eref[0], 6)
+
+        # sigma restricted to the CVS blocks
+        myeom = eom_rccsd.EOMIP(mycc2)
+        myeom.ncvs = 2
+        mask = myeom.cvs_mask()
+        numpy.random.seed(3)
+        xs = numpy.random.random((3,numpy.count_nonzero(mask))) - .5
+        for partition in (None, 'mp', 'full'):
+            myeom.partition = partition
+            imds = myeom.make_imds()
+            diag = myeom.get_diag(imds)
+            ref = [myeom.matvec(eom_rccsd._cvs_unpack(x, mask), imds, diag)[mask]
+                   for x in xs]
+            hx = myeom.matvec_cvs(xs, imds, diag)
+            self.assertAlmostEqual(abs(hx - numpy.array(ref)).max(), 0, 12)
+
+        myeom = eom_rccsd.EOMEE(mycc2)
+        myeom.ncvs = 1
+        self.assertRaises(NotImplementedError, myeom.kernel)
+
 
 ########################################
 # Complex integrals
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from pyscf import gto
+from pyscf import scf
+from pyscf import mp
+from pyscf import cc
+from pyscf.cc import fnoccsd
+
+mol = gto.Mole()
+mol.verbose = 7
+mol.output = '/dev/null'
+mol.atom = [
+    [8 , (0. , 0.     , 0.)],
+    [1 , (0. , -0.757 , 0.587)],
+    [1 , (0. , 0.757  , 0.587)]]
+mol.basis = 'cc-pvdz'
+mol.build()
+mf = scf.RHF(mol).run(conv_tol=1e-12)
+
+def tearDownModule():
+    global mol, mf
+    mol.stdout.close()
+    del mol, mf
+
+
+class KnownValues(unittest.TestCase):
+    def test_make_fno(self):
+        pt = mp.MP2(mf, frozen=1).run()
+        e_mp2, frozen, no_coeff = fnoccsd.make_fno(pt, thresh=1e-4)
+        self.assertAlmostEqual(e_mp2, pt.e_corr, 10)
+        self.assertEqual(frozen[0], 0)
+        self.assertEqual(frozen, [0, 22, 23])
+
+        pt1 = mp.MP2(mf, frozen=[0]).run()
+        self.assertAlmostEqual(fnoccsd.make_fno(pt1, nvir_act=15)[0], e_mp2, 10)
+
+    def test_fno_ccsd_t(self):
+        mycc = cc.CCSD(mf, frozen=1).run(conv_tol=1e-10)
+        e_t = mycc.ccsd_t()
+
+        myfno = fnoccsd.FNOCCSD(mf, frozen=1, thresh=1e-12)
+        myfno.conv_tol = 1e-10
+        myfno.with_t = True
+        myfno.run()
+        self.assertAlmostEqual(myfno.delta_emp2, 0, 9)
+        self.assertAlmostEqual(myfno.e_corr_fno, mycc.e_corr+e_t, 7)
+
+        myfno = cc.FNOCCSD(mf, thresh=1e-4, frozen=1)
+        myfno.with_t = True
+        myfno.run()
+        self.assertEqual(myfno.nmo, 21)
+        self.assertAlmostEqual(myfno.delta_emp2, -0.0003505425132530049, 9)
+        self.assertAlmostEqual(myfno.e_t, -0.0029815252181618016, 8)
+        self.assertAlmostEqual(myfno.e_tot_fno, mycc.e_tot+e_t, 3)
+
+        # Truncation is rebuilt when the FNO parameters are changed
+        myfno.set(thresh=1e-12, with_t=False).run(conv_tol=1e-10)
+        self.assertEqual(myfno.nmo, 23)
+        self.assertAlmostEqual(myfno.delta_emp2, 0, 9)
+        self.assertAlmostEqual(myfno.e_corr_fno, mycc.e_corr, 7)
+        myfno.nvir_act = 15
+        myfno.run()
+        self.assertEqual(myfno.nmo, 19)
+
+    def test_df_fno_ccsd_t(self):
+        mf1 = scf.RHF(mol).density_fit().run(conv_tol=1e-12)
+        mycc = cc.CCSD(mf1).run(conv_tol=1e-10)
+        e_t = mycc.ccsd_t()
+
+        myfno = cc.FNOCCSD(mf1, thresh=1e-12)
+        myfno.conv_tol = 1e-10
+        self.assertTrue(isinstance(myfno, fnoccsd.DFFNOCCSD))
+        myfno.run()
+        self.assertAlmostEqual(myfno.e_corr_fno, mycc.e_corr, 7)
+        myfno.ccsd_t()
+        self.assertAlmostEqual(myfno.e_t, e_t, 7)
+
+
+if __name__ == "__main__":
+    print("Full Tests for FNO-CCSD(T)")
+    unittest.main()
@@ -26,6 +26,7 @@ from pyscf.cc import uccsd
 from pyscf.cc import gccsd
 from pyscf.cc import rccsd
 from pyscf.cc import dfccsd
+from pyscf.cc import dfuccsd
 
 mol = gto.Mole()
 mol.verbose = 7
@@ -80,6 +81,20 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(mcc.ecc, -0.21124878189922872, 8)
         self.assertAlmostEqual(abs(mcc.t2).sum(), 5.4996425901189347, 6)
 
+    def test_ccsd_outcore_diis(self):
+        mcc = cc.ccsd.CC(mf, frozen=1)
+        mcc.conv_tol = 1e-10
+        mcc.diis_dtype = numpy.float32
+        mcc.diis_compression = 'lzf'
+        mcc.kernel()
+        self.assertAlmostEqual(mcc.ecc, -0.21124878189922872, 7)
+
+        mcc = cc.UCCSD(mf, frozen=1)
+        mcc.conv_tol = 1e-10
+        mcc.diis_dtype = numpy.float32
+        mcc.kernel()
+        self.assertAlmostEqual(mcc.ecc, -0.21124878189922872, 7)
+
     def test_ccsd_cart(self):
         pmol = mol.copy()
         pmol.cart = True
@@ -176,17 +191,17 @@ class KnownValues(unittest.TestCase):
         self.assertTrue(isinstance(cc.CCSD(mf.density_fit().newton().density_fit()), dfccsd.RCCSD))
 
         self.assertTrue(isinstance(cc.UCCSD(mf), uccsd.UCCSD))
-#        self.assertTrue(isinstance(cc.UCCSD(mf.density_fit()), dfccsd.UCCSD))
+        self.assertTrue(isinstance(cc.UCCSD(mf.density_fit()), dfuccsd.UCCSD))
         self.assertTrue(isinstance(cc.UCCSD(mf.newton()), uccsd.UCCSD))
-#        self.assertTrue(isinstance(cc.UCCSD(mf.density_fit().newton()), dfccsd.UCCSD))
+        self.assertTrue(isinstance(cc.UCCSD(mf.density_fit().newton()), dfuccsd.UCCSD))
         self.assertTrue(isinstance(cc.UCCSD(mf.newton().density_fit()), uccsd.UCCSD))
-#        self.assertTrue(not isinstance(cc.UCCSD(mf.newton().density_fit()), dfccsd.UCCSD))
-#        self.assertTrue(isinstance(cc.UCCSD(mf.density_fit().newton().density_fit()), dfccsd.UCCSD))
+        self.assertTrue(not isinstance(cc.UCCSD(mf.newton().density_fit()), dfuccsd.UCCSD))
+        self.assertTrue(isinstance(cc.UCCSD(mf.density_fit().newton().density_fit()), dfuccsd.UCCSD))
         self.assertTrue(isinstance(cc.CCSD(scf.GHF(mol)), gccsd.GCCSD))
 
         umf = scf.convert_to_uhf(mf, scf.UHF(mol))
         self.assertTrue(isinstance(cc.CCSD(umf), uccsd.UCCSD))
-#        self.assertTrue(isinstance(cc.CCSD(umf.density_fit()), dfccsd.UCCSD))
+        self.assertTrue(isinstance(cc.CCSD(umf.density_fit()), dfuccsd.UCCSD))
         self.assertTrue(isinstance(cc.CCSD(umf.newton()), uccsd.UCCSD))
 #        self.assertTrue(isinstance(cc.CCSD(umf.density_fit().newton()), dfccsd.UCCSD))
         self.assertTrue(isinstance(cc.CCSD(umf.newton().density_fit()), uccsd.UCCSD))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from pyscf import gto
+from pyscf import scf
+from pyscf import cc
+from pyscf.cc import pnoccsd
+
+mol = gto.Mole()
+mol.verbose = 7
+mol.output = '/dev/null'
+mol.atom = '''
+O   0.000   0.000   0.000
+H   0.000   0.757   0.587
+H   0.000  -0.757   0.587
+O   0.000   0.000   3.000
+H   0.000   0.757   3.587
+H   0.000  -0.757   3.587'''
+mol.basis = '631g'
+mol.build()
+mf = scf.RHF(mol).run(conv_tol=1e-12)
+mycc = cc.CCSD(mf, frozen=2).run(conv_tol=1e-10)
+
+def tearDownModule():
+    global mol, mf, mycc
+    mol.stdout.close()
+    del mol, mf, mycc
+
+
+class KnownValues(unittest.TestCase):
+    def test_no_truncation(self):
+        mypno = pnoccsd.PNOCCSD(mf, frozen=2)
+        mypno.pair_thresh = 0
+        mypno.pno_thresh = 0
+        mypno.conv_tol = 1e-10
+        mypno.kernel()
+        self.assertTrue(mypno.converged)
+        self.assertAlmostEqual(mypno.e_corr, mycc.e_corr, 7)
+        self.assertAlmostEqual(mypno.e_tot, mycc.e_tot, 7)
+
+    def test_truncation(self):
+        mypno = pnoccsd.PNOCCSD(mf, frozen=2)
+        mypno.pair_thresh = 1e-4
+        mypno.pno_thresh = 1e-5
+        e_corr = mypno.kernel()
+        self.assertAlmostEqual(e_corr, mycc.e_corr, 4)
+        self.assertEqual(mypno.e_frag.size, 8)
+        # 8 active occupied and 16 virtual orbitals in the canonical CCSD
+        self.assertTrue(all(mypno.domain_size[:,0] < 8))
+        self.assertTrue(any(mypno.domain_size[:,1] < 16))
+
+        mypno.lo_method = 'pipek'
+        mypno.lmo = None
+        self.assertAlmostEqual(mypno.kernel(), mycc.e_corr, 4)
+
+    def test_truncation_error(self):
+        err = []
+        for pair_thresh, pno_thresh in [(1e-3, 1e-4), (1e-4, 1e-5), (1e-6, 1e-7)]:
+            mypno = pnoccsd.PNOCCSD(mf, frozen=2)
+            mypno.pair_thresh = pair_thresh
+            mypno.pno_thresh = pno_thresh
+            err.append(abs(mypno.kernel() - mycc.e_corr))
+            if pno_thresh == 1e-4:
+                self.assertTrue(all(mypno.domain_size[:,1] < 16))
+        self.assertTrue(err[0] > err[1] > err[2])
+        self.assertTrue(err[2] < 1e-5)
+
+    def test_density_fit(self):
+        mf1 = scf.RHF(mol).density_fit().run(conv_tol=1e-12)
+        eref = cc.CCSD(mf1, frozen=2).run(conv_tol=1e-10).e_corr
+        mypno = pnoccsd.PNOCCSD(mf1, frozen=2)
+        mypno.pair_thresh = 0
+        mypno.pno_thresh = 0
+        mypno.conv_tol = 1e-10
+        self.assertAlmostEqual(mypno.kernel(), eref, 7)
+
+
+if __name__ == "__main__":
+    print("Full Tests for PNO-CCSD")
+    unittest.main()
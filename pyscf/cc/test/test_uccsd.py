@@ -67,10 +67,19 @@ def tearDownModule():
     del mol, rhf, mf, myucc, mol_s2, mf_s2, eris
 
 class KnownValues(unittest.TestCase):
-#    def test_with_df(self):
-#        mf = scf.UHF(mol).density_fit(auxbasis='weigend').run()
-#        mycc = cc.UCCSD(mf).run()
-#        self.assertAlmostEqual(mycc.e_tot, -76.118403942938741, 7)
+    def test_with_df(self):
+        mf = scf.UHF(mol).density_fit(auxbasis='weigend').run()
+        mycc = cc.UCCSD(mf).run()
+        self.assertAlmostEqual(mycc.e_tot, -76.118403942938741, 7)
+
+    def test_with_df_open_shell(self):
+        mf = scf.UHF(mol_s2).density_fit(auxbasis='weigend').run()
+        mycc = cc.UCCSD(mf).run(conv_tol=1e-10)
+        ref = uccsd.UCCSD(mf)
+        eris = uccsd._make_eris_incore(
+            ref, ao2mofn=lambda mo: mf.with_df.ao2mo(mo, compact=False))
+        ref.kernel(eris=eris)
+        self.assertAlmostEqual(mycc.e_corr, ref.e_corr, 7)
 
     def test_ERIS(self):
         ucc1 = cc.UCCSD(mf)
@@ -683,7 +683,7 @@ class UCCSD(ccsd.CCSD):
         elif getattr(self._scf, 'with_df', None):
             logger.warn(self, 'UCCSD detected DF being used in the HF object. '
                         'MO integrals are computed based on the DF 3-index tensors.\n'
-                        'It\'s recommended to use dfccsd.CCSD for the '
+                        'It\'s recommended to use dfuccsd.UCCSD for the '
                         'DF-CCSD calculations')
             raise NotImplementedError
 
@@ -726,8 +726,16 @@ class UCCSD(ccsd.CCSD):
         from pyscf.cc import eom_uccsd
         return eom_uccsd.EOMEE(self)
 
-    def density_fit(self):
-        raise NotImplementedError
+    def density_fit(self, auxbasis=None, with_df=None):
+        from pyscf.cc import dfuccsd
+        mycc = dfuccsd.UCCSD(self._scf, self.frozen, self.mo_coeff, self.mo_occ)
+        if with_df is not None:
+            mycc.with_df = with_df
+        if mycc.with_df.auxbasis != auxbasis:
+            import copy
+            mycc.with_df = copy.copy(mycc.with_df)
+            mycc.with_df.auxbasis = auxbasis
+        return mycc
 
     def nuc_grad_method(self):
         from pyscf.grad import uccsd
@@ -25,6 +25,7 @@ from functools import reduce
 import numpy
 from pyscf import lib
 from pyscf.lib import logger
+from pyscf.ao2mo import _ao2mo
 from pyscf.cc import ccsd
 from pyscf.cc import ccsd_rdm
 from pyscf.fci import cistring
@@ -42,8 +43,12 @@ def kernel(myci, eris, ci0=None, max_cycle=50, tol=1e-8, verbose=logger.INFO):
     if ci0 is None:
         ci0 = myci.get_init_guess(eris=eris, nroots=myci.nroots, diag=diag)[1]
 
-    def op(xs):
-        return [myci.contract(x, eris) for x in xs]
+    if myci.batch_sigma:
+        def op(xs):
+            return myci.contract_multi(xs, eris)
+    else:
+        def op(xs):
+            return [myci.contract(x, eris) for x in xs]
 
     def precond(x, e, *args):
         diagd = diag - (e-myci.level_shift)
@@ -102,81 +107,142 @@ def make_diagonal(myci, eris):
     return numpy.hstack((ehf, e1diag.reshape(-1), e2diag.reshape(-1)))
 
 def contract(myci, civec, eris):
+    return contract_multi(myci, [civec], eris)[0]
+
+def contract_multi(myci, civecs, eris):
+    '''Apply the CISD Hamiltonian to several CI vectors.  The integral blocks
+    are loaded once for all vectors and the vvvv contractions of all vectors
+    are carried out in one pass over the vvvv integrals.
+    '''
     time0 = time.clock(), time.time()
     log = logger.Logger(myci.stdout, myci.verbose)
     nocc = myci.nocc
     nmo = myci.nmo
     nvir = nmo - nocc
-    c0, c1, c2 = myci.cisdvec_to_amplitudes(civec, nmo, nocc)
+    nvec = len(civecs)
+
+    # Split the vectors into batches if the intermediates of all vectors do
+    # not fit in memory
+    max_memory = max(0, myci.max_memory - lib.current_memory()[0])
+    batch = max(1, int(max_memory*.3e6/8/(nocc**2*nvir**2*4)))
+    if nvec > batch:
+        return [x for p0, p1 in lib.prange(0, nvec, batch)
+                for x in contract_multi(myci, civecs[p0:p1], eris)]
 
-    t2 = myci._add_vvvv(c2, eris, t2sym='jiba')
-    t2 *= .5  # due to t2+t2.transpose(1,0,3,2) in the end
+    c0s, c1s, c2s = zip(*[myci.cisdvec_to_amplitudes(x, nmo, nocc)
+                          for x in civecs])
+
+    t2s = _add_vvvv_multi(myci, c2s, eris)
+    for t2 in t2s:
+        t2 *= .5  # due to t2+t2.transpose(1,0,3,2) in the end
     time1 = log.timer_debug1('vvvv', *time0)
 
     foo = eris.fock[:nocc,:nocc].copy()
     fov = eris.fock[:nocc,nocc:].copy()
     fvv = eris.fock[nocc:,nocc:].copy()
-
-    t1  = fov * c0
-    t1 += numpy.einsum('ib,ab->ia', c1, fvv)
-    t1 -= numpy.einsum('ja,ji->ia', c1, foo)
-
-    t2 += lib.einsum('kilj,klab->ijab', _cp(eris.oooo)*.5, c2)
-    t2 += lib.einsum('ijac,bc->ijab', c2, fvv)
-    t2 -= lib.einsum('kj,kiba->jiba', foo, c2)
-    t2 += numpy.einsum('ia,jb->ijab', c1, fov)
-
-    unit = nocc*nvir**2 + nocc**2*nvir*3 + 1
+    eris_oooo = _cp(eris.oooo)*.5
+
+    t1s = []
+    for c0, c1, c2, t2 in zip(c0s, c1s, c2s, t2s):
+        t1  = fov * c0
+        t1 += numpy.einsum('ib,ab->ia', c1, fvv)
+        t1 -= numpy.einsum('ja,ji->ia', c1, foo)
+        t1s.append(t1)
+
+        t2 += lib.einsum('kilj,klab->ijab', eris_oooo, c2)
+        t2 += lib.einsum('ijac,bc->ijab', c2, fvv)
+        t2 -= lib.einsum('kj,kiba->jiba', foo, c2)
+        t2 += numpy.einsum('ia,jb->ijab', c1, fov)
+    eris_oooo = None
+
+    unit = nocc*nvir**2 + nocc**2*nvir*5 + 1
     max_memory = max(0, myci.max_memory - lib.current_memory()[0])
     blksize = min(nvir, max(BLKMIN, int(max_memory*.9e6/8/unit)))
-    log.debug1('max_memory %d MB,  nocc,nvir = %d,%d  blksize = %d',
-               max_memory, nocc, nvir, blksize)
+    log.debug1('max_memory %d MB,  nocc,nvir = %d,%d  blksize = %d  nvec = %d',
+               max_memory, nocc, nvir, blksize, nvec)
     for p0, p1 in lib.prange(0, nvir, blksize):
         eris_oVoV = _cp(_cp(eris.oovv[:,:,p0:p1]).transpose(0,2,1,3))
-        tmp = lib.einsum('kbjc,ikca->jiba', eris_oVoV, c2)
-        t2[:,:,p0:p1] -= tmp*.5
-        t2[:,:,p0:p1] -= tmp.transpose(1,0,2,3)
-        tmp = None
-
         eris_ovvo = _cp(eris.ovvo[:,p0:p1])
-        t2[:,:,p0:p1] += eris_ovvo.transpose(0,3,1,2) * (c0*.5)
-        t1 += numpy.einsum('ia,iabj->jb', c1[:,p0:p1], eris_ovvo) * 2
-        t1[:,p0:p1] -= numpy.einsum('ib,iajb->ja', c1, eris_oVoV)
-
         ovov = -.5 * eris_oVoV
         ovov += eris_ovvo.transpose(3,1,0,2)
-        eris_oVoV = eris_ovov = None
-        theta = c2[:,:,p0:p1].transpose(2,0,1,3) * 2
-        theta-= c2[:,:,p0:p1].transpose(2,1,0,3)
-        for j in range(nocc):
-            t2[:,j] += lib.einsum('ckb,ckia->iab', ovov[j], theta)
-        tmp = ovov = None
-
-        t1 += numpy.einsum('aijb,ia->jb', theta, fov[:,p0:p1])
-
         eris_ovoo = _cp(eris.ovoo[:,p0:p1])
-        t1 -= lib.einsum('bjka,jbki->ia', theta, eris_ovoo)
-        t2[:,:,p0:p1] -= lib.einsum('jbik,ka->jiba', eris_ovoo.conj(), c1)
-        eris_ovoo = None
-
         eris_ovvv = eris.get_ovvv(slice(None), slice(p0,p1)).conj()
-        t1 += lib.einsum('cjib,jcba->ia', theta, eris_ovvv)
-        t2[:,:,p0:p1] += lib.einsum('iacb,jc->ijab', eris_ovvv, c1)
-        tmp = eris_ovvv = None
 
-    #:t2 + t2.transpose(1,0,3,2)
-    for i in range(nocc):
-        if i > 0:
-            t2[i,:i]+= t2[:i,i].transpose(0,2,1)
-            t2[:i,i] = t2[i,:i].transpose(0,2,1)
-        t2[i,i] = t2[i,i] + t2[i,i].T
-
-    t0  = numpy.einsum('ia,ia->', fov, c1) * 2
-    t0 += numpy.einsum('iabj,ijab->', eris.ovvo, c2) * 2
-    t0 -= numpy.einsum('iabj,jiab->', eris.ovvo, c2)
-    cinew = numpy.hstack((t0, t1.ravel(), t2.ravel()))
+        for c0, c1, c2, t1, t2 in zip(c0s, c1s, c2s, t1s, t2s):
+            tmp = lib.einsum('kbjc,ikca->jiba', eris_oVoV, c2)
+            t2[:,:,p0:p1] -= tmp*.5
+            t2[:,:,p0:p1] -= tmp.transpose(1,0,2,3)
+            tmp = None
+
+            t2[:,:,p0:p1] += eris_ovvo.transpose(0,3,1,2) * (c0*.5)
+            t1 += numpy.einsum('ia,iabj->jb', c1[:,p0:p1], eris_ovvo) * 2
+            t1[:,p0:p1] -= numpy.einsum('ib,iajb->ja', c1, eris_oVoV)
+
+            theta = c2[:,:,p0:p1].transpose(2,0,1,3) * 2
+            theta-= c2[:,:,p0:p1].transpose(2,1,0,3)
+            for j in range(nocc):
+                t2[:,j] += lib.einsum('ckb,ckia->iab', ovov[j], theta)
+
+            t1 += numpy.einsum('aijb,ia->jb', theta, fov[:,p0:p1])
+            t1 -= lib.einsum('bjka,jbki->ia', theta, eris_ovoo)
+            t2[:,:,p0:p1] -= lib.einsum('jbik,ka->jiba', eris_ovoo.conj(), c1)
+
+            t1 += lib.einsum('cjib,jcba->ia', theta, eris_ovvv)
+            t2[:,:,p0:p1] += lib.einsum('iacb,jc->ijab', eris_ovvv, c1)
+            theta = None
+        eris_oVoV = eris_ovvo = ovov = eris_ovoo = eris_ovvv = None
+        time1 = log.timer_debug1('sigma [%d:%d]'%(p0,p1), *time1)
+
+    cinew = []
+    for c1, c2, t1, t2 in zip(c1s, c2s, t1s, t2s):
+        #:t2 + t2.transpose(1,0,3,2)
+        for i in range(nocc):
+            if i > 0:
+                t2[i,:i]+= t2[:i,i].transpose(0,2,1)
+                t2[:i,i] = t2[i,:i].transpose(0,2,1)
+            t2[i,i] = t2[i,i] + t2[i,i].T
+
+        t0  = numpy.einsum('ia,ia->', fov, c1) * 2
+        t0 += numpy.einsum('iabj,ijab->', eris.ovvo, c2) * 2
+        t0 -= numpy.einsum('iabj,jiab->', eris.ovvo, c2)
+        cinew.append(numpy.hstack((t0, t1.ravel(), t2.ravel())))
+    log.timer_debug1('CISD sigma for %d vectors' % nvec, *time0)
     return cinew
 
+def _add_vvvv_multi(myci, c2s, eris):
+    '''myci._add_vvvv(c2, eris, t2sym='jiba') for several c2.  The lower
+    triangular parts of all c2 are stacked and passed to the vvvv
+    contraction machinery of CCSD at once.
+    '''
+    if (len(c2s) == 1 or
+        getattr(myci._add_vvvv, '__func__', None) is not CISD._add_vvvv):
+        return [myci._add_vvvv(c2, eris, t2sym='jiba') for c2 in c2s]
+
+    log = logger.Logger(myci.stdout, myci.verbose)
+    nocc, nvir = c2s[0].shape[1:3]
+    nocc2 = nocc*(nocc+1)//2
+    idx = numpy.tril_indices(nocc)
+    tau = numpy.empty((len(c2s)*nocc2,nvir,nvir), dtype=c2s[0].dtype)
+    for k, c2 in enumerate(c2s):
+        tau[k*nocc2:(k+1)*nocc2] = c2[idx]
+
+    if myci.direct:   # AO-direct CISD
+        mo = getattr(eris, 'mo_coeff', None)
+        if mo is None:
+            mo = ccsd._mo_without_core(myci, myci.mo_coeff)
+        nao, nmo = mo.shape
+        aos = numpy.asarray(mo[:,nocc:].T, order='F')
+        tau = _ao2mo.nr_e2(tau.reshape(-1,nvir**2), aos, (0,nao,0,nao), 's1', 's1')
+        buf = eris._contract_vvvv_t2(myci, tau.reshape(-1,nao,nao), True, None, log)
+        tau = None
+        Ht2tril = _ao2mo.nr_e2(buf.reshape(-1,nao,nao), mo.conj(),
+                               (nocc,nmo,nocc,nmo), 's1', 's1')
+        Ht2tril = Ht2tril.reshape(-1,nvir,nvir)
+    else:
+        Ht2tril = eris._contract_vvvv_t2(myci, tau, False, None, log)
+    return [ccsd._unpack_t2_tril(Ht2tril[k*nocc2:(k+1)*nocc2], nocc, nvir)
+            for k in range(len(c2s))]
+
 def amplitudes_to_cisdvec(c0, c1, c2):
     return numpy.hstack((c0, c1.ravel(), c2.ravel()))
 
@@ -753,6 +819,9 @@ class CISD(lib.StreamObject):
             AO-direct CISD. Default is False.
         async_io : bool
             Allow for asynchronous function execution. Default is True.
+        batch_sigma : bool
+            Apply the Hamiltonian to all trial vectors of a Davidson
+            iteration at once (see :func:`contract_multi`).  Default is True.
         frozen : int or list
             If integer is given, the inner-most orbitals are frozen from CI
             amplitudes.  Given the orbital indices (0-based) in a list, both
@@ -784,6 +853,7 @@ class CISD(lib.StreamObject):
     level_shift = getattr(__config__, 'ci_cisd_CISD_level_shift', 0)  # in preconditioner
     direct = getattr(__config__, 'ci_cisd_CISD_direct', False)
     async_io = getattr(__config__, 'ci_cisd_CISD_async_io', True)
+    batch_sigma = getattr(__config__, 'ci_cisd_CISD_batch_sigma', True)
 
     def __init__(self, mf, frozen=None, mo_coeff=None, mo_occ=None):
         if 'dft' in str(mf.__module__):
@@ -819,7 +889,7 @@ class CISD(lib.StreamObject):
         self._nmo = None
 
         keys = set(('conv_tol', 'max_cycle', 'max_space', 'lindep',
-                    'level_shift', 'direct'))
+                    'level_shift', 'direct', 'batch_sigma'))
         self._keys = set(self.__dict__.keys()).union(keys)
 
     def dump_flags(self, verbose=None):
@@ -953,6 +1023,13 @@ class CISD(lib.StreamObject):
     contract = contract
     make_diagonal = make_diagonal
 
+    def contract_multi(self, civecs, eris):
+        # UCISD and GCISD overload contract
+        if getattr(self.contract, '__func__', None) is contract:
+            return contract_multi(self, civecs, eris)
+        else:
+            return [self.contract(x, eris) for x in civecs]
+
     def _dot(self, x1, x2, nmo=None, nocc=None):
         if nmo is None: nmo = self.nmo
         if nocc is None: nocc = self.nocc
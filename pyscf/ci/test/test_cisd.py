@@ -276,6 +276,39 @@ class KnownValues(unittest.TestCase):
         ecisd, civec = myci.kernel()
         self.assertAlmostEqual(ecisd, -0.1319371817220385, 8)
 
+    def test_contract_multi(self):
+        mol = gto.Mole()
+        mol.verbose = 0
+        mol.atom = [
+            ['O', ( 0., 0.    , 0.   )],
+            ['H', ( 0., -0.757, 0.587)],
+            ['H', ( 0., 0.757 , 0.587)],]
+        mol.basis = '631g'
+        mol.build()
+        mf = scf.RHF(mol).run()
+        myci = ci.CISD(mf)
+        numpy.random.seed(12)
+        civecs = [numpy.random.random(myci.vector_size()) - .5 for i in range(3)]
+        for c in civecs:
+            c2 = myci.cisdvec_to_amplitudes(c)[2]
+            c2 += c2.transpose(1,0,3,2)
+
+        eris = myci.ao2mo()
+        ref = [myci.contract(c, eris) for c in civecs]
+        hcs = myci.contract_multi(civecs, eris)
+        self.assertAlmostEqual(abs(numpy.array(hcs) - numpy.array(ref)).max(), 0, 11)
+
+        myci.direct = True
+        eris = myci.ao2mo()
+        hcs = myci.contract_multi(civecs, eris)
+        self.assertAlmostEqual(abs(numpy.array(hcs) - numpy.array(ref)).max(), 0, 9)
+
+        myci.direct = False
+        myci.max_memory = 0
+        eris = ci.cisd.ccsd._make_eris_outcore(myci, mf.mo_coeff)
+        hcs = myci.contract_multi(civecs, eris)
+        self.assertAlmostEqual(abs(numpy.array(hcs) - numpy.array(ref)).max(), 0, 9)
+
     def test_multi_roots(self):
         mol = gto.Mole()
         mol.verbose = 0
@@ -294,6 +327,10 @@ class KnownValues(unittest.TestCase):
         myci.dump_chk()
         self.assertAlmostEqual(myci.e_tot[2], -1.6979890451316759, 8)
 
+        myci.batch_sigma = False
+        myci.run()
+        self.assertAlmostEqual(myci.e_tot[2], -1.6979890451316759, 8)
+
     def test_with_df(self):
         mol = gto.Mole()
         mol.verbose = 0
@@ -390,9 +390,18 @@ def _gen_jk(hessobj, mo_coeff, mo_occ, chkfile=None, atmlst=None,
     aoslices = mol.aoslice_by_atom()
     naux = auxmol.nao
 
-    ftmp = lib.H5TmpFile()
-    rho0_Pij = ftmp.create_group('rho0_Pij')
-    wj_ip1_pij = ftmp.create_group('wj_ip1_pij')
+    # The per-atom fitting coefficients are kept in memory if possible
+    mem_now = lib.current_memory()[0]
+    incore = (naux * nao**2 * (1 + 3 * (hessobj.auxbasis_response > 0)) * 8e-6
+              < (hessobj.max_memory - mem_now) * .5)
+    if incore:
+        ftmp = None
+        rho0_Pij = {}
+        wj_ip1_pij = {}
+    else:
+        ftmp = lib.H5TmpFile()
+        rho0_Pij = ftmp.create_group('rho0_Pij')
+        wj_ip1_pij = ftmp.create_group('wj_ip1_pij')
     int2c = auxmol.intor('int2c2e', aosym='s1')
     int2c_low = scipy.linalg.cho_factor(int2c, lower=True)
     int2c_ip1 = auxmol.intor('int2c2e_ip1', aosym='s1')
@@ -426,7 +435,8 @@ def _gen_jk(hessobj, mo_coeff, mo_occ, chkfile=None, atmlst=None,
         rhok0_PlJ = lib.einsum('plj,Jj->plJ', rhok0_Pl_[p0:p1], mocc_2)
         vk1_buf += lib.einsum('xijp,plj->xil', int3c_ip1, rhok0_PlJ[p0:p1])
         int3c_ip1 = None
-    vj1_buf = ftmp['vj1_buf'] = vj1_buf
+    if not incore:
+        vj1_buf = ftmp['vj1_buf'] = vj1_buf
 
     for i0, ia in enumerate(atmlst):
         shl0, shl1, p0, p1 = aoslices[ia]
@@ -46,6 +46,29 @@ class KnownValues(unittest.TestCase):
         g1 = scf.RHF(mol).density_fit().run().Hessian().kernel()
         self.assertAlmostEqual(abs(gref - g1).max(), 0, 3)
 
+    def test_rhf_hess_incore(self):
+        mf = scf.RHF(mol).density_fit().run(conv_tol=1e-12)
+        hobj = mf.Hessian()
+        hobj.h1_incore = True
+        h1 = hobj.kernel()
+        ftmp = tempfile.NamedTemporaryFile()
+        hobj.chkfile = ftmp.name
+        hobj.h1_incore = False
+        h2 = hobj.kernel()
+        self.assertAlmostEqual(abs(h1 - h2).max(), 0, 9)
+
+        # mo1 from block Krylov solver agrees with the single vector solver
+        mo_energy, mo_coeff, mo_occ = mf.mo_energy, mf.mo_coeff, mf.mo_occ
+        mocc = mo_coeff[:,mo_occ>0]
+        h1ao = hobj.make_h1(mo_coeff, mo_occ)
+        h1vo = numpy.array([mo_coeff.T.dot(x).dot(mocc) for x in h1ao[1]])
+        fx = hessian.rhf.gen_vind(mf, mo_coeff, mo_occ)
+        s1vo = numpy.zeros_like(h1vo)
+        ref = scf.cphf.solve(fx, mo_energy, mo_occ, h1vo, s1vo, tol=1e-10)[0]
+        mo1 = scf.cphf.solve(fx, mo_energy, mo_occ, h1vo, s1vo, tol=1e-10,
+                             block=True)[0]
+        self.assertAlmostEqual(abs(mo1 - ref).max(), 0, 7)
+
     def test_uks_hess(self):
         gref = mol.UKS.run(xc='b3lyp').Hessian().kernel()
         g1 = mol.UKS.density_fit().run(xc='b3lyp').Hessian().kernel()
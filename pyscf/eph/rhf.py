@@ -159,6 +159,8 @@ def get_eph(ephobj, mo1, omega, vec, mo_rep):
 class EPH(rhf.Hessian):
     def __init__(self, scf_method):
         rhf.Hessian.__init__(self, scf_method)
+        # get_eph reads the first order orbitals from chkfile
+        self.h1_incore = False
         self.CUTOFF_FREQUENCY=CUTOFF_FREQUENCY
 
     get_mode = get_mode
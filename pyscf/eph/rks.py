@@ -163,6 +163,8 @@ def get_eph(ephobj, mo1, omega, vec, mo_rep):
 class EPH(rks_hess.Hessian):
     def __init__(self, scf_method):
         rks_hess.Hessian.__init__(self, scf_method)
+        # get_eph reads the first order orbitals from chkfile
+        self.h1_incore = False
         self.CUTOFF_FREQUENCY=80
 
     get_mode = rhf_eph.get_mode
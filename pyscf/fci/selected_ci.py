@@ -121,7 +121,7 @@ def select_strs(myci, eri, eri_pq_max, civec_max, strs, norb, nelec):
                                  ctypes.c_double(myci.select_cutoff),
                                  ctypes.c_int(norb), ctypes.c_int(nelec),
                                  ctypes.c_int(nstrs))
-    strs_add = sorted(set(strs_add[:nadd]) - set(strs))
+    strs_add = numpy.setdiff1d(strs_add[:nadd], strs)
     return numpy.asarray(strs_add, dtype=numpy.int64)
 
 def enlarge_space(myci, civec_strs, eri, norb, nelec):
@@ -202,7 +202,7 @@ def des_des_linkstr(strs, norb, nelec, tril=False):
                                      strs.ctypes.data_as(ctypes.c_void_p),
                                      ctypes.c_int(norb), ctypes.c_int(nelec),
                                      ctypes.c_int(nstrs))
-    inter1 = numpy.asarray(sorted(set(inter1[:ninter])), dtype=numpy.int64)
+    inter1 = numpy.unique(inter1[:ninter])
     ninter = len(inter1)
 
     inter = numpy.empty((ninter*nelec), dtype=numpy.int64)
@@ -210,7 +210,7 @@ def des_des_linkstr(strs, norb, nelec, tril=False):
                                      inter1.ctypes.data_as(ctypes.c_void_p),
                                      ctypes.c_int(norb), ctypes.c_int(nelec-1),
                                      ctypes.c_int(ninter))
-    inter = numpy.asarray(sorted(set(inter[:ninter])), dtype=numpy.int64)
+    inter = numpy.unique(inter[:ninter])
     ninter = len(inter)
 
     nvir += 2
@@ -243,7 +243,7 @@ def gen_des_linkstr(strs, norb, nelec):
                                      strs.ctypes.data_as(ctypes.c_void_p),
                                      ctypes.c_int(norb), ctypes.c_int(nelec),
                                      ctypes.c_int(nstrs))
-    inter = numpy.asarray(sorted(set(inter[:ninter])), dtype=numpy.int64)
+    inter = numpy.unique(inter[:ninter])
     ninter = len(inter)
 
     nvir += 1
@@ -270,7 +270,7 @@ def gen_cre_linkstr(strs, norb, nelec):
                                      strs.ctypes.data_as(ctypes.c_void_p),
                                      ctypes.c_int(norb), ctypes.c_int(nelec),
                                      ctypes.c_int(nstrs))
-    inter = numpy.asarray(sorted(set(inter[:ninter])), dtype=numpy.int64)
+    inter = numpy.unique(inter[:ninter])
     ninter = len(inter)
 
     link_index = numpy.zeros((ninter,nelec+1,4), dtype=numpy.int32)
@@ -327,7 +327,7 @@ def kernel_fixed_space(myci, h1e, eri, norb, nelec, ci_strs, ci0=None,
     h2e = direct_spin1.absorb_h1e(h1e, eri, norb, nelec, .5)
     h2e = ao2mo.restore(1, h2e, norb)
 
-    link_index = _all_linkstr_index(ci_strs, norb, nelec)
+    link_index = myci.gen_linkstr(norb, nelec, True, ci_strs=ci_strs)
     hdiag = myci.make_hdiag(h1e, eri, ci_strs, norb, nelec)
 
     if isinstance(ci0, _SCIvector):
@@ -417,7 +417,7 @@ def kernel_float_space(myci, h1e, eri, norb, nelec, ci0=None,
                   icycle, (len(ci_strs[0]), len(ci_strs[1])), float_tol)
 
         ci0 = [c.ravel() for c in ci0]
-        link_index = _all_linkstr_index(ci_strs, norb, nelec)
+        link_index = myci.gen_linkstr(norb, nelec, True, ci_strs=ci_strs)
         hdiag = myci.make_hdiag(h1e, eri, ci_strs, norb, nelec)
         #e, ci0 = lib.davidson(hop, ci0.reshape(-1), precond, tol=float_tol)
         e, ci0 = myci.eig(hop, ci0, precond, tol=float_tol, lindep=lindep,
@@ -448,7 +448,7 @@ def kernel_float_space(myci, h1e, eri, norb, nelec, ci0=None,
     ci_strs = ci0[0]._strs
     log.debug('Extra CI in selected space %s', (len(ci_strs[0]), len(ci_strs[1])))
     ci0 = [c.ravel() for c in ci0]
-    link_index = _all_linkstr_index(ci_strs, norb, nelec)
+    link_index = myci.gen_linkstr(norb, nelec, True, ci_strs=ci_strs)
     hdiag = myci.make_hdiag(h1e, eri, ci_strs, norb, nelec)
     e, c = myci.eig(hop, ci0, precond, tol=tol, lindep=lindep,
                     max_cycle=max_cycle, max_space=max_space, nroots=nroots,
@@ -733,6 +733,7 @@ class SelectedCI(direct_spin1.FCISolver):
         #self.converged = False
         #self.ci = None
         self._strs = None
+        self._linkstr_cache = (None, None)
         keys = set(('ci_coeff_cutoff', 'select_cutoff', 'conv_tol',
                     'start_tol', 'tol_decay_rate'))
         self._keys = self._keys.union(keys)
@@ -751,6 +752,8 @@ class SelectedCI(direct_spin1.FCISolver):
         else:
             assert(civec_strs.size == len(self._strs[0])*len(self._strs[1]))
             civec_strs = _as_SCIvector(civec_strs, self._strs)
+        if link_index is None:
+            link_index = self.gen_linkstr(norb, nelec, True, ci_strs=civec_strs._strs)
         return contract_2e(eri, civec_strs, norb, nelec, link_index)
 
     def get_init_guess(self, ci_strs, norb, nelec, nroots, hdiag):
@@ -864,10 +867,19 @@ class SelectedCI(direct_spin1.FCISolver):
             ci_strs = self._strs
         neleca, nelecb = direct_spin1._unpack_nelec(nelec, spin)
         if tril:
-            cd_indexa = cre_des_linkstr_tril(ci_strs[0], norb, neleca)
-            dd_indexa = des_des_linkstr_tril(ci_strs[0], norb, neleca)
-            cd_indexb = cre_des_linkstr_tril(ci_strs[1], norb, nelecb)
-            dd_indexb = des_des_linkstr_tril(ci_strs[1], norb, nelecb)
+            # The link tables are cached and updated incrementally when
+            # strings are added to or removed from the selected space
+            cache_a, cache_b = self._linkstr_cache
+            strsa = numpy.asarray(ci_strs[0], dtype=numpy.int64)
+            strsb = numpy.asarray(ci_strs[1], dtype=numpy.int64)
+            cache_a = _update_linkstr_cache(cache_a, strsa, norb, neleca)
+            if neleca == nelecb and numpy.array_equal(strsa, strsb):
+                cache_b = cache_a
+            else:
+                cache_b = _update_linkstr_cache(cache_b, strsb, norb, nelecb)
+            self._linkstr_cache = (cache_a, cache_b)
+            cd_indexa, dd_indexa = cache_a['cd_index'], cache_a['dd_index']
+            cd_indexb, dd_indexb = cache_b['cd_index'], cache_b['dd_index']
         else:
             cd_indexa = cre_des_linkstr(ci_strs[0], norb, neleca)
             dd_indexa = des_des_linkstr(ci_strs[0], norb, neleca)
@@ -895,6 +907,198 @@ def _all_linkstr_index(ci_strs, norb, nelec):
     dd_indexb = des_des_linkstr_tril(ci_strs[1], norb, nelec[1])
     return cd_indexa, dd_indexa, cd_indexb, dd_indexb
 
+def _parity(strs):
+    '''Parity of the number of occupied orbitals of each uint64 string'''
+    strs = strs.copy()
+    for i in (32, 16, 8, 4, 2, 1):
+        strs ^= strs >> numpy.uint64(i)
+    return numpy.asarray(strs & numpy.uint64(1), dtype=numpy.int32)
+
+def _occ_mask(strs, norb):
+    '''Occupation of each orbital, for strings of up to 64 orbitals'''
+    ustrs = numpy.asarray(strs, dtype=numpy.int64).view(numpy.uint64)
+    return (ustrs[:,None] >> numpy.arange(norb, dtype=numpy.uint64)) & numpy.uint64(1)
+
+def _cre_des_entries(strs, norb, nelec, rows, blksize=None):
+    '''Single excitations between strs[rows] and the strings of strs.
+
+    Returns (row, col, a, i, sign) where strs[col] is obtained by moving the
+    electron of orbital i in strs[row] to orbital a.  sign is the
+    FCIcre_des_sign of the excitation, which is identical for the pair
+    (row,col) and (col,row).
+    '''
+    nvir = norb - nelec
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    if blksize is None:
+        blksize = max(1, 2000000 // max(1, nelec*nvir))
+    one = numpy.uint64(1)
+    ustrs = strs.view(numpy.uint64)
+    ex_rows, ex_cols, ex_a, ex_i, signs = [], [], [], [], []
+    for p0, p1 in lib.prange(0, len(rows), blksize):
+        r = rows[p0:p1]
+        occ_mask = _occ_mask(strs[r], norb)
+        occ = numpy.where(occ_mask)[1].reshape(-1,nelec)
+        vir = numpy.where(occ_mask == 0)[1].reshape(-1,nvir)
+        a = numpy.repeat(vir, nelec, axis=1).reshape(-1,nvir,nelec)
+        i = numpy.repeat(occ[:,None], nvir, axis=1)
+        ua = a.astype(numpy.uint64)
+        ui = i.astype(numpy.uint64)
+        str1 = ustrs[r,None,None]
+        str0 = (str1 ^ (one << ui)) | (one << ua)
+        # strs are sorted as signed integers
+        addr = numpy.searchsorted(strs, str0.view(numpy.int64))
+        addr[addr == len(strs)] = 0
+        mask = ustrs[addr] == str0
+        hi = numpy.maximum(ua, ui)[mask]
+        lo = numpy.minimum(ua, ui)[mask]
+        between = (one << hi) - (one << (lo + one))
+        ex_rows.append(numpy.repeat(r, nvir*nelec)[mask.ravel()])
+        ex_cols.append(addr[mask])
+        ex_a.append(a[mask])
+        ex_i.append(i[mask])
+        signs.append(1 - 2 * _parity(str1.repeat(nvir,1).repeat(nelec,2)[mask] & between))
+    return (numpy.hstack(ex_rows).astype(numpy.int32),
+            numpy.hstack(ex_cols).astype(numpy.int32),
+            numpy.hstack(ex_a).astype(numpy.int32),
+            numpy.hstack(ex_i).astype(numpy.int32),
+            numpy.hstack(signs).astype(numpy.int32))
+
+def _des_des_entries(strs, norb, nelec, rows):
+    '''Annihilation of two electrons p > q from strs[rows].
+
+    Returns (inter, pq, addr, sign) where inter is the intermediate string,
+    pq = p*(p-1)/2+q and sign = FCIcre_sign(p,inter) * FCIdes_sign(q,strs[addr])
+    '''
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    one = numpy.uint64(1)
+    ustrs = strs.view(numpy.uint64)[rows]
+    occ = numpy.where(_occ_mask(strs[rows], norb))[1].reshape(-1,nelec)
+    idx, idy = numpy.tril_indices(nelec, -1)
+    p = occ[:,idx]
+    q = occ[:,idy]
+    up = p.astype(numpy.uint64)
+    uq = q.astype(numpy.uint64)
+    str0 = ustrs[:,None]
+    inter = str0 ^ (one << up) ^ (one << uq)
+    # shift twice to avoid the undefined 64-bit shift for p = 63
+    sign = _parity((inter >> up) >> one) ^ _parity((str0 >> uq) >> one)
+    return (inter.view(numpy.int64).ravel(),
+            numpy.asarray(p*(p-1)//2+q, dtype=numpy.int32).ravel(),
+            numpy.repeat(numpy.asarray(rows, dtype=numpy.int32), len(idx)),
+            (1 - 2*sign).ravel())
+
+def _pack_cre_des_linkstr(entries, strs, norb, nelec):
+    '''Pack the excitation entries in the layout of cre_des_linkstr_tril.
+    The entries sorted in the order of the link table are returned as well.
+    '''
+    row, col, a, i, sign = entries
+    nstrs = len(strs)
+    nvir = norb - nelec
+    link_index = numpy.zeros((nstrs,nelec+nelec*nvir,4), dtype=numpy.int32)
+    occ = numpy.where(_occ_mask(strs, norb))[1].reshape(-1,nelec)
+    link_index[:,:nelec,0] = occ*(occ+1)//2+occ
+    link_index[:,:nelec,2] = numpy.arange(nstrs)[:,None]
+    link_index[:,:nelec,3] = 1
+
+    # Entries which are carried over from the previous space are already
+    # sorted. A stable sort is cheap for the partially ordered keys.
+    key = (row.astype(numpy.int64) * norb + a) * norb + i
+    order = numpy.argsort(key, kind='stable')
+    row, col, a, i, sign = row[order], col[order], a[order], i[order], sign[order]
+    start = numpy.append(0, numpy.cumsum(numpy.bincount(row, minlength=nstrs)))
+    k = numpy.arange(len(row)) - start[row] + nelec
+    link_index[row,k,0] = numpy.maximum(a,i)*(numpy.maximum(a,i)+1)//2 + numpy.minimum(a,i)
+    link_index[row,k,2] = col
+    link_index[row,k,3] = sign
+    return link_index, (row, col, a, i, sign)
+
+def _pack_des_des_linkstr(entries, norb, nelec):
+    '''Pack the annihilation entries in the layout of des_des_linkstr_tril.
+    The entries sorted in the order of the link table are returned as well.
+    '''
+    inter, pq, addr, sign = entries
+    order = numpy.argsort(inter, kind='stable')
+    inter = inter[order]
+    row = numpy.append(0, numpy.cumsum(inter[1:] != inter[:-1]))
+    ninter = row[-1] + 1 if len(row) > 0 else 0
+    order1 = numpy.argsort(row * (norb*(norb-1)//2) + pq[order], kind='stable')
+    order = order[order1]
+    inter, row, pq, addr, sign = inter[order1], row[order1], pq[order], addr[order], sign[order]
+
+    nvir = norb - nelec + 2
+    link_index = numpy.zeros((ninter,nvir*nvir,4), dtype=numpy.int32)
+    start = numpy.append(0, numpy.cumsum(numpy.bincount(row, minlength=ninter)))
+    k = numpy.arange(len(row)) - start[row]
+    link_index[row,k,0] = pq
+    link_index[row,k,2] = addr
+    link_index[row,k,3] = sign
+    return link_index, (inter, pq, addr, sign)
+
+def _update_linkstr_cache(cache, strs, norb, nelec):
+    '''Link tables (cd_index, dd_index) of the strings strs.
+
+    cache holds the tables and the excitation entries of a previous string
+    space.  Entries of the strings which are kept in the new space are
+    re-indexed and only the excitations involving the new strings are
+    generated.  The new cache is returned.
+    '''
+    strs = numpy.asarray(strs, dtype=numpy.int64)
+    if (cache is not None and cache['norb'] == norb and cache['nelec'] == nelec
+        and numpy.array_equal(cache['strs'], strs)):
+        return cache
+
+    nstrs = len(strs)
+    if cache is None or cache['norb'] != norb or cache['nelec'] != nelec:
+        cd_entries = _cre_des_entries(strs, norb, nelec, numpy.arange(nstrs))
+        if nelec > 1:
+            dd_entries = _des_des_entries(strs, norb, nelec, numpy.arange(nstrs))
+        else:
+            dd_entries = None
+    else:
+        strs_old = cache['strs']
+        addr = numpy.searchsorted(strs, strs_old)
+        addr[addr == nstrs] = 0
+        addr[strs[addr] != strs_old] = -1
+        new_mask = numpy.ones(nstrs, dtype=bool)
+        new_mask[addr[addr >= 0]] = False
+        new_rows = numpy.where(new_mask)[0]
+
+        row, col, a, i, sign = cache['cd_entries']
+        row = addr[row]
+        col = addr[col]
+        keep = (row >= 0) & (col >= 0)
+        row, col, a, i, sign = row[keep], col[keep], a[keep], i[keep], sign[keep]
+        row1, col1, a1, i1, sign1 = _cre_des_entries(strs, norb, nelec, new_rows)
+        # The excitations from existing strings to the new strings are the
+        # reverse of the excitations generated for the new strings
+        rev = ~new_mask[col1]
+        cd_entries = (numpy.hstack((row, row1, col1[rev])),
+                      numpy.hstack((col, col1, row1[rev])),
+                      numpy.hstack((a, a1, i1[rev])),
+                      numpy.hstack((i, i1, a1[rev])),
+                      numpy.hstack((sign, sign1, sign1[rev])))
+
+        if nelec > 1:
+            inter, pq, ddaddr, ddsign = cache['dd_entries']
+            ddaddr = addr[ddaddr]
+            keep = ddaddr >= 0
+            inter1, pq1, ddaddr1, ddsign1 = _des_des_entries(strs, norb, nelec, new_rows)
+            dd_entries = (numpy.hstack((inter[keep], inter1)),
+                          numpy.hstack((pq[keep], pq1)),
+                          numpy.hstack((ddaddr[keep], ddaddr1)).astype(numpy.int32),
+                          numpy.hstack((ddsign[keep], ddsign1)))
+        else:
+            dd_entries = None
+
+    cd_index, cd_entries = _pack_cre_des_linkstr(cd_entries, strs, norb, nelec)
+    if dd_entries is None:
+        dd_index = None
+    else:
+        dd_index, dd_entries = _pack_des_des_linkstr(dd_entries, norb, nelec)
+    return {'norb': norb, 'nelec': nelec, 'strs': strs,
+            'cd_entries': cd_entries, 'dd_entries': dd_entries,
+            'cd_index': cd_index, 'dd_index': dd_index}
+
 # numpy.ndarray does not allow to attach attribtues.  Overwrite the
 # numpy.ndarray class to tag the ._strs attribute
 class _SCIvector(numpy.ndarray):
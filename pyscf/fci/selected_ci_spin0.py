@@ -154,6 +154,8 @@ class SelectedCI(selected_ci.SelectedCI):
         else:
             assert(civec_strs.size == len(self._strs[0])*len(self._strs[1]))
             civec_strs = selected_ci._as_SCIvector(civec_strs, self._strs)
+        if link_index is None:
+            link_index = self.gen_linkstr(norb, nelec, True, ci_strs=civec_strs._strs)
         return contract_2e(eri, civec_strs, norb, nelec, link_index)
 
     def make_hdiag(self, h1e, eri, ci_strs, norb, nelec):
@@ -456,6 +456,32 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(abs(cd_index1a - fci.cistring.reform_linkstr_index(cd_index2a)).max(), 0, 12)
         self.assertAlmostEqual(abs(cd_index1b - fci.cistring.reform_linkstr_index(cd_index2b)).max(), 0, 12)
 
+    def test_gen_linkstr_incremental(self):
+        norb, nelec = 10, (4,3)
+        numpy.random.seed(3)
+        strsa = cistring.make_strings(range(norb), nelec[0])
+        strsb = cistring.make_strings(range(norb), nelec[1])
+        sol = selected_ci.SCI()
+        strs0 = (strsa[numpy.random.random(len(strsa)) > .6],
+                 strsb[numpy.random.random(len(strsb)) > .6])
+        sol.gen_linkstr(norb, nelec, ci_strs=strs0)
+        # Strings are removed and added to the space
+        strs1 = (numpy.union1d(strs0[0][numpy.random.random(len(strs0[0])) > .1],
+                               strsa[numpy.random.random(len(strsa)) > .7]),
+                 numpy.union1d(strs0[1][numpy.random.random(len(strs0[1])) > .1],
+                               strsb[numpy.random.random(len(strsb)) > .7]))
+        link_index = sol.gen_linkstr(norb, nelec, ci_strs=strs1)
+        ref = selected_ci._all_linkstr_index(strs1, norb, nelec)
+        for x, y in zip(link_index, ref):
+            self.assertTrue(numpy.array_equal(x, y))
+
+        ci = numpy.random.random((len(strs1[0]), len(strs1[1])))
+        ci = selected_ci._as_SCIvector(ci, strs1)
+        h2 = ao2mo.restore(1, numpy.random.random((norb,)*4), norb)
+        ci1 = sol.contract_2e(h2, ci, norb, nelec)
+        ref = selected_ci.contract_2e(h2, ci, norb, nelec)
+        self.assertAlmostEqual(abs(ci1 - ref).max(), 0, 12)
+
     def test_contract_2e_vs_slow_version(self):
         myci = selected_ci.SCI()
         ci1 = myci.contract_2e(eri, civec_strs, norb, nelec)
@@ -31,7 +31,6 @@ from pyscf import lib
 from pyscf import ao2mo
 from pyscf.lib import logger
 from pyscf.grad import rhf as rhf_grad
-from pyscf.grad.mp2 import _shell_prange
 from pyscf.scf import cphf
 
 if sys.version_info < (3,):
@@ -53,7 +52,6 @@ def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
     nocc = ncore + ncas
     nelecas = mc.nelecas
     nao, nmo = mo_coeff.shape
-    nao_pair = nao * (nao+1) // 2
     mo_energy = mc._scf.mo_energy
 
     mo_occ = mo_coeff[:,:nocc]
@@ -119,56 +117,35 @@ def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
     hcore_deriv = mc_grad.hcore_generator(mol)
     s1 = mc_grad.get_ovlp(mol)
 
-    diag_idx = numpy.arange(nao)
-    diag_idx = diag_idx * (diag_idx+1) // 2 + diag_idx
-    casdm2_cc = casdm2 + casdm2.transpose(0,1,3,2)
-    dm2buf = ao2mo._ao2mo.nr_e2(casdm2_cc.reshape(ncas**2,ncas**2), mo_cas.T,
-                                (0, nao, 0, nao)).reshape(ncas**2,nao,nao)
-    dm2buf = lib.pack_tril(dm2buf)
-    dm2buf[:,diag_idx] *= .5
-    dm2buf = dm2buf.reshape(ncas,ncas,nao_pair)
-    casdm2 = casdm2_cc = None
+    # All 2e derivative integrals are contracted in one pass: J and K of
+    # the SCF, relaxed and CASCI 1-particle density matrices, and the J-type
+    # contraction of the active space 2-RDM in the factorized form
+    dms = numpy.asarray((hf_dm1, zvec_ao, dm_core, dm_cas))
+    vj, vk, de2 = _get_jk_casdm2(mc_grad, mol, mo_cas, casdm2, dms, [True]*4)
+    casdm2 = dms = None
+    vhf1 = numpy.empty((2,3,nao,nao))
+    vhf1[0] = vj[1] * 2 - vk[1]  # (z|..) contracted with hf_dm1
+    vhf1[1] = vj[0] * 2 - vk[0]  # (hf_dm1|..) contracted with zvec
+    vhf1c = vj[2] * 2 - vk[2]
+    vhf1a = vj[3] * 2 - vk[3]
+    vj = vk = None
 
     if atmlst is None:
         atmlst = range(mol.natm)
     aoslices = mol.aoslice_by_atom()
     de = numpy.zeros((len(atmlst),3))
 
-    max_memory = mc_grad.max_memory - lib.current_memory()[0]
-    blksize = int(max_memory*.9e6/8 / ((aoslices[:,3]-aoslices[:,2]).max()*nao_pair))
-    blksize = min(nao, max(2, blksize))
-
     for k, ia in enumerate(atmlst):
         shl0, shl1, p0, p1 = aoslices[ia]
         h1ao = hcore_deriv(ia)
         de[k] += numpy.einsum('xij,ij->x', h1ao, casci_dm1)
         de[k] += numpy.einsum('xij,ij->x', h1ao, zvec_ao)
 
-        q1 = 0
-        for b0, b1, nf in _shell_prange(mol, 0, mol.nbas, blksize):
-            q0, q1 = q1, q1 + nf
-            dm2_ao = lib.einsum('ijw,pi,qj->pqw', dm2buf, mo_cas[p0:p1], mo_cas[q0:q1])
-            shls_slice = (shl0,shl1,b0,b1,0,mol.nbas,0,mol.nbas)
-            eri1 = mol.intor('int2e_ip1', comp=3, aosym='s2kl',
-                             shls_slice=shls_slice).reshape(3,p1-p0,nf,nao_pair)
-            de[k] -= numpy.einsum('xijw,ijw->x', eri1, dm2_ao) * 2
-
-            for i in range(3):
-                eri1tmp = lib.unpack_tril(eri1[i].reshape((p1-p0)*nf,-1))
-                eri1tmp = eri1tmp.reshape(p1-p0,nf,nao,nao)
-                de[k,i] -= numpy.einsum('ijkl,ij,kl', eri1tmp, hf_dm1[p0:p1,q0:q1], zvec_ao) * 2
-                de[k,i] -= numpy.einsum('ijkl,kl,ij', eri1tmp, hf_dm1, zvec_ao[p0:p1,q0:q1]) * 2
-                de[k,i] += numpy.einsum('ijkl,il,kj', eri1tmp, hf_dm1[p0:p1], zvec_ao[q0:q1])
-                de[k,i] += numpy.einsum('ijkl,jk,il', eri1tmp, hf_dm1[q0:q1], zvec_ao[p0:p1])
-
-                #:vhf1c, vhf1a = mc_grad.get_veff(mol, (dm_core, dm_cas))
-                #:de[k] += numpy.einsum('xij,ij->x', vhf1c[:,p0:p1], casci_dm1[p0:p1]) * 2
-                #:de[k] += numpy.einsum('xij,ij->x', vhf1a[:,p0:p1], dm_core[p0:p1]) * 2
-                de[k,i] -= numpy.einsum('ijkl,lk,ij', eri1tmp, dm_core[q0:q1], casci_dm1[p0:p1]) * 2
-                de[k,i] += numpy.einsum('ijkl,jk,il', eri1tmp, dm_core[q0:q1], casci_dm1[p0:p1])
-                de[k,i] -= numpy.einsum('ijkl,lk,ij', eri1tmp, dm_cas[q0:q1], dm_core[p0:p1]) * 2
-                de[k,i] += numpy.einsum('ijkl,jk,il', eri1tmp, dm_cas[q0:q1], dm_core[p0:p1])
-            eri1 = eri1tmp = None
+        de[k] += numpy.einsum('xij,ij->x', vhf1[0,:,p0:p1], hf_dm1[p0:p1])
+        de[k] += numpy.einsum('xij,ij->x', vhf1[1,:,p0:p1], zvec_ao[p0:p1])
+        de[k] += numpy.einsum('xij,ij->x', vhf1c[:,p0:p1], casci_dm1[p0:p1])
+        de[k] += numpy.einsum('xij,ij->x', vhf1a[:,p0:p1], dm_core[p0:p1])
+        de[k] += de2[:,p0:p1].sum(axis=1)
 
         de[k] -= numpy.einsum('xij,ij->x', s1[:,p0:p1], im1[p0:p1])
         de[k] -= numpy.einsum('xij,ji->x', s1[:,p0:p1], im1[:,p0:p1])
@@ -183,6 +160,72 @@ def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
     return de
 
 
+def _factorize_casdm2(mo_cas, casdm2, p0=0, p1=None):
+    '''The AO representation of the active space 2-RDM (symmetrized over
+    the kl pair) as the sum of products
+
+        Gamma_{ij,kl} = sum_P A^P_{ij} B^P_{kl}
+
+    with A^{tu} = C_t C_u^T + C_u C_t^T (t>u) and
+    B^{tu} = sum_{vw} (Gamma_{tuvw} + Gamma_{tuwv}) C_v C_w^T.  The
+    contraction of the derivative integrals with Gamma is the J-type
+    contraction of B^P followed by the dot product with A^P.
+
+    Only the factors P = p0 ... p1-1 of the (lower triangular) tu pairs are
+    generated.
+    '''
+    ncas = mo_cas.shape[1]
+    t, u = numpy.tril_indices(ncas)
+    if p1 is None:
+        p1 = t.size
+    t = t[p0:p1]
+    u = u[p0:p1]
+    casdm2_cc = casdm2[t,u]
+    casdm2_cc = casdm2_cc + casdm2_cc.transpose(0,2,1)
+    dm2_b = lib.einsum('pvw,iv,jw->pij', casdm2_cc, mo_cas, mo_cas)
+    dm2_a = numpy.einsum('ip,jp->pij', mo_cas[:,t], mo_cas[:,u])
+    dm2_a = dm2_a + dm2_a.transpose(0,2,1)
+    dm2_a[t == u] *= .5
+    return dm2_a, dm2_b
+
+def _get_jk_casdm2(mc_grad, mol, mo_cas, casdm2, dms, with_k, max_memory=None):
+    '''J and K derivative matrices of the density matrices dms, and the
+    contraction of the derivative integrals with the active space 2-RDM
+
+        de2[x,i] = sum_{jkl} (d/dx ij|kl) Gamma_{ij,kl}
+
+    The 2-RDM factors of :func:`_factorize_casdm2` are generated and
+    contracted in blocks bounded by max_memory.  The first block is computed
+    in the same pass of the integrals as dms.
+    '''
+    if max_memory is None:
+        max_memory = mc_grad.max_memory
+    nao, ncas = mo_cas.shape
+    npair = ncas * (ncas+1) // 2
+    n_dm = len(dms)
+    mem_avail = max_memory - lib.current_memory()[0]
+    # A, B, the copy of B in get_jk, vj and vk for each factor
+    blksize = int(mem_avail*1e6/8 / (nao**2*9)) - n_dm
+    blksize = max(1, min(npair, blksize))
+    logger.debug1(mc_grad, 'blksize of the 2-RDM factors %d', blksize)
+
+    de2 = numpy.zeros((3,nao))
+    vj1 = vk1 = None
+    for p0, p1 in lib.prange(0, npair, blksize):
+        dm2_a, dm2_b = _factorize_casdm2(mo_cas, casdm2, p0, p1)
+        if p0 == 0:
+            vj, vk = mc_grad.get_jk(mol, numpy.vstack((dms, dm2_b)),
+                                    with_k=list(with_k)+[False]*(p1-p0))
+            vj1 = vj[:n_dm]
+            vk1 = vk[:n_dm]
+            vj = vj[n_dm:]
+        else:
+            vj = mc_grad.get_jk(mol, dm2_b, with_k=False)[0]
+        de2 += numpy.einsum('pxij,pij->xi', vj, dm2_a)
+        vj = vk = dm2_a = dm2_b = None
+    return vj1, vk1, de2
+
+
 def as_scanner(mcscf_grad, state=None):
     '''Generating a nuclear gradients scanner/solver (for geometry optimizer).
 
@@ -31,7 +31,6 @@ from pyscf import ao2mo
 from pyscf.lib import logger
 from pyscf.grad import casci as casci_grad
 from pyscf.grad import rhf as rhf_grad  # noqa
-from pyscf.grad.mp2 import _shell_prange
 
 
 def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
@@ -49,7 +48,6 @@ def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
     nocc = ncore + ncas
     nelecas = mc.nelecas
     nao, nmo = mo_coeff.shape
-    nao_pair = nao * (nao+1) // 2
 
     mo_occ = mo_coeff[:,:nocc]
     mo_core = mo_coeff[:,:ncore]
@@ -73,45 +71,28 @@ def grad_elec(mc_grad, mo_coeff=None, ci=None, atmlst=None, verbose=None):
     aapa = vj = vk = vhf_c = vhf_a = h1 = gfock = None
 
     dm1 = dm_core + dm_cas
-    vj, vk = mc_grad.get_jk(mol, (dm_core, dm_cas))
+    # J/K of the core and active density matrices and the J-type contraction
+    # of the active space 2-RDM in one pass of the derivative integrals
+    vj, vk, de2 = casci_grad._get_jk_casdm2(mc_grad, mol, mo_cas, casdm2,
+                                            numpy.asarray((dm_core, dm_cas)),
+                                            [True]*2)
+    casdm2 = None
     vhf1c, vhf1a = vj - vk * .5
+    vj = vk = None
     hcore_deriv = mc_grad.hcore_generator(mol)
     s1 = mc_grad.get_ovlp(mol)
 
-    diag_idx = numpy.arange(nao)
-    diag_idx = diag_idx * (diag_idx+1) // 2 + diag_idx
-    casdm2_cc = casdm2 + casdm2.transpose(0,1,3,2)
-    dm2buf = ao2mo._ao2mo.nr_e2(casdm2_cc.reshape(ncas**2,ncas**2), mo_cas.T,
-                                (0, nao, 0, nao)).reshape(ncas**2,nao,nao)
-    dm2buf = lib.pack_tril(dm2buf)
-    dm2buf[:,diag_idx] *= .5
-    dm2buf = dm2buf.reshape(ncas,ncas,nao_pair)
-    casdm2 = casdm2_cc = None
-
     if atmlst is None:
         atmlst = range(mol.natm)
     aoslices = mol.aoslice_by_atom()
     de = numpy.zeros((len(atmlst),3))
 
-    max_memory = mc_grad.max_memory - lib.current_memory()[0]
-    blksize = int(max_memory*.9e6/8 / ((aoslices[:,3]-aoslices[:,2]).max()*nao_pair))
-    blksize = min(nao, max(2, blksize))
-
     for k, ia in enumerate(atmlst):
         shl0, shl1, p0, p1 = aoslices[ia]
         h1ao = hcore_deriv(ia)
         de[k] += numpy.einsum('xij,ij->x', h1ao, dm1)
         de[k] -= numpy.einsum('xij,ij->x', s1[:,p0:p1], dme0[p0:p1]) * 2
-
-        q1 = 0
-        for b0, b1, nf in _shell_prange(mol, 0, mol.nbas, blksize):
-            q0, q1 = q1, q1 + nf
-            dm2_ao = lib.einsum('ijw,pi,qj->pqw', dm2buf, mo_cas[p0:p1], mo_cas[q0:q1])
-            shls_slice = (shl0,shl1,b0,b1,0,mol.nbas,0,mol.nbas)
-            eri1 = mol.intor('int2e_ip1', comp=3, aosym='s2kl',
-                             shls_slice=shls_slice).reshape(3,p1-p0,nf,nao_pair)
-            de[k] -= numpy.einsum('xijw,ijw->x', eri1, dm2_ao) * 2
-            eri1 = None
+        de[k] += de2[:,p0:p1].sum(axis=1)
         de[k] += numpy.einsum('xij,ij->x', vhf1c[:,p0:p1], dm1[p0:p1]) * 2
         de[k] += numpy.einsum('xij,ij->x', vhf1a[:,p0:p1], dm_core[p0:p1]) * 2
 
@@ -146,38 +146,64 @@ def get_ovlp(mol):
     return -mol.intor('int1e_ipovlp', comp=3)
 
 
-def get_jk(mol, dm):
+def get_jk(mol, dm, with_j=True, with_k=True):
     '''J = ((-nabla i) j| kl) D_lk
     K = ((-nabla i) j| kl) D_jk
+
+    The J and K matrices of all density matrices are computed in one pass of
+    the (screened) 2e derivative integrals.  with_j and with_k can be a list
+    of booleans to compute J (K) for a subset of the density matrices only,
+    e.g. the J-type contraction of the 2-particle density matrix in the
+    factorized form Gamma_{ij,kl} = sum_P A^P_{ij} B^P_{kl}.  The skipped
+    matrices are set to zero.
     '''
+    dm = numpy.asarray(dm, order='C')
+    nao = dm.shape[-1]
+    dms = dm.reshape(-1,nao,nao)
+    n_dm = len(dms)
+    jmask = numpy.zeros(n_dm, dtype=bool)
+    kmask = numpy.zeros(n_dm, dtype=bool)
+    jmask[:] = with_j
+    kmask[:] = with_k
+
     vhfopt = _vhf.VHFOpt(mol, 'int2e_ip1ip2', 'CVHFgrad_jk_prescreen',
                          'CVHFgrad_jk_direct_scf')
-    dm = numpy.asarray(dm, order='C')
-    if dm.ndim == 3:
-        n_dm = dm.shape[0]
-    else:
-        n_dm = 1
     ao_loc = mol.ao_loc_nr()
     fsetdm = getattr(_vhf.libcvhf, 'CVHFgrad_jk_direct_scf_dm')
     fsetdm(vhfopt._this,
-           dm.ctypes.data_as(ctypes.c_void_p), ctypes.c_int(n_dm),
+           dms.ctypes.data_as(ctypes.c_void_p), ctypes.c_int(n_dm),
            ao_loc.ctypes.data_as(ctypes.c_void_p),
            mol._atm.ctypes.data_as(ctypes.c_void_p), mol.natm,
            mol._bas.ctypes.data_as(ctypes.c_void_p), mol.nbas,
            mol._env.ctypes.data_as(ctypes.c_void_p))
 
-    # Update the vhfopt's attributes intor.  Function direct_mapdm needs
+    # Update the vhfopt's attributes intor.  Function direct_bindm needs
     # vhfopt._intor and vhfopt._cintopt to compute J/K.  intor was initialized
     # as int2e_ip1ip2. It should be int2e_ip1
     vhfopt._intor = intor = mol._add_suffix('int2e_ip1')
     vhfopt._cintopt = None
 
-    vj, vk = _vhf.direct_mapdm(intor,  # (nabla i,j|k,l)
+    jidx = numpy.where(jmask)[0]
+    kidx = numpy.where(kmask)[0]
+    scripts = ['lk->s1ij'] * len(jidx) + ['jk->s1il'] * len(kidx)
+    dm_list = [dms[i] for i in jidx] + [dms[i] for i in kidx]
+    vj = vk = None
+    if dm_list:
+        vs = _vhf.direct_bindm(intor,  # (nabla i,j|k,l)
                                's2kl', # ip1_sph has k>=l,
-                               ('lk->s1ij', 'jk->s1il'),
-                               dm, 3, # xyz, 3 components
+                               scripts, dm_list, 3, # xyz, 3 components
                                mol._atm, mol._bas, mol._env, vhfopt=vhfopt)
-    return -vj, -vk
+    if with_j is not False:
+        vj = numpy.zeros((n_dm,3,nao,nao))
+        for n, i in enumerate(jidx):
+            vj[i] = -vs[n]
+        vj = vj.reshape(dm.shape[:-2] + (3,nao,nao))
+    if with_k is not False:
+        vk = numpy.zeros((n_dm,3,nao,nao))
+        for n, i in enumerate(kidx):
+            vk[i] = -vs[len(jidx)+n]
+        vk = vk.reshape(dm.shape[:-2] + (3,nao,nao))
+    return vj, vk
 
 def get_veff(mf_grad, mol, dm):
     '''NR Hartree-Fock Coulomb repulsion'''
@@ -310,27 +336,19 @@ class GradientsBasics(lib.StreamObject):
         return get_ovlp(mol)
 
     @lib.with_doc(get_jk.__doc__)
-    def get_jk(self, mol=None, dm=None, hermi=0):
+    def get_jk(self, mol=None, dm=None, hermi=0, with_j=True, with_k=True):
         if mol is None: mol = self.mol
         if dm is None: dm = self.base.make_rdm1()
         cpu0 = (time.clock(), time.time())
-        vj, vk = get_jk(mol, dm)
+        vj, vk = get_jk(mol, dm, with_j, with_k)
         logger.timer(self, 'vj and vk', *cpu0)
         return vj, vk
 
     def get_j(self, mol=None, dm=None, hermi=0):
-        if mol is None: mol = self.mol
-        if dm is None: dm = self.base.make_rdm1()
-        intor = mol._add_suffix('int2e_ip1')
-        return -_vhf.direct_mapdm(intor, 's2kl', 'lk->s1ij', dm, 3,
-                                  mol._atm, mol._bas, mol._env)
+        return self.get_jk(mol, dm, with_k=False)[0]
 
     def get_k(self, mol=None, dm=None, hermi=0):
-        if mol is None: mol = self.mol
-        if dm is None: dm = self.base.make_rdm1()
-        intor = mol._add_suffix('int2e_ip1')
-        return -_vhf.direct_mapdm(intor, 's2kl', 'jk->s1il', dm, 3,
-                                  mol._atm, mol._bas, mol._env)
+        return self.get_jk(mol, dm, with_j=False)[1]
 
     def grad_nuc(self, mol=None, atmlst=None):
         if mol is None: mol = self.mol
@@ -122,8 +122,11 @@ def grad_elec(td_grad, x_y, singlet=True, atmlst=None,
 
     dmz1doo = z1ao + dmzoo
     oo0 = reduce(numpy.dot, (orbo, orbo.T))
+    # J of the antisymmetric dmxmy vanishes; J of the transition density
+    # is not needed for triplets
+    with_j = (True, True, singlet, False)
     vj, vk = td_grad.get_jk(mol, (oo0, dmz1doo+dmz1doo.T, dmxpy+dmxpy.T,
-                                  dmxmy-dmxmy.T))
+                                  dmxmy-dmxmy.T), with_j=with_j)
     vj = vj.reshape(-1,3,nao,nao)
     vk = vk.reshape(-1,3,nao,nao)
     if singlet:
@@ -161,7 +161,7 @@ def grad_elec(td_grad, x_y, singlet=True, atmlst=None,
     oo0 = reduce(numpy.dot, (orbo, orbo.T))
     if abs(hyb) > 1e-10:
         dm = (oo0, dmz1doo+dmz1doo.T, dmxpy+dmxpy.T, dmxmy-dmxmy.T)
-        vj, vk = td_grad.get_jk(mol, dm)
+        vj, vk = td_grad.get_jk(mol, dm, with_j=(True, True, singlet, False))
         vk *= hyb
         if abs(omega) > 1e-10:
             with mol.with_range_coulomb(omega):
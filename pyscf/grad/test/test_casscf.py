@@ -99,6 +99,10 @@ class KnownValues(unittest.TestCase):
         g1ref += rhf_grad.grad_nuc(mol)
         self.assertAlmostEqual(abs(g1-g1ref).max(), 0, 9)
 
+        # 2-RDM factors contracted in blocks
+        g1blk = casscf_grad.Gradients(mc).set(max_memory=1).kernel()
+        self.assertAlmostEqual(abs(g1-g1blk).max(), 0, 9)
+
         mcs = mc.as_scanner()
         pmol = mol.copy()
         e1 = mcs(pmol.set_geom_('N 0 0 0; N 0 0 1.201; H 1 1 0; H 1 1 1.2'))
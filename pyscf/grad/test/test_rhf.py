@@ -107,6 +107,26 @@ class KnownValues(unittest.TestCase):
         e2 = mfs(mol.set_geom_('Cu 0 0  0.001; H 0 0 1.5'))
         self.assertAlmostEqual(g[0,2], (e2-e1)/0.002*lib.param.BOHR, 6)
 
+    def test_get_jk(self):
+        from pyscf.scf import _vhf
+        numpy.random.seed(1)
+        nao = mol.nao_nr()
+        dms = numpy.random.random((3,nao,nao))
+        dms = dms + dms.transpose(0,2,1)
+        ref = _vhf.direct_mapdm(mol._add_suffix('int2e_ip1'), 's2kl',
+                                ('lk->s1ij', 'jk->s1il'), dms, 3,
+                                mol._atm, mol._bas, mol._env)
+        vj, vk = grad.rhf.get_jk(mol, dms, with_j=(True, False, True),
+                                 with_k=(False, True, True))
+        self.assertAlmostEqual(abs(vj[[0,2]] + ref[0][[0,2]]).max(), 0, 9)
+        self.assertAlmostEqual(abs(vk[1:] + ref[1][1:]).max(), 0, 9)
+        self.assertAlmostEqual(abs(vj[1]).max(), 0, 12)
+        self.assertAlmostEqual(abs(vk[0]).max(), 0, 12)
+
+        vj, vk = grad.rhf.get_jk(mol, dms[0], with_k=False)
+        self.assertTrue(vk is None)
+        self.assertAlmostEqual(abs(vj + ref[0][0]).max(), 0, 9)
+
 
 if __name__ == "__main__":
     print("Full Tests for RHF Gradients")
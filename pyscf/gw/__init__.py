@@ -13,3 +13,4 @@
 # limitations under the License.
 
 from pyscf.gw.gw import GW
+from pyscf.gw.gw_ac import GWAC
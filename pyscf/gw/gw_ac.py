@@ -0,0 +1,475 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+G0W0 and evGW with density fitting and analytic continuation
+
+The correlation self-energy is computed on the imaginary frequency axis with
+the RI response function (O(N^4) per frequency point) and continued to the
+real axis with a Pade approximant or a two-pole model.  The quasiparticle
+equations of all requested orbitals are solved together.
+
+Ref:
+    X. Ren et al, New J. Phys. 14, 053020 (2012)
+    J. Wilhelm et al, J. Chem. Theory Comput. 14, 3067 (2018)
+'''
+
+import time
+from functools import reduce
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf.ao2mo import _ao2mo
+from pyscf import df
+from pyscf.mp.mp2 import get_nocc, get_nmo, get_frozen_mask
+from pyscf import __config__
+
+
+def kernel(gw, mo_energy, mo_coeff, Lpq=None, orbs=None, nw=None,
+           verbose=logger.NOTE):
+    '''GW-corrected quasiparticle orbital energies
+
+    Returns:
+        A list :  converged, mo_energy, mo_coeff
+    '''
+    mf = gw._scf
+    log = logger.new_logger(gw, verbose)
+    cput0 = (time.clock(), time.time())
+    assert(gw.frozen == 0 or gw.frozen is None)
+
+    if Lpq is None:
+        Lpq = gw.ao2mo(mo_coeff)
+    if orbs is None:
+        orbs = range(gw.nmo)
+    orbs = numpy.asarray(orbs)
+    if nw is None:
+        nw = gw.nw
+
+    # Exchange self-energy and the mean-field exchange-correlation potential
+    dm = mf.make_rdm1()
+    v_mf = mf.get_veff(mf.mol, dm) - mf.get_j(mf.mol, dm)
+    vk = -.5 * mf.get_k(mf.mol, dm)
+    v_diff = reduce(numpy.dot, (mo_coeff.T, vk - v_mf, mo_coeff)).diagonal()
+    v_diff = v_diff[orbs]
+    cput1 = log.timer('GW exchange', *cput0)
+
+    nocc = gw.nocc
+    freqs, wts = _get_scaled_legendre_roots(nw)
+    mf_mo_energy = numpy.asarray(mo_energy)
+    mo_energy = mf_mo_energy.copy()
+    # Orbital energies in G and W
+    e_gw = mf_mo_energy.copy()
+
+    # The Pade approximant is less accurate for the orbitals far from the
+    # Fermi level.  evGW feeds back the quasiparticle energies of the orbitals
+    # within ev_window of the Fermi level.  The other occupied (virtual)
+    # orbitals are shifted by the correction of the HOMO (LUMO).
+    if gw.evgw:
+        if not (numpy.isin(nocc-1, orbs) and numpy.isin(nocc, orbs)):
+            raise RuntimeError('evGW requires the HOMO and LUMO in orbs')
+        ef0 = (mf_mo_energy[nocc-1] + mf_mo_energy[nocc]) * .5
+        in_window = abs(mf_mo_energy[orbs] - ef0) < gw.ev_window
+        in_window |= numpy.isin(orbs, (nocc-1, nocc))
+        ev_orbs = orbs[in_window]
+        ihomo = orbs.tolist().index(nocc-1)
+        ilumo = orbs.tolist().index(nocc)
+        log.debug('evGW updates the energies of orbitals %s', ev_orbs)
+
+    conv = True
+    max_cycle = gw.max_cycle if gw.evgw else 1
+    for cycle in range(max_cycle):
+        sigmaI, omega, ef = get_sigma_diag(gw, orbs, Lpq, freqs, wts,
+                                           e_gw, gw.iw_cutoff)
+        cput1 = log.timer_debug1('imaginary frequency self-energy', *cput1)
+
+        if gw.ac == 'twopole':
+            coeff = AC_twopole_diag(sigmaI, omega, orbs < gw.nocc)
+            get_sigma = lambda e: two_pole(e - ef, coeff)
+        elif gw.ac == 'pade':
+            coeff, omega_fit = AC_pade_thiele_diag(sigmaI, omega)
+            get_sigma = lambda e: pade_thiele(e - ef, omega_fit, coeff)
+        else:
+            raise NotImplementedError('Analytic continuation %s' % gw.ac)
+
+        qp_conv, e_qp = solve_qp(gw, mf_mo_energy[orbs], get_sigma, v_diff)
+        conv = conv and qp_conv
+        mo_energy[orbs] = e_qp
+        if gw.evgw:
+            e_last = e_gw[ev_orbs]
+            e_gw[:nocc] = mf_mo_energy[:nocc] + (e_qp[ihomo] - mf_mo_energy[nocc-1])
+            e_gw[nocc:] = mf_mo_energy[nocc:] + (e_qp[ilumo] - mf_mo_energy[nocc])
+            e_gw[ev_orbs] = e_qp[in_window]
+            de = abs(e_gw[ev_orbs] - e_last).max()
+            log.info('evGW cycle %d  max|de| = %.6g', cycle+1, de)
+            if de < gw.conv_tol:
+                break
+    else:
+        if gw.evgw:
+            conv = False
+
+    if gw.verbose >= logger.DEBUG:
+        numpy.set_printoptions(threshold=gw.nmo)
+        log.debug('  GW mo_energy =\n%s', mo_energy)
+        numpy.set_printoptions(threshold=1000)
+    log.timer('GW', *cput0)
+    return conv, mo_energy, mo_coeff
+
+def solve_qp(gw, ep, get_sigma, v_diff, tol=1e-8, max_cycle=100):
+    '''Solve the quasiparticle equations
+
+        e = ep + Re Sigma_c(e) + Sigma_x - v_xc
+
+    for all orbitals simultaneously with Newton iterations.  get_sigma takes
+    the array of the orbital energies and returns the diagonal of Sigma_c.
+    '''
+    de = 1e-6
+    if gw.linearized:
+        sigma = get_sigma(ep).real
+        dsigma = (get_sigma(ep+de).real - sigma) / de
+        zn = 1. / (1. - dsigma)
+        return True, ep + zn * (sigma + v_diff)
+
+    e = ep.copy()
+    conv = False
+    for cycle in range(max_cycle):
+        sigma = get_sigma(e).real
+        dsigma = (get_sigma(e+de).real - sigma) / de
+        f = e - ep - sigma - v_diff
+        e = e - f / (1. - dsigma)
+        if abs(f).max() < tol:
+            conv = True
+            break
+    if not conv:
+        logger.warn(gw, 'Quasiparticle equations not converged, max|f| = %g',
+                    abs(f).max())
+    return conv, e
+
+def get_rho_response(omega, mo_energy, Lov):
+    '''Density response function chi_0 on the imaginary frequency i*omega in
+    the basis of the auxiliary functions (spin summed)'''
+    naux, nocc, nvir = Lov.shape
+    eia = mo_energy[:nocc,None] - mo_energy[None,nocc:]
+    eia = eia / (omega**2 + eia*eia)
+    Pia = Lov * eia
+    Pi = 4. * numpy.dot(Pia.reshape(naux,-1), Lov.reshape(naux,-1).T)
+    return Pi
+
+def get_sigma_diag(gw, orbs, Lpq, freqs, wts, mo_energy=None, iw_cutoff=None):
+    '''Diagonal elements of the correlation self-energy Sigma_c(ef + i*w) on
+    the imaginary axis.  The frequencies of the occupied orbitals are placed
+    in the lower half-plane to avoid branch cuts in the analytic continuation.
+
+    Returns:
+        sigma : (norbs, nw_sigma) array
+        omega : (norbs, nw_sigma) array, the imaginary frequencies
+        ef : Fermi level
+    '''
+    if mo_energy is None:
+        mo_energy = gw._scf.mo_energy
+    nocc = gw.nocc
+    naux = Lpq.shape[0]
+    orbs = numpy.asarray(orbs)
+    norbs = orbs.size
+
+    if mo_energy[nocc] - mo_energy[nocc-1] < 1e-3:
+        logger.warn(gw, 'HOMO-LUMO gap %s too small for GW analytic continuation',
+                    mo_energy[nocc] - mo_energy[nocc-1])
+    ef = (mo_energy[nocc-1] + mo_energy[nocc]) * .5
+
+    if iw_cutoff is None:
+        nw_sigma = len(freqs) + 1
+    else:
+        nw_sigma = numpy.count_nonzero(freqs < iw_cutoff) + 1
+    omega = numpy.zeros((norbs,nw_sigma), dtype=numpy.complex128)
+    omega[:,1:] = 1j * freqs[:nw_sigma-1]
+    omega[orbs < nocc] *= -1
+
+    # (norbs, nmo, nw_sigma)
+    emo = omega[:,None,:] + ef - mo_energy[None,:,None]
+    sigma = numpy.zeros((norbs,nw_sigma), dtype=numpy.complex128)
+    Lnm = Lpq[:,orbs].reshape(naux,-1)
+    Lov = Lpq[:,:nocc,nocc:]
+    eye = numpy.eye(naux)
+    for w in range(len(freqs)):
+        Pi = get_rho_response(freqs[w], mo_energy, Lov)
+        Pi_inv = numpy.linalg.inv(eye - Pi) - eye
+        Wnm = numpy.einsum('Pn,Pn->n', numpy.dot(Pi_inv, Lnm), Lnm)
+        Wnm = Wnm.reshape(norbs,-1)
+        g0 = wts[w] * emo / (emo**2 + freqs[w]**2)
+        sigma -= numpy.einsum('nm,nmw->nw', Wnm, g0) / numpy.pi
+    return sigma, omega, ef
+
+def _get_scaled_legendre_roots(nw, x0=.5):
+    '''Gauss-Legendre quadrature on [0, inf) with the mapping
+    w = x0 (1+x)/(1-x)'''
+    freqs, wts = numpy.polynomial.legendre.leggauss(nw)
+    freqs_new = x0 * (1. + freqs) / (1. - freqs)
+    wts = wts * 2. * x0 / (1. - freqs)**2
+    return freqs_new, wts
+
+def AC_pade_thiele_diag(sigma, omega):
+    '''Analytic continuation to the real axis with the Pade approximant of
+    Thiele's reciprocal difference method.
+    Ref: H. J. Vidberg and J. W. Serene, J. Low Temp. Phys. 29, 179 (1977)
+
+    Returns:
+        coeff : (npade, norbs) array
+        omega : (npade, norbs) array, the fitting frequencies
+    '''
+    nw = sigma.shape[1]
+    # Dense sampling at low frequencies where Sigma varies the most
+    idx = list(range(1, min(nw, 40), 6))
+    idx += list(range(idx[-1]+4, nw, 4))
+    npade = len(idx) // 2 * 2
+    idx = idx[:npade]
+    zn = omega[:,idx].T.copy()
+    coeff = thiele(sigma[:,idx].T, zn)
+    return coeff, zn
+
+def thiele(fn, zn):
+    '''Coefficients of the continued fraction which interpolates fn at the
+    points zn.  The first axis is the interpolation point; the remaining
+    axes are treated independently.'''
+    nfit = zn.shape[0]
+    g = numpy.zeros((nfit,)+fn.shape, dtype=numpy.complex128)
+    g[:,0] = fn
+    for i in range(1, nfit):
+        g[i:,i] = (g[i-1,i-1] - g[i:,i-1]) / ((zn[i:] - zn[i-1]) * g[i:,i-1])
+    return numpy.asarray([g[i,i] for i in range(nfit)])
+
+def pade_thiele(freqs, zn, coeff):
+    '''Evaluate the continued fraction of :func:`thiele` at freqs'''
+    nfit = coeff.shape[0]
+    X = coeff[-1] * (freqs - zn[-2])
+    for i in reversed(range(1, nfit-1)):
+        X = coeff[i] * (freqs - zn[i-1]) / (1. + X)
+    return coeff[0] / (1. + X)
+
+def AC_twopole_diag(sigma, omega, occ_mask):
+    '''Analytic continuation to the real axis with a two-pole model
+
+        Sigma(w) = c0 + c1/(w+c3) + c2/(w+c4)
+
+    Returns:
+        coeff : (10, norbs) array, the real and imaginary parts of c0..c4
+    '''
+    from scipy.optimize import least_squares
+    norbs = sigma.shape[0]
+    coeff = numpy.zeros((10,norbs))
+    for p in range(norbs):
+        if occ_mask[p]:
+            x0 = numpy.array([0, 1, 1, 1, -1, 0, 0, 0, -1., -.5])
+        else:
+            x0 = numpy.array([0, 1, 1, 1, -1, 0, 0, 0, 1., .5])
+        xopt = least_squares(_two_pole_fit, x0, jac='3-point', method='trf',
+                             xtol=1e-10, gtol=1e-10, max_nfev=1000,
+                             args=(omega[p], sigma[p]))
+        if not xopt.success:
+            logger.warn(None, '2-pole fit of orbital %d not converged, '
+                        'cost function %e', p, xopt.cost)
+        coeff[:,p] = xopt.x
+    return coeff
+
+def _two_pole_fit(coeff, omega, sigma):
+    f = two_pole(omega, coeff) - sigma
+    f[0] = f[0] / .01
+    return numpy.hstack((f.real, f.imag))
+
+def two_pole(freqs, coeff):
+    cf = coeff[:5] + 1j * coeff[5:]
+    return cf[0] + cf[1]/(freqs+cf[3]) + cf[2]/(freqs+cf[4])
+
+
+class GWAC(lib.StreamObject):
+    '''Restricted G0W0 (or evGW) with density fitting and analytic continuation
+
+    Attributes:
+        linearized : bool
+            Whether to solve the linearized quasiparticle equations.
+            Default is False.
+        ac : str
+            Analytic continuation method, 'pade' or 'twopole'.  Default is 'pade'.
+        nw : int
+            Number of the imaginary frequency points.  Default is 100.
+        iw_cutoff : float
+            The self-energy is fitted on the frequencies below iw_cutoff.
+        evgw : bool
+            Whether to update the orbital energies in G and W self-consistently
+            (eigenvalue-only self-consistent GW).  Default is False.
+        ev_window : float
+            evGW updates the energies of the orbitals within ev_window
+            (in Hartree) of the Fermi level in G and W.  The other occupied
+            (virtual) orbitals are shifted by the HOMO (LUMO) correction.
+            Default is 0.5.
+        max_cycle, conv_tol :
+            Convergence control of evGW.  conv_tol is applied to the
+            energies of the orbitals within ev_window.
+
+    Saved results
+
+        mo_energy :
+            Quasiparticle energies
+        mo_coeff
+            Orbital coefficients
+    '''
+
+    linearized = getattr(__config__, 'gw_gw_ac_GWAC_linearized', False)
+    ac = getattr(__config__, 'gw_gw_ac_GWAC_ac', 'pade')
+    nw = getattr(__config__, 'gw_gw_ac_GWAC_nw', 100)
+    iw_cutoff = getattr(__config__, 'gw_gw_ac_GWAC_iw_cutoff', 5.)
+    evgw = getattr(__config__, 'gw_gw_ac_GWAC_evgw', False)
+    max_cycle = getattr(__config__, 'gw_gw_ac_GWAC_max_cycle', 50)
+    conv_tol = getattr(__config__, 'gw_gw_ac_GWAC_conv_tol', 1e-5)
+    ev_window = getattr(__config__, 'gw_gw_ac_GWAC_ev_window', .5)
+
+    def __init__(self, mf, frozen=None):
+        self.mol = mf.mol
+        self._scf = mf
+        self.verbose = self.mol.verbose
+        self.stdout = self.mol.stdout
+        self.max_memory = mf.max_memory
+
+        self.frozen = frozen
+        if getattr(mf, 'with_df', None):
+            self.with_df = mf.with_df
+        else:
+            self.with_df = df.DF(mf.mol)
+            self.with_df.auxbasis = df.make_auxbasis(mf.mol, mp2fit=True)
+
+##################################################
+# don't modify the following attributes, they are not input options
+        self._nocc = None
+        self._nmo = None
+        self.converged = False
+        self.mo_energy = None
+        self.mo_coeff = mf.mo_coeff
+        self.mo_occ = mf.mo_occ
+
+        keys = set(('linearized', 'ac', 'nw', 'iw_cutoff', 'evgw',
+                    'max_cycle', 'conv_tol', 'ev_window', 'with_df'))
+        self._keys = set(self.__dict__.keys()).union(keys)
+
+    def dump_flags(self, verbose=None):
+        log = logger.new_logger(self, verbose)
+        log.info('')
+        log.info('******** %s ********', self.__class__)
+        log.info('method = %s', self.__class__.__name__)
+        nocc = self.nocc
+        nvir = self.nmo - nocc
+        log.info('GW nocc = %d, nvir = %d', nocc, nvir)
+        if self.frozen is not None:
+            log.info('frozen orbitals %s', str(self.frozen))
+        log.info('use perturbative linearized QP eqn = %s', self.linearized)
+        log.info('analytic continuation method = %s', self.ac)
+        log.info('number of imaginary frequencies = %d', self.nw)
+        if self.evgw:
+            log.info('evGW max_cycle = %d  conv_tol = %g  ev_window = %g',
+                     self.max_cycle, self.conv_tol, self.ev_window)
+        return self
+
+    @property
+    def nocc(self):
+        return self.get_nocc()
+    @nocc.setter
+    def nocc(self, n):
+        self._nocc = n
+
+    @property
+    def nmo(self):
+        return self.get_nmo()
+    @nmo.setter
+    def nmo(self, n):
+        self._nmo = n
+
+    get_nocc = get_nocc
+    get_nmo = get_nmo
+    get_frozen_mask = get_frozen_mask
+
+    def kernel(self, mo_energy=None, mo_coeff=None, Lpq=None, orbs=None,
+               nw=None):
+        '''
+        Args:
+            orbs : list
+                Orbitals for which the quasiparticle energies are computed.
+                Default is all orbitals.
+        '''
+        if mo_coeff is None:
+            mo_coeff = self._scf.mo_coeff
+        if mo_energy is None:
+            mo_energy = self._scf.mo_energy
+
+        self.dump_flags()
+        self.converged, self.mo_energy, self.mo_coeff = \
+                kernel(self, mo_energy, mo_coeff, Lpq=Lpq, orbs=orbs, nw=nw,
+                       verbose=self.verbose)
+        return self.mo_energy
+
+    def reset(self, mol=None):
+        if mol is not None:
+            self.mol = mol
+        self._scf.reset(mol)
+        self.with_df.reset(mol)
+        return self
+
+    def ao2mo(self, mo_coeff=None):
+        '''DF 3-index tensor (L|pq) in the MO basis'''
+        if mo_coeff is None:
+            mo_coeff = self.mo_coeff
+        mo = numpy.asarray(mo_coeff, order='F')
+        nmo = mo.shape[1]
+        naux = self.with_df.get_naoaux()
+        mem_incore = naux * nmo**2 * 8/1e6
+        mem_now = lib.current_memory()[0]
+        if mem_incore + mem_now > self.max_memory:
+            logger.warn(self, 'Not enough memory for the 3-index tensor. '
+                        'Memory required %d MB', mem_incore)
+
+        ijslice = (0, nmo, 0, nmo)
+        Lpq = numpy.empty((naux,nmo,nmo))
+        p1 = 0
+        buf = None
+        for eri1 in self.with_df.loop():
+            buf = _ao2mo.nr_e2(eri1, mo, ijslice, aosym='s2', mosym='s1', out=buf)
+            p0, p1 = p1, p1 + buf.shape[0]
+            Lpq[p0:p1] = buf.reshape(p1-p0,nmo,nmo)
+        return Lpq
+
+GW = GWAC
+
+
+if __name__ == '__main__':
+    from pyscf import gto, dft
+    mol = gto.Mole()
+    mol.verbose = 4
+    mol.atom = [
+        [8 , (0. , 0.     , 0.)],
+        [1 , (0. , -0.757 , 0.587)],
+        [1 , (0. , 0.757  , 0.587)]]
+    mol.basis = 'def2-svp'
+    mol.build()
+
+    mf = dft.RKS(mol)
+    mf.xc = 'pbe'
+    mf.kernel()
+
+    nocc = mol.nelectron//2
+    gw = GWAC(mf)
+    gw.kernel(orbs=range(nocc-3, nocc+3))
+    print(gw.mo_energy[nocc-1], gw.mo_energy[nocc])
+
+    gw.evgw = True
+    gw.kernel()
+    print(gw.mo_energy[nocc-1], gw.mo_energy[nocc])
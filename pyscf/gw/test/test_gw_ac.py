@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+import numpy
+from pyscf import gto, dft, tddft
+from pyscf import gw
+from pyscf.gw import gw_ac
+
+mol = gto.Mole()
+mol.verbose = 5
+mol.output = '/dev/null'
+mol.atom = [
+    [8 , (0. , 0.     , 0.)],
+    [1 , (0. , -0.757 , 0.587)],
+    [1 , (0. , 0.757  , 0.587)]]
+mol.basis = '631g'
+mol.build()
+
+mf = dft.RKS(mol)
+mf.xc = 'pbe'
+mf.kernel()
+nocc = mol.nelectron // 2
+
+def tearDownModule():
+    global mol, mf
+    mol.stdout.close()
+    del mol, mf
+
+class KnownValues(unittest.TestCase):
+    def test_gwac_vs_gw(self):
+        nvir = mf.mo_energy.size - nocc
+        td = tddft.dRPA(mf)
+        td.nstates = nocc * nvir
+        td.kernel()
+        gw_ref = gw.GW(mf, td)
+        gw_ref.kernel()
+
+        mygw = gw.GWAC(mf)
+        e = mygw.kernel()
+        self.assertTrue(mygw.converged)
+        # Pade continuation is reliable for the orbitals near Fermi level
+        self.assertAlmostEqual(abs(e[3:nocc+2] - gw_ref.mo_energy[3:nocc+2]).max(), 0, 4)
+
+        mygw.linearized = True
+        e = mygw.kernel(orbs=[nocc-1, nocc])
+        self.assertAlmostEqual(e[nocc-1], -0.40762643, 6)
+        self.assertAlmostEqual(e[nocc  ],  0.19899789, 6)
+
+    def test_twopole(self):
+        mygw = gw_ac.GWAC(mf)
+        mygw.ac = 'twopole'
+        e = mygw.kernel(orbs=[nocc-1, nocc])
+        self.assertAlmostEqual(e[nocc-1], -0.40611716, 5)
+        self.assertAlmostEqual(e[nocc  ],  0.1983922 , 5)
+
+    def test_evgw(self):
+        mygw = gw_ac.GWAC(mf)
+        mygw.evgw = True
+        mygw.conv_tol = 1e-8
+        e = mygw.kernel()
+        self.assertTrue(mygw.converged)
+        self.assertAlmostEqual(e[nocc-1], -0.43442156, 6)
+        self.assertAlmostEqual(e[nocc  ],  0.20370275, 6)
+
+    def test_pade(self):
+        z = numpy.array([.1j, .3j, .7j, 1.5j, 3j, 5j])
+        f = lambda x: .3 / (x - .5) - .2 / (x + .8) + .1
+        coeff = gw_ac.thiele(f(z), z)
+        x = numpy.array([-.3, .2, .4])
+        self.assertAlmostEqual(abs(gw_ac.pade_thiele(x, z, coeff) - f(x)).max(), 0, 9)
+
+
+if __name__ == "__main__":
+    print("Full Tests for GW with analytic continuation")
+    unittest.main()
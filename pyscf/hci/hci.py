@@ -30,6 +30,7 @@ import numpy
 import time
 import ctypes
 from pyscf import lib
+from pyscf.lib.misc import ThreadPoolExecutor
 from pyscf import ao2mo
 from pyscf.lib import logger
 from pyscf.fci import cistring
@@ -190,17 +191,288 @@ def make_hdiag(h1e, eri, strs, norb, nelec):
     diagk = numpy.einsum('ijji->ij',eri)
 
     ndet = len(strs)
-    hdiag = numpy.zeros(ndet)
-    for idet, (stra, strb) in enumerate(strs.reshape(ndet,2,-1)):
-        aocc = str2orblst(stra, norb)[0]
-        bocc = str2orblst(strb, norb)[0]
-        e1 = h1e[aocc,aocc].sum() + h1e[bocc,bocc].sum()
-        e2 = diagj[aocc][:,aocc].sum() + diagj[aocc][:,bocc].sum() \
-           + diagj[bocc][:,aocc].sum() + diagj[bocc][:,bocc].sum() \
-           - diagk[aocc][:,aocc].sum() - diagk[bocc][:,bocc].sum()
-        hdiag[idet] = e1 + e2*.5
+    strs = numpy.asarray(strs).reshape(ndet,2,-1)
+    occa = _strs2occ(strs[:,0], norb).astype(numpy.double)
+    occb = _strs2occ(strs[:,1], norb).astype(numpy.double)
+    occ = occa + occb
+    e1 = occ.dot(h1e.diagonal())
+    e2 = numpy.einsum('ij,ij->i', occ, occ.dot(diagj))
+    e2-= numpy.einsum('ij,ij->i', occa, occa.dot(diagk))
+    e2-= numpy.einsum('ij,ij->i', occb, occb.dot(diagk))
+    hdiag = e1 + e2*.5
     return hdiag
 
+def _strs2occ(strs, norb):
+    '''Occupation pattern (boolean array of shape (nstrs,norb)) of bit strings'''
+    strs = numpy.asarray(strs, dtype=numpy.uint64)
+    strs = strs.reshape(len(strs), -1)
+    # The last element of each string holds orbitals 0-63
+    bits = numpy.arange(64, dtype=numpy.uint64)
+    occ = (strs[:,::-1,None] >> bits) & numpy.uint64(1)
+    return occ.reshape(len(strs),-1)[:,:norb].astype(bool)
+
+def _unique_strs(strs):
+    '''Unique (sorted) rows of strs and the indices to reconstruct strs'''
+    strs = numpy.ascontiguousarray(strs)
+    tmp = strs.view(numpy.dtype((numpy.void, strs.dtype.itemsize * strs.shape[1])))
+    _, idx, inv = numpy.unique(tmp.ravel(), return_index=True, return_inverse=True)
+    return strs[idx], inv
+
+def _isin_strs(strs, strs_ref):
+    '''A boolean mask to indicate whether the rows of strs exist in strs_ref'''
+    dtype = numpy.dtype((numpy.void, strs.dtype.itemsize * strs.shape[1]))
+    tmp = numpy.ascontiguousarray(strs).view(dtype).ravel()
+    ref = numpy.ascontiguousarray(strs_ref).view(dtype).ravel()
+    return numpy.in1d(tmp, ref)
+
+def _string_pairs(occ_row, occ_col, nelec, max_excit, blksize=2400):
+    '''Pairs of strings which differ by at most max_excit excitations. The
+    pairs are returned as a CSR-like adjacency table (indptr, indices, nexcit)
+    over the row strings.
+    '''
+    nrow = len(occ_row)
+    occ_row = numpy.asarray(occ_row, dtype=numpy.double)
+    occ_col = numpy.asarray(occ_col, dtype=numpy.double)
+    rows = [numpy.zeros(0, dtype=int)]
+    cols = [numpy.zeros(0, dtype=int)]
+    nexcit = [numpy.zeros(0, dtype=numpy.int8)]
+    for p0, p1 in lib.prange(0, nrow, blksize):
+        # nelec - overlap is the number of excitations between two strings
+        n = nelec - lib.dot(occ_row[p0:p1], occ_col.T)
+        i, j = numpy.where(n < max_excit + .5)
+        rows.append(i + p0)
+        cols.append(j)
+        nexcit.append(n[i,j].round().astype(numpy.int8))
+    rows = numpy.hstack(rows)
+    indptr = numpy.append(0, numpy.cumsum(numpy.bincount(rows, minlength=nrow)))
+    return indptr, numpy.hstack(cols), numpy.hstack(nexcit)
+
+def _filter_pairs(indptr, indices, mask):
+    '''Keep the entries of a CSR-like adjacency table which are marked by mask'''
+    nrow = len(indptr) - 1
+    rows = numpy.repeat(numpy.arange(nrow), indptr[1:] - indptr[:-1])
+    counts = numpy.bincount(rows[mask], minlength=nrow)
+    return numpy.append(0, numpy.cumsum(counts)), indices[mask]
+
+def _expand(indptr, rows):
+    '''Enumerate the neighbours of rows in a CSR-like adjacency table. Returns
+    the positions in rows and the positions of the neighbours in the table.
+    '''
+    start = indptr[rows]
+    count = indptr[rows+1] - start
+    idx = numpy.repeat(numpy.arange(len(rows)), count)
+    offset = numpy.cumsum(count) - count
+    pos = numpy.arange(count.sum()) + numpy.repeat(start - offset, count)
+    return idx, pos
+
+def _connect(strs_bra, strs_ket, norb, nelec, blksize=20000):
+    '''Determinant pairs <bra|H|ket> which are coupled by single or double
+    excitations. The (bra, ket) index pairs are returned in three groups:
+    alpha (single and double) excitations, beta excitations and alpha-beta
+    double excitations.  Diagonal pairs (bra == ket) are excluded.
+    '''
+    neleca, nelecb = nelec
+    nbra = len(strs_bra)
+    nset = strs_bra.shape[1] // 2
+    stra, inva = _unique_strs(numpy.vstack((strs_bra[:,:nset], strs_ket[:,:nset])))
+    strb, invb = _unique_strs(numpy.vstack((strs_bra[:,nset:], strs_ket[:,nset:])))
+    bra_a, ket_a = inva[:nbra], inva[nbra:]
+    bra_b, ket_b = invb[:nbra], invb[nbra:]
+    nstrb = len(strb)
+
+    # Sorted keys to look up determinants in bra
+    bra_keys = bra_a.astype(numpy.int64) * nstrb + bra_b
+    key_order = numpy.argsort(bra_keys)
+    bra_keys = bra_keys[key_order]
+    def lookup(ia, ib):
+        keys = ia.astype(numpy.int64) * nstrb + ib
+        loc = numpy.searchsorted(bra_keys, keys)
+        loc[loc == nbra] = 0
+        mask = bra_keys[loc] == keys
+        return mask, key_order[loc[mask]]
+
+    # Adjacency tables between the ket strings and the bra strings, in the
+    # space of the unique strings
+    def string_neighbours(strs, bra_s, ket_s, nelec):
+        ket_u = numpy.unique(ket_s)
+        bra_u = numpy.unique(bra_s)
+        occ = _strs2occ(strs, norb)
+        indptr, indices, nexcit = _string_pairs(occ[ket_u], occ[bra_u], nelec, 2)
+        counts = numpy.zeros(len(strs), dtype=int)
+        counts[ket_u] = indptr[1:] - indptr[:-1]
+        indptr = numpy.append(0, numpy.cumsum(counts))
+        return indptr, bra_u[indices], nexcit
+    indptra, neighba, nexcita = string_neighbours(stra, bra_a, ket_a, neleca)
+    indptrb, neighbb, nexcitb = string_neighbours(strb, bra_b, ket_b, nelecb)
+    indptr1a, neighb1a = _filter_pairs(indptra, neighba, nexcita == 1)
+    indptr1b, neighb1b = _filter_pairs(indptrb, neighbb, nexcitb == 1)
+
+    pair_a = ([], [])
+    pair_b = ([], [])
+    pair_ab = ([], [])
+    for p0, p1 in lib.prange(0, len(ket_a), blksize):
+        ket_idx = numpy.arange(p0, p1)
+        # alpha excitations with the same beta string
+        idx, pos = _expand(indptra, ket_a[p0:p1])
+        mask = nexcita[pos] > 0
+        idx, pos = idx[mask], pos[mask]
+        found, bra = lookup(neighba[pos], ket_b[p0:p1][idx])
+        pair_a[0].append(bra)
+        pair_a[1].append(ket_idx[idx[found]])
+
+        # beta excitations with the same alpha string
+        idx, pos = _expand(indptrb, ket_b[p0:p1])
+        mask = nexcitb[pos] > 0
+        idx, pos = idx[mask], pos[mask]
+        found, bra = lookup(ket_a[p0:p1][idx], neighbb[pos])
+        pair_b[0].append(bra)
+        pair_b[1].append(ket_idx[idx[found]])
+
+        # alpha->alpha, beta->beta
+        idx, pos_a = _expand(indptr1a, ket_a[p0:p1])
+        idx1, pos_b = _expand(indptr1b, ket_b[p0:p1][idx])
+        idx = idx[idx1]
+        pos_a = pos_a[idx1]
+        found, bra = lookup(neighb1a[pos_a], neighb1b[pos_b])
+        pair_ab[0].append(bra)
+        pair_ab[1].append(ket_idx[idx[found]])
+
+    def pack(pair):
+        bra = numpy.hstack(pair[0]).astype(int)
+        ket = numpy.hstack(pair[1]).astype(int)
+        return bra, ket
+    return pack(pair_a), pack(pair_b), pack(pair_ab)
+
+def _count_between(cumocc, p, q):
+    '''Number of occupied orbitals between orbitals p and q'''
+    lo = numpy.minimum(p, q)
+    hi = numpy.maximum(p, q)
+    rows = numpy.arange(len(p))
+    return cumocc[rows,hi-1] - cumocc[rows,lo]
+
+def _excit_orbitals(occ_bra, occ_ket, nexcit):
+    '''Orbitals (in ascending order) annihilated in ket and created in bra'''
+    des = numpy.nonzero(occ_ket & ~occ_bra)[1].reshape(-1,nexcit)
+    cre = numpy.nonzero(occ_bra & ~occ_ket)[1].reshape(-1,nexcit)
+    return des, cre
+
+def _same_spin_elements(h1, eri, occ_bra, occ_ket, occ_ket_other):
+    '''Matrix elements <bra|H|ket> for single or double excitations of one
+    spin. occ_ket_other is the occupation pattern of the other spin.
+    '''
+    norb = h1.shape[0]
+    val = numpy.zeros(len(occ_ket))
+    nexcit = (occ_bra != occ_ket).sum(axis=1) // 2
+    cumocc = numpy.cumsum(occ_ket, axis=1)
+
+    # a^+ i
+    mask = numpy.where(nexcit == 1)[0]
+    if mask.size > 0:
+        des, cre = _excit_orbitals(occ_bra[mask], occ_ket[mask], 1)
+        i = des[:,0]
+        a = cre[:,0]
+        k = numpy.arange(norb)[:,None]
+        vj = eri[k,k,a,i]
+        vk = eri[k,i,a,k]
+        fai = h1[a,i] + numpy.einsum('pk,kp->p', occ_ket[mask], vj - vk)
+        fai += numpy.einsum('pk,kp->p', occ_ket_other[mask], vj)
+        n = _count_between(cumocc[mask], a, i)
+        val[mask] = fai * (1 - n % 2 * 2)
+
+    # b^+ j a^+ i
+    mask = numpy.where(nexcit == 2)[0]
+    if mask.size > 0:
+        des, cre = _excit_orbitals(occ_bra[mask], occ_ket[mask], 2)
+        i, j = des.T
+        a, b = cre.T
+        v = eri[a,i,b,j] - eri[a,j,b,i]
+        # The sign of a^+ i acting on ket, then b^+ j acting on the
+        # intermediate string in which i is removed and a is added
+        lo = numpy.minimum(b, j)
+        hi = numpy.maximum(b, j)
+        n = _count_between(cumocc[mask], a, i)
+        n+= _count_between(cumocc[mask], b, j)
+        n-= (lo < i) & (i < hi)
+        n+= (lo < a) & (a < hi)
+        val[mask] = v * (1 - n % 2 * 2)
+    return val
+
+def _opposite_spin_elements(eri, occa_bra, occa_ket, occb_bra, occb_ket):
+    '''Matrix elements <bra|H|ket> for alpha-beta double excitations'''
+    i, a = _excit_orbitals(occa_bra, occa_ket, 1)
+    j, b = _excit_orbitals(occb_bra, occb_ket, 1)
+    i, a, j, b = i[:,0], a[:,0], j[:,0], b[:,0]
+    n = _count_between(numpy.cumsum(occa_ket, axis=1), a, i)
+    n+= _count_between(numpy.cumsum(occb_ket, axis=1), b, j)
+    return eri[a,i,b,j] * (1 - n % 2 * 2)
+
+def _hamiltonian_elements(h1, eri, strs_bra, strs_ket, norb, nelec, blksize=20000):
+    '''Non-zero off-diagonal matrix elements <bra|H|ket> between two sets of
+    determinants.  Returns the (bra, ket) indices and the matrix elements.
+    '''
+    if len(strs_bra) == 0 or len(strs_ket) == 0:
+        idx = numpy.zeros(0, dtype=int)
+        return idx, idx, numpy.zeros(0)
+    eri = ao2mo.restore(1, eri, norb)
+    nset = strs_bra.shape[1] // 2
+    pair_a, pair_b, pair_ab = _connect(strs_bra, strs_ket, norb, nelec)
+    bra = numpy.hstack((pair_a[0], pair_b[0], pair_ab[0]))
+    ket = numpy.hstack((pair_a[1], pair_b[1], pair_ab[1]))
+    na, nb = len(pair_a[0]), len(pair_b[0])
+    occa_bra_all = _strs2occ(strs_bra[:,:nset], norb)
+    occb_bra_all = _strs2occ(strs_bra[:,nset:], norb)
+    occa_ket_all = _strs2occ(strs_ket[:,:nset], norb)
+    occb_ket_all = _strs2occ(strs_ket[:,nset:], norb)
+    val = numpy.empty(len(bra))
+    for p0, p1 in lib.prange(0, len(bra), blksize):
+        occa_bra = occa_bra_all[bra[p0:p1]]
+        occb_bra = occb_bra_all[bra[p0:p1]]
+        occa_ket = occa_ket_all[ket[p0:p1]]
+        occb_ket = occb_ket_all[ket[p0:p1]]
+        for q0, q1, kind in ((p0, min(p1, na), 'a'),
+                             (max(p0, na), min(p1, na+nb), 'b'),
+                             (max(p0, na+nb), p1, 'ab')):
+            if q0 >= q1:
+                continue
+            s = slice(q0-p0, q1-p0)
+            if kind == 'a':
+                val[q0:q1] = _same_spin_elements(h1, eri, occa_bra[s], occa_ket[s],
+                                                 occb_ket[s])
+            elif kind == 'b':
+                val[q0:q1] = _same_spin_elements(h1, eri, occb_bra[s], occb_ket[s],
+                                                 occa_ket[s])
+            else:
+                val[q0:q1] = _opposite_spin_elements(eri, occa_bra[s], occa_ket[s],
+                                                     occb_bra[s], occb_ket[s])
+    return bra, ket, val
+
+def make_hamiltonian(h1e, eri, strs, norb, nelec, hdiag=None):
+    '''Sparse Hamiltonian matrix (scipy.sparse.csr_matrix) in the space of
+    the selected determinants.  It can be reused by the sigma operation as
+    long as the determinant space and the integrals are not changed.
+    '''
+    from scipy import sparse
+    ndet = len(strs)
+    if hdiag is None:
+        hdiag = make_hdiag(h1e, eri, strs, norb, nelec)
+    bra, ket, val = _hamiltonian_elements(h1e, eri, strs, strs, norb, nelec)
+    idx = numpy.arange(ndet)
+    bra = numpy.hstack((bra, idx))
+    ket = numpy.hstack((ket, idx))
+    val = numpy.hstack((val, hdiag))
+    return sparse.csr_matrix((val, (bra, ket)), shape=(ndet,ndet))
+
+def contract_2e_sparse(h1_h2, civec, norb, nelec, hdiag=None, hamiltonian=None,
+                       **kwargs):
+    '''H|civec> with the sparse Hamiltonian matrix. The sparse matrix is
+    constructed if it is not given.
+    '''
+    if hamiltonian is None:
+        h1, eri = h1_h2
+        hamiltonian = make_hamiltonian(h1, eri, civec._strs, norb, nelec, hdiag)
+    ci1 = hamiltonian.dot(numpy.asarray(civec).ravel())
+    return as_SCIvector(ci1, civec._strs)
+
 def cre_des_sign(p, q, string):
     nset = len(string)
     pg, pb = p//64, p%64
@@ -309,12 +581,11 @@ def toggle_bit(s, place):
 
 def select_strs_ctypes(myci, civec, h1, eri, jk, eri_sorted, jk_sorted, norb, nelec):
     strs = civec._strs
-    ndet = strs.shape[0]
     ndet, nset = strs.shape
     nset = nset // 2
     neleca, nelecb = nelec
 
-    h1 = numpy.asarray(h1, order='C')  
+    h1 = numpy.asarray(h1, order='C')
     eri = numpy.asarray(eri, order='C')
     jk = numpy.asarray(jk, order='C')
     civec = numpy.asarray(civec, order='C')
@@ -322,43 +593,46 @@ def select_strs_ctypes(myci, civec, h1, eri, jk, eri_sorted, jk_sorted, norb, ne
     eri_sorted = numpy.asarray(eri_sorted, order='C')
     jk_sorted = numpy.asarray(jk_sorted, order='C')
 
-    str_add = numpy.empty((0,strs.shape[1]), dtype=numpy.uint64)
-
+    # Determinants are split into batches and the batches are handled by
+    # multiple threads. Each thread holds the buffer of one batch.
+    nthreads = max(1, lib.num_threads())
     batch_size = max(1, 8 * 4 * neleca * nelecb * (norb-neleca) * (norb-nelecb))
-    ndet_batch = int(myci.max_memory * 1024**2) // batch_size
-    nbatches = ndet // ndet_batch + 1
-
-    for i in range(nbatches):
-        ndet_start = ndet_batch * i
-        ndet_finish = min(ndet_batch * (i + 1), ndet)
-        ndet_select_max = 4 * neleca * nelecb * (norb-neleca) * (norb-nelecb) * ndet_batch
+    ndet_batch = int(myci.max_memory * 1024**2 / nthreads) // batch_size
+    ndet_batch = max(1, min(ndet_batch, (ndet+nthreads-1) // nthreads))
 
+    def select_batch(ndet_start, ndet_finish):
+        ndet_select_max = 4 * neleca * nelecb * (norb-neleca) * (norb-nelecb) * (ndet_finish-ndet_start)
         str_add_batch = numpy.empty((ndet_select_max, strs.shape[1]), dtype=numpy.uint64)
         n_str_add_batch = numpy.array([str_add_batch.shape[0]])
 
-        str_add_batch = numpy.asarray(str_add_batch, order='C')
-
-        libhci.select_strs(h1.ctypes.data_as(ctypes.c_void_p), 
-                           eri.ctypes.data_as(ctypes.c_void_p), 
-                           jk.ctypes.data_as(ctypes.c_void_p), 
-                           eri_sorted.ctypes.data_as(ctypes.c_void_p), 
-                           jk_sorted.ctypes.data_as(ctypes.c_void_p), 
-                           ctypes.c_int(norb), 
-                           ctypes.c_int(neleca), 
-                           ctypes.c_int(nelecb), 
-                           strs.ctypes.data_as(ctypes.c_void_p), 
-                           civec.ctypes.data_as(ctypes.c_void_p), 
-                           ctypes.c_ulonglong(ndet_start), 
-                           ctypes.c_ulonglong(ndet_finish), 
+        libhci.select_strs(h1.ctypes.data_as(ctypes.c_void_p),
+                           eri.ctypes.data_as(ctypes.c_void_p),
+                           jk.ctypes.data_as(ctypes.c_void_p),
+                           eri_sorted.ctypes.data_as(ctypes.c_void_p),
+                           jk_sorted.ctypes.data_as(ctypes.c_void_p),
+                           ctypes.c_int(norb),
+                           ctypes.c_int(neleca),
+                           ctypes.c_int(nelecb),
+                           strs.ctypes.data_as(ctypes.c_void_p),
+                           civec.ctypes.data_as(ctypes.c_void_p),
+                           ctypes.c_ulonglong(ndet_start),
+                           ctypes.c_ulonglong(ndet_finish),
                            ctypes.c_double(myci.select_cutoff),
                            str_add_batch.ctypes.data_as(ctypes.c_void_p),
                            n_str_add_batch.ctypes.data_as(ctypes.c_void_p))
 
-        n_str_add_batch = n_str_add_batch[0]
-        str_add_batch = str_add_batch[:n_str_add_batch]
-        str_add = numpy.vstack((str_add, str_add_batch))
+        # Remove duplicated strings within the batch to release the buffer
+        return _unique_strs(str_add_batch[:n_str_add_batch[0]])[0]
 
-    str_add = numpy.asarray(str_add)
+    batches = list(lib.prange(0, ndet, ndet_batch))
+    if nthreads > 1 and len(batches) > 1 and ThreadPoolExecutor is not None:
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            str_add = list(executor.map(lambda x: select_batch(*x), batches))
+    else:
+        str_add = [select_batch(*x) for x in batches]
+
+    str_add = [numpy.empty((0,strs.shape[1]), dtype=numpy.uint64)] + str_add
+    str_add = numpy.vstack(str_add)
     return str_add
 
 def enlarge_space(myci, civec, h1, eri, jk, eri_sorted, jk_sorted, norb, nelec):
@@ -376,12 +650,12 @@ def enlarge_space(myci, civec, h1, eri, jk, eri_sorted, jk_sorted, norb, nelec):
     strs = strs[cidx]
 
     ci_coeff = [as_SCIvector(c[cidx], strs) for c in civec]
- 
-    strs_new = strs.copy()
 
+    strs_new = [strs]
     for p in range(nroots):
         str_add = select_strs_ctypes(myci, ci_coeff[p], h1, eri, jk, eri_sorted, jk_sorted, norb, nelec)
-        strs_new = numpy.vstack((strs, str_add))
+        strs_new.append(str_add)
+    strs_new = numpy.vstack(strs_new)
 
     # Add strings together and remove duplicate strings
     tmp = numpy.ascontiguousarray(strs_new).view(numpy.dtype((numpy.void, strs_new.dtype.itemsize * strs_new.shape[1])))
@@ -397,6 +671,128 @@ def enlarge_space(myci, civec, h1, eri, jk, eri_sorted, jk_sorted, norb, nelec):
 
     return [as_SCIvector(ci, strs_new) for ci in new_ci]
 
+def _sort_integrals(eri, norb):
+    '''Integrals sorted by magnitude for the heat-bath selection'''
+    eri = ao2mo.restore(1, eri, norb).ravel()
+    eri_sorted = abs(eri).argsort()[::-1]
+    jk = eri.reshape([norb]*4)
+    jk = jk - jk.transpose(2,1,0,3)
+    jk = jk.ravel()
+    jk_sorted = abs(jk).argsort()[::-1]
+    return eri_sorted, jk, jk_sorted
+
+def _external_strs(myci, civec, h1, eri, jk, eri_sorted, jk_sorted, norb, nelec,
+                   cutoff, strs_var):
+    '''Determinants outside of the variational space strs_var which are
+    selected by the heat-bath criterion |H_ai c_i| > cutoff'''
+    with lib.temporary_env(myci, select_cutoff=cutoff):
+        str_add = select_strs_ctypes(myci, civec, h1, eri, jk, eri_sorted,
+                                     jk_sorted, norb, nelec)
+    str_add = _unique_strs(str_add)[0]
+    return str_add[~_isin_strs(str_add, strs_var)]
+
+def _pt2_numerators(h1, eri, strs_ext, civec, norb, nelec, cutoff):
+    '''Screened first order interactions sum_i <a|H|i> c_i of the external
+    determinants a. Contributions with |H_ai c_i| < cutoff are skipped.'''
+    bra, ket, hai = _hamiltonian_elements(h1, eri, strs_ext, civec._strs, norb, nelec)
+    hc = hai * numpy.asarray(civec)[ket]
+    mask = abs(hc) > cutoff
+    return numpy.bincount(bra[mask], weights=hc[mask], minlength=len(strs_ext))
+
+def pt2(myci, civec, h1e, eri, norb, nelec, e0=None, pt2_cutoff=None,
+        pt2_det_cutoff=None, nsamples=None, nbatches=None, verbose=None):
+    '''Epstein-Nesbet second order correction to the selected CI energy.
+
+    The heat-bath screened PT2 correction (JCTC 2017, 13, 1595) only includes
+    the contributions with |H_ai c_i| > pt2_cutoff.  The semistochastic
+    algorithm is used if nsamples > 0: the contributions above pt2_det_cutoff
+    are computed deterministically; the remaining contributions between
+    pt2_cutoff and pt2_det_cutoff are estimated by sampling nsamples
+    determinants of the variational wavefunction (with probabilities
+    proportional to |c_i|) in nbatches independent batches.
+
+    Args:
+        civec : SCIvector
+            Normalized variational wavefunction of one root
+
+    Kwargs:
+        e0 : float
+            Variational (electronic) energy of civec.
+
+    Returns:
+        The PT2 energy and the statistical error of the stochastic part.
+    '''
+    log = logger.new_logger(myci, verbose)
+    if pt2_cutoff is None: pt2_cutoff = myci.pt2_cutoff
+    if pt2_det_cutoff is None: pt2_det_cutoff = myci.pt2_det_cutoff
+    if nsamples is None: nsamples = myci.pt2_nsamples
+    if nbatches is None: nbatches = myci.pt2_nbatches
+    nelec = direct_spin1._unpack_nelec(nelec, myci.spin)
+    eri = ao2mo.restore(1, eri, norb)
+    eri_sorted, jk, jk_sorted = _sort_integrals(eri, norb)
+    eri = eri.ravel()
+    strs = civec._strs
+    if e0 is None:
+        hc = myci.contract_2e((h1e, eri), civec, norb, nelec)
+        e0 = numpy.dot(civec, hc)
+
+    if not nsamples:
+        pt2_det_cutoff = pt2_cutoff
+
+    t0 = (time.clock(), time.time())
+    strs_ext = _external_strs(myci, civec, h1e, eri, jk, eri_sorted, jk_sorted,
+                              norb, nelec, pt2_det_cutoff, strs)
+    log.debug('Deterministic PT2 with %d external determinants', len(strs_ext))
+    e2 = 0
+    # Estimate the number of couplings to determine the batch size
+    ncoupling = (nelec[0] * (norb-nelec[0]) + nelec[1] * (norb-nelec[1]))**2
+    blksize = max(1, int(myci.max_memory*1e6/64 / min(len(strs), ncoupling)))
+    for p0, p1 in lib.prange(0, len(strs_ext), blksize):
+        ediag = myci.make_hdiag(h1e, eri, strs_ext[p0:p1], norb, nelec)
+        v = _pt2_numerators(h1e, eri, strs_ext[p0:p1], civec, norb, nelec,
+                            pt2_det_cutoff)
+        e2 += numpy.dot(v**2, 1./(e0 - ediag))
+    log.timer('deterministic PT2', *t0)
+    if not nsamples:
+        log.info('PT2 energy = %.15g', e2)
+        return e2, 0
+
+    prob = abs(numpy.asarray(civec))
+    prob /= prob.sum()
+    e2_stoc = []
+    for ibatch in range(nbatches):
+        w = numpy.random.multinomial(nsamples, prob)
+        idx = numpy.where(w > 0)[0]
+        c_s = as_SCIvector(numpy.asarray(civec)[idx], strs[idx])
+        strs_ext = _external_strs(myci, c_s, h1e, eri, jk, eri_sorted, jk_sorted,
+                                  norb, nelec, pt2_cutoff, strs)
+        ediag = myci.make_hdiag(h1e, eri, strs_ext, norb, nelec)
+        bra, ket, hai = _hamiltonian_elements(h1e, eri, strs_ext, c_s._strs, norb, nelec)
+        hc = hai * numpy.asarray(c_s)[ket]
+        # The unbiased estimator of (sum_i H_ai c_i)^2 is
+        # [(sum_i w_i/p_i H_ai c_i)^2
+        #  + sum_i ((N-1) w_i/p_i - (w_i/p_i)^2) (H_ai c_i)^2] / (N(N-1))
+        w_p = w[idx] / prob[idx]
+        fac = (nsamples - 1) * w_p - w_p**2
+        de = []
+        for cutoff in (pt2_cutoff, pt2_det_cutoff):
+            mask = abs(hc) > cutoff
+            b, k, x = bra[mask], ket[mask], hc[mask]
+            v1 = numpy.bincount(b, weights=x*w_p[k], minlength=len(strs_ext))
+            v2 = numpy.bincount(b, weights=x**2*fac[k], minlength=len(strs_ext))
+            de.append(numpy.dot(v1**2 + v2, 1./(e0 - ediag)))
+        e2_stoc.append((de[0] - de[1]) / (nsamples * (nsamples - 1)))
+        log.debug1('PT2 stochastic batch %d  dE = %.12g', ibatch, e2_stoc[-1])
+    e2_stoc = numpy.array(e2_stoc)
+    e2 += e2_stoc.mean()
+    if nbatches > 1:
+        err = e2_stoc.std(ddof=1) / numpy.sqrt(nbatches)
+    else:
+        err = 0
+    log.timer('semistochastic PT2', *t0)
+    log.info('PT2 energy = %.15g +/- %.3g', e2, err)
+    return e2, err
+
 def str2orblst(string, norb):
     occ = []
     vir = []
@@ -457,11 +853,7 @@ def kernel_float_space(myci, h1e, eri, norb, nelec, ci0=None,
     if eri_sorted is None and jk is None and jk_sorted is None:
         log.debug("\nSorting two-electron integrals...")
         t_start = time.time()
-        eri_sorted = abs(eri).argsort()[::-1]
-        jk = eri.reshape([norb]*4)
-        jk = jk - jk.transpose(2,1,0,3)
-        jk = jk.ravel()
-        jk_sorted = abs(jk).argsort()[::-1]
+        eri_sorted, jk, jk_sorted = _sort_integrals(eri, norb)
         t_current = time.time() - t_start
         log.debug('Timing for sorting the integrals: %10.3f', t_current)
 
@@ -470,6 +862,8 @@ def kernel_float_space(myci, h1e, eri, norb, nelec, ci0=None,
         hf_str = numpy.hstack([orblst2str(range(nelec[0]), norb), orblst2str(range(nelec[1]), norb)]).reshape(1,-1)
         ci0 = [as_SCIvector(numpy.ones(1), hf_str)]
     else:
+        if not isinstance(ci0, (tuple, list)):
+            ci0 = [ci0]
         assert(nroots == len(ci0))
 
     ci0 = myci.enlarge_space(ci0, h1e, eri, jk, eri_sorted, jk_sorted, norb, nelec)
@@ -707,18 +1101,28 @@ class SelectedCI(direct_spin1.FCISolver):
         self.max_iter = 10
         # Maximum memory in MB for storing lists of selected strings
         self.max_memory = 1000
+        # Store the Hamiltonian matrix of the selected space as a sparse
+        # matrix. It is reused by the Davidson iterations.
+        self.sparse_hamiltonian = True
+        # Parameters for the (semistochastic) PT2 correction
+        self.pt2_cutoff = 1e-5
+        self.pt2_det_cutoff = 1e-4
+        self.pt2_nsamples = 0
+        self.pt2_nbatches = 10
 
 ##################################################
 # don't modify the following attributes, they are not input options
         #self.converged = False
         #self.ci = None
         self._strs = None
+        self._hamiltonian = None
         self._keys = set(self.__dict__.keys())
 
     def dump_flags(self, verbose=None):
         direct_spin1.FCISolver.dump_flags(self, verbose)
         logger.info(self, 'ci_coeff_cutoff %g', self.ci_coeff_cutoff)
         logger.info(self, 'select_cutoff   %g', self.select_cutoff)
+        logger.info(self, 'sparse_hamiltonian %s', self.sparse_hamiltonian)
 
     # define absorb_h1e for compatibility to other FCI solver
     def absorb_h1e(h1, eri, *args, **kwargs):
@@ -730,9 +1134,23 @@ class SelectedCI(direct_spin1.FCISolver):
         else:
             assert(civec.size == len(self._strs))
             civec = as_SCIvector(civec, self._strs)
-        return contract_2e_ctypes(h1_h2, civec, norb, nelec, hdiag, **kwargs)
+        if not self.sparse_hamiltonian:
+            return contract_2e_ctypes(h1_h2, civec, norb, nelec, hdiag, **kwargs)
 #        return contract_2e(h1_h2, civec, norb, nelec, hdiag, **kwargs)
 
+        # The cached Hamiltonian is valid for the same determinant space and
+        # the same integral arrays
+        h1, eri = h1_h2
+        strs = civec._strs
+        if (self._hamiltonian is None or self._hamiltonian[0] is not strs or
+            self._hamiltonian[1] is not h1 or self._hamiltonian[2] is not eri):
+            if isinstance(nelec, (int, numpy.number)):
+                nelec = direct_spin1._unpack_nelec(nelec, self.spin)
+            hmat = make_hamiltonian(h1, eri, strs, norb, nelec, hdiag)
+            self._hamiltonian = (strs, h1, eri, hmat)
+        return contract_2e_sparse(h1_h2, civec, norb, nelec,
+                                  hamiltonian=self._hamiltonian[3])
+
     def contract_ss(self, civec, norb, nelec):
         if getattr(civec, '_strs', None) is not None:
             self._strs = civec._strs
@@ -772,6 +1190,26 @@ class SelectedCI(direct_spin1.FCISolver):
 
         return make_rdm12s(civec, norb, nelec)
 
+    def make_rdm1s(self, civec, norb, nelec, link_index=None):
+        return self.make_rdm12s(civec, norb, nelec)[0]
+
+    def make_rdm1(self, civec, norb, nelec, link_index=None):
+        dm1a, dm1b = self.make_rdm1s(civec, norb, nelec)
+        return dm1a + dm1b
+
+    def make_rdm12(self, civec, norb, nelec, link_index=None, reorder=True):
+        (dm1a, dm1b), (dm2aa, dm2ab, dm2bb) = self.make_rdm12s(civec, norb, nelec)
+        dm2 = dm2aa + dm2bb + dm2ab + dm2ab.transpose(2,3,0,1)
+        return dm1a + dm1b, dm2
+
+    def make_rdm2(self, civec, norb, nelec, link_index=None, reorder=True):
+        return self.make_rdm12(civec, norb, nelec)[1]
+
+    def pt2(self, civec, h1e, eri, norb, nelec, e0=None, **kwargs):
+        if getattr(civec, '_strs', None) is None:
+            civec = as_SCIvector(civec, self._strs)
+        return pt2(self, civec, h1e, eri, norb, nelec, e0, **kwargs)
+
     enlarge_space = enlarge_space
     kernel = kernel_float_space
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import numpy
+from pyscf import gto
+from pyscf import scf
+from pyscf import mcscf
+from pyscf.fci import direct_spin1
+from pyscf.hci import hci
+
+norb = 8
+nelec = (4, 3)
+numpy.random.seed(3)
+h1 = numpy.random.random([norb]*2)**4 * 1e-1
+h1 = h1 + h1.T
+eri = numpy.random.random([norb]*4)**4 * 1e-1
+eri = eri + eri.transpose(0,1,3,2)
+eri = eri + eri.transpose(1,0,2,3)
+eri = eri + eri.transpose(2,3,0,1)
+
+def tearDownModule():
+    global h1, eri
+    del h1, eri
+
+def make_civec(myci):
+    eri_sorted, jk, jk_sorted = hci._sort_integrals(eri, norb)
+    hf_str = numpy.hstack([hci.orblst2str(range(nelec[0]), norb),
+                           hci.orblst2str(range(nelec[1]), norb)]).reshape(1,-1)
+    civec = [hci.as_SCIvector(numpy.ones(1), hf_str)]
+    numpy.random.seed(1)
+    for i in range(2):
+        civec = myci.enlarge_space(civec, h1, eri.ravel(), jk, eri_sorted,
+                                   jk_sorted, norb, nelec)
+        strs = civec[0]._strs
+        civec = [hci.as_SCIvector(numpy.random.random(len(strs)), strs)]
+    return civec
+
+class KnownValues(unittest.TestCase):
+    def test_contract_2e_sparse(self):
+        myci = hci.SCI()
+        myci.select_cutoff = 1e-3
+        myci.ci_coeff_cutoff = 1e-3
+        civec = make_civec(myci)
+        strs = civec[0]._strs
+        ci1 = hci.contract_2e_ctypes((h1, eri), civec[0], norb, nelec)
+        ci2 = myci.contract_2e((h1, eri), civec[0], norb, nelec)
+        self.assertAlmostEqual(abs(ci1-ci2).max().item(), 0, 12)
+        hmat = myci._hamiltonian[3]
+        # The cached Hamiltonian is reused
+        ci2 = myci.contract_2e((h1, eri), civec[0], norb, nelec)
+        self.assertTrue(myci._hamiltonian[3] is hmat)
+
+        fcivec = hci.to_fci(civec, norb, nelec)
+        h2e = direct_spin1.absorb_h1e(h1, eri, norb, nelec, .5)
+        ref = direct_spin1.contract_2e(h2e, fcivec, norb, nelec)
+        ref = hci.from_fci(ref, strs, norb, nelec)
+        self.assertAlmostEqual(abs(ci2-ref).max().item(), 0, 12)
+
+    def test_make_hdiag(self):
+        myci = hci.SCI()
+        myci.select_cutoff = 1e-3
+        myci.ci_coeff_cutoff = 1e-3
+        strs = make_civec(myci)[0]._strs
+        hdiag = hci.make_hdiag(h1, eri, strs, norb, nelec)
+        ref = direct_spin1.make_hdiag(h1, eri, norb, nelec)
+        ref = hci.from_fci(ref, strs, norb, nelec)
+        self.assertAlmostEqual(abs(hdiag-ref).max().item(), 0, 12)
+
+    def test_kernel_pt2(self):
+        mol = gto.M(atom='N 0 0 0; N 0 0 1.2', basis='631g', verbose=0)
+        mf = scf.RHF(mol).run()
+        mc = mcscf.CASCI(mf, 10, 10)
+        h1e, ecore = mc.get_h1eff()
+        h2e = mc.get_h2eff()
+        efci = direct_spin1.kernel(h1e, h2e, 10, 10)[0]
+
+        myci = hci.SCI(mol)
+        myci.select_cutoff = 2e-3
+        myci.ci_coeff_cutoff = 2e-3
+        e, civec = myci.kernel(h1e, h2e, 10, (5,5))
+        self.assertAlmostEqual(e[0], -30.5312619, 6)
+        e2, err = myci.pt2(civec[0], h1e, h2e, 10, (5,5), pt2_cutoff=1e-6)
+        self.assertEqual(err, 0)
+        self.assertAlmostEqual(e2, -0.0013718479, 8)
+        self.assertTrue(abs(e[0]+e2-efci) < abs(e[0]-efci) * .1)
+
+        myci.sparse_hamiltonian = False
+        e1 = myci.kernel(h1e, h2e, 10, (5,5))[0]
+        self.assertAlmostEqual(e1[0], e[0], 9)
+
+        numpy.random.seed(2)
+        e3, err = myci.pt2(civec[0], h1e, h2e, 10, (5,5), pt2_cutoff=1e-6,
+                           pt2_det_cutoff=1e-4, nsamples=100, nbatches=50)
+        self.assertTrue(err > 0)
+        self.assertTrue(abs(e3 - e2) < err * 4)
+
+    def test_make_rdm12(self):
+        myci = hci.SCI()
+        myci.select_cutoff = 1e-3
+        myci.ci_coeff_cutoff = 1e-3
+        civec = make_civec(myci)
+        civec[0] /= numpy.linalg.norm(civec[0])
+        dm1, dm2 = myci.make_rdm12(civec[0], norb, nelec)
+        fcivec = hci.to_fci(civec, norb, nelec)
+        ref1, ref2 = direct_spin1.make_rdm12(fcivec, norb, nelec)
+        self.assertAlmostEqual(abs(dm1-ref1).max(), 0, 12)
+        self.assertAlmostEqual(abs(dm2-ref2).max(), 0, 12)
+
+if __name__ == "__main__":
+    print("Full Tests for hci")
+    unittest.main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Semi-numerical Hessian from the central differences of analytical nuclear
+gradients
+
+It can be used with any method which provides nuclear gradients (CCSD,
+CASSCF, MP2, TDDFT excited states ...).  The point group symmetry of the
+molecule (the largest D2h subgroup) is used to reduce the number of
+displaced geometries.  The displaced gradients are computed on a pool of
+worker processes.  Each displaced calculation starts from the solution (MOs,
+CI vectors, amplitudes) of the reference geometry.
+
+The Hessian has the same layout as the analytical Hessian (natm,natm,3,3)
+and can be passed to hessian.thermo.harmonic_analysis.
+
+Examples:
+
+>>> from pyscf import gto, scf, cc, hessian
+>>> mol = gto.M(atom='O 0 0 0; H 0 -.757 .587; H 0 .757 .587', basis='ccpvdz')
+>>> mycc = cc.CCSD(scf.RHF(mol).run()).run()
+>>> hess = hessian.numerical.Hessian(mycc).set(nproc=4).kernel()
+>>> results = hessian.thermo.harmonic_analysis(mol, hess)
+'''
+
+import time
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf.symm import geom
+from pyscf.symm import param
+from pyscf import __config__
+
+DISP = getattr(__config__, 'hessian_numerical_disp', 5e-3)
+NPROC = getattr(__config__, 'hessian_numerical_nproc', None)
+
+# The attributes which are used by the scanners as the initial guess
+_GUESS_KEYS = ('mo_coeff', 'mo_occ', 'mo_energy', 'ci', 't1', 't2', 'l1', 'l2')
+
+# The gradients scanner of the worker process and the reference solution.
+# They are created by _init_worker when the process pool is forked.
+_worker_scanner = None
+_worker_guess = None
+
+
+def kernel(hessobj, disp=None, nproc=None, symmetry=None, verbose=None):
+    '''Semi-numerical Hessian
+
+    Kwargs:
+        disp : float
+            Displacement (in Bohr) of the central finite difference.
+        nproc : int
+            Number of worker processes.  Each worker runs with one OpenMP
+            thread.  The displaced gradients are computed in the current
+            process if nproc is 1.  Default is the number of OpenMP threads.
+        symmetry : bool
+            Whether to use the point group symmetry to reduce the number of
+            displaced geometries.
+
+    Returns:
+        de : ndarray, shape (natm,natm,3,3)
+            Second derivatives of the total energy (in Hartree/Bohr^2).
+    '''
+    if disp is None: disp = hessobj.disp
+    if nproc is None: nproc = hessobj.nproc
+    if symmetry is None: symmetry = hessobj.symmetry
+    log = logger.new_logger(hessobj, verbose)
+    cput0 = (time.clock(), time.time())
+
+    mol = hessobj.mol
+    natm = mol.natm
+    coords = mol.atom_coords()
+    if symmetry:
+        axes, ops, perms = _symm_ops(mol, log)
+    else:
+        axes = numpy.eye(3)
+        ops, perms = [numpy.eye(3)], [numpy.arange(natm)]
+
+    # Displacements (atom, direction, sign) along the symmetry axes.  The
+    # operation op maps the displacement (a,k,s) to (perm[a],k,s*op[k,k]).
+    disps = [(ia, k, s) for ia in range(natm) for k in range(3) for s in (1, -1)]
+    ref_of = {}
+    tasks = []
+    for d in disps:
+        if d in ref_of:
+            continue
+        tasks.append(d)
+        ia, k, s = d
+        for op, perm in zip(ops, perms):
+            d1 = (perm[ia], k, s * int(op[k,k]))
+            if d1 not in ref_of:
+                ref_of[d1] = (d, op, perm)
+    log.info('Semi-numerical Hessian: %d of %d displaced geometries (disp = %g Bohr)',
+             len(tasks), len(disps), disp)
+    hessobj.ndisp = len(tasks)
+
+    geoms = []
+    for ia, k, s in tasks:
+        c = coords.copy()
+        c[ia] += s * disp * axes[k]
+        geoms.append(c)
+
+    if nproc is None:
+        nproc = lib.num_threads()
+    nproc = max(1, min(nproc, len(tasks)))
+
+    scanner = _init_worker(hessobj.base)
+    e0, g0 = scanner(mol)
+    if not scanner.converged:
+        log.warn('Reference calculation not converged')
+    hessobj.e_tot = e0
+    hessobj.grad0 = g0
+    guess = _save_guess(scanner)
+    cput1 = log.timer('reference gradients', *cput0)
+
+    grads = [None] * len(tasks)
+    if nproc == 1:
+        for i, c in enumerate(geoms):
+            grads[i] = _run_point(c, scanner, guess)
+            log.debug('Displacement %s done', tasks[i])
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # The workers inherit the converged scanner through fork.  OpenMP
+        # thread pools do not survive fork.  Each worker runs with one thread.
+        ctx = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=nproc, mp_context=ctx,
+                                 initializer=_init_worker_pool,
+                                 initargs=(scanner, guess)) as executor:
+            grads = list(executor.map(_run_point, geoms))
+    cput1 = log.timer('displaced gradients', *cput1)
+
+    if not all(conv for g, conv in grads):
+        log.warn('%d displaced calculations not converged',
+                 sum(not conv for g, conv in grads))
+
+    # Gradients in the frame of the symmetry axes
+    gsym = dict((d, numpy.dot(g, axes.T)) for d, (g, conv) in zip(tasks, grads))
+    for d in disps:
+        if d not in gsym:
+            d0, op, perm = ref_of[d]
+            g = numpy.empty((natm,3))
+            g[perm] = gsym[d0] * op.diagonal()
+            gsym[d] = g
+
+    hsym = numpy.empty((natm,3,natm,3))
+    for ia in range(natm):
+        for k in range(3):
+            hsym[ia,k] = (gsym[(ia,k,1)] - gsym[(ia,k,-1)]) / (2 * disp)
+    hsym = (hsym + hsym.transpose(2,3,0,1)) * .5
+    de = lib.einsum('ki,akbl,lj->abij', axes, hsym, axes)
+    log.timer('semi-numerical Hessian', *cput0)
+    return de
+
+def _symm_ops(mol, log):
+    '''Axes of the symmetry frame, the operations of the largest D2h subgroup
+    (in the symmetry frame) and the atom permutations of the operations'''
+    natm = mol.natm
+    gpname, orig, axes = geom.detect_symm(mol._atom)
+    gpname, axes = geom.get_subgroup(gpname, axes)
+    if gpname == 'Dooh':
+        gpname = 'D2h'
+    elif gpname == 'Coov':
+        gpname = 'C2v'
+    log.info('Point group %s for semi-numerical Hessian', gpname)
+
+    coords = numpy.dot(mol.atom_coords() - orig, axes.T)
+    symbs = [mol.atom_symbol(i) for i in range(natm)]
+    ops = []
+    perms = []
+    for opname in param.OPERATOR_TABLE[gpname]:
+        op = param.D2H_OPS[opname]
+        newc = numpy.dot(coords, op)
+        dist = numpy.linalg.norm(newc[:,None] - coords, axis=2)
+        perm = numpy.argmin(dist, axis=1)
+        if (dist[numpy.arange(natm),perm].max() > geom.TOLERANCE or
+            any(symbs[i] != symbs[j] for i, j in enumerate(perm))):
+            log.warn('Symmetry operation %s not found. Symmetry is not used '
+                     'in semi-numerical Hessian', opname)
+            return numpy.eye(3), [numpy.eye(3)], [numpy.arange(natm)]
+        ops.append(op)
+        perms.append(perm)
+    return axes, ops, perms
+
+def _iter_methods(scanner):
+    '''The scanner and the underlying methods whose solutions are used as the
+    initial guess of the next calculation'''
+    seen = set()
+    stack = [scanner]
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        yield obj
+        for key in ('base', '_scf'):
+            stack.append(getattr(obj, key, None))
+
+def _save_guess(scanner):
+    return [dict((key, getattr(obj, key)) for key in _GUESS_KEYS
+                 if getattr(obj, key, None) is not None)
+            for obj in _iter_methods(scanner)]
+
+def _restore_guess(scanner, guess):
+    for obj, attrs in zip(_iter_methods(scanner), guess):
+        for key, val in attrs.items():
+            setattr(obj, key, val)
+
+def _init_worker(method, nthreads=None):
+    if isinstance(method, lib.GradScanner):
+        scanner = method
+    elif hasattr(method, 'nuc_grad_method'):
+        scanner = method.nuc_grad_method().as_scanner()
+    else:
+        scanner = method.as_scanner()
+    if nthreads is not None:
+        lib.num_threads(nthreads)
+    # SCF scanner would otherwise take the initial guess from chkfile
+    for obj in _iter_methods(scanner):
+        if getattr(obj, 'chkfile', None):
+            obj.chkfile = None
+    return scanner
+
+def _init_worker_pool(scanner, guess):
+    global _worker_scanner, _worker_guess
+    _worker_scanner = scanner
+    _worker_guess = guess
+    lib.num_threads(1)
+
+def _run_point(coords, scanner=None, guess=None):
+    '''Gradients of the displaced geometry (in Bohr), starting from the
+    solution of the reference geometry'''
+    if scanner is None:
+        scanner = _worker_scanner
+        guess = _worker_guess
+    _restore_guess(scanner, guess)
+    mol = scanner.mol.set_geom_(coords, unit='Bohr', inplace=False)
+    e, g = scanner(mol)
+    return numpy.asarray(g), bool(scanner.converged)
+
+
+class Hessian(lib.StreamObject):
+    '''Semi-numerical Hessian from the finite differences of the nuclear
+    gradients of any method which provides nuc_grad_method.
+
+    Attributes:
+        disp : float
+            Displacement (in Bohr) of the central finite difference.
+        nproc : int
+            Number of worker processes.  Default is the number of OpenMP
+            threads.
+        symmetry : bool
+            Whether to use point group symmetry to reduce the number of
+            displaced geometries.
+
+    Saved results:
+        de : ndarray, shape (natm,natm,3,3)
+            Hessian, in the same layout as the analytical Hessian
+        grad0 : ndarray
+            Nuclear gradients of the reference geometry
+        ndisp : int
+            Number of displaced geometries which were computed
+    '''
+
+    disp = DISP
+    nproc = NPROC
+    symmetry = getattr(__config__, 'hessian_numerical_symmetry', True)
+
+    def __init__(self, method):
+        self.verbose = method.verbose
+        self.stdout = method.stdout
+        self.mol = method.mol
+        self.base = method
+
+        self.e_tot = None
+        self.grad0 = None
+        self.ndisp = None
+        self.de = numpy.zeros((0,0,3,3))
+        self._keys = set(self.__dict__.keys()).union(('disp', 'nproc', 'symmetry'))
+
+    def dump_flags(self, verbose=None):
+        log = logger.new_logger(self, verbose)
+        log.info('\n')
+        log.info('******** %s for %s ********', self.__class__,
+                 self.base.__class__)
+        log.info('disp = %g', self.disp)
+        log.info('nproc = %s', self.nproc)
+        log.info('symmetry = %s', self.symmetry)
+        return self
+
+    def kernel(self, disp=None, nproc=None, symmetry=None):
+        self.dump_flags()
+        self.de = kernel(self, disp, nproc, symmetry)
+        return self.de
+    hess = kernel
+
+
+if __name__ == '__main__':
+    from pyscf import gto, scf
+    from pyscf.hessian import rhf
+    mol = gto.M(atom='O 0 0 0; H 0 -.757 .587; H 0 .757 .587', basis='631g',
+                verbose=0)
+    mf = scf.RHF(mol).run()
+    h1 = Hessian(mf).kernel()
+    h0 = mf.Hessian().kernel()
+    print(abs(h1 - h0).max())
@@ -53,7 +53,19 @@ def hess_elec(hessobj, mo_energy=None, mo_coeff=None, mo_occ=None,
                                     max_memory, log)
 
     if h1ao is None:
-        h1ao = hessobj.make_h1(mo_coeff, mo_occ, hessobj.chkfile, atmlst, log)
+        # Keep H1 and MO1 of all atoms in memory if possible. The chkfile is
+        # only used as the storage when they do not fit in max_memory
+        incore = getattr(hessobj, 'h1_incore', None)
+        if incore is None:
+            nao, nmo = mo_coeff.shape
+            nocc = numpy.count_nonzero(mo_occ > 0)
+            mem_h1 = len(atmlst) * 3 * nao * (nao + nocc) * 8e-6
+            incore = mem_h1 < (max_memory - lib.current_memory()[0]) * .5
+        if incore or not hessobj.chkfile:
+            chkfile = None
+        else:
+            chkfile = hessobj.chkfile
+        h1ao = hessobj.make_h1(mo_coeff, mo_occ, chkfile, atmlst, log)
         t1 = log.timer_debug1('making H1', *time0)
     if mo1 is None or mo_e1 is None:
         mo1, mo_e1 = hessobj.solve_mo1(mo_energy, mo_coeff, mo_occ, h1ao,
@@ -340,7 +352,9 @@ def solve_mo1(mf, mo_energy, mo_coeff, mo_occ, h1ao_or_chkfile,
 
         h1vo = numpy.vstack(h1vo)
         s1vo = numpy.vstack(s1vo)
-        mo1, e1 = cphf.solve(fx, mo_energy, mo_occ, h1vo, s1vo)
+        # All 3N perturbations of the batch share one block Krylov subspace
+        mo1, e1 = cphf.solve(fx, mo_energy, mo_occ, h1vo, s1vo,
+                             verbose=verbose, block=True)
         mo1 = numpy.einsum('pq,xqi->xpi', mo_coeff, mo1).reshape(-1,3,nao,nocc)
         e1 = e1.reshape(-1,3,nocc,nocc)
 
@@ -475,6 +489,10 @@ class Hessian(lib.StreamObject):
         self.base = scf_method
         self.chkfile = scf_method.chkfile
         self.max_memory = self.mol.max_memory
+        # Whether to keep the first order Fock matrices and orbitals of all
+        # atoms in memory. If None, they are stored in chkfile only when they
+        # do not fit in max_memory
+        self.h1_incore = None
 
         self.atmlst = range(self.mol.natm)
         self.de = numpy.zeros((0,0,3,3))  # (A,B,dR_A,dR_B)
@@ -574,7 +592,8 @@ class Hessian(lib.StreamObject):
         else:
             self.atmlst = atmlst
 
-        de = self.hess_elec(mo_energy, mo_coeff, mo_occ, atmlst=atmlst)
+        de = self.hess_elec(mo_energy, mo_coeff, mo_occ, atmlst=atmlst,
+                            max_memory=self.max_memory)
         self.de = de + self.hess_nuc(self.mol, atmlst=atmlst)
         return self.de
     hess = kernel
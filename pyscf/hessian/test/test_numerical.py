@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+import numpy
+from pyscf import gto, scf, cc, lib
+from pyscf import hessian
+from pyscf.hessian import numerical, thermo
+
+mol = gto.Mole()
+mol.verbose = 5
+mol.output = '/dev/null'
+mol.atom = '''
+O  0.   0.       0.
+H  0.   -0.757   0.587
+H  0.   0.757    0.587'''
+mol.basis = '631g'
+mol.build()
+
+mf = scf.RHF(mol).run(conv_tol=1e-12)
+href = mf.Hessian().kernel()
+
+def tearDownModule():
+    global mol, mf, href
+    mol.stdout.close()
+    del mol, mf, href
+
+class KnownValues(unittest.TestCase):
+    def test_rhf_symmetry(self):
+        hobj = numerical.Hessian(mf)
+        hobj.nproc = 1
+        h1 = hobj.kernel()
+        self.assertAlmostEqual(abs(h1 - href).max(), 0, 4)
+        self.assertAlmostEqual(abs(hobj.grad0).max(), 0.0241133974, 6)
+        # C2v: 4 displacements of O, 5 of H1, the displacements of H2 are
+        # obtained from H1
+        self.assertEqual(hobj.ndisp, 9)
+
+        h2 = hobj.kernel(symmetry=False)
+        self.assertEqual(hobj.ndisp, 18)
+        self.assertAlmostEqual(abs(h2 - href).max(), 0, 4)
+        self.assertAlmostEqual(abs(h1 - h2).max(), 0, 7)
+
+        freq = thermo.harmonic_analysis(mol, h1)['freq_wavenumber']
+        ref = thermo.harmonic_analysis(mol, href)['freq_wavenumber']
+        self.assertTrue(abs(freq - ref).max() < .1)
+
+    def test_rotated_molecule(self):
+        pmol = mol.copy()
+        u = numpy.linalg.qr(numpy.random.RandomState(2).rand(3,3))[0]
+        pmol.set_geom_(mol.atom_coords().dot(u) + .5, unit='Bohr')
+        pmf = scf.RHF(pmol).run(conv_tol=1e-12)
+        h0 = pmf.Hessian().kernel()
+        h1 = numerical.Hessian(pmf).set(nproc=2).kernel()
+        self.assertAlmostEqual(abs(h1 - h0).max(), 0, 4)
+
+    def test_ccsd(self):
+        mycc = cc.CCSD(mf).run(conv_tol=1e-10)
+        hobj = numerical.Hessian(mycc).set(nproc=2)
+        h1 = hobj.kernel()
+        self.assertAlmostEqual(hobj.e_tot, mycc.e_tot, 8)
+        self.assertAlmostEqual(abs(h1 - h1.transpose(1,0,3,2)).max(), 0, 9)
+        h2 = hobj.kernel(symmetry=False)
+        self.assertAlmostEqual(abs(h1 - h2).max(), 0, 4)
+        # Translational invariance
+        self.assertAlmostEqual(abs(h1.sum(axis=0)).max(), 0, 4)
+
+
+if __name__ == "__main__":
+    print("Full Tests for semi-numerical Hessian")
+    unittest.main()
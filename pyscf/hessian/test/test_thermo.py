@@ -78,6 +78,43 @@ class KnownValues(unittest.TestCase):
         thermo.dump_thermo(mol, results)
         self.assertAlmostEqual(results['E_0K'][0], -74.93727546, 7)
 
+    def test_thermo_batch(self):
+        mol = gto.M(atom='O 0 0 0; H 0 .757 .587; H 0 -.757 .587', verbose=0)
+        mf = mol.HF().set(conv_tol=1e-11).as_scanner()
+        geoms = ['O 0 0 0; H 0 .757 .587; H 0 -.757 .587',
+                 'O 0 0 0; H 0 .737 .607; H .02 -.767 .577',
+                 'O 0 0 0; H 0 .807 .567; H 0 -.747 .597']
+        hess = []
+        coords = []
+        e_tot = []
+        ref = []
+        for geom in geoms:
+            mol.set_geom_(geom)
+            e_tot.append(mf(mol))
+            h = mf.Hessian().kernel()
+            hess.append(h)
+            coords.append(mol.atom_coords())
+            r1 = thermo.harmonic_analysis(mol, h)
+            r2 = thermo.thermo(mf, r1['freq_au'], 298.15, 101325)
+            ref.append((r1, r2))
+
+        ftmp = lib.H5TmpFile()
+        ftmp['hess'] = numpy.asarray(hess)
+        ftmp['coords'] = numpy.asarray(coords)
+        res1 = thermo.harmonic_analysis_batch(mol, ftmp['hess'], ftmp['coords'],
+                                              blksize=2)
+        res2 = thermo.thermo_batch(mol, res1['freq_au'], e_tot, ftmp['coords'])
+        for i, (r1, r2) in enumerate(ref):
+            for key in ('freq_au', 'reduced_mass', 'force_const_dyne'):
+                self.assertAlmostEqual(abs(res1[key][i] - r1[key]).max(), 0, 9)
+            self.assertAlmostEqual(abs(abs(res1['norm_mode'][i]) -
+                                       abs(r1['norm_mode'])).max(), 0, 7)
+            self.assertAlmostEqual(abs(res2['rot_const'][0][i] -
+                                       r2['rot_const'][0]).max(), 0, 5)
+            for key in ('ZPE', 'S_rot', 'S_vib', 'S_tot',
+                        'H_tot', 'G_tot', 'E_0K'):
+                self.assertAlmostEqual(abs(res2[key][0][i] - r2[key][0]).max(), 0, 9)
+
 if __name__ == "__main__":
     print("Full Tests for RHF Hessian")
     unittest.main()
@@ -36,6 +36,8 @@ from pyscf import lib
 from pyscf.data import nist
 
 LINDEP_THRESHOLD = 1e-7
+# Number of Hessians to be diagonalized together in harmonic_analysis_batch
+BLKSIZE = 256
 
 
 def harmonic_analysis(mol, hess, exclude_trans=True, exclude_rot=True,
@@ -111,14 +113,17 @@ def harmonic_analysis(mol, hess, exclude_trans=True, exclude_rot=True,
 def rotation_const(mass, atom_coords, unit='GHz'):
     '''Rotational constants to characterize rotational spectra
 
+    atom_coords can be a stack of geometries (nconf,natm,3). The rotational
+    constants of each geometry are stored in the last axis of the output.
+
     Kwargs:
         unit (string) : One of GHz, wavenumber
     '''
-    mass_center = numpy.einsum('z,zr->r', mass, atom_coords) / mass.sum()
-    r = atom_coords - mass_center
-    im = numpy.einsum('z,zr,zs->rs', mass, r, r)
-    im = numpy.eye(3) * im.trace() - im
-    e = numpy.sort(numpy.linalg.eigvalsh(im))
+    mass_center = numpy.einsum('z,...zr->...r', mass, atom_coords) / mass.sum()
+    r = atom_coords - mass_center[...,None,:]
+    im = numpy.einsum('z,...zr,...zs->...rs', mass, r, r)
+    im = numpy.eye(3) * numpy.einsum('...ii->...', im)[...,None,None] - im
+    e = numpy.sort(numpy.linalg.eigvalsh(im), axis=-1)
 
     unit_im = nist.ATOMIC_MASS * (nist.BOHR_SI)**2
     unit_hz = nist.HBAR / (4 * numpy.pi * unit_im)
@@ -229,6 +234,229 @@ def thermo(model, freq, temperature=298.15, pressure=101325):
     return results
 
 
+def harmonic_analysis_batch(mol, hess, coords=None, exclude_trans=True,
+                            exclude_rot=True, imaginary_freq=True,
+                            blksize=BLKSIZE):
+    '''Harmonic analysis for a stack of Hessians of the same molecule at
+    different geometries (conformer ensembles, trajectory snapshots etc.)
+
+    The Hessians are processed in blocks of blksize geometries. Translations
+    and rotations are projected out and the mass-weighted Hessians are
+    diagonalized for the entire block at once. hess and coords can be h5py
+    datasets. They are read from the HDF5 file block by block, e.g.
+
+    >>> with h5py.File('ensemble.h5', 'r') as f:
+    ...     results = harmonic_analysis_batch(mol, f['hess'], f['coords'])
+
+    Args:
+        mol : Mole object
+            Provides the atoms and the (isotope averaged) masses.
+        hess : (nconf,natm,natm,3,3) ndarray or h5py dataset
+            Hessians in the same layout as the output of hessian.RHF etc.
+
+    Kwargs:
+        coords : (nconf,natm,3) ndarray or h5py dataset
+            Geometries (in Bohr) of the Hessians. If not given, the geometry
+            of mol is used for all Hessians.
+        blksize : int
+            Number of Hessians to be diagonalized together.
+
+    Returns:
+        A dict with the same keys as :func:`harmonic_analysis`. Each entry
+        has an extra leading dimension for the geometries.
+    '''
+    mass = mol.atom_mass_list(isotope_avg=True)
+    natm = mass.size
+    nconf = hess.shape[0]
+    if coords is None:
+        coords = numpy.asarray([mol.atom_coords()] * nconf)
+    elif coords.shape[0] != nconf:
+        raise ValueError('%d geometries for %d Hessians' % (coords.shape[0], nconf))
+
+    au2hz = (nist.HARTREE2J / (nist.ATOMIC_MASS * nist.BOHR_SI**2))**.5 / (2 * numpy.pi)
+    dyne = 1e-2 * nist.HARTREE2J / nist.BOHR_SI**2
+    massp = mass ** -.5
+
+    results = {}
+    ntr0 = None
+    for p0, p1 in lib.prange(0, nconf, blksize):
+        c = numpy.asarray(coords[p0:p1])
+        h = numpy.asarray(hess[p0:p1])
+        h = numpy.einsum('cpqxy,p,q->cpxqy', h, massp, massp)
+        h = h.reshape(p1-p0, natm*3, natm*3)
+
+        TR = _get_TR_batch(mass, c)
+        TRspace = []
+        if exclude_trans:
+            TRspace.append(TR[:,:3])
+        if exclude_rot:
+            nrot = _get_nrot(rotation_const(mass, c))
+            if numpy.any(nrot != nrot[0]):
+                raise RuntimeError('Linear and non-linear geometries cannot '
+                                   'be mixed in harmonic_analysis_batch')
+            TRspace.append(TR[:,3:3+nrot[0]])
+
+        if TRspace:
+            # The translational and rotational modes are orthogonal
+            TRspace = numpy.concatenate(TRspace, axis=1)
+            TRspace /= numpy.linalg.norm(TRspace, axis=2)[:,:,None]
+            ntr = TRspace.shape[1]
+            if ntr0 is None:
+                ntr0 = ntr
+            elif ntr != ntr0:
+                raise RuntimeError('Linear and non-linear geometries cannot '
+                                   'be mixed in harmonic_analysis_batch')
+            P = numpy.eye(natm*3) - numpy.einsum('cki,ckj->cij', TRspace, TRspace)
+            w, bvec = numpy.linalg.eigh(P)
+            bvec = bvec[:,:,ntr:]
+            h = numpy.matmul(bvec.transpose(0,2,1), numpy.matmul(h, bvec))
+            force_const_au, mode = numpy.linalg.eigh(h)
+            mode = numpy.matmul(bvec, mode)
+        else:
+            force_const_au, mode = numpy.linalg.eigh(h)
+
+        freq_au = numpy.lib.scimath.sqrt(force_const_au)
+        freq_error = numpy.count_nonzero(freq_au.imag > 0, axis=1)
+        if not imaginary_freq and numpy.iscomplexobj(freq_au):
+            freq_au = freq_au.real - abs(freq_au.imag)
+
+        norm_mode = numpy.einsum('z,czri->cizr', massp,
+                                 mode.reshape(p1-p0,natm,3,-1))
+        reduced_mass = 1./numpy.einsum('cizr,cizr->ci', norm_mode, norm_mode)
+
+        blk = {}
+        blk['freq_error'] = freq_error
+        blk['freq_au'] = freq_au
+        blk['freq_wavenumber'] = freq_au * au2hz / nist.LIGHT_SPEED_SI * 1e-2
+        blk['norm_mode'] = norm_mode
+        blk['reduced_mass'] = reduced_mass
+        blk['vib_temperature'] = freq_au * au2hz * nist.PLANCK / nist.BOLTZMANN
+        blk['force_const_au'] = force_const_au
+        blk['force_const_dyne'] = reduced_mass * force_const_au * dyne
+        for key, val in blk.items():
+            results.setdefault(key, []).append(val)
+
+    return dict((key, numpy.concatenate(val)) for key, val in results.items())
+
+def thermo_batch(mol, freq, e_tot=0, coords=None, temperature=298.15,
+                 pressure=101325, sym_number=None):
+    '''Thermochemistry analysis for a stack of geometries of the same
+    molecule. All contributions are evaluated for all geometries at once.
+
+    Args:
+        mol : Mole object
+            Provides the atoms, the masses and the spin multiplicity.
+        freq : (nconf,nmode) ndarray
+            Vibrational frequencies in atomic unit, e.g. the "freq_au" of
+            :func:`harmonic_analysis_batch`.
+
+    Kwargs:
+        e_tot : float or (nconf,) ndarray
+            Electronic energies of the geometries.
+        coords : (nconf,natm,3) ndarray or h5py dataset
+            Geometries (in Bohr). If not given, the geometry of mol is used.
+        sym_number : int or (nconf,) ndarray
+            Rotational symmetry numbers. By default, they are determined
+            from the point group of each geometry.
+
+    Returns:
+        A dict with the same keys as :func:`thermo`. The values are the
+        (ndarray, unit) pairs, with one element for each geometry.
+    '''
+    mass = mol.atom_mass_list(isotope_avg=True)
+    nconf = freq.shape[0]
+    if coords is None:
+        coords = numpy.asarray([mol.atom_coords()] * nconf)
+    else:
+        coords = numpy.asarray(coords)
+    if sym_number is None:
+        from pyscf import symm
+        symbs = [a[0] for a in mol._atom]
+        sym_number = [_group_symmetry_number(symm.detect_symm(list(zip(symbs, c)))[0])
+                      for c in coords]
+    sym_number = numpy.ones(nconf) * sym_number
+    E0 = numpy.ones(nconf) * e_tot
+    zeros = numpy.zeros(nconf)
+
+    kB = nist.BOLTZMANN
+    h = nist.PLANCK
+    R_Eh = kB*nist.AVOGADRO / (nist.HARTREE2J * nist.AVOGADRO)
+
+    results = {}
+    results['temperature'] = (temperature, 'K')
+    results['pressure'] = (pressure, 'Pa')
+    results['E0'] = (E0, 'Eh')
+
+    # Electronic part
+    results['S_elec' ] = (zeros + R_Eh * numpy.log(mol.multiplicity), 'Eh/K')
+    results['Cv_elec'] = results['Cp_elec'] = (zeros, 'Eh/K')
+    results['E_elec' ] = results['H_elec' ] = (E0, 'Eh')
+
+    # Translational part
+    mass_tot = mass.sum() * nist.ATOMIC_MASS
+    q_trans = ((2.0 * numpy.pi * mass_tot * kB * temperature / h**2)**1.5
+               * kB * temperature / pressure)
+    results['S_trans' ] = (zeros + R_Eh * (2.5 + numpy.log(q_trans)), 'Eh/K')
+    results['Cv_trans'] = (zeros + 1.5 * R_Eh, 'Eh/K')
+    results['Cp_trans'] = (zeros + 2.5 * R_Eh, 'Eh/K')
+    results['E_trans' ] = (zeros + 1.5 * R_Eh * temperature, 'Eh')
+    results['H_trans' ] = (zeros + 2.5 * R_Eh * temperature, 'Eh')
+
+    # Rotational part
+    rot_const = rotation_const(mass, coords, 'GHz')
+    results['rot_const'] = (rot_const, 'GHz')
+    results['sym_number'] = (sym_number, '')
+    nrot = _get_nrot(rot_const)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        B = rot_const[:,1] * 1e9
+        q_rot_linear = kB * temperature / (sym_number * h * B)
+        ABC = rot_const * 1e9
+        q_rot = ((kB*temperature/h)**1.5 * numpy.pi**.5
+                 / (sym_number * numpy.prod(ABC, axis=1)**.5))
+        S_rot = numpy.where(nrot == 3, R_Eh * (1.5 + numpy.log(q_rot)),
+                            R_Eh * (1 + numpy.log(q_rot_linear)))
+    S_rot[nrot == 0] = 0
+    results['S_rot' ] = (S_rot, 'Eh/K')
+    results['Cv_rot'] = results['Cp_rot'] = (.5 * nrot * R_Eh, 'Eh/K')
+    results['E_rot' ] = results['H_rot' ] = (.5 * nrot * R_Eh * temperature, 'Eh')
+
+    # Vibrational part. The imaginary modes are masked
+    au2hz = (nist.HARTREE2J / (nist.ATOMIC_MASS * nist.BOHR_SI**2))**.5 / (2 * numpy.pi)
+    idx = freq.real > 0
+    vib_temperature = numpy.where(idx, freq.real, 0) * au2hz * h / kB
+    rt = numpy.where(idx, vib_temperature, 1) / max(1e-14, temperature)
+    e = numpy.exp(-rt)
+
+    ZPE = R_Eh * .5 * vib_temperature.sum(axis=1)
+    results['ZPE'] = (ZPE, 'Eh')
+
+    s_vib = numpy.where(idx, rt*e/(1-e) - numpy.log(1-e), 0)
+    cv_vib = numpy.where(idx, e * rt**2/(1-e)**2, 0)
+    e_vib = numpy.where(idx, rt * e / (1-e), 0)
+    results['S_vib' ] = (R_Eh * s_vib.sum(axis=1), 'Eh/K')
+    results['Cv_vib'] = results['Cp_vib'] = (R_Eh * cv_vib.sum(axis=1), 'Eh/K')
+    results['E_vib' ] = results['H_vib' ] = \
+            (ZPE + R_Eh * temperature * e_vib.sum(axis=1), 'Eh')
+
+    results['G_elec' ] = (results['H_elec' ][0] - temperature * results['S_elec' ][0], 'Eh')
+    results['G_trans'] = (results['H_trans'][0] - temperature * results['S_trans'][0], 'Eh')
+    results['G_rot'  ] = (results['H_rot'  ][0] - temperature * results['S_rot'  ][0], 'Eh')
+    results['G_vib'  ] = (results['H_vib'  ][0] - temperature * results['S_vib'  ][0], 'Eh')
+
+    def _sum(f):
+        keys = ('elec', 'trans', 'rot', 'vib')
+        return sum(results.get(f+'_'+key, (0,))[0] for key in keys)
+    results['S_tot' ] = (_sum('S' ), 'Eh/K')
+    results['Cv_tot'] = (_sum('Cv'), 'Eh/K')
+    results['Cp_tot'] = (_sum('Cp'), 'Eh/K')
+    results['E_0K' ]  = (E0 + ZPE, 'Eh')
+    results['E_tot' ] = (_sum('E'), 'Eh')
+    results['H_tot' ] = (_sum('H'), 'Eh')
+    results['G_tot' ] = (_sum('G'), 'Eh')
+
+    return results
+
+
 def _get_TR(mass, coords):
     '''Translational mode and rotational mode'''
     mass_center = numpy.einsum('z,zx->x', mass, coords) / mass.sum()
@@ -260,6 +488,40 @@ def _get_TR(mass, coords):
             Rx.ravel(), Ry.ravel(), Rz.ravel())
 
 
+def _get_TR_batch(mass, coords):
+    '''Translational and rotational modes of a stack of geometries. Returns an
+    array of shape (nconf,6,natm*3).'''
+    nconf, natm = coords.shape[:2]
+    mass_center = numpy.einsum('z,czx->cx', mass, coords) / mass.sum()
+    coords = coords - mass_center[:,None]
+    massp = mass ** .5
+
+    T = numpy.einsum('m,xy->xmy', massp, numpy.eye(3))
+    T = numpy.broadcast_to(T, (nconf,3,natm,3))
+
+    im = numpy.einsum('m,cmx,cmy->cxy', mass, coords, coords)
+    im = numpy.eye(3) * numpy.einsum('cii->c', im)[:,None,None] - im
+    w, paxes = numpy.linalg.eigh(im)
+    # Same ordering of the principal axes as _get_TR: rotation about the axis
+    # e_k is e_k x r
+    paxes = paxes[:,:,::-1].transpose(0,2,1)
+    R = numpy.cross(paxes[:,:,None,:], coords[:,None,:,:]) * massp[:,None]
+
+    return numpy.concatenate([T, R], axis=1).reshape(nconf,6,natm*3)
+
+
+def _get_nrot(rot_const):
+    '''Number of rotational degrees of freedom (0 for atom, 2 for linear
+    molecule) for each set of rotational constants'''
+    rot_const = numpy.asarray(rot_const)
+    nrot = numpy.full(rot_const.shape[:-1], 3, dtype=int)
+    with numpy.errstate(invalid='ignore'):
+        nrot[(rot_const[...,0] > 1e8) &
+             (rot_const[...,1] - rot_const[...,2] < 1e-3)] = 2
+    nrot[numpy.all(rot_const > 1e8, axis=-1)] = 0
+    return nrot
+
+
 def _get_rotor_type(rot_const):
     if numpy.all(rot_const > 1e8):
         rotor_type = 'ATOM'
@@ -278,7 +540,9 @@ def rotational_symmetry_number(mol):
     '''
     from pyscf import symm
     group = symm.detect_symm(mol._atom)[0]
+    return _group_symmetry_number(group)
 
+def _group_symmetry_number(group):
     if group in ['SO3', 'C1', 'Ci', 'Cs', 'Coov']:
         sigma = 1
     elif group == 'Dooh':
@@ -335,6 +335,133 @@ class DIIS(object):
         return self
 
 
+class OutcoreDIIS(DIIS):
+    '''DIIS with all vectors held in an HDF5 file.
+
+    The history vectors can be stored in single precision and/or compressed
+    by HDF5 filters.  Each update streams over the stored vectors in blocks
+    of BLOCK_SIZE elements twice: the new error vector is written and its
+    overlaps with the stored error vectors are accumulated in the same pass,
+    then the extrapolated vector is assembled.  The DIIS overlap matrix is
+    updated incrementally.  The previous extrapolated vector, from which the
+    error vector is generated when xerr is not given, is kept in full
+    precision.
+
+    Attributes:
+        dtype : numpy dtype
+            The precision to store the history vectors.  numpy.float32 halves
+            the storage of the default (the precision of the input vectors).
+            For complex vectors, float32 is stored as complex64.  The
+            extrapolated vectors then carry errors of the single precision
+            roundoff (about 1e-7 relative).
+        compression : str
+            HDF5 compression filter ('lzf' or 'gzip').  Default is None.
+    '''
+    def __init__(self, dev=None, filename=None, dtype=None, compression=None):
+        DIIS.__init__(self, dev, filename, incore=False)
+        self.dtype = dtype
+        self.compression = compression
+
+    def _storage_dtype(self, value):
+        if self.dtype is None:
+            return value.dtype
+        dtype = numpy.dtype(self.dtype)
+        if numpy.iscomplexobj(value) and dtype.kind != 'c':
+            dtype = numpy.result_type(dtype, numpy.complex64)
+        return dtype
+
+    def _dataset(self, key, size, dtype):
+        if self._diisfile is None:
+            self._diisfile = misc.H5TmpFile(self.filename, 'w')
+        if key in self._diisfile:
+            dat = self._diisfile[key]
+            if dat.shape == (size,) and dat.dtype == dtype:
+                return dat
+            del(self._diisfile[key])
+        if self.compression:
+            return self._diisfile.create_dataset(key, (size,), dtype,
+                                                 compression=self.compression)
+        else:
+            return self._diisfile.create_dataset(key, (size,), dtype)
+
+    def _store(self, key, value):
+        value = value.ravel()
+        if key == 'xprev':
+            dtype = value.dtype
+        else:
+            dtype = self._storage_dtype(value)
+        dat = self._dataset(key, value.size, dtype)
+        for p0, p1 in misc.prange(0, value.size, BLOCK_SIZE):
+            dat[p0:p1] = value[p0:p1]
+        self._diisfile.flush()
+
+    def update(self, x, xerr=None):
+        shape = x.shape
+        x = x.ravel()
+        if xerr is None and self._xprev is None:
+            self._store('xprev', x)
+            self._xprev = self._diisfile['xprev']
+            return x.reshape(shape)
+        if xerr is not None:
+            self._err_vec_touched = True
+            xerr = xerr.ravel()
+
+        if self._head >= self.space:
+            self._head = 0
+        while len(self._bookkeep) >= self.space:
+            self._bookkeep.pop(0)
+        head = self._head
+        self._bookkeep.append(head)
+        self._head += 1
+        nd = self.get_num_vec()
+
+        dtype = self._storage_dtype(x)
+        xdat = self._dataset('x%d'%head, x.size, dtype)
+        edat = self._dataset('e%d'%head, x.size, dtype)
+        if self._H is None:
+            self._H = numpy.zeros((self.space+1,self.space+1),
+                                  numpy.result_type(x, 1.))
+            self._H[0,1:] = self._H[1:,0] = 1
+
+        # Write the new vectors and accumulate the overlaps of the new error
+        # vector in one pass
+        h = numpy.zeros(nd, self._H.dtype)
+        for p0, p1 in misc.prange(0, x.size, BLOCK_SIZE):
+            if xerr is None:
+                e = x[p0:p1] - self._xprev[p0:p1]
+            else:
+                e = xerr[p0:p1]
+            xdat[p0:p1] = x[p0:p1]
+            edat[p0:p1] = e
+            for i in range(nd):
+                if i == head:
+                    h[i] += numpy.dot(e.conj(), e)
+                else:
+                    h[i] += numpy.dot(e.conj(), self.get_err_vec(i)[p0:p1])
+            e = None
+        self._diisfile.flush()
+        self._H[head+1,1:nd+1] = h
+        self._H[1:nd+1,head+1] = h.conj()
+
+        if nd < self.min_space:
+            return x.reshape(shape)
+
+        xnew = self.extrapolate(nd)
+        if xerr is None:
+            self._store('xprev', xnew)
+            self._xprev = self._diisfile['xprev']
+        return xnew.reshape(shape)
+
+    def restore(self, filename, inplace=True):
+        DIIS.restore(self, filename, inplace)
+        self._buffer = {}
+        if self._diisfile is None:
+            self._diisfile = misc.H5TmpFile(filename)
+        if 'xprev' in self._diisfile:
+            self._xprev = self._diisfile['xprev']
+        return self
+
+
 def restore(filename):
     '''Restore/construct diis object based on a diis file'''
     return DIIS().restore(filename)
@@ -960,6 +960,132 @@ def davidson_nosym1(aop, x0, precond, tol=1e-12, max_cycle=50, max_space=12,
         x0 = [x for x in x0]  # nparray -> list
         return numpy.asarray(conv), e, x0
 
+def davidson_interior(aop, x0, precond, shift, tol=1e-12, max_cycle=50,
+                      max_space=12, lindep=DAVIDSON_LINDEP, nroots=1,
+                      hermi=True, verbose=logger.WARN, tol_residual=None):
+    '''Block Davidson solver for the interior eigenvalues closest to shift.
+
+    The eigenvectors are extracted from the subspace with harmonic Ritz
+    projection, which converges monotonically for the interior eigenvalues
+    (plain Rayleigh-Ritz may skip roots).  The cost scales with the number
+    of roots around shift rather than the number of roots below shift.
+    Ref: R. B. Morgan, Linear Algebra Appl. 154, 289 (1991)
+
+    Args:
+        aop : function([x]) => [array_like_x]
+            Matrix vector multiplication for a block of vectors.
+        x0 : 1D array or a list of 1D arrays
+            Initial guess
+        precond : function(dx, e, x0) => array_like_dx
+            Preconditioner.  e is the Rayleigh quotient of the root.
+        shift : float
+            Target eigenvalue
+
+    Kwargs:
+        hermi : bool
+            Whether the matrix is Hermitian.  For non-Hermitian matrix, only
+            the roots with real eigenvalues are searched.
+
+    Returns:
+        conv : list of bool
+        e : 1D array
+            The nroots eigenvalues closest to shift, in ascending order.
+        c : list of 1D arrays
+    '''
+    if isinstance(verbose, logger.Logger):
+        log = verbose
+    else:
+        log = logger.Logger(sys.stdout, verbose)
+    if tol_residual is None:
+        toloose = numpy.sqrt(tol)
+    else:
+        toloose = tol_residual
+
+    if isinstance(x0, numpy.ndarray) and x0.ndim == 1:
+        x0 = [x0]
+    # Extra roots are tracked in the subspace.  Harmonic Ritz vectors of the
+    # roots which are poorly represented by the subspace are not reliably
+    # ordered at the beginning of the iterations.
+    nwork = nroots * 2
+    max_space = max_space + (nwork-1) * 3
+    xt = _qr(x0, numpy.dot, lindep)[0]
+    axt = aop(xt)
+    xs = numpy.asarray(xt)
+    ax = numpy.asarray(axt)
+    e = elast = numpy.zeros(nroots)
+    conv = [False] * nroots
+    for icyc in range(max_cycle):
+        space = xs.shape[0]
+        ws = ax - shift * xs
+        g = numpy.dot(ws.conj(), ws.T)
+        h = numpy.dot(ws.conj(), xs.T)
+        # Harmonic Ritz values theta: g y = (theta - shift) h y
+        w, v = scipy.linalg.eig(g, h)
+        mask = numpy.isfinite(w) & (abs(w.imag) < 1e-6 + abs(w.real) * 1e-3)
+        idx = numpy.where(mask)[0]
+        idx = idx[numpy.argsort(abs(w[idx].real))][:nwork]
+        v = v[:,idx]
+        if hermi or xs.dtype != numpy.complex128:
+            v = v.real
+        x0 = numpy.dot(v.T, xs)
+        ax0 = numpy.dot(v.T, ax)
+        norm = numpy.linalg.norm(x0, axis=1)
+        x0 /= norm[:,None]
+        ax0 /= norm[:,None]
+        e = numpy.einsum('ij,ij->i', x0.conj(), ax0)
+        if hermi:
+            e = e.real
+        nroot = len(e)
+        if elast.size != nroot:
+            elast = numpy.zeros(nroot)
+        de = e - elast
+        elast = e
+        xt = ax0 - e[:,None] * x0
+        dx_norm = numpy.linalg.norm(xt, axis=1)
+        conv = (abs(de) < tol) & (dx_norm < toloose)
+        # The nroots Ritz pairs closest to shift are checked for convergence
+        target = numpy.argsort(abs(e - shift))[:nroots]
+        log.debug('davidson_interior %d %d  |r|= %4.3g  e= %s  max|de|= %4.3g',
+                  icyc, space, dx_norm[target].max(), e[target],
+                  abs(de[target]).max())
+        if all(conv[target]) and len(target) == nroots:
+            break
+
+        # Olsen's correction vectors.  Plain preconditioned residuals
+        # stagnate when the root is close to a diagonal element of the matrix
+        xt_new = []
+        for k in numpy.where(~conv)[0]:
+            pr = precond(xt[k], e[k], x0[k])
+            px = precond(x0[k], e[k], x0[k])
+            eps = numpy.dot(x0[k].conj(), pr) / numpy.dot(x0[k].conj(), px)
+            xi = pr - eps * px
+            xt_new.append(xi/numpy.linalg.norm(xi))
+        xt = xt_new
+        if space + len(xt) > max_space:
+            # restart with the current eigenvectors
+            u, sigma, vh = scipy.linalg.svd(x0, full_matrices=False)
+            keep = sigma > lindep**.5
+            xs = vh[keep]
+            ax = numpy.dot(u[:,keep].conj().T / sigma[keep,None], ax0)
+        for i in range(len(xt)):
+            xt[i] -= numpy.dot(xs.T, numpy.dot(xs.conj(), xt[i]))
+        if len(xt) > 0:
+            xt = _qr(xt, numpy.dot, lindep)[0]
+        if len(xt) == 0:
+            log.debug('Linear dependency in trial subspace. |r| for each state %s',
+                      dx_norm)
+            conv = conv | (dx_norm < toloose)
+            break
+        axt = aop(xt)
+        xs = numpy.vstack((xs, xt))
+        ax = numpy.vstack((ax, axt))
+
+    idx = numpy.argsort(abs(e - shift))[:nroots]
+    idx = idx[numpy.argsort(e[idx].real)]
+    if not hermi:
+        e = e.real
+    return numpy.asarray(conv)[idx], e[idx], [x0[i] for i in idx]
+
 def dgeev(abop, x0, precond, type=1, tol=1e-12, max_cycle=50, max_space=12,
           lindep=DAVIDSON_LINDEP, max_memory=MAX_MEMORY,
           dot=numpy.dot, callback=None,
@@ -1309,6 +1435,10 @@ def krylov(aop, b, x0=None, tol=1e-10, max_cycle=30, dot=numpy.dot,
     if not (isinstance(b, numpy.ndarray) and b.ndim == 1):
         b = numpy.asarray(b)
 
+    if b.ndim == 2 and b.shape[0] > 1:
+        return _krylov_block(aop, b, x0, tol, max_cycle, dot, lindep,
+                             callback, hermi, max_memory, log)
+
     if x0 is None:
         x1 = b
     else:
@@ -1409,6 +1539,141 @@ def krylov(aop, b, x0=None, tol=1e-10, max_cycle=30, dot=numpy.dot,
     return x
 
 
+def _krylov_block(aop, b, x0=None, tol=1e-10, max_cycle=30, dot=numpy.dot,
+                  lindep=DSOLVE_LINDEP, callback=None, hermi=False,
+                  max_memory=MAX_MEMORY, verbose=logger.WARN):
+    '''Block Krylov subspace method to solve  (1+a) x = b  for multiple
+    right-hand sides b.  All right-hand sides share one orthonormal subspace.
+    The Galerkin solution and the residuals of all columns are updated in
+    each iteration.  Columns whose residual is smaller than tol are deflated
+    (not used to expand the subspace anymore).
+
+    The subspace is stored as one block of vectors per iteration and all
+    projections are evaluated with matrix-matrix products over the blocks.
+    The Euclidean inner product is used;  the argument dot is not referenced.
+
+    Args:
+        aop : function(x) => array_like_x
+            aop(x) for a set of vectors x (2D array).
+        b : 2D array
+            Each row is a right-hand side.
+
+    Returns:
+        x : 2D array like b
+    '''
+    log = logger.new_logger(verbose=verbose)
+
+    if x0 is not None:
+        b = b - (x0 + numpy.asarray(aop(x0)).reshape(x0.shape))
+    nroots, ndim = b.shape
+
+    _incore = max_memory*1e6/b[0].nbytes > 14 * nroots
+    log.debug1('max_memory %d  incore %s', max_memory, _incore)
+    # Each element of xs (ax) is the block of trial vectors (their aop
+    # products) of one iteration
+    if _incore:
+        xs = []
+        ax = []
+    else:
+        xs = _Xlist()
+        ax = _Xlist()
+
+    h = numpy.zeros((0,0), dtype=b.dtype)
+    g = numpy.zeros((0,nroots), dtype=b.dtype)
+    conv = numpy.zeros(nroots, dtype=bool)
+    x1 = b
+    max_cycle = min(max_cycle, ndim)
+    for cycle in range(max_cycle):
+        # Orthonormalize the new vectors against the subspace and each other.
+        # Two passes of block Gram-Schmidt for numerical stability.
+        x1 = numpy.array(x1, copy=True)
+        norm0 = numpy.linalg.norm(x1, axis=1)
+        for k in range(2):
+            for i in range(len(xs)):
+                xblk = numpy.asarray(xs[i])
+                x1 -= numpy_helper.dot(numpy_helper.dot(x1, xblk.conj().T), xblk)
+            x1 = _orth_block(x1, norm0, lindep)
+            norm0 = numpy.ones(len(x1))
+        if len(x1) == 0:
+            log.debug('krylov cycle %d  linear dependence', cycle)
+            break
+
+        axt = numpy.asarray(aop(x1)).reshape(len(x1),ndim)
+        nd0 = h.shape[0]
+        nd = nd0 + len(x1)
+        dtype = numpy.result_type(h, x1, axt)
+        h1 = numpy.zeros((nd,nd), dtype=dtype)
+        h1[:nd0,:nd0] = h
+        p1 = 0
+        for i in range(len(xs)):
+            xblk = numpy.asarray(xs[i])
+            p0, p1 = p1, p1 + len(xblk)
+            h1[p0:p1,nd0:] = numpy_helper.dot(xblk.conj(), axt.T)
+            if not hermi:
+                axblk = numpy.asarray(ax[i])
+                h1[nd0:,p0:p1] = numpy_helper.dot(x1.conj(), axblk.T)
+        if hermi:
+            h1[nd0:,:nd0] = h1[:nd0,nd0:].conj().T
+        h1[nd0:,nd0:] = numpy_helper.dot(x1.conj(), axt.T)
+        h1[nd0:,nd0:] += numpy.eye(nd-nd0)
+        h = h1
+        g = numpy.vstack((g, numpy_helper.dot(x1.conj(), b.T)))
+
+        xs.append(x1)
+        ax.append(axt)
+        if callable(callback):
+            callback(cycle, xs, ax)
+        axt = x1 = None
+
+        c = numpy.linalg.solve(h, g)
+        # Residuals r = b - (1+a) x
+        r = numpy.array(b, dtype=numpy.result_type(b, c), copy=True)
+        p1 = 0
+        for i in range(len(xs)):
+            xblk = numpy.asarray(xs[i])
+            p0, p1 = p1, p1 + len(xblk)
+            ct = numpy.asarray(c[p0:p1].T, order='C')
+            r -= numpy_helper.dot(ct, xblk)
+            r -= numpy_helper.dot(ct, numpy.asarray(ax[i]))
+        rnorm = numpy.linalg.norm(r, axis=1)
+        conv = rnorm < tol
+        log.debug('krylov cycle %d  r = %g  conv = %d/%d',
+                  cycle, rnorm.max(), numpy.count_nonzero(conv), nroots)
+        if all(conv):
+            break
+        x1 = r[~conv]
+        r = None
+
+    if not all(conv):
+        log.warn('krylov solver not converged for %d right-hand sides',
+                 numpy.count_nonzero(~conv))
+
+    x = numpy.zeros(b.shape, dtype=numpy.result_type(b, h))
+    p1 = 0
+    for i in range(len(xs)):
+        xblk = numpy.asarray(xs[i])
+        p0, p1 = p1, p1 + len(xblk)
+        ct = numpy.asarray(c[p0:p1].T, order='C')
+        x += numpy_helper.dot(ct, xblk)
+    if x0 is not None:
+        x += x0
+    return x
+
+def _orth_block(x, norm0, lindep):
+    '''Orthonormalize the rows of x (canonical orthogonalization).  The rows
+    whose norm is reduced below sqrt(lindep)*norm0 are removed first.'''
+    norm = numpy.linalg.norm(x, axis=1)
+    idx = (norm > 1e-14) & (norm**2 > lindep * norm0**2)
+    x = x[idx] / norm[idx,None]
+    if len(x) == 0:
+        return x
+    s = numpy_helper.dot(x.conj(), x.T)
+    w, v = scipy.linalg.eigh(s)
+    idx = w > max(lindep, 1e-14)
+    v = v[:,idx] / numpy.sqrt(w[idx])
+    return numpy.asarray(numpy_helper.dot(v.T, x), order='C')
+
+
 def dsolve(aop, b, precond, tol=1e-12, max_cycle=30, dot=numpy.dot,
            lindep=DSOLVE_LINDEP, verbose=0, tol_residual=None):
     '''Davidson iteration to solve linear equation.  It works bad.
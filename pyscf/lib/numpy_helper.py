@@ -23,6 +23,7 @@ Extension to numpy and scipy
 import string
 import ctypes
 import math
+import time
 import numpy
 from pyscf.lib import misc
 from numpy import asarray  # For backward compatibility
@@ -119,12 +120,41 @@ def _contract(subscripts, *tensors, **kwargs):
         return tblis_einsum._contract(idx_str, A, B, **kwargs)
 
     DEBUG = kwargs.get('DEBUG', False)
+    key = (idx_str, A.shape, B.shape)
+    plan = _CONTRACT_PLANS.get(key, False)
+    if plan is False or DEBUG:
+        plan = _contract_plan(idx_str, A.shape, B.shape, DEBUG)
+        _cache_plan(_CONTRACT_PLANS, key, plan)
+    if plan is None:
+        return _numpy_einsum(idx_str, A, B)
 
+    new_orderA, new_orderB, inner_shape, shapeCt, new_orderCt = plan
+    if A.size == 0 or B.size == 0:
+        shapeCt = [shapeCt[i] for i in new_orderCt]
+        return numpy.zeros(shapeCt, dtype=C_dtype)
+
+    At = A.transpose(new_orderA)
+    Bt = B.transpose(new_orderB)
+
+    if At.flags.f_contiguous:
+        At = numpy.asarray(At.reshape(-1,inner_shape), order='F')
+    else:
+        At = numpy.asarray(At.reshape(-1,inner_shape), order='C')
+    if Bt.flags.f_contiguous:
+        Bt = numpy.asarray(Bt.reshape(inner_shape,-1), order='F')
+    else:
+        Bt = numpy.asarray(Bt.reshape(inner_shape,-1), order='C')
+
+    return dot(At,Bt).reshape(shapeCt, order='A').transpose(new_orderCt)
+
+def _contract_plan(idx_str, shapeA, shapeB, DEBUG=False):
+    '''The transpose/GEMM decomposition of a two-tensor contraction.  None
+    means the contraction is handled by numpy.einsum.'''
     # Split the strings into a list of idx char's
     idxA, idxBC = idx_str.split(',')
     idxB, idxC = idxBC.split('->')
-    assert(len(idxA) == A.ndim)
-    assert(len(idxB) == B.ndim)
+    assert(len(idxA) == len(shapeA))
+    assert(len(idxB) == len(shapeB))
 
     if DEBUG:
         print("*** Einsum for", idx_str)
@@ -133,21 +163,21 @@ def _contract(subscripts, *tensors, **kwargs):
         print(" idxC =", idxC)
 
     # Get the range for each index and put it in a dictionary
-    rangeA = dict(zip(idxA, A.shape))
-    rangeB = dict(zip(idxB, B.shape))
+    rangeA = dict(zip(idxA, shapeA))
+    rangeB = dict(zip(idxB, shapeB))
     #rangeC = dict(zip(idxC, C.shape))
     if DEBUG:
         print("rangeA =", rangeA)
         print("rangeB =", rangeB)
 
     # duplicated indices 'in,ijj->n'
-    if len(rangeA) != A.ndim or len(rangeB) != B.ndim:
-        return _numpy_einsum(idx_str, A, B)
+    if len(rangeA) != len(shapeA) or len(rangeB) != len(shapeB):
+        return None
 
     # Find the shared indices being summed over
     shared_idxAB = set(idxA).intersection(idxB)
     if len(shared_idxAB) == 0: # Indices must overlap
-        return _numpy_einsum(idx_str, A, B)
+        return None
 
     idxAt = list(idxA)
     idxBt = list(idxB)
@@ -198,24 +228,59 @@ def _contract(subscripts, *tensors, **kwargs):
         shapeCt.append(rangeB[idx])
         idxCt.append(idx)
     new_orderCt = [idxCt.index(idx) for idx in idxC]
+    return new_orderA, new_orderB, inner_shape, shapeCt, new_orderCt
+
+# Contraction plans (the transpose/GEMM decomposition of _contract and the
+# pairwise contraction order of einsum) are memoized for each subscripts and
+# shapes.  The caches are cleared when they exceed EINSUM_PLAN_CACHE_SIZE.
+EINSUM_PLAN_CACHE_SIZE = getattr(misc.__config__, 'lib_einsum_plan_cache_size', 4096)
+_CONTRACT_PLANS = {}
+_EINSUM_PATHS = {}
+def _cache_plan(cache, key, plan):
+    if len(cache) >= EINSUM_PLAN_CACHE_SIZE:
+        cache.clear()
+    cache[key] = plan
+
+def clear_einsum_cache():
+    '''Clear the memoized contraction plans of :func:`einsum`'''
+    _CONTRACT_PLANS.clear()
+    _EINSUM_PATHS.clear()
+
+# Wall time and the number of calls of einsum for each (subscripts, shapes).
+# Timing is enabled by einsum_timing(True) or the config option
+# lib_einsum_timing.
+EINSUM_TIMING = getattr(misc.__config__, 'lib_einsum_timing', False)
+_EINSUM_STATS = {}
+def einsum_timing(enable=True):
+    '''Switch on/off the timing statistics of :func:`einsum`'''
+    global EINSUM_TIMING
+    EINSUM_TIMING = enable
+
+def einsum_stats(reset=False):
+    '''Timing statistics of :func:`einsum`.
 
-    if A.size == 0 or B.size == 0:
-        shapeCt = [shapeCt[i] for i in new_orderCt]
-        return numpy.zeros(shapeCt, dtype=C_dtype)
-
-    At = A.transpose(new_orderA)
-    Bt = B.transpose(new_orderB)
-
-    if At.flags.f_contiguous:
-        At = numpy.asarray(At.reshape(-1,inner_shape), order='F')
-    else:
-        At = numpy.asarray(At.reshape(-1,inner_shape), order='C')
-    if Bt.flags.f_contiguous:
-        Bt = numpy.asarray(Bt.reshape(inner_shape,-1), order='F')
-    else:
-        Bt = numpy.asarray(Bt.reshape(inner_shape,-1), order='C')
-
-    return dot(At,Bt).reshape(shapeCt, order='A').transpose(new_orderCt)
+    Returns:
+        A list of (subscripts, shapes, ncalls, wall_time), sorted by the wall
+        time in descending order.
+    '''
+    stats = [key + tuple(val) for key, val in _EINSUM_STATS.items()]
+    stats = sorted(stats, key=lambda x: x[3], reverse=True)
+    if reset:
+        _EINSUM_STATS.clear()
+    return stats
+
+def dump_einsum_stats(stdout=None, ntop=20, reset=False):
+    '''Print the ntop most time-consuming contractions of :func:`einsum`'''
+    import sys
+    if stdout is None:
+        stdout = sys.stdout
+    stats = einsum_stats(reset)
+    stdout.write('einsum timing: %d contractions, %.2f s in total\n' %
+                 (len(stats), sum(x[3] for x in stats)))
+    for subscripts, shapes, ncalls, t in stats[:ntop]:
+        stdout.write('  %-24s %8d calls %10.4f s  %s\n' %
+                     (subscripts, ncalls, t, ' '.join(str(x) for x in shapes)))
+    stdout.flush()
 
 def einsum(subscripts, *tensors, **kwargs):
     '''Perform a more efficient einsum via reshaping to a matrix multiply.
@@ -225,6 +290,20 @@ def einsum(subscripts, *tensors, **kwargs):
     and appears only twice (i.e. no 'ij,ik,il->jkl'). The output indices must
     be explicitly specified (i.e. 'ij,j->i' and not 'ij,j').
     '''
+    if EINSUM_TIMING:
+        t0 = time.time()
+        out = _einsum(subscripts, *tensors, **kwargs)
+        key = (subscripts, tuple(getattr(x, 'shape', ()) for x in tensors))
+        stat = _EINSUM_STATS.get(key)
+        if stat is None:
+            stat = _EINSUM_STATS[key] = [0, 0.]
+        stat[0] += 1
+        stat[1] += time.time() - t0
+        return out
+    else:
+        return _einsum(subscripts, *tensors, **kwargs)
+
+def _einsum(subscripts, *tensors, **kwargs):
     contract = kwargs.pop('_contract', _contract)
 
     subscripts = subscripts.replace(' ','')
@@ -233,15 +312,13 @@ def einsum(subscripts, *tensors, **kwargs):
     elif len(tensors) <= 2:
         out = _contract(subscripts, *tensors, **kwargs)
     else:
-        if '->' in subscripts:
-            indices_in, idx_final = subscripts.split('->')
-            indices_in = indices_in.split(',')
-        else:
-            idx_final = ''
-            indices_in = subscripts.split('->')[0].split(',')
         tensors = list(tensors)
-        contraction_list = _einsum_path(subscripts, *tensors, optimize=True,
-                                        einsum_call=True)[1]
+        key = (subscripts,) + tuple(numpy.shape(x) for x in tensors)
+        contraction_list = _EINSUM_PATHS.get(key)
+        if contraction_list is None:
+            contraction_list = _einsum_path(subscripts, *tensors, optimize=True,
+                                            einsum_call=True)[1]
+            _cache_plan(_EINSUM_PATHS, key, contraction_list)
         for contraction in contraction_list:
             inds, idx_rm, einsum_str, remaining = contraction[:4]
             tmp_operands = [tensors.pop(x) for x in inds]
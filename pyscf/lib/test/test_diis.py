@@ -87,6 +87,48 @@ class KnownValues(unittest.TestCase):
         self.assertAlmostEqual(abs(a.dot(x) - b).max(), 0, 6)
         self.assertAlmostEqual(abs(x - numpy.linalg.solve(a,b)).max(), 0, 6)
 
+    def test_outcore_diis(self):
+        a, b, adiis, arest, x0 = make_ab(16)
+        x = x0
+        ad = lib.diis.OutcoreDIIS(compression='gzip')
+        for i in range(20):
+            e = b - a.dot(x)
+            x = (b - arest.dot(x)) / adiis
+            x = ad.update(x, xerr=e)
+        self.assertAlmostEqual(abs(x - numpy.linalg.solve(a,b)).max(), 0, 6)
+
+        ftmp = tempfile.NamedTemporaryFile()
+        ad = lib.diis.OutcoreDIIS(filename=ftmp.name, dtype=numpy.float32)
+        x = x0
+        for i in range(8):
+            x = (b - arest.dot(x)) / adiis
+            x = ad.update(x)
+        self.assertEqual(ad.get_vec(0).dtype, numpy.float32)
+        # The overlap matrix is identical to the one built from the stored
+        # error vectors up to the single precision roundoff
+        nd = ad.get_num_vec()
+        errs = numpy.array([ad.get_err_vec(i) for i in range(nd)], dtype=float)
+        h = ad._H[1:nd+1,1:nd+1]
+        self.assertAlmostEqual(abs(h - errs.dot(errs.T)).max()/abs(h).max(), 0, 6)
+
+        ad = lib.diis.OutcoreDIIS(dtype=numpy.float32).restore(ftmp.name)
+        for i in range(12):
+            x = (b - arest.dot(x)) / adiis
+            x = ad.update(x)
+        self.assertAlmostEqual(abs(x - numpy.linalg.solve(a,b)).max(), 0, 6)
+
+    def test_outcore_diis_complex(self):
+        a, b, adiag, arest, x = make_ab(16)
+        a = a + numpy.diag(numpy.arange(16) * .1j)
+        adiag = a.diagonal()
+        ad = lib.diis.OutcoreDIIS(dtype=numpy.float32)
+        x = x + 0j
+        for i in range(20):
+            x = (b - arest.dot(x)) / adiag
+            x = ad.update(x)
+        self.assertEqual(ad.get_vec(0).dtype, numpy.complex64)
+        self.assertAlmostEqual(abs(x - numpy.linalg.solve(a,b)).max(), 0, 6)
+
 
 if __name__ == "__main__":
     print("Full Tests for lib.diis")
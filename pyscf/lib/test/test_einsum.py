@@ -1,6 +1,7 @@
 import unittest
 import numpy
 from pyscf import lib
+from pyscf.lib import numpy_helper
 einsum = lib.einsum
 
 lib.numpy_helper.EINSUM_MAX_SIZE, bak = 0, lib.numpy_helper.EINSUM_MAX_SIZE
@@ -242,6 +243,46 @@ class KnownValues(unittest.TestCase):
         ref = lib.einsum('jlxp,px->jl', ref, d)
         self.assertAlmostEqual(abs(ref-f).max(), 0, 9)
 
+    def test_plan_cache(self):
+        lib.clear_einsum_cache()
+        a = numpy.random.random((7,10,9))
+        b = numpy.random.random((9,10,8))
+        ref = numpy.einsum('ijk,kjl->il', a, b)
+        self.assertAlmostEqual(abs(lib.einsum('ijk,kjl->il', a, b) - ref).max(), 0, 12)
+        self.assertEqual(len(numpy_helper._CONTRACT_PLANS), 1)
+        self.assertAlmostEqual(abs(lib.einsum('ijk,kjl->il', a, b) - ref).max(), 0, 12)
+        self.assertEqual(len(numpy_helper._CONTRACT_PLANS), 1)
+        self.assertRaises(ValueError, lib.einsum, 'ijk,kjl->il', a, b[:,:9])
+
+        c = numpy.random.random((8,6))
+        ref = numpy.einsum('ijk,kjl,lm->im', a, b, c)
+        for i in range(2):
+            f = lib.einsum('ijk,kjl,lm->im', a, b, c)
+            self.assertAlmostEqual(abs(f - ref).max(), 0, 12)
+        self.assertEqual(len(numpy_helper._EINSUM_PATHS), 1)
+        lib.clear_einsum_cache()
+        self.assertEqual(len(numpy_helper._CONTRACT_PLANS), 0)
+
+    def test_einsum_stats(self):
+        a = numpy.random.random((7,10,9))
+        b = numpy.random.random((9,10,8))
+        lib.einsum_stats(reset=True)
+        lib.einsum_timing(True)
+        try:
+            for i in range(3):
+                lib.einsum('ijk,kjl->il', a, b)
+            lib.einsum('ijk,kjl->li', a, b)
+        finally:
+            lib.einsum_timing(False)
+        lib.einsum('ijk,kjl->il', a, b)
+        stats = lib.einsum_stats(reset=True)
+        self.assertEqual(len(stats), 2)
+        ncalls = dict((x[0], x[2]) for x in stats)
+        self.assertEqual(ncalls['ijk,kjl->il'], 3)
+        self.assertEqual(ncalls['ijk,kjl->li'], 1)
+        self.assertEqual(stats[0][1], ((7,10,9), (9,10,8)))
+        self.assertEqual(lib.einsum_stats(), [])
+
 
 if __name__ == '__main__':
     unittest.main()
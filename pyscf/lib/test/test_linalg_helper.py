@@ -19,6 +19,7 @@ import unittest
 import numpy
 import scipy.linalg
 import tempfile
+from pyscf import lib
 from pyscf import gto
 from pyscf import scf
 from pyscf import fci
@@ -38,6 +39,61 @@ class KnownValues(unittest.TestCase):
         e = myfci.kernel()[0]
         self.assertAlmostEqual(e, -11.579978414933732+mol.energy_nuc(), 9)
 
+    def test_davidson_interior(self):
+        numpy.random.seed(3)
+        n = 200
+        a = numpy.random.random((n,n)) * .05
+        a = a + a.T + numpy.diag(numpy.arange(n) * .1)
+        ref = numpy.linalg.eigvalsh(a)
+        shift = ref[100] + .02
+        ref = ref[numpy.argsort(abs(ref-shift))[:4]]
+        aop = lambda xs: [a.dot(x) for x in xs]
+        precond = lambda dx, e, x0: dx/(a.diagonal() - e)
+        x0 = numpy.eye(n)[98:104]
+        conv, e, c = lib.davidson_interior(aop, x0, precond, shift, tol=1e-10,
+                                           nroots=4)
+        self.assertTrue(all(conv))
+        self.assertAlmostEqual(abs(e - numpy.sort(ref)).max(), 0, 7)
+        self.assertAlmostEqual(abs(a.dot(c[0]) - e[0]*c[0]).max(), 0, 4)
+
+        b = a + numpy.random.random((n,n)) * .01
+        ref = scipy.linalg.eigvals(b).real
+        ref = ref[numpy.argsort(abs(ref-shift))[:4]]
+        aop = lambda xs: [b.dot(x) for x in xs]
+        precond = lambda dx, e, x0: dx/(b.diagonal() - e)
+        conv, e, c = lib.davidson_interior(aop, x0, precond, shift, tol=1e-10,
+                                           nroots=4, hermi=False)
+        self.assertAlmostEqual(abs(e - numpy.sort(ref)).max(), 0, 7)
+
+    def test_krylov_multiple_rhs(self):
+        numpy.random.seed(2)
+        n = 100
+        a = numpy.random.random((n,n)) * .01
+        b = numpy.random.random((5,n))
+        aop = lambda xs: numpy.dot(xs, a.T)
+        x = lib.krylov(aop, b, tol=1e-10, max_cycle=30)
+        self.assertAlmostEqual(abs(x + x.dot(a.T) - b).max(), 0, 7)
+
+        x = lib.krylov(aop, b[0], tol=1e-10, max_cycle=30)
+        self.assertAlmostEqual(abs(x + a.dot(x) - b[0]).max(), 0, 7)
+
+        # initial guess
+        x0 = x1 = lib.krylov(aop, b, tol=1e-3, max_cycle=30)
+        self.assertTrue(abs(x1 + x1.dot(a.T) - b).max() > 1e-9)
+        x = lib.krylov(aop, b, x0, tol=1e-10, max_cycle=30)
+        self.assertAlmostEqual(abs(x + x.dot(a.T) - b).max(), 0, 7)
+
+        # trial vectors stored on disk
+        x = lib.krylov(aop, b, x0, tol=1e-10, max_cycle=30, max_memory=1e-3)
+        self.assertAlmostEqual(abs(x + x.dot(a.T) - b).max(), 0, 7)
+
+        # complex, non-hermitian
+        a1 = a + a.T * .5j
+        aop = lambda xs: numpy.dot(xs, a1.T)
+        b1 = b + b[::-1] * 1j
+        x = lib.krylov(aop, b1, tol=1e-10, max_cycle=30, max_memory=1e-3)
+        self.assertAlmostEqual(abs(x + x.dot(a1.T) - b1).max(), 0, 7)
+
 if __name__ == "__main__":
     print("Full Tests for linalg_helper")
     unittest.main()
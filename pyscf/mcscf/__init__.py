@@ -189,6 +189,7 @@ from pyscf.mcscf import umc1step
 mc1step_uhf = umc1step  # for backward compatibility
 from pyscf.mcscf.addons import *
 from pyscf.mcscf import chkfile
+from pyscf.mcscf import scan
 
 def CASSCF(mf_or_mol, ncas, nelecas, ncore=None, frozen=None):
     from pyscf import gto
@@ -902,6 +902,12 @@ To enable the solvent model for CASCI, the following code needs to be called
 
     as_scanner = as_scanner
 
+    def scan(self, geoms, nproc=None, output=None, save_wfn=True):
+        '''Parallel potential energy surface scan.  See also
+        :func:`pyscf.mcscf.scan.kernel`'''
+        from pyscf.mcscf import scan
+        return scan.kernel(self, geoms, nproc, output, save_wfn)
+
     @lib.with_doc(cas_natorb.__doc__)
     def cas_natorb(self, mo_coeff=None, ci=None, eris=None, sort=False,
                    casdm1=None, verbose=None, with_meta_lowdin=WITH_META_LOWDIN):
@@ -24,6 +24,8 @@ from pyscf import lib
 from pyscf.lib import logger
 from pyscf.ao2mo import _ao2mo
 from pyscf import df
+from pyscf import scf
+from pyscf import __config__
 
 
 def density_fit(casscf, auxbasis=None, with_df=None):
@@ -68,16 +70,20 @@ def density_fit(casscf, auxbasis=None, with_df=None):
             with_df.auxbasis = auxbasis
 
     class DFCASSCF(_DFCASSCF, casscf_class):
+        direct_core_fock = getattr(__config__, 'mcscf_df_DFCASSCF_direct_core_fock', False)
+
         def __init__(self):
             self.__dict__.update(casscf.__dict__)
             #self.grad_update_dep = 0
             self.with_df = with_df
-            self._keys = self._keys.union(['with_df'])
+            self._keys = self._keys.union(['with_df', 'direct_core_fock'])
 
         def dump_flags(self, verbose=None):
             casscf_class.dump_flags(self, verbose)
             logger.info(self, 'DFCASCI/DFCASSCF: density fitting for JK matrix '
                         'and 2e integral transformation')
+            if self.direct_core_fock:
+                logger.info(self, 'Core Fock matrix from AO-direct integrals')
             return self
 
         def reset(self, mol=None):
@@ -105,10 +111,16 @@ def density_fit(casscf, auxbasis=None, with_df=None):
 # Modify get_veff for JK matrix of core density because get_h1eff calls
 # self.get_veff to generate core JK
         def get_veff(self, mol=None, dm=None, hermi=1):
+            if mol is None: mol = self.mol
             if dm is None:
                 mocore = self.mo_coeff[:,:self.ncore]
                 dm = numpy.dot(mocore, mocore.T) * 2
-            vj, vk = self.get_jk(mol, dm, hermi)
+            if self.direct_core_fock:
+                # The exact JK matrices of the core density from the AO-direct
+                # integrals. DF integrals are used for the active space only.
+                vj, vk = scf.hf.get_jk(mol, dm, hermi)
+            else:
+                vj, vk = self.get_jk(mol, dm, hermi)
             return vj - vk * .5
 
 # only approximate jk for self.update_jk_in_ah
@@ -263,8 +275,6 @@ class _ERIS(object):
         nao, nmo = mo.shape
         ncore = casscf.ncore
         ncas = casscf.ncas
-        nocc = ncore + ncas
-        naoaux = with_df.get_naoaux()
 
         mem_incore, mem_outcore, mem_basic = _mem_usage(ncore, ncas, nmo)
         mem_now = lib.current_memory()[0]
@@ -273,6 +283,29 @@ class _ERIS(object):
             log.warn('Calculation needs %d MB memory, over CASSCF.max_memory (%d MB) limit',
                      (mem_basic+mem_now)/.9, casscf.max_memory)
 
+        t0 = (time.clock(), time.time())
+        mo = numpy.asarray(mo, order='F')
+        # ppaa and papa together take the same amount of memory as mem_basic
+        if (mem_basic*2+mem_now < casscf.max_memory*.9 or mol.incore_anyway):
+            self.j_pc, self.k_pc, self.ppaa, self.papa = \
+                    _trans_e1_incore(with_df, mo, ncore, ncas,
+                                     max_memory-mem_basic, log)
+            t0 = log.timer('density fitting ao2mo incore', *t0)
+        else:
+            self._trans_e1_outcore(casscf, mo, with_df, max_memory, log)
+            t0 = log.timer('density fitting ao2mo', *t0)
+
+        dm_core = numpy.dot(mo[:,:ncore], mo[:,:ncore].T)
+        self.vhf_c = reduce(numpy.dot, (mo.T, casscf.get_veff(mol, dm_core*2), mo))
+        log.timer('density fitting vhf_c', *t0)
+
+    def _trans_e1_outcore(self, casscf, mo, with_df, max_memory, log):
+        nao, nmo = mo.shape
+        ncore = casscf.ncore
+        ncas = casscf.ncas
+        nocc = ncore + ncas
+        naoaux = with_df.get_naoaux()
+
         t1 = t0 = (time.clock(), time.time())
         self.feri = lib.H5TmpFile()
         self.ppaa = self.feri.create_dataset('ppaa', (nmo,nmo,ncas,ncas), 'f8')
@@ -280,7 +313,6 @@ class _ERIS(object):
         self.j_pc = numpy.zeros((nmo,ncore))
         k_cp = numpy.zeros((ncore,nmo))
 
-        mo = numpy.asarray(mo, order='F')
         fxpp = lib.H5TmpFile()
 
         blksize = max(4, int(min(with_df.blockdim, (max_memory*.95e6/8-naoaux*nmo*ncas)/3/nmo**2)))
@@ -346,10 +378,51 @@ class _ERIS(object):
 
         self.feri.flush()
 
-        dm_core = numpy.dot(mo[:,:ncore], mo[:,:ncore].T)
-        vj, vk = casscf.get_jk(mol, dm_core)
-        self.vhf_c = reduce(numpy.dot, (mo.T, vj*2-vk, mo))
-        t0 = log.timer('density fitting ao2mo', *t0)
+def _trans_e1_incore(with_df, mo, ncore, ncas, max_memory, log):
+    '''j_pc, k_pc, ppaa and papa from the three-index tensors (L|pq).
+
+    Both (pq|uv) and (pu|qv) are sums over the auxiliary index.  They are
+    accumulated in memory block by block of the auxiliary basis, thus the
+    (L|pq) tensor is transformed in one pass without any swap file.
+    '''
+    t1 = (time.clock(), time.time())
+    nao, nmo = mo.shape
+    nocc = ncore + ncas
+    ppaa = numpy.zeros((nmo,nmo,ncas,ncas))
+    papa = numpy.zeros((nmo,ncas,nmo,ncas))
+    j_pc = numpy.zeros((nmo,ncore))
+    k_cp = numpy.zeros((ncore,nmo))
+
+    mo = numpy.asarray(mo, order='F')
+    blksize = max(4, int(min(with_df.blockdim,
+                             max_memory*.95e6/8/(nmo**2+nmo*ncas*2))))
+    bufs1 = numpy.empty((blksize,nmo,nmo))
+    bufs2 = numpy.empty((blksize,nmo,ncas))
+    fmmm = _ao2mo.libao2mo.AO2MOmmm_nr_s2_iltj
+    fdrv = _ao2mo.libao2mo.AO2MOnr_e2_drv
+    ftrans = _ao2mo.libao2mo.AO2MOtranse2_nr_s2
+    for eri1 in with_df.loop(blksize):
+        naux = eri1.shape[0]
+        bufpp = bufs1[:naux]
+        fdrv(ftrans, fmmm,
+             bufpp.ctypes.data_as(ctypes.c_void_p),
+             eri1.ctypes.data_as(ctypes.c_void_p),
+             mo.ctypes.data_as(ctypes.c_void_p),
+             ctypes.c_int(naux), ctypes.c_int(nao),
+             (ctypes.c_int*4)(0, nmo, 0, nmo),
+             ctypes.c_void_p(0), ctypes.c_int(0))
+        bufpa = bufs2[:naux]
+        bufpa[:] = bufpp[:,:,ncore:nocc]
+        bufaa = bufpa[:,ncore:nocc].reshape(naux,ncas**2)
+        lib.dot(bufpp.reshape(naux,-1).T, bufaa, 1, ppaa.reshape(nmo**2,-1), 1)
+        bufpa = bufpa.reshape(naux,-1)
+        lib.dot(bufpa.T, bufpa, 1, papa.reshape(nmo*ncas,-1), 1)
+
+        bufd = numpy.einsum('kii->ki', bufpp)
+        j_pc += numpy.einsum('ki,kj->ij', bufd, bufd[:,:ncore])
+        k_cp += numpy.einsum('kij,kij->ij', bufpp[:,:ncore], bufpp[:,:ncore])
+        t1 = log.timer_debug1('density fitting ppaa and papa', *t1)
+    return j_pc, k_cp.T.copy(), ppaa, papa
 
 def _mem_usage(ncore, ncas, nmo):
     outcore = basic = ncas**2*nmo**2*2 * 8/1e6
@@ -363,7 +436,6 @@ def prange(start, end, step):
 
 if __name__ == '__main__':
     from pyscf import gto
-    from pyscf import scf
     from pyscf import mcscf
     from pyscf.mcscf import addons
 
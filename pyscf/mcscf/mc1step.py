@@ -380,6 +380,7 @@ def kernel(casscf, mo_coeff, tol=1e-7, conv_tol_grad=None,
         max_cycle_micro = casscf.micro_cycle_scheduler(locals())
         max_stepsize = casscf.max_stepsize_scheduler(locals())
         imicro = 0
+        u_ci = None
         rota = casscf.rotate_orb_cc(mo, lambda:fcivec, lambda:casdm1, lambda:casdm2,
                                     eris, r0, conv_tol_grad*.3, max_stepsize, log)
         for u, g_orb, njk, r0 in rota:
@@ -394,8 +395,13 @@ def kernel(casscf, mo_coeff, tol=1e-7, conv_tol_grad=None,
                           imicro, norm_t, norm_gorb)
                 break
 
-            casdm1, casdm2, gci, fcivec = \
-                    casscf.update_casdm(mo, u, fcivec, e_cas, eris, locals())
+            if imicro > 1 and casscf.ci_update_scheduler(locals()):
+                log.debug1('micro %d  skip CI update, |u-u_ci|=%5.3g',
+                           imicro, numpy.linalg.norm(u - u_ci))
+            else:
+                u_ci = u
+                casdm1, casdm2, gci, fcivec = \
+                        casscf.update_casdm(mo, u, fcivec, e_cas, eris, locals())
             norm_ddm = numpy.linalg.norm(casdm1 - casdm1_last)
             norm_ddm_micro = numpy.linalg.norm(casdm1 - casdm1_prev)
             casdm1_prev = casdm1
@@ -432,7 +438,12 @@ def kernel(casscf, mo_coeff, tol=1e-7, conv_tol_grad=None,
         eris = casscf.ao2mo(mo)
         t2m = log.timer('update eri', *t3m)
 
-        e_tot, e_cas, fcivec = casscf.casci(mo, fcivec, eris, log, locals())
+        ci_tol = casscf.ci_conv_tol_scheduler(locals())
+        if ci_tol is None:
+            e_tot, e_cas, fcivec = casscf.casci(mo, fcivec, eris, log, locals())
+        else:
+            with lib.temporary_env(casscf.fcisolver, conv_tol=ci_tol):
+                e_tot, e_cas, fcivec = casscf.casci(mo, fcivec, eris, log, locals())
         casdm1, casdm2 = casscf.fcisolver.make_rdm12(fcivec, ncas, casscf.nelecas)
         norm_ddm = numpy.linalg.norm(casdm1 - casdm1_last)
         casdm1_prev = casdm1_last = casdm1
@@ -599,6 +610,18 @@ class CASSCF(casci.CASCI):
             Default is the checkpoint file of mean field object.
         ci_response_space : int
             subspace size to solve the CI vector response.  Default is 3.
+        adaptive_ci : bool
+            Whether to adjust the CI solver to the progress of the orbital
+            optimization.  The CASCI problem of macro iterations is solved
+            with a tolerance derived from the orbital gradients, and the CI
+            update of micro iterations is skipped for small orbital rotations.
+            It reduces the number of CI sigma vector evaluations.  Default is
+            False.
+        ci_update_min_step : float
+            For adaptive_ci, the CI vector is not updated in micro iterations
+            if the orbitals rotate less than ci_update_min_step (the norm of
+            the change of the rotation matrix) since the last CI update.
+            Default is 0.01.
         callback : function(envs_dict) => None
             callback function takes one dict as the argument which is
             generated by the builtin function :func:`locals`, so that the
@@ -679,6 +702,8 @@ class CASSCF(casci.CASCI):
     internal_rotation = getattr(__config__, 'mcscf_mc1step_CASSCF_internal_rotation', False)
     ci_response_space = getattr(__config__, 'mcscf_mc1step_CASSCF_ci_response_space', 4)
     ci_grad_trust_region = getattr(__config__, 'mcscf_mc1step_CASSCF_ci_grad_trust_region', 3.0)
+    adaptive_ci = getattr(__config__, 'mcscf_mc1step_CASSCF_adaptive_ci', False)
+    ci_update_min_step = getattr(__config__, 'mcscf_mc1step_CASSCF_ci_update_min_step', 1e-2)
     with_dep4 = getattr(__config__, 'mcscf_mc1step_CASSCF_with_dep4', False)
     chk_ci = getattr(__config__, 'mcscf_mc1step_CASSCF_chk_ci', False)
     kf_interval = getattr(__config__, 'mcscf_mc1step_CASSCF_kf_interval', 4)
@@ -717,7 +742,8 @@ class CASSCF(casci.CASCI):
                     'ah_conv_tol', 'ah_max_cycle', 'ah_lindep',
                     'ah_start_tol', 'ah_start_cycle', 'ah_grad_trust_region',
                     'internal_rotation', 'ci_response_space',
-                    'ci_grad_trust_region', 'with_dep4', 'chk_ci',
+                    'ci_grad_trust_region', 'adaptive_ci', 'ci_update_min_step',
+                    'with_dep4', 'chk_ci',
                     'kf_interval', 'kf_trust_region', 'fcisolver_max_cycle',
                     'fcisolver_conv_tol', 'natorb', 'canonicalization',
                     'sorting_mo_energy', 'scale_restoration'))
@@ -751,6 +777,9 @@ class CASSCF(casci.CASCI):
         log.info('kf_interval = %d', self.kf_interval)
         log.info('ci_response_space = %d', self.ci_response_space)
         log.info('ci_grad_trust_region = %d', self.ci_grad_trust_region)
+        log.info('adaptive_ci = %s', self.adaptive_ci)
+        if self.adaptive_ci:
+            log.info('ci_update_min_step = %g', self.ci_update_min_step)
         log.info('with_dep4 %d', self.with_dep4)
         log.info('natorb = %s', self.natorb)
         log.info('canonicalization = %s', self.canonicalization)
@@ -1201,6 +1230,26 @@ To enable the solvent model for CASSCF, the following code needs to be called
         log_norm_ddm = numpy.log(envs['norm_ddm'])
         return max(self.max_cycle_micro, int(self.max_cycle_micro-1-log_norm_ddm))
 
+    def ci_update_scheduler(self, envs):
+        '''Whether to skip the CI update in the micro iteration'''
+        if not self.adaptive_ci:
+            return False
+        norm_du = numpy.linalg.norm(envs['u'] - envs['u_ci'])
+        return norm_du < self.ci_update_min_step
+
+    def ci_conv_tol_scheduler(self, envs):
+        '''Convergence tolerance of the CASCI solver in the macro iteration.
+        The CI problem is solved loosely when the orbitals are far from
+        convergence. The tolerance is tightened to fcisolver.conv_tol when the
+        orbital gradients are close to conv_tol_grad.
+        '''
+        conv_tol = getattr(self.fcisolver, 'conv_tol', None)
+        if (conv_tol is None or not self.adaptive_ci or
+            envs['norm_gorb0'] < envs['conv_tol_grad'] or
+            envs['imacro'] >= self.max_cycle_macro):
+            return conv_tol
+        return max(conv_tol, min(1e-4, envs['norm_gorb0']**2*.1))
+
     def max_stepsize_scheduler(self, envs):
         if not WITH_STEPSIZE_SCHEDULER:
             return self.max_stepsize
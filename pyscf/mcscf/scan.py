@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Parallel CASCI/CASSCF potential energy surface scans
+
+Geometries are distributed over a pool of worker processes.  Each point is
+started from the CI vectors and (for CASSCF, projected to the new geometry)
+the MOs of the nearest point which has already converged.  The results of every point are
+written to one HDF5 file as soon as they are available.
+
+Examples:
+
+>>> import numpy
+>>> from pyscf import gto, scf, mcscf
+>>> mol = gto.M(atom='N 0 0 0; N 0 0 1.1', basis='ccpvdz', verbose=0)
+>>> mc = mcscf.CASCI(scf.RHF(mol), 6, 6)
+>>> mc.fcisolver.nroots = 3
+>>> geoms = ['N 0 0 0; N 0 0 %g' % r for r in numpy.arange(0.9, 2.5, .02)]
+>>> e_tot = mcscf.scan.kernel(mc, geoms, nproc=4, output='n2_pes.h5')
+'''
+
+import time
+import numpy
+from pyscf import lib
+from pyscf.lib import logger
+from pyscf import gto
+from pyscf.mcscf import addons
+from pyscf.mcscf import mc1step
+from pyscf import __config__
+
+NPROC = getattr(__config__, 'mcscf_scan_nproc', None)
+
+# The scanner of the worker process.  It is created by _init_worker when the
+# process pool is forked.
+_worker_mc = None
+
+
+def kernel(mc, geoms, nproc=NPROC, output=None, save_wfn=True, verbose=None):
+    '''Scan the CASCI/CASSCF energies over a set of geometries.
+
+    Unless mc already holds a solution, the first point is started from the
+    SCF orbitals.  Any other point is started from the CI vectors of its
+    nearest converged point.  For CASSCF, the MOs of that point are projected
+    to the new geometry as the initial guess orbitals.  CASCI always uses the
+    SCF orbitals of the current geometry, as the scanner does.  The distance
+    between two points is the Frobenius norm of the difference of their
+    coordinates (in Bohr).
+
+    Args:
+        mc : an :class:`CASCI` or :class:`CASSCF` object
+            All settings of mc (active space, fcisolver, nroots, state
+            average, density fitting ...) are applied to every point.
+        geoms : a list of geometries
+            Each geometry can be a :class:`Mole` object or anything accepted
+            by :func:`Mole.set_geom_`.
+
+    Kwargs:
+        nproc : int
+            Number of worker processes.  Each worker runs with one OpenMP
+            thread.  The scan runs in the current process (with all OpenMP
+            threads) if nproc is 1.  Default is the number of OpenMP threads.
+        output : str
+            HDF5 file to store the results.  For each geometry i, the group
+            "scan/i" holds e_tot, converged, the index of the reference point
+            the initial guess was taken from (-1 for SCF orbitals), and
+            mo_coeff and ci if save_wfn is set.
+        save_wfn : bool
+            Whether to write mo_coeff and ci to the output.
+
+    Returns:
+        e_tot : ndarray, shape (ngeoms,) or (ngeoms, nroots)
+            Energies of the scan.  NaN is assigned to the points which failed.
+    '''
+    log = logger.new_logger(mc, verbose)
+    cput0 = (time.clock(), time.time())
+
+    mols = [geom if isinstance(geom, gto.Mole)
+            else mc.mol.set_geom_(geom, inplace=False) for geom in geoms]
+    coords = numpy.asarray([mol.atom_coords() for mol in mols])
+    ngeoms = len(mols)
+    if ngeoms == 0:
+        return numpy.zeros(0)
+
+    if nproc is None:
+        nproc = lib.num_threads()
+    nproc = max(1, min(nproc, ngeoms))
+    log.info('CASCI scan over %d geometries with %d processes', ngeoms, nproc)
+
+    if output is not None:
+        lib.chkfile.dump(output, 'scan/coords', coords)
+
+    # Converged points which can be used as the initial guess
+    ref_coords = []
+    ref_wfn = []
+    ref_ids = []
+    if mc.mo_coeff is not None and mc.ci is not None:
+        ref_coords.append(mc.mol.atom_coords())
+        ref_wfn.append((mc.mo_coeff, mc.ci))
+        ref_ids.append(-1)
+
+    def next_task(pending):
+        '''The pending point closest to the converged points, and its nearest
+        converged point'''
+        if not ref_coords:
+            return pending[0], None
+        dist = numpy.linalg.norm(coords[pending][:,None] -
+                                 numpy.asarray(ref_coords)[None], axis=(2,3))
+        i, k = numpy.unravel_index(numpy.argmin(dist), dist.shape)
+        return pending[i], k
+
+    e_tot = [None] * ngeoms
+    def collect(i, ref, result):
+        e, conv, mo, ci = result
+        e_tot[i] = e
+        log.info('Geometry %d  guess from %s  E = %s  converged = %s',
+                 i, ref, e, conv)
+        if conv:
+            ref_coords.append(coords[i])
+            ref_wfn.append((mo, ci))
+            ref_ids.append(i)
+        if output is not None:
+            dat = {'e_tot': e, 'converged': conv, 'ref': ref}
+            if save_wfn:
+                dat['mo_coeff'] = mo
+                dat['ci'] = ci
+            lib.chkfile.dump(output, 'scan/%d' % i, dat)
+
+    def failed(i, ref, err):
+        log.warn('Geometry %d failed: %s', i, err)
+        if output is not None:
+            lib.chkfile.dump(output, 'scan/%d' % i,
+                             {'converged': False, 'ref': ref})
+
+    pending = list(range(ngeoms))
+    if nproc == 1:
+        scanner = _init_worker(mc)
+        while pending:
+            i, k = next_task(pending)
+            pending.remove(i)
+            if k is None:
+                ref, wfn = -1, (None, None)
+            else:
+                ref, wfn = ref_ids[k], ref_wfn[k]
+            try:
+                collect(i, ref, _run_point(coords[i], *wfn, mc=scanner))
+            except Exception as err:
+                failed(i, ref, err)
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        # The workers inherit the mc object through fork, so that it does not
+        # need to be pickled.  OpenMP thread pools do not survive fork.  Each
+        # worker has to run with one thread.
+        ctx = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=nproc, mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=(mc, 1)) as executor:
+            running = {}
+            while pending or running:
+                # Keep at most nproc points in flight so that the initial
+                # guess of a point is taken from the latest converged points.
+                while pending and len(running) < nproc:
+                    i, k = next_task(pending)
+                    pending.remove(i)
+                    if k is None:
+                        ref, wfn = -1, (None, None)
+                    else:
+                        ref, wfn = ref_ids[k], ref_wfn[k]
+                    fut = executor.submit(_run_point, coords[i], *wfn)
+                    running[fut] = (i, ref)
+                    if k is None:
+                        # Without any converged point, wait for the first
+                        # point to warm start the rest of the scan.
+                        break
+                done = wait(running, return_when=FIRST_COMPLETED)[0]
+                for fut in done:
+                    i, ref = running.pop(fut)
+                    err = fut.exception()
+                    if err is None:
+                        collect(i, ref, fut.result())
+                    else:
+                        failed(i, ref, err)
+
+    shapes = [numpy.shape(e) for e in e_tot if e is not None]
+    shape = (ngeoms,) + (shapes[0] if shapes else ())
+    e_out = numpy.full(shape, numpy.nan)
+    for i, e in enumerate(e_tot):
+        if e is not None:
+            e_out[i] = e
+    if output is not None:
+        lib.chkfile.dump(output, 'scan/e_tot', e_out)
+    log.timer('CASCI scan', *cput0)
+    return e_out
+
+def _init_worker(mc, nthreads=None):
+    global _worker_mc
+    _worker_mc = mc.as_scanner()
+    if nthreads is not None:
+        lib.num_threads(nthreads)
+        # The forked workers would otherwise write to the same chkfiles
+        _worker_mc._scf.chkfile = None
+        if getattr(_worker_mc, 'chkfile', None):
+            _worker_mc.chkfile = None
+    return _worker_mc
+
+def _run_point(coords, mo0=None, ci0=None, mc=None):
+    '''Solve CASCI/CASSCF for one geometry (in Bohr).  mo0 and ci0 are the
+    solution of a nearby geometry.'''
+    if mc is None:
+        mc = _worker_mc
+    mol = mc.mol.set_geom_(coords, unit='Bohr', inplace=False)
+
+    for key in ('with_df', 'with_x2c', 'with_solvent', 'with_dftd3'):
+        sub_mod = getattr(mc, key, None)
+        if sub_mod:
+            sub_mod.reset(mol)
+
+    mf_scanner = mc._scf
+    mf_scanner(mol)
+    mc.mol = mol
+    if mo0 is None or not isinstance(mc, mc1step.CASSCF):
+        # CASCI results depend on the orbitals.  Without orbital optimization,
+        # the SCF orbitals of the current geometry are used as in the scanner.
+        mo = mf_scanner.mo_coeff
+    else:
+        mo = addons.project_init_guess(mc, mo0)
+    mc.kernel(mo, ci0)
+    return mc.e_tot, bool(mc.converged), mc.mo_coeff, mc.ci
@@ -186,6 +186,61 @@ class KnownValues(unittest.TestCase):
         mc1.kernel(mo)
         self.assertAlmostEqual(mc1.e_tot, -105.82923271851176, 8)
 
+    def test_adaptive_ci(self):
+        mc1 = mcscf.CASSCF(m, 4, 4)
+        mc1.chkfile = None
+        mc1.adaptive_ci = True
+        mc1.kernel()
+        self.assertTrue(mc1.converged)
+        self.assertAlmostEqual(mc1.e_tot, mc0.e_tot, 8)
+
+        # Count the CI updates of the micro iterations
+        def count_updates(mc):
+            skipped = []
+            nupdate = [0]
+            ci_update_scheduler = mc.ci_update_scheduler
+            update_casdm = mc.update_casdm
+            def scheduler(envs):
+                skip = ci_update_scheduler(envs)
+                skipped.append(skip)
+                return skip
+            def update(*args):
+                nupdate[0] += 1
+                return update_casdm(*args)
+            mc.ci_update_scheduler = scheduler
+            mc.update_casdm = update
+            mc.kernel()
+            return sum(skipped), nupdate[0]
+
+        mc1 = mcscf.CASSCF(m, 4, 4)
+        mc1.chkfile = None
+        nskip0, nupdate0 = count_updates(mc1)
+        self.assertEqual(nskip0, 0)
+
+        mc1 = mcscf.CASSCF(m, 4, 4)
+        mc1.chkfile = None
+        mc1.adaptive_ci = True
+        mc1.ci_update_min_step = .1
+        nskip, nupdate = count_updates(mc1)
+        self.assertTrue(mc1.converged)
+        self.assertAlmostEqual(mc1.e_tot, mc0.e_tot, 8)
+        self.assertTrue(nskip > 0)
+        self.assertEqual(nupdate, nupdate0 - nskip)
+
+        mc1 = mcscf.CASSCF(m, 4, 4)
+        mc1.chkfile = None
+        mc1.adaptive_ci = True
+        mc1.max_cycle = 1
+        ci_tol = []
+        casci = mc1.casci
+        def check_tol(*args, **kwargs):
+            ci_tol.append(mc1.fcisolver.conv_tol)
+            return casci(*args, **kwargs)
+        mc1.casci = check_tol
+        mc1.kernel()
+        # The last CASCI of an unconverged calculation uses the full tolerance
+        self.assertAlmostEqual(ci_tol[-1], mc1.fcisolver.conv_tol, 12)
+
     # FIXME: How to test ci_response_space? The test below seems numerical instable
     #def test_ci_response_space(self):
     #    mc1 = mcscf.CASSCF(m, 4, 4)
@@ -173,6 +173,32 @@ class KnownValues(unittest.TestCase):
         self.assertTrue(numpy.allclose(eri0[:,:,ncore:nocc,ncore:nocc], eris.ppaa))
         self.assertTrue(numpy.allclose(eri0[:,ncore:nocc,:,ncore:nocc], eris.papa))
 
+    def test_df_ao2mo_incore(self):
+        mf = scf.density_fit(msym, auxbasis='weigend')
+        mf.max_memory = 100
+        mf.kernel()
+        mc = mcscf.DFCASSCF(mf, 4, 4)
+        mc.max_memory = 1
+        eris0 = mc.ao2mo(mc.mo_coeff)
+        mc.max_memory = 4000
+        eris1 = mc.ao2mo(mc.mo_coeff)
+        self.assertTrue(isinstance(eris1.ppaa, numpy.ndarray))
+        self.assertTrue(numpy.allclose(eris0.ppaa, eris1.ppaa))
+        self.assertTrue(numpy.allclose(eris0.papa, eris1.papa))
+        self.assertTrue(numpy.allclose(eris0.j_pc, eris1.j_pc))
+        self.assertTrue(numpy.allclose(eris0.k_pc, eris1.k_pc))
+
+    def test_direct_core_fock(self):
+        mc = mcscf.DFCASSCF(m, 4, 4, auxbasis='weigend')
+        mc.direct_core_fock = True
+        mo = mc.mo_coeff
+        ncore = mc.ncore
+        dm_core = numpy.dot(mo[:,:ncore], mo[:,:ncore].T) * 2
+        vj, vk = scf.hf.get_jk(mol, dm_core)
+        self.assertAlmostEqual(abs(mc.get_veff(mol, dm_core) - (vj-vk*.5)).max(), 0, 9)
+        emc = mc.mc1step()[0]
+        self.assertAlmostEqual(emc, -108.91355911191, 7)
+
     def test_assign_cderi(self):
         nao = molsym.nao_nr()
         w, u = scipy.linalg.eigh(mol.intor('int2e_sph', aosym='s4'))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import unittest
+import numpy
+from pyscf import lib
+from pyscf import gto
+from pyscf import scf
+from pyscf import mcscf
+
+mol = gto.M(
+    verbose = 5,
+    output = '/dev/null',
+    atom = 'N 0 0 0; N 0 0 1.1',
+    basis = '631g')
+mf = scf.RHF(mol)
+mf.conv_tol = 1e-10
+geoms = ['N 0 0 0; N 0 0 %g' % r for r in numpy.arange(0.9, 1.5, .1)]
+
+def tearDownModule():
+    global mol, mf
+    mol.stdout.close()
+    del mol, mf
+
+
+class KnownValues(unittest.TestCase):
+    def test_casci_scan(self):
+        mc = mcscf.CASCI(mf, 6, 6)
+        mc.fcisolver.nroots = 2
+        mc.fcisolver.conv_tol = 1e-10
+        scanner = mc.as_scanner()
+        eref = numpy.array([scanner(geom) for geom in geoms])
+
+        ftmp = tempfile.NamedTemporaryFile()
+        e_tot = mcscf.scan.kernel(mc, geoms, nproc=1, output=ftmp.name)
+        self.assertEqual(e_tot.shape, (len(geoms), 2))
+        self.assertAlmostEqual(abs(e_tot - eref).max(), 0, 7)
+        self.assertAlmostEqual(lib.finger(e_tot), 45.14291722328805, 7)
+
+        dat = lib.chkfile.load(ftmp.name, 'scan')
+        self.assertAlmostEqual(abs(dat['e_tot'] - e_tot).max(), 0, 12)
+        self.assertEqual(dat['0']['ref'], -1)
+        self.assertEqual(dat['3']['ref'], 2)
+        self.assertTrue(dat['3']['converged'])
+        self.assertEqual(len(dat['3']['ci']), 2)
+
+        e_tot = mc.scan(geoms, nproc=3, output=ftmp.name)
+        self.assertAlmostEqual(abs(e_tot - eref).max(), 0, 7)
+        dat = lib.chkfile.load(ftmp.name, 'scan')
+        self.assertTrue(all(dat[str(i)]['converged'] for i in range(len(geoms))))
+
+    def test_casscf_scan(self):
+        mc = mcscf.CASSCF(mf, 6, 6)
+        mc.conv_tol = 1e-10
+        scanner = mc.as_scanner()
+        eref = numpy.array([scanner(geom) for geom in geoms])
+
+        e_tot = mc.scan(geoms, nproc=2)
+        self.assertAlmostEqual(abs(e_tot - eref).max(), 0, 7)
+
+
+if __name__ == "__main__":
+    print("Full Tests for CASCI/CASSCF scan")
+    unittest.main()
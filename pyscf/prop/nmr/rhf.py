@@ -24,6 +24,7 @@ Non-relativistic NMR shielding tensor
 import time
 from functools import reduce
 import numpy
+import scipy.linalg
 from pyscf import lib
 from pyscf.lib import logger
 from pyscf.scf import _vhf
@@ -41,6 +42,7 @@ def dia(nmrobj, gauge_orig=None, shielding_nuc=None, dm0=None):
     if dm0 is None: dm0 = nmrobj._scf.make_rdm1()
 
     mol = nmrobj.mol
+    shielding_nuc = _atom_ids(mol, shielding_nuc)
     mf = nmrobj._scf
 
     if getattr(mf, 'with_x2c', None):
@@ -82,6 +84,7 @@ def para(nmrobj, mo10=None, mo_coeff=None, mo_occ=None, shielding_nuc=None):
     if mo10 is None: mo10 = nmrobj.solve_mo1()[0]
 
     mol = nmrobj.mol
+    shielding_nuc = _atom_ids(mol, shielding_nuc)
     para_vir = numpy.empty((len(shielding_nuc),3,3))
     para_occ = numpy.empty((len(shielding_nuc),3,3))
     occidx = mo_occ > 0
@@ -102,10 +105,30 @@ def para(nmrobj, mo10=None, mo_coeff=None, mo_occ=None, shielding_nuc=None):
     msc_para = para_occ + para_vir
     return msc_para, para_vir, para_occ
 
-def make_h10(mol, dm0, gauge_orig=None, verbose=logger.WARN):
+def _atom_ids(mol, shielding_nuc):
+    '''Atom indices of shielding_nuc.  The elements of shielding_nuc can be
+    atom indices or element symbols (e.g. [0, 'C'] for the first atom and all
+    carbon atoms).
+    '''
+    if all(isinstance(x, (int, numpy.integer)) for x in shielding_nuc):
+        return shielding_nuc
+    symbs = [mol.atom_pure_symbol(i).upper() for i in range(mol.natm)]
+    atm_ids = []
+    for x in shielding_nuc:
+        if isinstance(x, str):
+            atm_ids.extend(i for i, s in enumerate(symbs) if s == x.upper())
+        else:
+            atm_ids.append(x)
+    return sorted(set(atm_ids))
+
+def make_h10(mol, dm0, gauge_orig=None, verbose=logger.WARN, with_df=None):
     '''Imaginary part of first order Fock operator
 
     Note the side effects of set_common_origin
+
+    Kwargs:
+        with_df : DF or SGX object
+            See the function :func:`get_jk`
     '''
     log = logger.new_logger(mol, verbose)
     if gauge_orig is None:
@@ -113,17 +136,48 @@ def make_h10(mol, dm0, gauge_orig=None, verbose=logger.WARN):
         # A10_j dot p + p dot A10_j consistents with <g p^2>
         # 1/2(A10_j dot p + p dot A10_j) => Im[1/4 (rjxp - pxrj)] = -1/2 <irjxp>
         log.debug('First-order GIAO Fock matrix')
-        h1 = -.5 * mol.intor('int1e_giao_irjxp', 3) + make_h10giao(mol, dm0)
+        h1 = -.5 * mol.intor('int1e_giao_irjxp', 3)
+        h1 += make_h10giao(mol, dm0, with_df)
     else:
         with mol.with_common_origin(gauge_orig):
             h1 = -.5 * mol.intor('int1e_cg_irxp', 3)
     return h1
 
-def get_jk(mol, dm0):
+def get_jk(mol, dm0, with_k=True, with_df=None):
+    '''Imaginary part of the GIAO Coulomb and exchange matrices
+
+    Kwargs:
+        with_k : bool
+            Whether to compute the exchange matrix.  vk is None if with_k is
+            False.
+        with_df : DF or SGX object
+            If given, the Coulomb matrix is computed with the RI (density
+            fitting) approximation.  The exchange matrix is computed on the
+            grids of the SGX object (the seminumerical COSX scheme) if
+            with_df is an SGX object, or with the exact 4-center integrals
+            for a DF object.
+    '''
+    if with_df is not None:
+        vj = get_j_df(mol, dm0, _make_auxmol(mol, with_df),
+                      with_df.max_memory)
+        vk = None
+        if with_k:
+            from pyscf.sgx import sgx
+            if isinstance(with_df, sgx.SGX):
+                vk = get_k_sgx(with_df, dm0)
+            else:
+                vk = get_jk(mol, dm0)[1]
+        return vj, vk
+
 # J = Im[(i i|\mu g\nu) + (i gi|\mu \nu)] = -i (i i|\mu g\nu)
 # K = Im[(\mu gi|i \nu) + (\mu i|i g\nu)]
 #   = [-i (\mu g i|i \nu)] - h.c.   (-h.c. for anti-symm because of the factor -i)
     intor = mol._add_suffix('int2e_ig1')
+    if not with_k:
+        vj = _vhf.direct_mapdm(intor, 'a4ij', 'lk->s1ij', dm0, 3,
+                               mol._atm, mol._bas, mol._env)
+        return -vj, None
+
     vj, vk = _vhf.direct_mapdm(intor,  # (g i,j|k,l)
                                'a4ij', ('lk->s1ij', 'jk->s1il'),
                                dm0, 3, # xyz, 3 components
@@ -131,8 +185,117 @@ def get_jk(mol, dm0):
     vk = vk - numpy.swapaxes(vk, -1, -2)
     return -vj, -vk
 
-def make_h10giao(mol, dm0):
-    vj, vk = get_jk(mol, dm0)
+def get_j_df(mol, dm0, auxmol, max_memory=2000):
+    '''RI approximation for the GIAO Coulomb matrix of :func:`get_jk`
+
+        J = -(g i,j|P) (P|Q)^{-1} (Q|k,l) D_{lk}
+    '''
+    from pyscf.ao2mo.outcore import balance_partition
+    from pyscf.df.grad.rhf import _int3c_wrapper
+    get_int3c = _int3c_wrapper(mol, auxmol, 'int3c2e', 's2ij')
+    get_int3c_ig1 = _int3c_wrapper(mol, auxmol, 'int3c2e_ig1', 's1')
+
+    nao = mol.nao
+    nbas = mol.nbas
+    naux = auxmol.nao
+    dms = numpy.asarray(dm0)
+    out_shape = dms.shape[:-2] + (3,) + dms.shape[-2:]
+    dms = dms.reshape(-1,nao,nao)
+    nset = dms.shape[0]
+
+    aux_loc = auxmol.ao_loc
+    max_memory = max_memory - lib.current_memory()[0]
+    blksize = int(min(max(max_memory * .5e6/8 / (nao**2*3), 20), naux, 240))
+    ao_ranges = balance_partition(aux_loc, blksize)
+
+    idx = numpy.arange(nao)
+    dm_tril = dms + dms.transpose(0,2,1)
+    dm_tril[:,idx,idx] *= .5
+    dm_tril = lib.pack_tril(dm_tril)
+
+    # (i,j|P)
+    rhoj = numpy.empty((nset,naux))
+    for shl0, shl1, nL in ao_ranges:
+        int3c = get_int3c((0, nbas, 0, nbas, shl0, shl1))
+        p0, p1 = aux_loc[shl0], aux_loc[shl1]
+        rhoj[:,p0:p1] = numpy.einsum('wp,nw->np', int3c, dm_tril)
+        int3c = None
+
+    # (P|Q)
+    int2c = auxmol.intor('int2c2e', aosym='s1')
+    rhoj = scipy.linalg.solve(int2c, rhoj.T, assume_a='pos').T
+    int2c = None
+
+    # (g i,j|P)
+    vj = numpy.zeros((nset,3,nao,nao))
+    for shl0, shl1, nL in ao_ranges:
+        int3c = get_int3c_ig1((0, nbas, 0, nbas, shl0, shl1))
+        p0, p1 = aux_loc[shl0], aux_loc[shl1]
+        vj -= numpy.einsum('xijp,np->nxij', int3c, rhoj[:,p0:p1])
+        int3c = None
+    return vj.reshape(out_shape)
+
+def get_k_sgx(sgxobj, dm0, direct_scf_tol=1e-13):
+    r'''Seminumerical (COSX) approximation for the GIAO exchange matrix of
+    :func:`get_jk`.  The GIAO phase factors of the bra orbital pair are
+    evaluated on the grids of the SGX object
+
+        K_{il} = \sum_g [\chi_i(g) g\chi_j(g) - g\chi_i(g) \chi_j(g)] D_{jk} (k,l|g)
+
+    where g\chi is the GIAO derivative of the AO value (GTOval_ig).
+    '''
+    from pyscf.sgx import sgx_jk
+    mol = sgxobj.mol
+    grids = sgxobj.grids
+    if grids is None:
+        grids = sgx_jk.get_gridss(mol, sgxobj.grids_level_f, sgxobj.grids_thrd)
+
+    dms = numpy.asarray(dm0)
+    out_shape = dms.shape[:-2] + (3,) + dms.shape[-2:]
+    nao = dms.shape[-1]
+    dms = dms.reshape(-1,nao,nao)
+    nset = dms.shape[0]
+
+    if sgxobj.debug:
+        batch_nuc = sgx_jk._gen_batch_nuc(mol)
+    else:
+        batch_jk = sgx_jk._gen_jk_direct(mol, 's2', False, True,
+                                         direct_scf_tol, sgxobj._opt)
+
+    vk = numpy.zeros((nset,3,nao,nao))
+    ngrids = grids.coords.shape[0]
+    max_memory = sgxobj.max_memory - lib.current_memory()[0]
+    blksize = min(ngrids, max(4, int(min(sgxobj.blockdim,
+                                         max_memory*1e6/8/nao**2/4))))
+    for i0, i1 in lib.prange(0, ngrids, blksize):
+        coords = grids.coords[i0:i1]
+        weights = grids.weights[i0:i1,None]
+        ao = mol.eval_gto('GTOval', coords)
+        giao = mol.eval_gto('GTOval_ig', coords, comp=3)
+        if sgxobj.debug:
+            gbn = batch_nuc(mol, coords)
+        for i in range(nset):
+            fg = numpy.vstack((lib.dot(ao*weights, dms[i])[None],
+                               lib.einsum('xgi,ij->xgj', giao*weights, dms[i])))
+            if sgxobj.debug:
+                gv = lib.einsum('gvt,xgt->xgv', gbn, fg)
+            else:
+                gv = batch_jk(mol, coords, None, fg)[1]
+            vk[i] += lib.einsum('gi,xgl->xil', ao, gv[1:])
+            vk[i] -= lib.einsum('xgi,gl->xil', giao, gv[0])
+        ao = giao = gbn = fg = gv = None
+    vk = vk - vk.transpose(0,1,3,2)
+    return -vk.reshape(out_shape)
+
+def _make_auxmol(mol, with_df):
+    from pyscf.df import addons
+    auxmol = getattr(with_df, 'auxmol', None)
+    if auxmol is None:
+        auxmol = addons.make_auxmol(mol, with_df.auxbasis)
+    return auxmol
+
+def make_h10giao(mol, dm0, with_df=None):
+    vj, vk = get_jk(mol, dm0, with_df=with_df)
     h1 = vj - .5 * vk
 # Im[<g\mu|H|g\nu>] = -i * (gnuc + gkin)
     h1 -= mol.intor_asymmetric('int1e_ignuc', 3)
@@ -208,7 +371,7 @@ def solve_mo1(nmrobj, mo_energy=None, mo_coeff=None, mo_occ=None,
             vind = gen_vind(nmrobj._scf, mo_coeff, mo_occ)
         mo10, mo_e10 = cphf.solve(vind, mo_energy, mo_occ, h1, s1,
                                   nmrobj.max_cycle_cphf, nmrobj.conv_tol,
-                                  verbose=log)
+                                  verbose=log, block=not callable(with_cphf))
     else:
         mo10, mo_e10 = _solve_mo1_uncoupled(mo_energy, mo_occ, h1, s1)
 
@@ -224,7 +387,9 @@ def get_fock(nmrobj, dm0=None, gauge_orig=None):
     if gauge_orig is None: gauge_orig = nmrobj.gauge_orig
 
     log = logger.Logger(nmrobj.stdout, nmrobj.verbose)
-    h1 = make_h10(nmrobj.mol, dm0, gauge_orig, log)
+    # Magnetizability, ESR and GTensor reuse this function without with_df
+    with_df = getattr(nmrobj, 'with_df', None)
+    h1 = make_h10(nmrobj.mol, dm0, gauge_orig, log, with_df)
     if nmrobj.chkfile:
         lib.chkfile.dump(nmrobj.chkfile, 'nmr/h1', h1)
     return h1
@@ -238,7 +403,7 @@ def gen_vind(mf, mo_coeff, mo_occ):
     nao, nmo = mo_coeff.shape
     def vind(mo1):
         dm1 = [reduce(numpy.dot, (mo_coeff, x*2, orbo.T.conj()))
-               for x in mo1.reshape(3,nmo,nocc)]
+               for x in mo1.reshape(-1,nmo,nocc)]
         dm1 = numpy.asarray([d1-d1.conj().T for d1 in dm1])
         v1mo = lib.einsum('xpq,pi,qj->xij', vresp(dm1), mo_coeff.conj(), orbo)
         return v1mo.ravel()
@@ -253,12 +418,17 @@ class NMR(lib.StreamObject):
         self.chkfile = scf_method.chkfile
         self._scf = scf_method
 
+# Atom indices or element symbols. The dia- and para-magnetic terms are only
+# evaluated for these nuclei.
         self.shielding_nuc = range(self.mol.natm)
 # gauge_orig=None will call GIAO. A coordinate array leads to common gauge
         self.gauge_orig = None
         self.cphf = True
         self.max_cycle_cphf = 20
         self.conv_tol = 1e-9
+# A DF object leads to RI-J for the GIAO Fock matrix. An SGX object leads to
+# RI-J and the seminumerical exchange (RIJCOSX)
+        self.with_df = getattr(scf_method, 'with_df', None)
 
         self.mo10 = None
         self.mo_e10 = None
@@ -271,6 +441,8 @@ class NMR(lib.StreamObject):
                  self.__class__, self._scf.__class__)
         if self.gauge_orig is None:
             log.info('gauge = GIAO')
+            if self.with_df is not None:
+                log.info('GIAO Fock matrix with %s', self.with_df.__class__)
         else:
             log.info('Common gauge = %s', str(self.gauge_orig))
         log.info('shielding for atoms %s', str(self.shielding_nuc))
@@ -306,7 +478,7 @@ class NMR(lib.StreamObject):
 
         logger.timer(self, 'NMR shielding', *cput0)
         if self.verbose >= logger.NOTE:
-            for i, atm_id in enumerate(self.shielding_nuc):
+            for i, atm_id in enumerate(_atom_ids(self.mol, self.shielding_nuc)):
                 _write(self.stdout, e11[i],
                        '\ntotal shielding of atom %d %s' \
                        % (atm_id, self.mol.atom_symbol(atm_id)))
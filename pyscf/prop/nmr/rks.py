@@ -20,7 +20,6 @@
 import numpy
 from pyscf import lib
 from pyscf.lib import logger
-from pyscf.scf import _vhf
 from pyscf.dft import numint
 from pyscf.prop.nmr import rhf as rhf_nmr
 
@@ -116,6 +115,7 @@ def get_fock(nmrobj, dm0=None, gauge_orig=None):
         mf = nmrobj._scf
         ni = mf._numint
         omega, alpha, hyb = ni.rsh_and_hybrid_coeff(mf.xc, mol.spin)
+        with_df = getattr(nmrobj, 'with_df', None)
 
         mem_now = lib.current_memory()[0]
         max_memory = max(2000, mf.max_memory*.9-mem_now)
@@ -124,17 +124,16 @@ def get_fock(nmrobj, dm0=None, gauge_orig=None):
         h1 -= get_vxc_giao(ni, mol, mf.grids, mf.xc, dm0,
                            max_memory=max_memory, verbose=nmrobj.verbose)
 
-        intor = mol._add_suffix('int2e_ig1')
         if abs(hyb) > 1e-10:
-            vj, vk = rhf_nmr.get_jk(mol, dm0)
+            vj, vk = rhf_nmr.get_jk(mol, dm0, with_df=with_df)
             h1 += vj - .5 * hyb * vk
             if abs(omega) > 1e-10:
+                # Long-range exchange is computed with exact integrals
                 with mol.with_range_coulomb(omega):
                     h1 -= .5*(alpha-hyb) * rhf_nmr.get_jk(mol, dm0)[1]
         else:
-            vj = _vhf.direct_mapdm(intor, 'a4ij', 'lk->s1ij',
-                                   dm0, 3, mol._atm, mol._bas, mol._env)
-            h1 -= vj
+            vj = rhf_nmr.get_jk(mol, dm0, with_k=False, with_df=with_df)[0]
+            h1 += vj
     else:
         with mol.with_common_origin(gauge_orig):
             h1 = -.5 * mol.intor('int1e_cg_irxp', 3)
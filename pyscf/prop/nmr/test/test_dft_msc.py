@@ -48,6 +48,17 @@ class KnowValues(unittest.TestCase):
         msc = m.kernel()
         self.assertAlmostEqual(finger(msc), 13.743109885011432, 5)
 
+    def test_nr_b3lyp_giao_df(self):
+        mf = dft.RKS(mol).density_fit()
+        mf.conv_tol_grad = 1e-6
+        mf.xc = 'b3lypg'
+        mf.scf()
+        m = nmr.RKS(mf)
+        self.assertTrue(m.with_df is mf.with_df)
+        msc = m.kernel()
+        ref = m.set(with_df=None).kernel()
+        self.assertAlmostEqual(abs(msc - ref).max(), 0, 1)
+
     def test_nr_b3lyp_common_gauge(self):
         mf = dft.RKS(mol)
         mf.conv_tol_grad = 1e-6
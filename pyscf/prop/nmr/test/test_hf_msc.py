@@ -59,7 +59,7 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = (1,1,1)
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1562.3859473764551, 5)
+        self.assertAlmostEqual(finger(msc), 1562.3859050889937, 5)
 
     def test_nr_giao_ucpscf(self):
         m = nmr.RHF(nrhf)
@@ -73,7 +73,55 @@ class KnowValues(unittest.TestCase):
         m.cphf = True
         m.gauge_orig = None
         msc = m.shielding()
-        self.assertAlmostEqual(finger(msc), 1358.9826064972372, 5)
+        self.assertAlmostEqual(finger(msc), 1358.9826216762704, 5)
+
+    def test_nr_giao_rijcosx(self):
+        from pyscf.sgx import sgx
+        m = nmr.RHF(nrhf)
+        ref = m.shielding()
+
+        m = nmr.RHF(nrhf)
+        m.with_df = sgx.SGX(mol, 'cc-pvdz-jkfit')
+        m.with_df.debug = True
+        m.with_df.grids_level_f = 2
+        m.shielding_nuc = ['F']
+        msc = m.shielding()
+        self.assertEqual(msc.shape, (1,3,3))
+        self.assertAlmostEqual(abs(msc[0] - ref[1]).max(), 0, 1)
+
+        vj, vk = nmr.rhf.get_jk(mol, nrhf.make_rdm1())
+        vj1, vk1 = nmr.rhf.get_jk(mol, nrhf.make_rdm1(), with_df=m.with_df)
+        self.assertAlmostEqual(abs(vj1 - vj).max(), 0, 3)
+        self.assertAlmostEqual(abs(vk1 - vk).max(), 0, 5)
+
+    def test_nr_get_fock_without_df(self):
+        # Magnetizability reuses nmr get_fock but does not have with_df
+        from pyscf.prop import magnetizability
+        ref = nmr.RHF(nrhf).get_fock()
+        h1 = magnetizability.RHF(nrhf).get_fock()
+        self.assertAlmostEqual(abs(h1 - ref).max(), 0, 12)
+
+        uhf = scf.UHF(mol).run(conv_tol=1e-10)
+        ref = nmr.UHF(uhf).get_fock()
+        h1 = magnetizability.UHF(uhf).get_fock()
+        self.assertAlmostEqual(abs(h1 - ref).max(), 0, 12)
+
+    def test_nr_block_cphf(self):
+        m = nmr.RHF(nrhf)
+        mo1, mo_e1 = m.solve_mo1()
+        vind = nmr.rhf.gen_vind(nrhf, nrhf.mo_coeff, nrhf.mo_occ)
+        ref = m.solve_mo1(with_cphf=vind)
+        self.assertAlmostEqual(abs(mo1 - ref[0]).max(), 0, 7)
+        self.assertAlmostEqual(abs(mo_e1 - ref[1]).max(), 0, 7)
+
+        mf = scf.UHF(mol).run(conv_tol=1e-12)
+        m = nmr.UHF(mf)
+        mo1, mo_e1 = m.solve_mo1()
+        vind = nmr.uhf.gen_vind(mf, mf.mo_coeff, mf.mo_occ)
+        ref = m.solve_mo1(with_cphf=vind)
+        self.assertAlmostEqual(abs(mo1[0] - ref[0][0]).max(), 0, 7)
+        self.assertAlmostEqual(abs(mo1[1] - ref[0][1]).max(), 0, 7)
+        self.assertAlmostEqual(abs(mo_e1[1] - ref[1][1]).max(), 0, 7)
 
     def test_rmb_common_gauge_ucpscf(self):
         m = nmr.DHF(rhf)
@@ -43,6 +43,7 @@ def para(nmrobj, mo10=None, mo_coeff=None, mo_occ=None,
     if shielding_nuc is None: shielding_nuc = nmrobj.shielding_nuc
 
     mol = nmrobj.mol
+    shielding_nuc = rhf_nmr._atom_ids(mol, shielding_nuc)
     para_vir = numpy.empty((len(shielding_nuc),3,3))
     para_occ = numpy.empty((len(shielding_nuc),3,3))
     occidxa = mo_occ[0] > 0
@@ -69,22 +70,23 @@ def para(nmrobj, mo10=None, mo_coeff=None, mo_occ=None,
     msc_para = para_occ + para_vir
     return msc_para, para_vir, para_occ
 
-def make_h10(mol, dm0, gauge_orig=None, verbose=logger.WARN):
+def make_h10(mol, dm0, gauge_orig=None, verbose=logger.WARN, with_df=None):
     log = logger.new_logger(mol, verbose=verbose)
     if gauge_orig is None:
         # A10_i dot p + p dot A10_i consistents with <p^2 g>
         # A10_j dot p + p dot A10_j consistents with <g p^2>
         # A10_j dot p + p dot A10_j => i/2 (rjxp - pxrj) = irjxp
         log.debug('First-order GIAO Fock matrix')
-        h1 = -.5 * mol.intor('int1e_giao_irjxp', 3) + make_h10giao(mol, dm0)
+        h1 = -.5 * mol.intor('int1e_giao_irjxp', 3)
+        h1 = h1 + make_h10giao(mol, dm0, with_df)
     else:
         with mol.with_common_origin(gauge_orig):
             h1 = -.5 * mol.intor('int1e_cg_irxp', 3)
             h1 = (h1, h1)
     return h1
 
-def make_h10giao(mol, dm0):
-    vj, vk = rhf_nmr.get_jk(mol, dm0)
+def make_h10giao(mol, dm0, with_df=None):
+    vj, vk = rhf_nmr.get_jk(mol, dm0, with_df=with_df)
     h1 = vj[0] + vj[1] - vk
     h1 -= mol.intor_asymmetric('int1e_ignuc', 3)
     if mol.has_ecp():
@@ -100,7 +102,9 @@ def get_fock(nmrobj, dm0=None, gauge_orig=None):
     if gauge_orig is None: gauge_orig = nmrobj.gauge_orig
 
     log = logger.Logger(nmrobj.stdout, nmrobj.verbose)
-    h1 = make_h10(nmrobj.mol, dm0, gauge_orig, log)
+    # Magnetizability, ESR and GTensor reuse this function without with_df
+    with_df = getattr(nmrobj, 'with_df', None)
+    h1 = make_h10(nmrobj.mol, dm0, gauge_orig, log, with_df)
     if nmrobj.chkfile:
         lib.chkfile.dump(nmrobj.chkfile, 'nmr/h1', h1)
     return h1
@@ -173,7 +177,7 @@ def solve_mo1(nmrobj, mo_energy=None, mo_coeff=None, mo_occ=None,
             vind = gen_vind(nmrobj._scf, mo_coeff, mo_occ)
         mo10, mo_e10 = ucphf.solve(vind, mo_energy, mo_occ, h1, s1,
                                    nmrobj.max_cycle_cphf, nmrobj.conv_tol,
-                                   verbose=log)
+                                   verbose=log, block=not callable(with_cphf))
     else:
         mo10, mo_e10 = _solve_mo1_uncoupled(mo_energy, mo_occ, h1, s1)
 
@@ -191,8 +195,10 @@ def gen_vind(mf, mo_coeff, mo_occ):
     noccb = orbob.shape[1]
     nao, nmo = mo_coeff[0].shape
     def vind(mo1):
-        mo1a = mo1.reshape(3,-1)[:,:nocca*nmo].reshape(3,nmo,nocca)
-        mo1b = mo1.reshape(3,-1)[:,nocca*nmo:].reshape(3,nmo,noccb)
+        mo1 = mo1.reshape(-1,(nocca+noccb)*nmo)
+        nset = len(mo1)
+        mo1a = mo1[:,:nocca*nmo].reshape(nset,nmo,nocca)
+        mo1b = mo1[:,nocca*nmo:].reshape(nset,nmo,noccb)
         dm1a = [reduce(numpy.dot, (mo_coeff[0], x, orboa.T.conj())) for x in mo1a]
         dm1b = [reduce(numpy.dot, (mo_coeff[1], x, orbob.T.conj())) for x in mo1b]
         dm1 = numpy.asarray(([d1-d1.conj().T for d1 in dm1a],
@@ -200,8 +206,8 @@ def gen_vind(mf, mo_coeff, mo_occ):
         v1ao = vresp(dm1)
         v1a = [reduce(numpy.dot, (mo_coeff[0].T.conj(), x, orboa)) for x in v1ao[0]]
         v1b = [reduce(numpy.dot, (mo_coeff[1].T.conj(), x, orbob)) for x in v1ao[1]]
-        v1mo = numpy.hstack((numpy.asarray(v1a).reshape(3,-1),
-                             numpy.asarray(v1b).reshape(3,-1)))
+        v1mo = numpy.hstack((numpy.asarray(v1a).reshape(nset,-1),
+                             numpy.asarray(v1b).reshape(nset,-1)))
         return v1mo.ravel()
     return vind
 
@@ -60,7 +60,7 @@ def polarizability(polobj, with_cphf=True):
     if with_cphf:
         mo1 = cphf.solve(vind, mo_energy, mo_occ, h1, s1,
                          polobj.max_cycle_cphf, polobj.conv_tol,
-                         verbose=log)[0]
+                         verbose=log, block=True)[0]
     else:
         mo1 = rhf_nmr._solve_mo1_uncoupled(mo_energy, mo_occ, h1, s1)[0]
 
@@ -100,7 +100,8 @@ def hyper_polarizability(polobj, with_cphf=True):
     vind = polobj.gen_vind(mf, mo_coeff, mo_occ)
     if with_cphf:
         mo1, e1 = cphf.solve(vind, mo_energy, mo_occ, h1, s1,
-                             polobj.max_cycle_cphf, polobj.conv_tol, verbose=log)
+                             polobj.max_cycle_cphf, polobj.conv_tol,
+                             verbose=log, block=True)
     else:
         mo1, e1 = rhf_nmr._solve_mo1_uncoupled(mo_energy, mo_occ, h1, s1)
     mo1 = lib.einsum('xqi,pq->xpi', mo1, mo_coeff)
@@ -179,9 +180,9 @@ def __FIXME_cphf_with_freq(mf, mo_energy, mo_occ, h1, freq=0,
         v = numpy.stack((v1vo, v1ov), axis=1)
         return v.reshape(nz,-1)
 
-    # FIXME: krylov solver is not accurate enough for many freqs. Using tight
-    # tol and lindep could offer small help. A better linear equation solver
-    # is needed.
+    # All components are solved in one block Krylov subspace. Tight lindep
+    # keeps the subspace from being truncated for the near-singular
+    # equations close to the excitation energies.
     mo1 = lib.krylov(vind, mo1base, tol=tol, max_cycle=max_cycle,
                      hermi=hermi, lindep=1e-18, verbose=log)
     mo1 = mo1.reshape(-1,2,nvir,nocc)
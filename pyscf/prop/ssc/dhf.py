@@ -203,7 +203,7 @@ def solve_mo1(sscobj, mo_energy=None, mo_coeff=None, mo_occ=None,
             vind = gen_vind(sscobj._scf, mo_coeff, mo_occ)
         mo1, mo_e1 = cphf.solve(vind, mo_energy, mo_occ, h1, None,
                                 sscobj.max_cycle_cphf, sscobj.conv_tol,
-                                verbose=log)
+                                verbose=log, block=not callable(with_cphf))
     else:
         e_ai = lib.direct_sum('i-a->ai', mo_energy[mo_occ>0], mo_energy[mo_occ==0])
         mo1 = h1 / e_ai
@@ -163,14 +163,15 @@ def solve_mo1_fc(sscobj, h1):
     vresp = sscobj._scf.gen_response(singlet=False, hermi=1)
     mo_v_o = numpy.asarray(numpy.hstack((orbv,orbo)), order='F')
     def vind(mo1):
-        dm1 = _dm1_mo2ao(mo1.reshape(nset,nvir,nocc), orbv, orbo*2)  # *2 for double occupancy
+        dm1 = _dm1_mo2ao(mo1.reshape(-1,nvir,nocc), orbv, orbo*2)  # *2 for double occupancy
         dm1 = dm1 + dm1.transpose(0,2,1)
         v1 = vresp(dm1)
-        v1 = _ao2mo.nr_e2(v1, mo_v_o, (0,nvir,nvir,nmo)).reshape(nset,nvir,nocc)
+        v1 = _ao2mo.nr_e2(v1, mo_v_o, (0,nvir,nvir,nmo)).reshape(-1,nvir,nocc)
         v1 *= eai
-        return v1.ravel()
+        return v1.reshape(mo1.shape)
 
-    mo1 = lib.krylov(vind, mo1.ravel(), tol=sscobj.conv_tol,
+    # All nuclei are solved together in one block Krylov subspace
+    mo1 = lib.krylov(vind, mo1.reshape(nset,-1), tol=sscobj.conv_tol,
                      max_cycle=sscobj.max_cycle_cphf, verbose=log)
     log.timer('solving FC CPHF eqn', *cput1)
     return mo1.reshape(nset,nvir,nocc)
@@ -286,7 +287,7 @@ def solve_mo1(sscobj, mo_energy=None, mo_coeff=None, mo_occ=None,
             vind = gen_vind(sscobj._scf, mo_coeff, mo_occ)
         mo1, mo_e1 = cphf.solve(vind, mo_energy, mo_occ, h1, None,
                                 sscobj.max_cycle_cphf, sscobj.conv_tol,
-                                verbose=log)
+                                verbose=log, block=not callable(with_cphf))
     else:
         e_ai = lib.direct_sum('i-a->ai', mo_energy[mo_occ>0], mo_energy[mo_occ==0])
         mo1 = h1 * (1 / e_ai)
@@ -27,6 +27,7 @@ import numpy
 from pyscf import lib
 from pyscf import tools
 from pyscf.lib import logger
+from pyscf.ao2mo import _ao2mo
 from pyscf.scf import ucphf
 from pyscf.scf import _response_functions
 from pyscf.dft import numint
@@ -157,9 +158,9 @@ def solve_mo1_fc(sscobj, h1):
         nvars = nvira*nocca + nvirb*noccb
         nset = h1aa.size // eai_aa.size
         def _split_mo1(mo1):
-            mo1 = mo1.reshape(nset,nvars)
-            mo1aa = mo1[:,:nvira*nocca].reshape(nset,nvira,nocca)
-            mo1bb = mo1[:,nvira*nocca:].reshape(nset,nvirb,noccb)
+            mo1 = mo1.reshape(-1,nvars)
+            mo1aa = mo1[:,:nvira*nocca].reshape(-1,nvira,nocca)
+            mo1bb = mo1[:,nvira*nocca:].reshape(-1,nvirb,noccb)
             return mo1aa, mo1ab, mo1ba, mo1bb
 
         mo1_fc = numpy.hstack((mo1_fc[0].reshape(nset,-1),
@@ -176,13 +177,13 @@ def solve_mo1_fc(sscobj, h1):
             v1 = vresp(dm1)
             v1aa = _ao2mo.nr_e2(v1[0], mo_va_oa, (0,nvira,nvira,nvira+nocca))
             v1bb = _ao2mo.nr_e2(v1[1], mo_vb_ob, (0,nvirb,nvirb,nvirb+noccb))
-            v1aa = v1aa.reshape(nset,nvira,nocca)
-            v1bb = v1bb.reshape(nset,nvirb,noccb)
+            v1aa = v1aa.reshape(-1,nvira,nocca)
+            v1bb = v1bb.reshape(-1,nvirb,noccb)
             v1aa *= eai_aa
             v1bb *= eai_bb
-            v1mo = numpy.hstack((v1aa.reshape(nset,-1),
-                                 v1bb.reshape(nset,-1)))
-            return v1mo.ravel()
+            v1mo = numpy.hstack((v1aa.reshape(-1,nvira*nocca),
+                                 v1bb.reshape(-1,nvirb*noccb)))
+            return v1mo.reshape(mo1.shape)
 
     else:
         segs = (nvira*nocca, nvira*noccb, nvirb*nocca, nvirb*noccb)
@@ -190,11 +191,11 @@ def solve_mo1_fc(sscobj, h1):
         nvars = numpy.sum(segs)
         nset = h1aa.size // eai_aa.size
         def _split_mo1(mo1):
-            mo1 = numpy.split(mo1.reshape(nset,nvars), sections, axis=1)
-            mo1aa = mo1[0].reshape(nset,nvira,nocca)
-            mo1ab = mo1[1].reshape(nset,nvira,noccb)
-            mo1ba = mo1[2].reshape(nset,nvirb,nocca)
-            mo1bb = mo1[3].reshape(nset,nvirb,noccb)
+            mo1 = numpy.split(mo1.reshape(-1,nvars), sections, axis=1)
+            mo1aa = mo1[0].reshape(-1,nvira,nocca)
+            mo1ab = mo1[1].reshape(-1,nvira,noccb)
+            mo1ba = mo1[2].reshape(-1,nvirb,nocca)
+            mo1bb = mo1[3].reshape(-1,nvirb,noccb)
             return mo1aa, mo1ab, mo1ba, mo1bb
 
         mo1_fc = numpy.hstack((mo1_fc[0].reshape(nset,-1),
@@ -221,21 +222,22 @@ def solve_mo1_fc(sscobj, h1):
             v1ab = _ao2mo.nr_e2(v1[1], mo_va_ob, (0,nvira,nvira,nvira+noccb))
             v1ba = _ao2mo.nr_e2(v1[2], mo_vb_oa, (0,nvirb,nvirb,nvirb+nocca))
             v1bb = _ao2mo.nr_e2(v1[3], mo_vb_ob, (0,nvirb,nvirb,nvirb+noccb))
-            v1aa = v1aa.reshape(nset,nvira,nocca)
-            v1ab = v1ab.reshape(nset,nvira,noccb)
-            v1ba = v1ba.reshape(nset,nvirb,nocca)
-            v1bb = v1bb.reshape(nset,nvirb,noccb)
+            v1aa = v1aa.reshape(-1,nvira,nocca)
+            v1ab = v1ab.reshape(-1,nvira,noccb)
+            v1ba = v1ba.reshape(-1,nvirb,nocca)
+            v1bb = v1bb.reshape(-1,nvirb,noccb)
             v1aa *= eai_aa
             v1ab *= eai_ab
             v1ba *= eai_ba
             v1bb *= eai_bb
-            v1mo = numpy.hstack((v1aa.reshape(nset,-1),
-                                 v1ab.reshape(nset,-1),
-                                 v1ba.reshape(nset,-1),
-                                 v1bb.reshape(nset,-1)))
-            return v1mo.ravel()
-
-    mo1 = lib.krylov(vind, mo1_fc.ravel(), tol=sscobj.conv_tol,
+            v1mo = numpy.hstack((v1aa.reshape(-1,nvira*nocca),
+                                 v1ab.reshape(-1,nvira*noccb),
+                                 v1ba.reshape(-1,nvirb*nocca),
+                                 v1bb.reshape(-1,nvirb*noccb)))
+            return v1mo.reshape(mo1.shape)
+
+    # All nuclei are solved together in one block Krylov subspace
+    mo1 = lib.krylov(vind, mo1_fc, tol=sscobj.conv_tol,
                      max_cycle=sscobj.max_cycle_cphf, verbose=log)
     log.timer('solving FC CPHF eqn', *cput1)
     mo1_fc = _split_mo1(mo1)
@@ -346,7 +348,7 @@ def solve_mo1(sscobj, mo_energy=None, mo_coeff=None, mo_occ=None,
             vind = gen_vind(sscobj._scf, mo_coeff, mo_occ)
         mo1, mo_e1 = ucphf.solve(vind, mo_energy, mo_occ, (h1a,h1b), None,
                                  sscobj.max_cycle_cphf, sscobj.conv_tol,
-                                 verbose=log)
+                                 verbose=log, block=not callable(with_cphf))
     else:
         eai_aa = lib.direct_sum('i-a->ai', mo_energy[0][mo_occ[0]>0], mo_energy[0][mo_occ[0]==0])
         eai_bb = lib.direct_sum('i-a->ai', mo_energy[1][mo_occ[1]>0], mo_energy[1][mo_occ[1]==0])
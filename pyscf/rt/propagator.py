@@ -0,0 +1,92 @@
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+'''
+Exponential integrators for real-time TDSCF
+
+The orbitals are propagated in the Lowdin orthogonal AO basis with
+    C(t+dt) = exp(-i Omega) C(t)
+where Omega is the 2nd or 4th order Magnus expansion of the time-dependent
+Fock matrix.  The action of the matrix exponential on the occupied orbitals
+is computed with a Chebyshev expansion (matrix-matrix products only) so that
+no diagonalization is needed in the propagation.
+
+Ref: A. Gomez Pueyo, M. A. L. Marques, A. Rubio, A. Castro,
+     J. Chem. Theory Comput. 14, 3040 (2018)
+'''
+
+import numpy as np
+import scipy.special
+
+SQRT3 = np.sqrt(3.)
+
+def gershgorin_bounds(h):
+    '''Lower and upper bounds of the spectrum of a Hermitian matrix'''
+    diag = h.diagonal().real
+    radius = abs(h).sum(axis=1) - abs(diag)
+    return (diag - radius).min(), (diag + radius).max()
+
+def expm_multiply_chebyshev(h, v, tol=1e-12):
+    '''exp(-1j*h) v for Hermitian h with the Chebyshev expansion
+
+        exp(-i r x) = J_0(r) + 2 sum_k (-i)^k J_k(r) T_k(x)
+
+    where x = (h-a)/r is the matrix scaled to the interval [-1,1].
+    '''
+    emin, emax = gershgorin_bounds(h)
+    a = (emax + emin) * .5
+    r = (emax - emin) * .5
+    if r < 1e-14:
+        return np.exp(-1j*a) * v
+
+    # J_k(r) decays super-exponentially when k > r
+    nterms = int(r + 10 * np.log10(r + 10)) + 10
+    jk = scipy.special.jv(np.arange(nterms), r)
+    nterms = max(np.where(abs(jk) > tol)[0][-1] + 1, 2)
+
+    hop = lambda x: (np.dot(h, x) - a * x) / r
+    t0 = v
+    t1 = hop(v)
+    out = jk[0] * t0 + 2 * (-1j) * jk[1] * t1
+    for k in range(2, nterms):
+        t0, t1 = t1, 2 * hop(t1) - t0
+        out += 2 * (-1j)**k * jk[k] * t1
+    return np.exp(-1j*a) * out
+
+def expm_multiply_eig(h, v):
+    '''exp(-1j*h) v for Hermitian h with the full diagonalization'''
+    e, u = np.linalg.eigh(h)
+    return np.dot(u * np.exp(-1j*e), np.dot(u.T.conj(), v))
+
+def magnus_omega(f0, f1, get_field, t, dt, order=4):
+    '''Hermitian Magnus operator Omega (exp(-i Omega) is the propagator from
+    t to t+dt).  The Fock matrices without the external field f0 = F(t) and
+    f1 = F(t+dt) are interpolated linearly;  the field is evaluated at the
+    quadrature points.
+
+    Args:
+        get_field : function(t) => the external field matrix at time t
+    '''
+    if order == 2:
+        # exponential midpoint rule
+        return dt * ((f0 + f1) * .5 + get_field(t + dt*.5))
+    elif order == 4:
+        c1 = .5 - SQRT3 / 6
+        c2 = .5 + SQRT3 / 6
+        fa = f0 + c1 * (f1 - f0) + get_field(t + c1*dt)
+        fb = f0 + c2 * (f1 - f0) + get_field(t + c2*dt)
+        comm = np.dot(fb, fa) - np.dot(fa, fb)
+        return dt * .5 * (fa + fb) - 1j * SQRT3 / 12 * dt**2 * comm
+    else:
+        raise NotImplementedError('Magnus expansion of order %s' % order)
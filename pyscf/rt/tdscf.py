@@ -325,16 +325,30 @@ class RTTDSCF(lib.StreamObject):
 
         self.params["StatusEvery"] = 5000
         self.params["Print"]=0
+
+        # Magnus propagators (Method MAGNUS2 or MAGNUS4)
+        self.params["ExpMethod"] = "CHEBYSHEV"
+        self.params["PCTol"] = 1e-8
+        self.params["PCMaxIter"] = 6
+        self.params["AdaptiveDt"] = 0
+        self.params["dtMin"] = 0.001
+        self.params["dtMax"] = 0.2
+        self.params["Chkfile"] = None
+        self.params["ChkEvery"] = 0
+        self.params["Restart"] = 0
         # Here they should be read from disk.
         if(prm != None):
             for line in prm.splitlines():
                 s = line.split()
                 if len(s) > 1:
-                    if s[0] == "MaxIter" or s[0] == str("ApplyImpulse") or \
-                    s[0] == str("ApplyCw") or s[0] == str("StatusEvery"):
+                    if s[0] in ("MaxIter", "ApplyImpulse", "ApplyCw",
+                                "StatusEvery", "PCMaxIter", "AdaptiveDt",
+                                "ChkEvery", "Restart"):
                         self.params[s[0]] = int(s[1])
-                    elif s[0] == "Model" or s[0] == "Method":
+                    elif s[0] in ("Model", "Method", "ExpMethod"):
                         self.params[s[0]] = s[1].upper()
+                    elif s[0] == "Chkfile":
+                        self.params[s[0]] = s[1]
                     else:
                         self.params[s[0]] = float(s[1])
 
@@ -355,6 +369,18 @@ class RTTDSCF(lib.StreamObject):
         logger.log(self,"ApplyImpulse: %d", self.params["ApplyImpulse"])
         logger.log(self,"ApplyCw: %d", self.params["ApplyCw"])
         logger.log(self,"StatusEvery: %d", self.params["StatusEvery"])
+        if self.params["Method"].startswith("MAGNUS"):
+            logger.log(self,"ExpMethod: " + self.params["ExpMethod"])
+            logger.log(self,"PCTol: %g", self.params["PCTol"])
+            logger.log(self,"PCMaxIter: %d", self.params["PCMaxIter"])
+            logger.log(self,"AdaptiveDt: %d", self.params["AdaptiveDt"])
+            if self.params["AdaptiveDt"]:
+                logger.log(self,"dtMin: %g", self.params["dtMin"])
+                logger.log(self,"dtMax: %g", self.params["dtMax"])
+            if self.params["Chkfile"]:
+                logger.log(self,"Chkfile: " + self.params["Chkfile"])
+                logger.log(self,"ChkEvery: %d", self.params["ChkEvery"])
+                logger.log(self,"Restart: %d", self.params["Restart"])
         logger.log(self,"=============================\n\n")
 
         return
@@ -612,6 +638,9 @@ class RTTDSCF(lib.StreamObject):
             f: file
                 output file with |t, dipole(x,y,z), energy|
         """
+        if self.params["Method"].startswith("MAGNUS"):
+            return self.prop_magnus(fmat, c_am, v_lm, rho, output)
+
         it = 0
         tnow = 0
         rhom12 = rho.copy()
@@ -634,3 +663,162 @@ class RTTDSCF(lib.StreamObject):
             it = it + 1
 
         f.close()
+
+    def field_lao(self, tnow):
+        """
+        Args:
+            tnow: float
+                current time in A.U.
+        Returns:
+            vfield: float or complex
+                external field in Lowdin AO basis
+        """
+        zero = np.zeros_like(self.s)
+        return self.field.applyfield(zero, self.x, tnow)[0]
+
+    def magnusstep(self, c_lo, fmat, fmat_prev, tnow, dt, dt_prev):
+        """
+        Take dt step with the Magnus propagator and predictor-corrector
+        iterations.  The Fock matrix at t+dt is extrapolated from the previous
+        steps, then refined with the Fock matrix of the propagated density.
+        The converged Fock matrix is reused as F(t) of the next step.
+
+        Args:
+            c_lo: complex
+                Occupied orbitals in Lowdin AO basis (scaled by the square
+                root of the MO density)
+            fmat: complex
+                Fock matrix in Lowdin AO basis at tnow, without the field
+            fmat_prev: complex
+                Fock matrix in Lowdin AO basis at tnow-dt_prev, or None
+            tnow: float
+                current time in A.U.
+        Returns:
+            n_c_lo: complex
+                Occupied orbitals in Lowdin AO basis at tnow+dt
+            n_fmat: complex
+                Fock matrix in Lowdin AO basis at tnow+dt
+            n_jmat: complex
+                Coulomb matrix in AO basis
+            n_kmat: complex
+                Exact Exchange in AO basis
+            conv: bool
+                Whether the predictor-corrector iterations converged
+            cycle: int
+                Number of the corrector steps
+        """
+        from pyscf.rt import propagator
+        order = int(self.params["Method"][len("MAGNUS"):])
+        if self.params["ExpMethod"] == "EIG":
+            expm_multiply = propagator.expm_multiply_eig
+        else:
+            expm_multiply = propagator.expm_multiply_chebyshev
+
+        if fmat_prev is None:
+            n_fmat = fmat
+        else:
+            n_fmat = fmat + (fmat - fmat_prev) * (dt / dt_prev)
+        conv = False
+        for cycle in range(self.params["PCMaxIter"]):
+            omega = propagator.magnus_omega(fmat, n_fmat, self.field_lao,
+                                            tnow, dt, order)
+            n_c_lo = expm_multiply(omega, c_lo)
+            f_pred = n_fmat
+            n_fmat, n_jmat, n_kmat = \
+                    self.fockbuild(np.dot(n_c_lo, n_c_lo.T.conj()))
+            err = abs(n_fmat - f_pred).max()
+            logger.debug1(self, "Corrector %d  max|dF| = %g", cycle, err)
+            if err < self.params["PCTol"]:
+                conv = True
+                break
+        return n_c_lo, n_fmat, n_jmat, n_kmat, conv, cycle
+
+    def dump_chk(self, chkfile, c_lo, fmat, fmat_prev, tnow, dt, dt_prev, it):
+        """
+        Save the propagation state in HDF5 chkfile
+        """
+        state = {"c_lo": c_lo, "fmat": fmat, "t": tnow, "dt": dt,
+                 "dt_prev": dt_prev, "it": it}
+        if fmat_prev is not None:
+            state["fmat_prev"] = fmat_prev
+        lib.chkfile.dump(chkfile, "rt", state)
+
+    def prop_magnus(self, fmat, c_am, v_lm, rho, output):
+        """
+        The propagation loop of the Magnus integrators (Method MAGNUS2 or
+        MAGNUS4).  The occupied orbitals are propagated in Lowdin AO basis
+        and the matrix exponential is computed without diagonalization
+        (ExpMethod CHEBYSHEV).  The propagation ends at MaxIter*dt.
+
+        Args:
+            fmat: complex
+                Fock matrix in Lowdin AO basis
+            c_am: complex
+                Transformation Matrix |AO><MO|
+            v_lm: complex
+                Transformation Matrix |LAO><MO|
+            rho: complex
+                MO density matrix.
+            output: str
+                name of the file with result of propagation
+        Saved results:
+            f: file
+                output file with |t, dipole(x,y,z), energy|
+        """
+        dt = self.params["dt"]
+        tend = self.params["MaxIter"] * dt
+        adaptive = self.params["AdaptiveDt"]
+        chkfile = self.params["Chkfile"]
+        chkevery = self.params["ChkEvery"]
+
+        occ = rho.diagonal().real
+        c_lo = (v_lm[:,occ>0] * np.sqrt(occ[occ>0])).astype(complex)
+        fmat_prev = None
+        dt_prev = dt
+        tnow = 0
+        it = 0
+        if self.params["Restart"] and chkfile:
+            state = lib.chkfile.load(chkfile, "rt")
+            c_lo = state["c_lo"]
+            fmat_prev = state.get("fmat_prev")
+            tnow, dt, dt_prev, it = (state["t"], state["dt"],
+                                     state["dt_prev"], state["it"])
+            logger.log(self, "Restart from %s at t = %f", chkfile, tnow)
+        fmat, jmat, kmat = self.fockbuild(np.dot(c_lo, c_lo.T.conj()))
+        eye = np.eye(c_lo.shape[0])
+
+        f = open(output,"a")
+        logger.log(self,"\n\nPropagation Begins")
+        start = time.time()
+        while tnow < tend - dt * 1e-6:
+            dt = min(dt, tend - tnow)
+            n_c_lo, n_fmat, n_jmat, n_kmat, conv, cycle = \
+                    self.magnusstep(c_lo, fmat, fmat_prev, tnow, dt, dt_prev)
+            if not conv:
+                if adaptive and dt * .5 >= self.params["dtMin"]:
+                    dt *= .5
+                    logger.debug(self, "Reduce dt to %g at t = %f", dt, tnow)
+                    continue
+                logger.warn(self, "Predictor-corrector not converged at "
+                            "t = %f", tnow)
+            fmat_prev, dt_prev = fmat, dt
+            c_lo, fmat, jmat, kmat = n_c_lo, n_fmat, n_jmat, n_kmat
+            tnow = tnow + dt
+            dm_lao = np.dot(c_lo, c_lo.T.conj())
+            f.write(self.loginstant(dm_lao, self.x, eye, fmat, jmat, kmat,
+                                    tnow, it)+"\n")
+            if it%self.params["StatusEvery"] ==0:
+                end = time.time()
+                logger.log(self, "%f hr/ps", \
+                (end - start)/(60*60*tnow * FSPERAU * 0.001))
+            it = it + 1
+            if adaptive and cycle <= 1:
+                dt = min(dt * 1.25, self.params["dtMax"])
+            if chkfile and chkevery and it % chkevery == 0:
+                self.dump_chk(chkfile, c_lo, fmat, fmat_prev, tnow, dt,
+                              dt_prev, it)
+        f.close()
+        if chkfile:
+            self.dump_chk(chkfile, c_lo, fmat, fmat_prev, tnow, dt, dt_prev, it)
+        self.c_lo = c_lo
+        return c_lo
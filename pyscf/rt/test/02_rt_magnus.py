@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import numpy as np
+import pyscf
+import pyscf.dft
+from  pyscf import gto
+from pyscf.rt import tdscf
+np.set_printoptions(linewidth=220, suppress = True,precision = 7)
+
+def TestMagnus():
+    """
+    4th order Magnus propagator with Chebyshev exponential, compared to the
+    propagation with the exact exponential.  Restart from chkfile.
+    """
+    prm = '''
+    Model	TDDFT
+    Method	MAGNUS4
+    dt	0.02
+    MaxIter	100
+    FieldAmplitude	0.01
+    FieldFreq	0.9202
+    StatusEvery	10
+    '''
+    geom = """
+    H 0. 0. 0.
+    H 0. 0. 0.9
+    H 2.0 0.  0
+    H 2.0 0.9 0
+    """
+    mol = gto.Mole()
+    mol.atom = geom
+    mol.basis = 'sto-3g'
+    mol.build()
+    ks = pyscf.dft.RKS(mol)
+    ks.xc='PBE,PBE'
+    ks.kernel()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        chkfile = os.path.join(tmpdir, 'rt.chk')
+        tdscf.RTTDSCF(ks, prm+'ExpMethod EIG', os.path.join(tmpdir, 'eig'))
+        ref = np.loadtxt(os.path.join(tmpdir, 'eig'))
+        tdscf.RTTDSCF(ks, prm+'Chkfile '+chkfile, os.path.join(tmpdir, 'cheb'))
+        dat = np.loadtxt(os.path.join(tmpdir, 'cheb'))
+        assert abs(dat - ref).max() < 1e-6
+
+        # Restart from the last step and propagate to t = 3.0.  The trajectory
+        # should be the same as the uninterrupted propagation.
+        prm150 = prm.replace('MaxIter	100', 'MaxIter	150')
+        tdscf.RTTDSCF(ks, prm150+'Chkfile '+chkfile+'\nRestart 1',
+                      os.path.join(tmpdir, 'cheb'))
+        dat = np.loadtxt(os.path.join(tmpdir, 'cheb'))
+        tdscf.RTTDSCF(ks, prm150, os.path.join(tmpdir, 'ref'))
+        ref = np.loadtxt(os.path.join(tmpdir, 'ref'))
+        assert dat.shape == ref.shape == (150, ref.shape[1])
+        assert abs(dat - ref).max() < 1e-8
+    return
+TestMagnus()
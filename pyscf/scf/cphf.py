@@ -27,7 +27,8 @@ from pyscf.lib import logger
 
 
 def solve(fvind, mo_energy, mo_occ, h1, s1=None,
-          max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+          max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+          block=False):
     '''
     Args:
         fvind : function
@@ -36,18 +37,23 @@ def solve(fvind, mo_energy, mo_occ, h1, s1=None,
     Kwargs:
         hermi : boolean
             Whether the matrix defined by fvind is Hermitian or not.
+        block : boolean
+            If h1 holds several perturbations, solve them as independent
+            right-hand sides of one block Krylov subspace.  fvind must
+            accept an arbitrary number of perturbations in this case.
     '''
     if s1 is None:
         return solve_nos1(fvind, mo_energy, mo_occ, h1,
-                          max_cycle, tol, hermi, verbose)
+                          max_cycle, tol, hermi, verbose, block)
     else:
         return solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
-                            max_cycle, tol, hermi, verbose)
+                            max_cycle, tol, hermi, verbose, block)
 kernel = solve
 
 # h1 shape is (:,nvir,nocc)
 def solve_nos1(fvind, mo_energy, mo_occ, h1,
-               max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+               max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+               block=False):
     '''For field independent basis. First order overlap matrix is zero'''
     log = logger.new_logger(verbose=verbose)
     t0 = (time.clock(), time.time())
@@ -56,19 +62,28 @@ def solve_nos1(fvind, mo_energy, mo_occ, h1,
     e_i = mo_energy[mo_occ>0]
     e_ai = 1 / lib.direct_sum('a-i->ai', e_a, e_i)
     mo1base = h1 * -e_ai
+    nvir, nocc = e_ai.shape
+
+    if block and h1.ndim == 3:
+        fshape = (-1,nvir,nocc)
+        mo1base = mo1base.reshape(len(h1), -1)
+    else:
+        fshape = h1.shape
+        mo1base = mo1base.ravel()
 
     def vind_vo(mo1):
-        v = fvind(mo1.reshape(h1.shape)).reshape(h1.shape)
+        v = fvind(mo1.reshape(fshape)).reshape(-1,nvir,nocc)
         v *= e_ai
-        return v.ravel()
-    mo1 = lib.krylov(vind_vo, mo1base.ravel(),
+        return v.reshape(mo1.shape)
+    mo1 = lib.krylov(vind_vo, mo1base,
                      tol=tol, max_cycle=max_cycle, hermi=hermi, verbose=log)
     log.timer('krylov solver in CPHF', *t0)
     return mo1.reshape(h1.shape), None
 
 # h1 shape is (:,nocc+nvir,nocc)
 def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
-                 max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+                 max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+                 block=False):
     '''For field dependent basis. First order overlap matrix is non-zero.
     The first order orbitals are set to
     C^1_{ij} = -1/2 S1
@@ -100,12 +115,19 @@ def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
     mo1base[:,viridx] *= -e_ai
     mo1base[:,occidx] = -s1[:,occidx] * .5
 
+    if block:
+        fshape = (-1,nmo,nocc)
+        b = mo1base.reshape(len(mo1base), -1)
+    else:
+        fshape = h1.shape
+        b = mo1base.ravel()
+
     def vind_vo(mo1):
-        v = fvind(mo1.reshape(h1.shape)).reshape(-1,nmo,nocc)
+        v = fvind(mo1.reshape(fshape)).reshape(-1,nmo,nocc)
         v[:,viridx,:] *= e_ai
         v[:,occidx,:] = 0
-        return v.ravel()
-    mo1 = lib.krylov(vind_vo, mo1base.ravel(),
+        return v.reshape(mo1.shape)
+    mo1 = lib.krylov(vind_vo, b,
                      tol=tol, max_cycle=max_cycle, hermi=hermi, verbose=log)
     mo1 = mo1.reshape(mo1base.shape)
     log.timer('krylov solver in CPHF', *t0)
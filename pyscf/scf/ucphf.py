@@ -27,23 +27,31 @@ from pyscf.lib import logger
 
 
 def solve(fvind, mo_energy, mo_occ, h1, s1=None,
-          max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+          max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+          block=False):
     '''
     Args:
         fvind : function
             Given density matrix, compute (ij|kl)D_{lk}*2 - (ij|kl)D_{jk}
+
+    Kwargs:
+        block : boolean
+            If h1 holds several perturbations, solve them as independent
+            right-hand sides of one block Krylov subspace.  fvind must
+            accept an arbitrary number of perturbations in this case.
     '''
     if s1 is None:
         return solve_nos1(fvind, mo_energy, mo_occ, h1,
-                          max_cycle, tol, hermi, verbose)
+                          max_cycle, tol, hermi, verbose, block)
     else:
         return solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
-                            max_cycle, tol, hermi, verbose)
+                            max_cycle, tol, hermi, verbose, block)
 kernel = solve
 
 # h1 shape is (:,nvir,nocc)
 def solve_nos1(fvind, mo_energy, mo_occ, h1,
-               max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+               max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+               block=False):
     '''For field independent basis. First order overlap matrix is zero'''
     log = logger.new_logger(verbose=verbose)
     t0 = (time.clock(), time.time())
@@ -62,12 +70,20 @@ def solve_nos1(fvind, mo_energy, mo_occ, h1,
     mo1base = numpy.hstack((h1[0].reshape(-1,nvira*nocca),
                             h1[1].reshape(-1,nvirb*noccb)))
     mo1base *= -e_ai
+    ndim = mo1base.shape[1]
+
+    if block:
+        fshape = (-1,ndim)
+        b = mo1base
+    else:
+        fshape = mo1base.shape
+        b = mo1base.ravel()
 
     def vind_vo(mo1):
-        v = fvind(mo1.reshape(mo1base.shape)).reshape(mo1base.shape)
+        v = fvind(mo1.reshape(fshape)).reshape(-1,ndim)
         v *= e_ai
-        return v.ravel()
-    mo1 = lib.krylov(vind_vo, mo1base.ravel(),
+        return v.reshape(mo1.shape)
+    mo1 = lib.krylov(vind_vo, b,
                      tol=tol, max_cycle=max_cycle, hermi=hermi, verbose=log)
     log.timer('krylov solver in CPHF', *t0)
 
@@ -83,7 +99,8 @@ def solve_nos1(fvind, mo_energy, mo_occ, h1,
 
 # h1 shape is (:,nvir+nocc,nocc)
 def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
-                 max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN):
+                 max_cycle=20, tol=1e-9, hermi=False, verbose=logger.WARN,
+                 block=False):
     '''For field dependent basis. First order overlap matrix is non-zero.
     The first order orbitals are set to
     C^1_{ij} = -1/2 S1
@@ -117,17 +134,25 @@ def solve_withs1(fvind, mo_energy, mo_occ, h1, s1,
     eai_a = 1. / eai_a
     eai_b = 1. / eai_b
     mo1base = numpy.hstack((mo1base_a.reshape(nset,-1), mo1base_b.reshape(nset,-1)))
+    ndim = mo1base.shape[1]
+
+    if block:
+        b = mo1base
+    else:
+        b = mo1base.ravel()
 
     def vind_vo(mo1):
-        v = fvind(mo1).reshape(mo1base.shape)
-        v1a = v[:,:nmoa*nocca].reshape(nset,nmoa,nocca)
-        v1b = v[:,nmoa*nocca:].reshape(nset,nmob,noccb)
+        if block:
+            mo1 = mo1.reshape(-1,ndim)
+        v = fvind(mo1).reshape(-1,ndim)
+        v1a = v[:,:nmoa*nocca].reshape(-1,nmoa,nocca)
+        v1b = v[:,nmoa*nocca:].reshape(-1,nmob,noccb)
         v1a[:,viridxa] *= eai_a
         v1b[:,viridxb] *= eai_b
         v1a[:,occidxa] = 0
         v1b[:,occidxb] = 0
-        return v.ravel()
-    mo1 = lib.krylov(vind_vo, mo1base.ravel(),
+        return v.reshape(mo1.shape)
+    mo1 = lib.krylov(vind_vo, b,
                      tol=tol, max_cycle=max_cycle, hermi=hermi, verbose=log)
     log.timer('krylov solver in CPHF', *t0)
 
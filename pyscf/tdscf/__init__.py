@@ -19,6 +19,7 @@ from pyscf.tdscf import rhf
 from pyscf.tdscf import uhf
 from pyscf.tdscf import rks
 from pyscf.tdscf import uks
+from pyscf.tdscf import stda
 from pyscf.tdscf.rhf import TDRHF
 from pyscf.tdscf.rks import TDRKS
 from pyscf.tdscf.uhf import TDUHF
@@ -82,3 +83,17 @@ def dTDA(mf):
         return uks.dTDA(mf)
     else:
         return rks.dTDA(mf)
+
+def sTDA(mf):
+    '''Simplified TDA for RHF/RKS'''
+    if isinstance(mf, scf.uhf.UHF) or mf.mol.spin != 0:
+        raise NotImplementedError('sTDA for open-shell systems')
+    mf = scf.addons.convert_to_rhf(mf)
+    return stda.TDA(mf)
+
+def sTDDFT(mf):
+    '''Simplified TDDFT for RHF/RKS'''
+    if isinstance(mf, scf.uhf.UHF) or mf.mol.spin != 0:
+        raise NotImplementedError('sTDDFT for open-shell systems')
+    mf = scf.addons.convert_to_rhf(mf)
+    return stda.TDDFT(mf)
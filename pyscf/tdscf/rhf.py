@@ -564,6 +564,55 @@ def oscillator_strength(tdobj, e=None, xy=None, gauge='length', order=0):
     return f
 
 
+def _window_davidson(tdobj, vind, x0, hdiag, nstates, log, hermi=True,
+                     square=False):
+    '''Solve the roots closest to the center of tdobj.e_window
+
+    If square is set, the eigenvalues of vind are the squares of the
+    excitation energies.  The roots are searched around center**2 and then
+    selected by the distance of the excitation energies to the center.
+    '''
+    center = (tdobj.e_window[0] + tdobj.e_window[1]) * .5
+    if not hermi:
+        # hdiag of [A B; -B -A] is stored as (diag(A), diag(A))
+        hdiag = hdiag.reshape(2,-1) * numpy.array([[1], [-1]])
+        hdiag = hdiag.ravel()
+    def precond(x, e, x0):
+        diagd = hdiag - (e-tdobj.level_shift)
+        diagd[abs(diagd)<1e-8] = 1e-8
+        return x/diagd
+
+    if not square:
+        return lib.linalg_helper.davidson_interior(
+            vind, x0, precond, center, tol=tdobj.conv_tol, nroots=nstates,
+            lindep=tdobj.lindep, max_space=tdobj.max_space,
+            max_cycle=tdobj.max_cycle, hermi=hermi, verbose=log)
+
+    # The distance |w^2 - center^2| = |w - center| * (w + center) favors the
+    # roots below the center.  Extra roots are solved in the w^2 space to
+    # cover the nstates roots closest to the center in w.
+    nroots = min(nstates * 2, hdiag.size)
+    conv, w2, x1 = lib.linalg_helper.davidson_interior(
+        vind, x0, precond, center**2, tol=tdobj.conv_tol, nroots=nroots,
+        lindep=tdobj.lindep, max_space=tdobj.max_space,
+        max_cycle=tdobj.max_cycle, hermi=hermi, verbose=log)
+    dw = abs(numpy.sqrt(abs(w2)) - center)
+    idx = numpy.sort(numpy.argsort(dw)[:nstates])
+    # All roots within dw_max of the center are found in the w^2 space
+    dw_max = numpy.sqrt(center**2 + abs(w2 - center**2).max()) - center
+    if nroots < hdiag.size and dw[idx].max() > dw_max:
+        log.warn('Roots between %g and %g from the window center may be missing',
+                 dw_max, dw[idx].max())
+    return conv[idx], w2[idx], [x1[i] for i in idx]
+
+def _window_guess_order(tdobj, e_ia):
+    '''Order of the Koopmans excitations for the initial guess'''
+    if tdobj.e_window is None:
+        return numpy.argsort(e_ia)
+    center = (tdobj.e_window[0] + tdobj.e_window[1]) * .5
+    return numpy.argsort(abs(e_ia - center))
+
+
 def as_scanner(td):
     '''Generating a scanner/solver for TDA/TDHF/TDDFT PES.
 
@@ -621,6 +670,11 @@ class TDA(lib.StreamObject):
             Diagonalization convergence tolerance.  Default is 1e-9.
         nstates : int
             Number of TD states to be computed. Default is 3.
+        e_window : (float, float)
+            Energy window (in Hartree) of the target excited states.  If
+            given, the solver computes the nstates roots closest to the
+            center of the window (eg for core excitations) instead of the
+            lowest nstates roots.  Default is None.
 
     Saved results:
 
@@ -641,6 +695,7 @@ class TDA(lib.StreamObject):
     level_shift = getattr(__config__, 'tdscf_rhf_TDA_level_shift', 0)
     max_space = getattr(__config__, 'tdscf_rhf_TDA_max_space', 50)
     max_cycle = getattr(__config__, 'tdscf_rhf_TDA_max_cycle', 100)
+    e_window = getattr(__config__, 'tdscf_rhf_TDA_e_window', None)
 
     def __init__(self, mf):
         self.verbose = mf.verbose
@@ -659,7 +714,7 @@ class TDA(lib.StreamObject):
         self.xy = None
 
         keys = set(('conv_tol', 'nstates', 'singlet', 'lindep', 'level_shift',
-                    'max_space', 'max_cycle'))
+                    'max_space', 'max_cycle', 'e_window'))
         self._keys = set(self.__dict__.keys()).union(keys)
 
     @property
@@ -684,6 +739,8 @@ class TDA(lib.StreamObject):
         else:
             log.info('nstates = %d triplet', self.nstates)
         log.info('wfnsym = %s', self.wfnsym)
+        if self.e_window is not None:
+            log.info('e_window = (%g, %g)', *self.e_window)
         log.info('conv_tol = %g', self.conv_tol)
         log.info('eigh lindep = %g', self.lindep)
         log.info('eigh level_shift = %g', self.level_shift)
@@ -741,9 +798,12 @@ class TDA(lib.StreamObject):
             e_ia[(orbsym[occidx,None] ^ orbsym[viridx]) != wfnsym] = 1e99
 
         nov = e_ia.size
+        if self.e_window is not None:
+            # Extra guess vectors to reach the interior states of all symmetries
+            nstates = nstates * 2
         nroot = min(nstates, nov)
         x0 = numpy.zeros((nroot, nov))
-        idx = numpy.argsort(e_ia.ravel())
+        idx = _window_guess_order(self, e_ia.ravel())
         for i in range(nroot):
             x0[i,idx[i]] = 1  # Koopmans' excitations
         return x0
@@ -771,12 +831,16 @@ class TDA(lib.StreamObject):
             idx = numpy.where(w > POSTIVE_EIG_THRESHOLD**2)[0]
             return w[idx], v[:,idx], idx
 
-        self.converged, self.e, x1 = \
-                lib.davidson1(vind, x0, precond,
-                              tol=self.conv_tol,
-                              nroots=nstates, lindep=self.lindep,
-                              max_space=self.max_space, pick=pickeig,
-                              verbose=log)
+        if self.e_window is None:
+            self.converged, self.e, x1 = \
+                    lib.davidson1(vind, x0, precond,
+                                  tol=self.conv_tol,
+                                  nroots=nstates, lindep=self.lindep,
+                                  max_space=self.max_space, pick=pickeig,
+                                  verbose=log)
+        else:
+            self.converged, self.e, x1 = _window_davidson(
+                    self, vind, x0, hdiag, nstates, log)
 
         nocc = (self._scf.mo_occ>0).sum()
         nmo = self._scf.mo_occ.size
@@ -948,12 +1012,16 @@ class TDHF(TDA):
             return lib.linalg_helper._eigs_cmplx2real(w, v, realidx,
                                                       real_eigenvectors=True)
 
-        self.converged, w, x1 = \
-                lib.davidson_nosym1(vind, x0, precond,
-                                    tol=self.conv_tol,
-                                    nroots=nstates, lindep=self.lindep,
-                                    max_space=self.max_space, pick=pickeig,
-                                    verbose=log)
+        if self.e_window is None:
+            self.converged, w, x1 = \
+                    lib.davidson_nosym1(vind, x0, precond,
+                                        tol=self.conv_tol,
+                                        nroots=nstates, lindep=self.lindep,
+                                        max_space=self.max_space, pick=pickeig,
+                                        verbose=log)
+        else:
+            self.converged, w, x1 = _window_davidson(
+                    self, vind, x0, hdiag, nstates, log, hermi=False)
 
         nocc = (self._scf.mo_occ>0).sum()
         nmo = self._scf.mo_occ.size
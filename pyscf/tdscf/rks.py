@@ -127,12 +127,16 @@ class TDDFTNoHybrid(TDA):
             idx = numpy.where(w > POSTIVE_EIG_THRESHOLD**2)[0]
             return w[idx], v[:,idx], idx
 
-        self.converged, w2, x1 = \
-                lib.davidson1(vind, x0, precond,
-                              tol=self.conv_tol,
-                              nroots=nstates, lindep=self.lindep,
-                              max_space=self.max_space, pick=pickeig,
-                              verbose=log)
+        if self.e_window is None:
+            self.converged, w2, x1 = \
+                    lib.davidson1(vind, x0, precond,
+                                  tol=self.conv_tol,
+                                  nroots=nstates, lindep=self.lindep,
+                                  max_space=self.max_space, pick=pickeig,
+                                  verbose=log)
+        else:
+            self.converged, w2, x1 = rhf._window_davidson(
+                    self, vind, x0, hdiag, nstates, log, square=True)
 
         mo_energy = self._scf.mo_energy
         mo_occ = self._scf.mo_occ
@@ -0,0 +1,610 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Simplified TDA (sTDA) and simplified TDDFT (sTDDFT)
+
+The two-electron integrals of the response matrices are approximated by
+monopole transition charges on the Lowdin orthogonalized AOs, interacting
+through the Mataga-Nishimoto-Ohno-Klopman damped Coulomb operators.  The
+excitation space is truncated to the configurations below an energy
+threshold plus the configurations selected by perturbation theory.
+
+Ref:
+S. Grimme, J. Chem. Phys. 138, 244104 (2013)
+C. Bannwarth, S. Grimme, Comput. Theor. Chem. 1040, 45 (2014)
+'''
+
+import time
+from functools import reduce
+import numpy
+import scipy.linalg
+from pyscf import lib
+from pyscf import gto
+from pyscf.lib import logger
+from pyscf.tdscf import rhf
+from pyscf.data import nist
+from pyscf.data import elements
+from pyscf import __config__
+
+E_MAX = getattr(__config__, 'tdscf_stda_e_max', 7./nist.HARTREE2EV)
+PT_THRESH = getattr(__config__, 'tdscf_stda_pt_thresh', 1e-4)
+# Parameters of the damped Coulomb interactions.  The exponents are
+# alpha = ALPHA1 + ALPHA2*ax for (ia|jb) and beta = BETA1 + BETA2*ax for (ij|ab)
+ALPHA1 = getattr(__config__, 'tdscf_stda_alpha1', 1.42)
+ALPHA2 = getattr(__config__, 'tdscf_stda_alpha2', 0.48)
+BETA1 = getattr(__config__, 'tdscf_stda_beta1', 0.20)
+BETA2 = getattr(__config__, 'tdscf_stda_beta2', 1.83)
+
+# Chemical hardness (in eV) of H - Kr
+# Ref: D. C. Ghosh, N. Islam, Int. J. Quantum Chem. 110, 1206 (2010)
+HARDNESS = (
+    6.4299544, 12.5449630,
+    2.3746410, 3.4968000, 4.6190760, 5.7410880, 6.8633640, 7.9854200,
+    9.1074760, 10.2298120,
+    2.4441000, 3.0146000, 3.5849000, 4.1551000, 4.7258000, 5.2960000,
+    5.8662000, 6.4366000,
+    2.3273060, 2.7587000,
+    2.8582000, 2.9578000, 3.0573000, 3.1567000, 3.2564000, 3.3559000,
+    3.4556000, 3.5550000, 3.6544000, 3.7542000,
+    3.9864000, 4.2186000, 4.4508000, 4.6830000, 4.9152000, 5.1474000,
+)
+
+
+def get_ax(mf):
+    '''Fraction of the Fock exchange of the ground state functional'''
+    if getattr(mf, 'xc', None) and getattr(mf, '_numint', None):
+        omega, alpha, hyb = mf._numint.rsh_and_hybrid_coeff(mf.xc, mf.mol.spin)
+        if omega != 0:
+            logger.warn(mf, 'sTDA for range-separated functional %s. '
+                        'The long-range exchange is ignored.', mf.xc)
+        return hyb
+    return 1.
+
+def get_gamma(mol, ax, hardness=None):
+    '''Damped Coulomb interactions (gamma_J, gamma_K) between atoms.
+    gamma_J is used in the integrals (ij|ab) and gamma_K in (ia|jb).
+
+    Kwargs:
+        hardness : dict
+            Chemical hardness (in eV) for elements.  It overrides the default
+            values of HARDNESS.
+    '''
+    eta = numpy.empty(mol.natm)
+    for ia in range(mol.natm):
+        symb = mol.atom_pure_symbol(ia)
+        if hardness and symb in hardness:
+            eta[ia] = hardness[symb]
+        else:
+            z = elements.charge(symb)
+            if z > len(HARDNESS):
+                raise NotImplementedError('sTDA chemical hardness of %s' % symb)
+            eta[ia] = HARDNESS[z-1]
+    eta = (eta[:,None] + eta) * .5 / nist.HARTREE2EV
+
+    coords = mol.atom_coords()
+    r = numpy.linalg.norm(coords[:,None,:] - coords, axis=2)
+    alpha = ALPHA1 + ALPHA2 * ax
+    beta = BETA1 + BETA2 * ax
+    gamma_k = (r**alpha + eta**-alpha) ** (-1./alpha)
+    if ax > 1e-10:
+        gamma_j = (r**beta + (ax*eta)**-beta) ** (-1./beta)
+    else:
+        gamma_j = numpy.zeros_like(r)
+    return gamma_j, gamma_k
+
+def get_transition_charges(mol, orbo, orbv, s=None):
+    r'''Lowdin transition charges q[A,p,q] = \sum_{\mu \in A} C'_{\mu p} C'_{\mu q}
+    with C' = S^{1/2} C for the oo, ov and vv orbital pairs.
+    '''
+    if s is None:
+        s = mol.intor_symmetric('int1e_ovlp')
+    e, u = scipy.linalg.eigh(s)
+    s_half = numpy.dot(u*numpy.sqrt(e), u.T)
+    orbo = numpy.dot(s_half, orbo)
+    orbv = numpy.dot(s_half, orbv)
+    nocc = orbo.shape[1]
+    nvir = orbv.shape[1]
+    q_oo = numpy.empty((mol.natm,nocc,nocc))
+    q_ov = numpy.empty((mol.natm,nocc,nvir))
+    q_vv = numpy.empty((mol.natm,nvir,nvir))
+    for ia, (b0, b1, p0, p1) in enumerate(gto.aoslice_by_atom(mol)):
+        q_oo[ia] = numpy.dot(orbo[p0:p1].T, orbo[p0:p1])
+        q_ov[ia] = numpy.dot(orbo[p0:p1].T, orbv[p0:p1])
+        q_vv[ia] = numpy.dot(orbv[p0:p1].T, orbv[p0:p1])
+    return q_oo, q_ov, q_vv
+
+def get_ab(mf, mo_energy=None, mo_coeff=None, mo_occ=None, singlet=True,
+           ax=None, hardness=None):
+    r'''sTDA/sTDDFT A and B matrices in the full excitation space.  The layout
+    is the same to :func:`rhf.get_ab`
+
+    A[i,a,j,b] = \delta_{ab}\delta_{ij}(E_a - E_i) + 2(ia|jb)' - (ij|ab)'
+    B[i,a,j,b] = 2(ia|jb)' - a_x (ib|ja)'
+    '''
+    if mo_energy is None: mo_energy = mf.mo_energy
+    if mo_coeff is None: mo_coeff = mf.mo_coeff
+    if mo_occ is None: mo_occ = mf.mo_occ
+    if ax is None: ax = get_ax(mf)
+    assert(mo_coeff.dtype == numpy.double)
+
+    mol = mf.mol
+    occidx = numpy.where(mo_occ==2)[0]
+    viridx = numpy.where(mo_occ==0)[0]
+    nocc = len(occidx)
+    nvir = len(viridx)
+    q_oo, q_ov, q_vv = get_transition_charges(mol, mo_coeff[:,occidx],
+                                              mo_coeff[:,viridx],
+                                              mf.get_ovlp())
+    gamma_j, gamma_k = get_gamma(mol, ax, hardness)
+
+    e_ia = lib.direct_sum('a-i->ia', mo_energy[viridx], mo_energy[occidx])
+    a = numpy.diag(e_ia.ravel()).reshape(nocc,nvir,nocc,nvir)
+    a -= lib.einsum('Aij,AB,Bab->iajb', q_oo, gamma_j, q_vv)
+    b = -ax * lib.einsum('Aib,AB,Bja->iajb', q_ov, gamma_k, q_ov)
+    if singlet:
+        k_iajb = lib.einsum('Aia,AB,Bjb->iajb', q_ov, gamma_k, q_ov) * 2
+        a += k_iajb
+        b += k_iajb
+    return a, b
+
+
+class TDA(rhf.TDA):
+    '''Simplified Tamm-Dancoff approximation (sTDA)
+
+    Attributes:
+        e_max : float
+            Energy threshold (in Hartree) of the primary configurations.  The
+            configurations with the diagonal elements of A below e_max are
+            included.  Default is 7 eV.
+        pt_thresh : float
+            Configurations above e_max are included if their second order
+            perturbative contributions to the primary configurations are
+            larger than pt_thresh.  Default is 1e-4.
+        max_dense_size : int
+            If the number of configurations is smaller than max_dense_size,
+            the response matrix is built and diagonalized directly.
+            Otherwise, the Davidson solver is used.  Default is 4000.
+        ax : float
+            Fraction of Fock exchange.  By default, it is taken from the
+            ground state functional.
+        hardness : dict
+            Chemical hardness (in eV) of elements to overwrite the default
+            values.
+
+    Saved results:
+
+        e, xy : same to :class:`rhf.TDA`.  The amplitudes of the
+            configurations out of the sTDA space are zero.
+        csf_mask : 2D bool array
+            The (nocc,nvir) configurations included in the sTDA space.
+
+    Examples:
+
+    >>> mf = dft.RKS(mol).set(xc='b3lyp').run()
+    >>> td = tdscf.sTDA(mf)
+    >>> td.nstates = 500
+    >>> td.e_max = 10/27.2114
+    >>> td.kernel()
+    >>> f = td.oscillator_strength()
+    '''
+
+    e_max = E_MAX
+    pt_thresh = PT_THRESH
+    max_dense_size = getattr(__config__, 'tdscf_stda_TDA_max_dense_size', 4000)
+
+    def __init__(self, mf):
+        rhf.TDA.__init__(self, mf)
+        self.ax = None
+        self.hardness = None
+        self.csf_mask = None
+        self._keys.update(['e_max', 'pt_thresh', 'max_dense_size'])
+
+    def dump_flags(self, verbose=None):
+        rhf.TDA.dump_flags(self, verbose)
+        log = logger.new_logger(self, verbose)
+        if self.ax is None:
+            log.info('sTDA ax = %g', get_ax(self._scf))
+        else:
+            log.info('sTDA ax = %g', self.ax)
+        log.info('sTDA e_max = %g  pt_thresh = %g', self.e_max, self.pt_thresh)
+        return self
+
+    @lib.with_doc(get_ab.__doc__)
+    def get_ab(self, mf=None):
+        if mf is None: mf = self._scf
+        return get_ab(mf, singlet=self.singlet, ax=self.ax,
+                      hardness=self.hardness)
+
+    def gen_vind(self, mf):
+        raise NotImplementedError
+
+    def _setup(self, mf=None):
+        '''Transition charges and the selected configurations'''
+        if mf is None: mf = self._scf
+        log = logger.new_logger(self)
+        ax = self.ax
+        if ax is None:
+            ax = get_ax(mf)
+        mol = mf.mol
+        mo_energy = mf.mo_energy
+        mo_occ = mf.mo_occ
+        occidx = numpy.where(mo_occ==2)[0]
+        viridx = numpy.where(mo_occ==0)[0]
+        nocc = len(occidx)
+        nvir = len(viridx)
+        e_ia = mo_energy[viridx] - mo_energy[occidx,None]
+
+        # Orbital window.  The configurations far above e_max do not
+        # contribute to the low-lying states.
+        e_window = 2 * (1 + .8*ax) * self.e_max
+        window = e_ia < e_window
+        if self.wfnsym is not None and mol.symmetry:
+            window &= _sym_allowed(mf, self.wfnsym, occidx, viridx)
+        oidx = numpy.where(window.any(axis=1))[0]
+        vidx = numpy.where(window.any(axis=0))[0]
+        q_oo, q_ov, q_vv = get_transition_charges(
+            mol, mf.mo_coeff[:,occidx[oidx]], mf.mo_coeff[:,viridx[vidx]],
+            mf.get_ovlp())
+        gamma_j, gamma_k = get_gamma(mol, ax, self.hardness)
+        natm = mol.natm
+        q_ov = q_ov.reshape(natm,-1)
+        qk_ov = numpy.dot(gamma_k, q_ov)
+        qj_vv = numpy.dot(gamma_j, q_vv.reshape(natm,-1)).reshape(q_vv.shape)
+
+        window = window[oidx[:,None],vidx].ravel()
+        u_idx = numpy.where(window)[0]
+        e_u = e_ia[oidx[:,None],vidx].ravel()[u_idx]
+        nvir_w = len(vidx)
+        iu, au = u_idx // nvir_w, u_idx % nvir_w
+
+        # Diagonal elements of A
+        diag = e_u - numpy.einsum('Au,Au->u', q_oo[:,iu,iu], qj_vv[:,au,au])
+        if self.singlet:
+            diag += numpy.einsum('Au,Au->u', q_ov[:,u_idx], qk_ov[:,u_idx]) * 2
+
+        primary = diag < self.e_max
+        if numpy.count_nonzero(primary) < min(self.nstates, diag.size):
+            log.warn('sTDA: less than %d configurations below e_max %g. '
+                     'The lowest %d configurations are used as the primary '
+                     'configurations.', self.nstates, self.e_max, self.nstates)
+            primary[numpy.argsort(diag)[:self.nstates]] = True
+        p_idx = numpy.where(primary)[0]
+        s_idx = numpy.where(~primary)[0]
+        log.debug('sTDA: %d configurations in the orbital window, '
+                  '%d primary configurations', len(u_idx), len(p_idx))
+
+        if len(s_idx) > 0:
+            def get_a(idx1, idx2):
+                return self._get_a_block(u_idx[idx1], u_idx[idx2], nvir_w,
+                                         q_oo, q_ov, qk_ov, qj_vv)
+            e_pt = numpy.zeros(len(s_idx))
+            blksize = max(1, int(self.max_memory*.2e6/8/len(p_idx)))
+            for s0, s1 in lib.prange(0, len(s_idx), blksize):
+                a_sp = get_a(s_idx[s0:s1], p_idx)
+                de = diag[s_idx[s0:s1],None] - diag[p_idx]
+                e_pt[s0:s1] = numpy.einsum('sp,sp->s', a_sp**2, 1./de)
+            secondary = s_idx[e_pt > self.pt_thresh]
+            log.debug('sTDA: %d secondary configurations', len(secondary))
+            c_idx = numpy.sort(numpy.append(p_idx, secondary))
+        else:
+            c_idx = p_idx
+
+        csf_mask = numpy.zeros((nocc,nvir), dtype=bool)
+        csf_mask[oidx[iu[c_idx]],vidx[au[c_idx]]] = True
+        self.csf_mask = csf_mask
+        log.info('sTDA: %d configurations selected out of %d',
+                 len(c_idx), nocc*nvir)
+
+        envs = {'ax': ax, 'oidx': oidx, 'vidx': vidx, 'nvir_w': nvir_w,
+                'c_idx': u_idx[c_idx], 'hdiag': diag[c_idx],
+                'e_ia': e_u[c_idx], 'q_oo': q_oo, 'q_ov': q_ov,
+                'qk_ov': qk_ov, 'qj_vv': qj_vv}
+        return envs
+
+    def _get_a_block(self, u_idx, v_idx, nvir, q_oo, q_ov, qk_ov, qj_vv):
+        '''A[u,v] of the configurations u_idx and v_idx without the orbital
+        energy differences'''
+        iu, au = u_idx // nvir, u_idx % nvir
+        iv, av = v_idx // nvir, v_idx % nvir
+        a = numpy.zeros((len(u_idx), len(v_idx)))
+        if self.singlet:
+            a += lib.ddot(q_ov[:,u_idx].T, qk_ov[:,v_idx], 2)
+        for ia in range(q_oo.shape[0]):
+            a -= q_oo[ia][iu[:,None],iv] * qj_vv[ia][au[:,None],av]
+        return a
+
+    def _get_b_block(self, u_idx, v_idx, nvir, ax, q_ov, qk_ov):
+        '''B[u,v] of the configurations u_idx and v_idx'''
+        iu, au = u_idx // nvir, u_idx % nvir
+        iv, av = v_idx // nvir, v_idx % nvir
+        natm = q_ov.shape[0]
+        q_ov = q_ov.reshape(natm,-1,nvir)
+        qk_ov = qk_ov.reshape(natm,-1,nvir)
+        b = numpy.zeros((len(u_idx), len(v_idx)))
+        if self.singlet:
+            b += lib.ddot(q_ov[:,iu,au].T, qk_ov[:,iv,av], 2)
+        if ax != 0:
+            for ia in range(natm):
+                b -= ax * q_ov[ia][iu[:,None],av] * qk_ov[ia][iv,au[:,None]]
+        return b
+
+    def gen_stda_vind(self, envs):
+        '''Compute Ax in the sTDA configuration space'''
+        c_idx = envs['c_idx']
+        e_ia = envs['e_ia']
+        q_oo = envs['q_oo']
+        q_ov = envs['q_ov']
+        qk_ov = envs['qk_ov']
+        qj_vv = envs['qj_vv']
+        nocc = q_oo.shape[1]
+        nvir = envs['nvir_w']
+        natm = q_oo.shape[0]
+        singlet = self.singlet
+
+        def vind(zs):
+            zs = numpy.asarray(zs).reshape(-1,len(c_idx))
+            nz = zs.shape[0]
+            x = numpy.zeros((nz,nocc*nvir))
+            x[:,c_idx] = zs
+            ax = numpy.zeros((nz,nocc,nvir))
+            if singlet:
+                ax += lib.ddot(lib.ddot(x, q_ov.T), qk_ov, 2).reshape(nz,nocc,nvir)
+            x = x.reshape(nz,nocc,nvir)
+            for ia in range(natm):
+                tmp = lib.einsum('ij,zjb->zib', q_oo[ia], x)
+                ax -= lib.einsum('zib,ab->zia', tmp, qj_vv[ia])
+            ax = ax.reshape(nz,-1)[:,c_idx]
+            ax += zs * e_ia
+            return ax
+        return vind
+
+    def init_guess(self, envs, nstates=None):
+        if nstates is None: nstates = self.nstates
+        hdiag = envs['hdiag']
+        nroot = min(nstates, hdiag.size)
+        x0 = numpy.zeros((nroot, hdiag.size))
+        idx = numpy.argsort(hdiag)
+        for i in range(nroot):
+            x0[i,idx[i]] = 1
+        return x0
+
+    def kernel(self, x0=None, nstates=None):
+        '''sTDA diagonalization solver
+        '''
+        cpu0 = (time.clock(), time.time())
+        self.check_sanity()
+        self.dump_flags()
+        if nstates is None:
+            nstates = self.nstates
+        else:
+            self.nstates = nstates
+
+        log = logger.Logger(self.stdout, self.verbose)
+        envs = self._setup()
+        c_idx = envs['c_idx']
+        ncsf = len(c_idx)
+        nstates = min(nstates, ncsf)
+
+        if ncsf <= self.max_dense_size:
+            a = self._get_a_block(c_idx, c_idx, envs['nvir_w'], envs['q_oo'],
+                                  envs['q_ov'], envs['qk_ov'], envs['qj_vv'])
+            a[numpy.diag_indices(ncsf)] += envs['e_ia']
+            e, x1 = scipy.linalg.eigh(a)
+            e, x1 = e[:nstates], x1[:,:nstates]
+            self.converged = numpy.ones(nstates, dtype=bool)
+            self.e = e
+            x1 = x1.T
+        else:
+            vind = self.gen_stda_vind(envs)
+            precond = self.get_precond(envs['hdiag'])
+            if x0 is None:
+                x0 = self.init_guess(envs, nstates)
+            def pickeig(w, v, nroots, envs):
+                idx = numpy.where(w > rhf.POSTIVE_EIG_THRESHOLD**2)[0]
+                return w[idx], v[:,idx], idx
+            self.converged, self.e, x1 = \
+                    lib.davidson1(vind, x0, precond,
+                                  tol=self.conv_tol,
+                                  nroots=nstates, lindep=self.lindep,
+                                  max_space=max(self.max_space, nstates*4),
+                                  pick=pickeig, verbose=log)
+
+        self.xy = [(self._expand(xi, envs)*numpy.sqrt(.5), 0) for xi in x1]
+
+        if self.chkfile:
+            lib.chkfile.save(self.chkfile, 'tddft/e', self.e)
+            lib.chkfile.save(self.chkfile, 'tddft/xy', self.xy)
+
+        log.timer('sTDA', *cpu0)
+        log.note('Excited State energies (eV)\n%s', self.e * nist.HARTREE2EV)
+        return self.e, self.xy
+
+    def _expand(self, z, envs):
+        '''Amplitudes in the sTDA space -> (nocc,nvir) array'''
+        mo_occ = self._scf.mo_occ
+        nocc = numpy.count_nonzero(mo_occ == 2)
+        nvir = numpy.count_nonzero(mo_occ == 0)
+        oidx = envs['oidx']
+        vidx = envs['vidx']
+        x = numpy.zeros((len(oidx),len(vidx)))
+        x.ravel()[envs['c_idx']] = z
+        out = numpy.zeros((nocc,nvir))
+        out[oidx[:,None],vidx] = x
+        return out
+
+    def nuc_grad_method(self):
+        raise NotImplementedError
+
+sTDA = TDA
+
+
+class TDDFT(TDA):
+    '''Simplified TDDFT (sTDDFT).  The attributes are the same to
+    :class:`TDA`.  The excitation space is selected by the sTDA criteria.
+    '''
+    def gen_stda_vind(self, envs):
+        '''Compute
+
+        [ A  B][X]
+        [-B -A][Y]
+
+        in the sTDA configuration space
+        '''
+        vind_a = TDA.gen_stda_vind(self, envs)
+        c_idx = envs['c_idx']
+        q_ov = envs['q_ov']
+        qk_ov = envs['qk_ov']
+        ax = envs['ax']
+        nvir = envs['nvir_w']
+        natm = q_ov.shape[0]
+        nocc = q_ov.shape[1] // nvir
+        singlet = self.singlet
+
+        def vind_b(zs):
+            nz = zs.shape[0]
+            x = numpy.zeros((nz,nocc*nvir))
+            x[:,c_idx] = zs
+            bx = numpy.zeros((nz,nocc,nvir))
+            if singlet:
+                bx += lib.ddot(lib.ddot(x, q_ov.T), qk_ov, 2).reshape(nz,nocc,nvir)
+            if ax != 0:
+                x = x.reshape(nz,nocc,nvir)
+                q = q_ov.reshape(natm,nocc,nvir)
+                qk = qk_ov.reshape(natm,nocc,nvir)
+                for ia in range(natm):
+                    # (ib|ja) x_jb
+                    tmp = lib.einsum('ib,zjb->zij', q[ia], x)
+                    bx -= ax * lib.einsum('zij,ja->zia', tmp, qk[ia])
+            return bx.reshape(nz,-1)[:,c_idx]
+
+        def vind(xys):
+            xys = numpy.asarray(xys).reshape(-1,2,len(c_idx))
+            xs, ys = xys.transpose(1,0,2)
+            ax_ = vind_a(xs)
+            ay_ = vind_a(ys)
+            bx_ = vind_b(xs)
+            by_ = vind_b(ys)
+            nz = xys.shape[0]
+            return numpy.hstack((ax_ + by_, -(bx_ + ay_))).reshape(nz,-1)
+        return vind
+
+    def get_precond(self, hdiag):
+        return TDA.get_precond(self, numpy.hstack((hdiag, hdiag)))
+
+    def init_guess(self, envs, nstates=None):
+        x0 = TDA.init_guess(self, envs, nstates)
+        y0 = numpy.zeros_like(x0)
+        return numpy.hstack((x0,y0))
+
+    def kernel(self, x0=None, nstates=None):
+        '''sTDDFT diagonalization solver
+        '''
+        cpu0 = (time.clock(), time.time())
+        self.check_sanity()
+        self.dump_flags()
+        if nstates is None:
+            nstates = self.nstates
+        else:
+            self.nstates = nstates
+
+        log = logger.Logger(self.stdout, self.verbose)
+        envs = self._setup()
+        c_idx = envs['c_idx']
+        ncsf = len(c_idx)
+        nstates = min(nstates, ncsf)
+
+        if ncsf <= self.max_dense_size:
+            nvir = envs['nvir_w']
+            a = self._get_a_block(c_idx, c_idx, nvir, envs['q_oo'],
+                                  envs['q_ov'], envs['qk_ov'], envs['qj_vv'])
+            a[numpy.diag_indices(ncsf)] += envs['e_ia']
+            b = self._get_b_block(c_idx, c_idx, nvir, envs['ax'],
+                                  envs['q_ov'], envs['qk_ov'])
+            # (A-B)^{1/2} (A+B) (A-B)^{1/2} Z = w^2 Z
+            e, u = scipy.linalg.eigh(a - b)
+            if e[0] < rhf.POSTIVE_EIG_THRESHOLD:
+                log.warn('sTDDFT A-B matrix is not positive definite. '
+                         'Smallest eigenvalue %g', e[0])
+            e = numpy.sqrt(abs(e))
+            amb_half = numpy.dot(u*e, u.T)
+            amb_mhalf = numpy.dot(u/e, u.T)
+            h = reduce(numpy.dot, (amb_half, a + b, amb_half))
+            w2, z = scipy.linalg.eigh(h)
+            w2, z = w2[:nstates], z[:,:nstates]
+            w = numpy.sqrt(abs(w2))
+            xpy = numpy.dot(amb_half, z) / numpy.sqrt(w)
+            xmy = numpy.dot(amb_mhalf, z) * numpy.sqrt(w)
+            self.converged = numpy.ones(nstates, dtype=bool)
+            self.e = w
+            x1 = numpy.hstack(((xpy + xmy).T * .5, (xpy - xmy).T * .5))
+        else:
+            vind = self.gen_stda_vind(envs)
+            precond = self.get_precond(envs['hdiag'])
+            if x0 is None:
+                x0 = self.init_guess(envs, nstates)
+            def pickeig(w, v, nroots, envs):
+                realidx = numpy.where((abs(w.imag) < rhf.REAL_EIG_THRESHOLD) &
+                                      (w.real > rhf.POSTIVE_EIG_THRESHOLD))[0]
+                return lib.linalg_helper._eigs_cmplx2real(w, v, realidx,
+                                                          real_eigenvectors=True)
+            self.converged, self.e, x1 = \
+                    lib.davidson_nosym1(vind, x0, precond,
+                                        tol=self.conv_tol,
+                                        nroots=nstates, lindep=self.lindep,
+                                        max_space=max(self.max_space, nstates*4),
+                                        pick=pickeig, verbose=log)
+
+        def norm_xy(z):
+            x, y = z.reshape(2,ncsf)
+            norm = lib.norm(x)**2 - lib.norm(y)**2
+            norm = numpy.sqrt(.5/norm)  # normalize to 0.5 for alpha spin
+            return self._expand(x*norm, envs), self._expand(y*norm, envs)
+        self.xy = [norm_xy(z) for z in x1]
+
+        if self.chkfile:
+            lib.chkfile.save(self.chkfile, 'tddft/e', self.e)
+            lib.chkfile.save(self.chkfile, 'tddft/xy', self.xy)
+
+        log.timer('sTDDFT', *cpu0)
+        log.note('Excited State energies (eV)\n%s', self.e * nist.HARTREE2EV)
+        return self.e, self.xy
+
+sTDDFT = TDDFT
+
+
+def _sym_allowed(mf, wfnsym, occidx, viridx):
+    from pyscf import symm
+    from pyscf.scf import hf_symm
+    mol = mf.mol
+    if isinstance(wfnsym, str):
+        wfnsym = symm.irrep_name2id(mol.groupname, wfnsym)
+    wfnsym = wfnsym % 10  # convert to D2h subgroup
+    orbsym = hf_symm.get_orbsym(mol, mf.mo_coeff) % 10
+    return (orbsym[occidx,None] ^ orbsym[viridx]) == wfnsym
+
+
+if __name__ == '__main__':
+    from pyscf import dft
+    mol = gto.M(atom='''
+    O  0.   0.       0.
+    H  0.   -0.757   0.587
+    H  0.   0.757    0.587''', basis='631g*')
+    mf = dft.RKS(mol).set(xc='b3lyp').run()
+    td = TDA(mf)
+    td.nstates = 10
+    td.kernel()
+    print(td.oscillator_strength())
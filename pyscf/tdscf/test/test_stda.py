@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+import numpy
+from pyscf import lib, gto, scf, dft
+from pyscf import tdscf
+from pyscf.tdscf import stda
+
+mol = gto.Mole()
+mol.verbose = 5
+mol.output = '/dev/null'
+mol.atom = '''
+O  0.   0.       0.
+H  0.   -0.757   0.587
+H  0.   0.757    0.587'''
+mol.basis = '631g*'
+mol.build()
+
+mf = dft.RKS(mol).set(xc='b3lyp').run()
+
+def tearDownModule():
+    global mol, mf
+    mol.stdout.close()
+    del mol, mf
+
+class KnownValues(unittest.TestCase):
+    def test_stda_vs_get_ab(self):
+        td = tdscf.sTDA(mf)
+        td.e_max = 10.
+        td.pt_thresh = 0
+        td.nstates = 8
+        e_dense = td.kernel()[0]
+        self.assertEqual(td.csf_mask.sum(), td.csf_mask.size)
+        a, b = td.get_ab()
+        nov = a.shape[0] * a.shape[1]
+        ref = numpy.linalg.eigvalsh(a.reshape(nov,nov))[:8]
+        self.assertAlmostEqual(abs(e_dense - ref).max(), 0, 9)
+
+        td.max_dense_size = 0
+        e_davidson = td.kernel()[0]
+        self.assertAlmostEqual(abs(e_davidson - ref).max(), 0, 7)
+
+        td.singlet = False
+        e = td.kernel()[0]
+        a, b = td.get_ab()
+        ref = numpy.linalg.eigvalsh(a.reshape(nov,nov))[:8]
+        self.assertAlmostEqual(abs(e - ref).max(), 0, 7)
+
+    def test_stddft_vs_get_ab(self):
+        td = tdscf.sTDDFT(mf)
+        td.e_max = 10.
+        td.pt_thresh = 0
+        td.nstates = 6
+        e_dense = td.kernel()[0]
+        f_dense = td.oscillator_strength()
+        a, b = td.get_ab()
+        nov = a.shape[0] * a.shape[1]
+        a = a.reshape(nov,nov)
+        b = b.reshape(nov,nov)
+        w = numpy.linalg.eigvals(numpy.block([[a, b], [-b, -a]])).real
+        ref = numpy.sort(w[w > 0])[:6]
+        self.assertAlmostEqual(abs(e_dense - ref).max(), 0, 9)
+
+        td.max_dense_size = 0
+        e_davidson = td.kernel()[0]
+        self.assertAlmostEqual(abs(e_davidson - ref).max(), 0, 7)
+        self.assertAlmostEqual(abs(td.oscillator_strength() - f_dense).max(), 0, 5)
+
+    def test_csf_selection(self):
+        td = stda.TDA(mf)
+        td.nstates = 5
+        e = td.kernel()[0]
+        self.assertTrue(td.csf_mask.sum() < td.csf_mask.size)
+        self.assertAlmostEqual(lib.finger(e), -0.4754453217288378, 6)
+        f = td.oscillator_strength()
+        self.assertEqual(f.shape, (5,))
+        self.assertAlmostEqual(abs(td.xy[0][0][~td.csf_mask]).max(), 0, 12)
+
+        # sTDA of RHF reference, ax = 1
+        mf_hf = scf.RHF(mol).run()
+        td = tdscf.sTDA(mf_hf)
+        self.assertAlmostEqual(stda.get_ax(mf_hf), 1, 12)
+        e = td.kernel(nstates=3)[0]
+        self.assertTrue(e[0] > 0)
+
+
+if __name__ == "__main__":
+    print("Full Tests for sTDA")
+    unittest.main()
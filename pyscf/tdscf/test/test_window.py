@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# Copyright 2014-2020 The PySCF Developers. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+import numpy
+from pyscf import lib, gto, scf, dft
+from pyscf import tdscf
+
+mol = gto.Mole()
+mol.verbose = 5
+mol.output = '/dev/null'
+mol.atom = '''
+O  0.   0.       0.
+H  0.   -0.757   0.587
+H  0.   0.757    0.587'''
+mol.basis = '631g'
+mol.build()
+
+mf = scf.RHF(mol).run()
+a, b = tdscf.TDHF(mf).get_ab()
+nov = a.shape[0] * a.shape[1]
+a = a.reshape(nov,nov)
+b = b.reshape(nov,nov)
+e_tda = numpy.linalg.eigvalsh(a)
+e_rpa = numpy.linalg.eigvals(numpy.block([[a, b], [-b, -a]])).real
+e_rpa = numpy.sort(e_rpa[e_rpa > 0])
+
+def tearDownModule():
+    global mol, mf
+    mol.stdout.close()
+    del mol, mf
+
+class KnownValues(unittest.TestCase):
+    def test_tda_core_window(self):
+        td = tdscf.rhf.TDA(mf)
+        td.e_window = (19.5, 21.)
+        td.nstates = 4
+        e = td.kernel()[0]
+        self.assertTrue(all(td.converged))
+        ref = e_tda[(e_tda > 19.5) & (e_tda < 21.)]
+        self.assertAlmostEqual(abs(e - ref).max(), 0, 7)
+        self.assertEqual(td.oscillator_strength().shape, (4,))
+
+    def test_tda_valence_window(self):
+        td = tdscf.rhf.TDA(mf)
+        td.e_window = (e_tda[8] - 1e-3, e_tda[10] + 1e-3)
+        td.nstates = 3
+        e = td.kernel()[0]
+        self.assertAlmostEqual(abs(e - e_tda[8:11]).max(), 0, 7)
+
+    def test_tdhf_core_window(self):
+        td = tdscf.rhf.TDHF(mf)
+        td.e_window = (19.5, 21.)
+        td.nstates = 4
+        e = td.kernel()[0]
+        ref = e_rpa[(e_rpa > 19.5) & (e_rpa < 21.)]
+        self.assertAlmostEqual(abs(e - ref).max(), 0, 7)
+
+    def test_tddft_nohybrid_window(self):
+        mfd = dft.RKS(mol).set(xc='lda,vwn').run()
+        a, b = tdscf.TDDFT(mfd).get_ab()
+        a = a.reshape(nov,nov)
+        b = b.reshape(nov,nov)
+        ref = numpy.sqrt(numpy.sort(numpy.linalg.eigvals((a-b).dot(a+b)).real))
+
+        td = tdscf.rks.TDDFTNoHybrid(mfd)
+        td.e_window = (ref[8] - 1e-3, ref[10] + 1e-3)
+        td.nstates = 3
+        e = td.kernel()[0]
+        self.assertTrue(all(td.converged))
+        self.assertAlmostEqual(abs(e - ref[8:11]).max(), 0, 7)
+
+        # ref[5] is closer to the center than ref[4] in the excitation energy
+        # but not in the squared excitation energy
+        td.e_window = (0.55, 0.652)
+        td.nstates = 1
+        e = td.kernel()[0]
+        self.assertAlmostEqual(e[0], ref[5], 7)
+
+    def test_uhf_core_window(self):
+        mfu = scf.UHF(mol).run()
+        td = tdscf.uhf.TDA(mfu)
+        td.e_window = (19.5, 21.)
+        td.nstates = 4
+        e = td.kernel()[0]
+        self.assertTrue(all(td.converged))
+        # two triplets below the singlet states of RHF-TDA
+        ref = e_tda[(e_tda > 19.5) & (e_tda < 20.5)]
+        self.assertAlmostEqual(abs(e[2:] - ref).max(), 0, 5)
+        self.assertAlmostEqual(e[0], 20.18445973, 5)
+        self.assertAlmostEqual(e[1], 20.21079213, 5)
+
+
+if __name__ == "__main__":
+    print("Tests for TDDFT eigensolver with energy window")
+    unittest.main()
@@ -592,6 +592,8 @@ class TDA(rhf.TDA):
                  self.__class__, self._scf.__class__)
         log.info('nstates = %d', self.nstates)
         log.info('wfnsym = %s', self.wfnsym)
+        if self.e_window is not None:
+            log.info('e_window = (%g, %g)', *self.e_window)
         log.info('conv_tol = %g', self.conv_tol)
         log.info('eigh lindep = %g', self.lindep)
         log.info('eigh level_shift = %g', self.level_shift)
@@ -639,9 +641,12 @@ class TDA(rhf.TDA):
 
         e_ia = numpy.hstack((e_ia_a.ravel(), e_ia_b.ravel()))
         nov = e_ia.size
+        if self.e_window is not None:
+            # Extra guess vectors to reach the interior states of all symmetries
+            nstates = nstates * 2
         nroot = min(nstates, nov)
         x0 = numpy.zeros((nroot, nov))
-        idx = numpy.argsort(e_ia)
+        idx = rhf._window_guess_order(self, e_ia)
         for i in range(nroot):
             x0[i,idx[i]] = 1  # lowest excitations
         return x0
@@ -667,12 +672,16 @@ class TDA(rhf.TDA):
             idx = numpy.where(w > POSTIVE_EIG_THRESHOLD)[0]
             return w[idx], v[:,idx], idx
 
-        self.converged, self.e, x1 = \
-                lib.davidson1(vind, x0, precond,
-                              tol=self.conv_tol,
-                              nroots=nstates, lindep=self.lindep,
-                              max_space=self.max_space, pick=pickeig,
-                              verbose=log)
+        if self.e_window is None:
+            self.converged, self.e, x1 = \
+                    lib.davidson1(vind, x0, precond,
+                                  tol=self.conv_tol,
+                                  nroots=nstates, lindep=self.lindep,
+                                  max_space=self.max_space, pick=pickeig,
+                                  verbose=log)
+        else:
+            self.converged, self.e, x1 = rhf._window_davidson(
+                    self, vind, x0, hdiag, nstates, log)
 
         nmo = self._scf.mo_occ[0].size
         nocca = (self._scf.mo_occ[0]>0).sum()
@@ -826,12 +835,16 @@ class TDHF(TDA):
             return lib.linalg_helper._eigs_cmplx2real(w, v, realidx,
                                                       real_eigenvectors=True)
 
-        self.converged, w, x1 = \
-                lib.davidson_nosym1(vind, x0, precond,
-                                    tol=self.conv_tol,
-                                    nroots=nstates, lindep=self.lindep,
-                                    max_space=self.max_space, pick=pickeig,
-                                    verbose=log)
+        if self.e_window is None:
+            self.converged, w, x1 = \
+                    lib.davidson_nosym1(vind, x0, precond,
+                                        tol=self.conv_tol,
+                                        nroots=nstates, lindep=self.lindep,
+                                        max_space=self.max_space, pick=pickeig,
+                                        verbose=log)
+        else:
+            self.converged, w, x1 = rhf._window_davidson(
+                    self, vind, x0, hdiag, nstates, log, hermi=False)
 
         nmo = self._scf.mo_occ[0].size
         nocca = (self._scf.mo_occ[0]>0).sum()
@@ -21,6 +21,7 @@ import numpy
 from pyscf import symm
 from pyscf import lib
 from pyscf import scf
+from pyscf.tdscf import rhf
 from pyscf.tdscf import uhf
 from pyscf.scf import uhf_symm
 from pyscf.scf import _response_functions  # noqa
@@ -144,12 +145,16 @@ class TDDFTNoHybrid(TDA):
             idx = numpy.where(w > POSTIVE_EIG_THRESHOLD**2)[0]
             return w[idx], v[:,idx], idx
 
-        self.converged, w2, x1 = \
-                lib.davidson1(vind, x0, precond,
-                              tol=self.conv_tol,
-                              nroots=nstates, lindep=self.lindep,
-                              max_space=self.max_space, pick=pickeig,
-                              verbose=log)
+        if self.e_window is None:
+            self.converged, w2, x1 = \
+                    lib.davidson1(vind, x0, precond,
+                                  tol=self.conv_tol,
+                                  nroots=nstates, lindep=self.lindep,
+                                  max_space=self.max_space, pick=pickeig,
+                                  verbose=log)
+        else:
+            self.converged, w2, x1 = rhf._window_davidson(
+                    self, vind, x0, hdiag, nstates, log, square=True)
 
         mo_energy = self._scf.mo_energy
         mo_occ = self._scf.mo_occ